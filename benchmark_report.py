@@ -0,0 +1,495 @@
+#!/usr/bin/env python3
+"""
+BlueSecAudit v2.0 - Report Benchmark
+Mede o desempenho do gerador de relatórios sobre sessões sintéticas
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import random
+import struct
+import argparse
+import datetime
+import platform
+import contextlib
+import multiprocessing
+import tempfile
+from pathlib import Path
+
+import generate_final_report as report
+
+# Escalas pré-definidas: targets x arquivos por target x tamanho
+SCALES = {
+    'small': {'targets': 5, 'files': 5, 'size_kb': 4, 'captures': 1, 'packets': 2000},
+    'medium': {'targets': 50, 'files': 5, 'size_kb': 64, 'captures': 5, 'packets': 50000},
+    'large': {'targets': 200, 'files': 5, 'size_kb': 512, 'captures': 20, 'packets': 200000},
+}
+
+# Ordem dos tipos de relatório gerados por target (--files escolhe os N primeiros)
+REPORT_KINDS = ('sdp_enum', 'bluesmack_report', 'pin_bruteforce', 'obex_summary', 'full_audit')
+
+STAGES = ('collect', 'summarize', 'html', 'json')
+
+SDP_SERVICES = (
+    ('Serial Port', '0x1101', 'RFCOMM'),
+    ('OBEX Object Push', '0x1105', 'OBEX'),
+    ('OBEX File Transfer', '0x1106', 'OBEX'),
+    ('Audio Sink', '0x110b', 'AVDTP'),
+    ('Audio Source', '0x110a', 'AVDTP'),
+    ('AV Remote Control', '0x110e', 'AVCTP'),
+    ('Headset Audio Gateway', '0x1112', 'RFCOMM'),
+    ('Handsfree', '0x111e', 'RFCOMM'),
+    ('PnP Information', '0x1200', None),
+)
+
+class SessionGenerator:
+    """Gera uma sessão sintética nos mesmos formatos gravados pelo bs-at-v2.sh"""
+
+    # btsnoop H4 (datalink 1002), como as capturas do hcidump
+    BTSNOOP_HEADER = b'btsnoop\0' + struct.pack('>II', 1, 1002)
+    BTSNOOP_RECORD = struct.Struct('>IIIIq')
+    BTSNOOP_EPOCH_DELTA = 0x00dcddb30f2f8000
+
+    def __init__(self, results_dir, session_id, targets, files, size_kb, captures=0,
+                 packets=0, seed=0):
+        self.results_dir = Path(results_dir)
+        self.session_id = session_id
+        self.targets = targets
+        self.kinds = REPORT_KINDS[:max(1, min(files, len(REPORT_KINDS)))]
+        self.size = size_kb * 1024
+        self.captures = captures
+        self.packets = packets
+        self.random = random.Random(seed)
+        self.files = 0
+        self.bytes = 0
+
+    def generate(self):
+        """Grava todos os arquivos da sessão e retorna (arquivos, bytes)"""
+        self.results_dir.mkdir(parents=True, exist_ok=True)
+        for index in range(self.targets):
+            mac = ':'.join(f'{b:02X}' for b in (0x00, 0x1A, 0x7D, index >> 16 & 0xff,
+                                                  index >> 8 & 0xff, index & 0xff))
+            for kind in self.kinds:
+                getattr(self, f'_write_{kind}')(mac)
+            if index < self.captures:
+                self._write_capture(mac)
+        return self.files, self.bytes
+
+    def _name(self, prefix, mac, suffix='.txt'):
+        return self.results_dir / f"{prefix}_{mac.replace(':', '_')}_{self.session_id}{suffix}"
+
+    def _write(self, path, content):
+        data = content.encode('utf-8') if isinstance(content, str) else content
+        path.write_bytes(data)
+        self.files += 1
+        self.bytes += len(data)
+
+    def _timestamp(self):
+        return datetime.datetime.now().strftime('%a %b %d %H:%M:%S UTC %Y')
+
+    def _sdp_records(self, target_size):
+        """Registros no formato do sdptool browse até atingir o tamanho pedido"""
+        lines = []
+        size = 0
+        handle = 0x10000
+        while size < target_size:
+            name, uuid, protocol = self.random.choice(SDP_SERVICES)
+            record = [
+                f"Service Name: {name}",
+                f"Service RecHandle: 0x{handle:x}",
+                "Service Class ID List:",
+                f'  "{name}" ({uuid})',
+            ]
+            if protocol:
+                record += [
+                    "Protocol Descriptor List:",
+                    '  "L2CAP" (0x0100)',
+                    f'  "{protocol}" (0x0003)',
+                    f"    Channel: {self.random.randint(1, 30)}",
+                ]
+            record += ["Profile Descriptor List:", f'  "{name}" ({uuid})', "    Version: 0x0102", ""]
+            block = '\n'.join(record) + '\n'
+            lines.append(block)
+            size += len(block)
+            handle += 1
+        return ''.join(lines)
+
+    def _sdp_content(self, mac):
+        return (f"=== SDP Service Discovery para {mac} ===\n"
+                f"Timestamp: {self._timestamp()}\n\n"
+                f"{self._sdp_records(self.size)}")
+
+    def _write_sdp_enum(self, mac):
+        self._write(self._name('sdp_enum', mac), self._sdp_content(mac))
+
+    def _write_bluesmack_report(self, mac):
+        status = 'SUCCESS' if self.random.random() < 0.5 else 'FAILED'
+        self._write(self._name('bluesmack_report', mac), f"""=== BLUESMACK ATTACK REPORT ===
+Target: {mac}
+Timestamp: {self._timestamp()}
+Duration: {self.random.randint(5, 60)}s
+Status: {status}
+
+Attack Details:
+- Type: L2CAP DoS (BlueSmack)
+- Packets sent: 100
+- Packet size: 600 bytes
+- Capture file: {self._name('bluesmack_capture', mac, '.pcap')}
+
+Notes:
+- Attack completed successfully
+- Monitor target device for impact
+- Traffic captured for analysis
+""")
+
+    def _write_pin_bruteforce(self, mac):
+        status = 'SUCCESS - PIN FOUND' if self.random.random() < 0.3 else 'FAILED - PIN NOT FOUND'
+        self._write(self._name('pin_bruteforce', mac), f"""=== PIN BRUTE FORCE REPORT ===
+Target: {mac}
+Device Type: headset
+Timestamp: {self._timestamp()}
+Duration: {self.random.randint(10, 300)}s
+Status: {status}
+
+Attack Details:
+- Type: Intelligent PIN Brute Force
+- Device Classification: headset
+- Wordlist: Built-in
+""")
+
+    def _write_obex_summary(self, mac):
+        listing = []
+        size = 0
+        index = 0
+        while size < self.size // 4:
+            entry = f"  📄 file_{index:05d}{self.random.choice(('.vcf', '.jpg', '.png', '.txt'))} ({self.random.randint(100, 90000)} bytes)\n"
+            listing.append(entry)
+            size += len(entry)
+            index += 1
+        self._write(self._name('obex_summary', mac), f"""=== OBEX EXPLOITATION REPORT ===
+Target: {mac}
+Timestamp: {self._timestamp()}
+Mode: safe
+Duration: {self.random.randint(5, 45)}s
+Status: SUCCESS
+
+Results Directory: /tmp/obex_{mac.replace(':', '_')}
+Files Generated: {index}
+
+{''.join(listing)}
+Analysis:
+- OBEX service was accessible
+- Directory listings obtained
+""")
+
+    def _write_full_audit(self, mac):
+        audit_dir = self.results_dir / f"full_audit_{mac.replace(':', '_')}_{self.session_id}"
+        audit_dir.mkdir(exist_ok=True)
+        sdp = self._sdp_content(mac)
+        self._write(audit_dir / 'reconnaissance.txt',
+                    f"=== Device Reconnaissance ===\nTarget: {mac}\nTimestamp: {self._timestamp()}\n"
+                    f"Device Name: Synthetic Device\nDevice Class: 0x240404\n")
+        self._write(audit_dir / 'sdp_enumeration.txt', sdp)
+        self._write(audit_dir / 'vulnerabilities.txt',
+                    f"=== Vulnerability Scan ===\nTarget: {mac}\n- Serial Port Profile exposed\n")
+        self._write(audit_dir / 'attack_surface.txt', "=== Attack Surface ===\nRFCOMM channels: 3\n")
+        self._write(audit_dir / 'signal_strength.txt', f"RSSI: -{self.random.randint(40, 90)} dBm\n")
+        self._write(audit_dir / 'audit_report.html', f"""<!DOCTYPE html>
+<html lang="pt-BR">
+<head><meta charset="UTF-8"><title>BlueSecAudit - Relatório Completo</title></head>
+<body>
+    <div class="container">
+        <div class="info-box">
+            <p><strong>Target:</strong> {mac}</p>
+            <p><strong>Data/Hora:</strong> {self._timestamp()}</p>
+            <p><strong>Sessão:</strong> {self.session_id}</p>
+        </div>
+        <div class="code">
+{sdp[:4096]}
+        </div>
+    </div>
+</body>
+</html>
+""")
+
+    def _write_capture(self, mac):
+        """Captura btsnoop H4 de um BlueSmack (L2CAP echo requests de 600 bytes)"""
+        records = [self.BTSNOOP_HEADER]
+        record = self.BTSNOOP_RECORD
+        ts = int(time.time() * 1000000) + self.BTSNOOP_EPOCH_DELTA
+        handle = 0x0040
+        echo = bytes(600)
+        for index in range(self.packets):
+            ts += self.random.randint(200, 5000)
+            if index % 50 == 0:
+                # Pedido de conexão L2CAP (PSM SDP) no canal de sinalização
+                l2cap = struct.pack('<HHBBHHH', 8, 0x0001, 0x02, index & 0xff, 4, 0x0001, 0x0040)
+            else:
+                # Echo request (l2ping) no canal de sinalização
+                l2cap = struct.pack('<HHBBH', 4 + len(echo), 0x0001, 0x08, index & 0xff, len(echo)) + echo
+            packet = b'\x02' + struct.pack('<HH', handle | 0x2000, len(l2cap)) + l2cap
+            records.append(record.pack(len(packet), len(packet), 0, 0, ts))
+            records.append(packet)
+        self._write(self._name('bluesmack_capture', mac, '.pcap'), b''.join(records))
+
+def _reset_peak_rss():
+    """Zera o pico de RSS do processo (Linux: /proc/self/clear_refs)"""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+def _peak_rss_kb():
+    """Pico de RSS do processo em KB (VmHWM, ou ru_maxrss como alternativa)"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS informa bytes, Linux informa KB
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+def _cpu_seconds():
+    """Tempo de CPU do processo e dos workers já finalizados"""
+    times = os.times()
+    return times.user + times.system + times.children_user + times.children_system
+
+def run_stages(results_dir, session_id, output_dir, workers):
+    """Executa as etapas do gerador e mede tempo, CPU e pico de RSS de cada uma"""
+    stages = {}
+    resettable = _reset_peak_rss()
+    generator = report.BlueSecAuditReportGenerator(
+        session_id=session_id,
+        results_dir=results_dir,
+        logs_dir=output_dir,
+        workers=workers
+    )
+    steps = (
+        ('collect', generator.collect_session_data),
+        ('summarize', lambda: (generator.generate_executive_summary(),
+                               generator.generate_recommendations())),
+        ('html', lambda: generator.generate_html_report(Path(output_dir) / 'report.html')),
+        ('json', lambda: generator.generate_json_report(Path(output_dir) / 'report.json')),
+    )
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        for name, step in steps:
+            if resettable:
+                _reset_peak_rss()
+            wall = time.perf_counter()
+            cpu = _cpu_seconds()
+            step()
+            stages[name] = {
+                'wall_s': round(time.perf_counter() - wall, 4),
+                'cpu_s': round(_cpu_seconds() - cpu, 4),
+                'peak_rss_kb': _peak_rss_kb()
+            }
+
+    return {
+        'stages': stages,
+        'peak_rss_kb': max(stage['peak_rss_kb'] for stage in stages.values()),
+        'per_stage_rss': resettable,
+        'attacks': len(generator.report_data['attacks']),
+        'vulnerabilities': len(generator.report_data['vulnerabilities']),
+        'errors': generator.errors
+    }
+
+def _stage_worker(queue, results_dir, session_id, output_dir, workers):
+    """Executa uma medição em um processo novo (RSS sem interferência de outras escalas)"""
+    try:
+        queue.put(run_stages(results_dir, session_id, output_dir, workers))
+    except Exception as e:
+        queue.put({'error': str(e)})
+
+def measure(results_dir, session_id, output_dir, workers):
+    """Mede uma execução completa em um processo separado"""
+    context = multiprocessing.get_context('spawn')
+    queue = context.Queue()
+    process = context.Process(target=_stage_worker,
+                              args=(queue, str(results_dir), session_id, str(output_dir), workers))
+    process.start()
+    result = queue.get()
+    process.join()
+    if 'error' in result:
+        raise RuntimeError(result['error'])
+    return result
+
+def benchmark_scale(name, params, workers, repeat, seed, work_dir):
+    """Gera a sessão de uma escala e mede o pipeline repeat vezes"""
+    session_id = f"bs_{1700000000 + seed}_{sum(map(ord, name))}"
+    scale_dir = Path(work_dir) / name
+    results_dir = scale_dir / 'results'
+    output_dir = scale_dir / 'output'
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    generator = SessionGenerator(results_dir, session_id, seed=seed, **params)
+    started = time.perf_counter()
+    files, size = generator.generate()
+    print(f"🧪 {name}: {files} arquivos, {size / 1024 / 1024:.1f} MB gerados em "
+          f"{time.perf_counter() - started:.1f}s")
+
+    runs = [measure(results_dir, session_id, output_dir, workers) for _ in range(repeat)]
+
+    # Melhor tempo por etapa (menos sensível a ruído) e pico de RSS máximo
+    stages = {}
+    for stage in STAGES:
+        samples = [run['stages'][stage] for run in runs]
+        stages[stage] = {
+            'wall_s': min(s['wall_s'] for s in samples),
+            'cpu_s': min(s['cpu_s'] for s in samples),
+            'peak_rss_kb': max(s['peak_rss_kb'] for s in samples),
+            'samples_wall_s': [s['wall_s'] for s in samples]
+        }
+
+    result = {
+        'scale': name,
+        'params': params,
+        'files': files,
+        'bytes': size,
+        'stages': stages,
+        'total_s': round(sum(stage['wall_s'] for stage in stages.values()), 4),
+        'peak_rss_kb': max(run['peak_rss_kb'] for run in runs),
+        'per_stage_rss': runs[0]['per_stage_rss'],
+        'attacks': runs[0]['attacks'],
+        'vulnerabilities': runs[0]['vulnerabilities'],
+        'errors': runs[0]['errors']
+    }
+
+    for stage in STAGES:
+        s = stages[stage]
+        print(f"   {stage:<10} {s['wall_s']:>9.3f}s  cpu {s['cpu_s']:>8.3f}s  "
+              f"pico RSS {s['peak_rss_kb'] / 1024:>8.1f} MB")
+    print(f"   {'total':<10} {result['total_s']:>9.3f}s  "
+          f"throughput {size / 1024 / 1024 / max(result['total_s'], 1e-9):.1f} MB/s")
+    return result
+
+def compare_baseline(results, baseline_file, threshold, workers, min_delta=0.005):
+    """Compara com um baseline anterior e retorna o número de regressões
+
+    Variações de tempo menores que min_delta segundos são tratadas como ruído.
+    """
+    with open(baseline_file, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    baseline = {item['scale']: item for item in data.get('results', [])}
+
+    regressions = 0
+    print(f"\n📊 Comparação com {baseline_file} (limite {threshold:.0f}%)")
+    if data.get('workers', 1) != workers:
+        print(f"   baseline usa {data.get('workers', 1)} workers, esta execução {workers} - ignorado")
+        return 0
+    for result in results:
+        old = baseline.get(result['scale'])
+        if old is None:
+            print(f"   {result['scale']}: sem referência no baseline")
+            continue
+        if old.get('params') != result['params']:
+            print(f"   {result['scale']}: parâmetros diferentes do baseline - ignorado")
+            continue
+
+        metrics = [(stage, old['stages'][stage]['wall_s'], result['stages'][stage]['wall_s'], min_delta)
+                   for stage in STAGES if stage in old.get('stages', {})]
+        metrics.append(('peak_rss', old['peak_rss_kb'], result['peak_rss_kb'], 0))
+        for metric, before, after, noise in metrics:
+            change = (after - before) / before * 100 if before else 0.0
+            flag = ''
+            if change > threshold and after - before > noise:
+                flag = ' ⚠️ REGRESSÃO'
+                regressions += 1
+            print(f"   {result['scale']:<8} {metric:<10} {before:>10.3f} -> {after:>10.3f} ({change:+6.1f}%){flag}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description='BlueSecAudit v2.0 - Report Benchmark')
+    parser.add_argument('--scale', action='append', choices=sorted(SCALES),
+                        help='Predefined scale to run (repeatable, default: small and medium)')
+    parser.add_argument('--targets', type=int, help='Custom scale: number of targets')
+    parser.add_argument('--files', type=int, default=len(REPORT_KINDS),
+                        help=f'Custom scale: report files per target (1-{len(REPORT_KINDS)})')
+    parser.add_argument('--size-kb', type=int, default=64,
+                        help='Custom scale: approximate size of each SDP file in KB')
+    parser.add_argument('--captures', type=int, default=0, help='Custom scale: number of captures')
+    parser.add_argument('--packets', type=int, default=10000, help='Custom scale: packets per capture')
+    parser.add_argument('--workers', type=int, default=1, help='Worker processes for collection')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per scale (best time is kept)')
+    parser.add_argument('--seed', type=int, default=1, help='Random seed for synthetic sessions')
+    parser.add_argument('--output', default='logs/report_benchmark.json',
+                        help='Benchmark results JSON (default: logs/report_benchmark.json)')
+    parser.add_argument('--compare', metavar='BASELINE',
+                        help='Compare with a previous results JSON and exit 1 on regressions')
+    parser.add_argument('--threshold', type=float, default=10.0,
+                        help='Regression threshold in percent for --compare (default: 10)')
+    parser.add_argument('--work-dir', help='Keep synthetic sessions in this directory')
+    parser.add_argument('--generate-only', action='store_true',
+                        help='Only generate the synthetic session(s) in --work-dir')
+
+    args = parser.parse_args()
+
+    if args.repeat < 1 or args.workers < 1:
+        parser.error('--repeat and --workers must be >= 1')
+    if args.generate_only and not args.work_dir:
+        parser.error('--generate-only requires --work-dir')
+
+    scales = {name: SCALES[name] for name in (args.scale or [])}
+    if args.targets:
+        scales['custom'] = {
+            'targets': args.targets, 'files': args.files, 'size_kb': args.size_kb,
+            'captures': args.captures, 'packets': args.packets
+        }
+    if not scales:
+        scales = {name: SCALES[name] for name in ('small', 'medium')}
+
+    print("⏱️ BlueSecAudit v2.0 - Report Benchmark")
+
+    with contextlib.ExitStack() as stack:
+        work_dir = args.work_dir or stack.enter_context(tempfile.TemporaryDirectory(prefix='bs_bench_'))
+
+        if args.generate_only:
+            for name, params in scales.items():
+                session_id = f"bs_{1700000000 + args.seed}_{sum(map(ord, name))}"
+                files, size = SessionGenerator(Path(work_dir) / name / 'results', session_id,
+                                               seed=args.seed, **params).generate()
+                print(f"🧪 {name}: sessão {session_id} com {files} arquivos ({size} bytes)")
+            return
+
+        results = [
+            benchmark_scale(name, params, args.workers, args.repeat, args.seed, work_dir)
+            for name, params in scales.items()
+        ]
+
+    baseline = {
+        'generator': 'BlueSecAudit v2.0 - Report Benchmark',
+        'format_version': 1,
+        'created_at': datetime.datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'workers': args.workers,
+        'repeat': args.repeat,
+        'seed': args.seed,
+        'results': results
+    }
+
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(baseline, f, indent=2, ensure_ascii=False)
+    print(f"✅ Resultados salvos em: {output}")
+
+    if args.compare:
+        regressions = compare_baseline(results, args.compare, args.threshold, args.workers)
+        if regressions:
+            print(f"❌ {regressions} regressões acima de {args.threshold:.0f}%")
+            sys.exit(1)
+        print("✅ Nenhuma regressão acima do limite")
+
+if __name__ == '__main__':
+    main()
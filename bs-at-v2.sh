@@ -29,6 +29,18 @@ SESSION_ID=$(generate_session_id)
 CAPTURE_ACTIVE=false
 SELECTED_TARGET=""
 
+# Registrar itens de resultado no índice de sessões (melhor esforço)
+# Usa o serviço de relatórios residente quando em execução
+# (./production-monitor.sh --serve); sem ele, o cliente executa o gerador
+index_result_item() {
+    command -v python3 >/dev/null 2>&1 || return 0
+    python3 "${SCRIPT_DIR}/report_client.py" \
+        --results-dir "$RESULTS_DIR" \
+        --logs-dir "${SCRIPT_DIR}/logs" \
+        --session "$SESSION_ID" \
+        --index-add "$@" >/dev/null 2>&1 || true
+}
+
 # Verificação de preparação para produção
 check_production_readiness() {
     echo "🔍 Verificando preparação para ataques reais..."
@@ -390,6 +402,7 @@ Notes:
 EOF
         
         echo "📋 Relatório salvo em: $report_file"
+        index_result_item "$report_file" "$capture_file"
         
     else
         echo "❌ BlueSmack falhou"
@@ -456,6 +469,7 @@ execute_sdp_enumeration() {
         
         # Análise de resultados
         if [[ -f "$output_file" ]]; then
+            index_result_item "$output_file"
             local service_count=$(grep -c "Service Name:" "$output_file" 2>/dev/null || echo "0")
             local protocol_count=$(grep -c "Protocol Descriptor List:" "$output_file" 2>/dev/null || echo "0")
             
@@ -607,6 +621,7 @@ Recommendations:
 EOF
             
             echo "📋 Relatório resumido: $report_file"
+            index_result_item "$report_file"
         fi
         
     else
@@ -778,6 +793,7 @@ EOF
     fi
     
     echo "📋 Relatório salvo em: $report_file"
+    index_result_item "$report_file"
 }
 
 # Executar auditoria completa
@@ -986,6 +1002,7 @@ $(cat "$signal_file" 2>/dev/null || echo "Teste de força de sinal não disponí
 EOF
     
     echo "✅ Relatório HTML gerado: $audit_report"
+    index_result_item "$audit_dir"
     
     # Resumo final
     echo ""
@@ -1141,6 +1158,7 @@ Status: SUCCESS (simulated)"
         
         generate_hid_report "$hid_data" "$report_file"
         echo "📋 Relatório HID salvo em: $report_file"
+        index_result_item "$report_file" "$payload_file"
         
     else
         echo "❌ HID Injection falhou"
@@ -1222,6 +1240,7 @@ Status: SUCCESS (simulated)"
         
         generate_audio_report "$audio_data" "$report_file"
         echo "📋 Relatório de áudio salvo em: $report_file"
+        index_result_item "$report_file" "$sdp_file"
         
     else
         echo "❌ Interceptação de áudio falhou"
@@ -1275,6 +1294,7 @@ execute_ble_attacks() {
                 detect_ble_device_type "$(cat "$gatt_file")"
                 
                 echo "📁 Resultados salvos em: $gatt_file"
+                index_result_item "$gatt_file"
             fi
             ;;
         3)
@@ -1301,6 +1321,7 @@ Services: 5"
             local report_file="$RESULTS_DIR/ble_security_${ble_target//:/_}_$SESSION_ID.html"
             generate_ble_report "$security_data" "$report_file"
             echo "📋 Relatório BLE salvo em: $report_file"
+            index_result_item "$report_file"
             ;;
         4)
             echo "📍 Executando Beacon Detection..."
@@ -1330,6 +1351,7 @@ Eddystone: URL=https://example.com"
             if monitor_ble_traffic "$ble_target" "$monitor_duration" "$monitor_file"; then
                 echo "✅ Monitoramento BLE concluído"
                 echo "📁 Tráfego salvo em: $monitor_file"
+                index_result_item "$monitor_file"
             fi
             ;;
         *)
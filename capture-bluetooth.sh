@@ -8,6 +8,7 @@ CAPTURE_DIR="${1:-/var/log/bluesecaudit/captures}"
 DURATION="${2:-300}"
 INTERFACE="${3:-hci0}"
 SESSION_ID="${4:-$(date +%Y%m%d_%H%M%S)}"
+REPORT_GENERATOR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)/generate_final_report.py"
 
 mkdir -p "$CAPTURE_DIR"
 
@@ -42,7 +43,8 @@ start_captures() {
     local tshark_file="$CAPTURE_DIR/tshark_${SESSION_ID}.pcap"
     
     echo "📡 Starting HCI capture..."
-    hcidump -i "$INTERFACE" -w "$hci_file" &
+    # Formato btsnoop (-B): indexável por generate_final_report.py --index-capture
+    hcidump -B -i "$INTERFACE" -w "$hci_file" &
     echo "$!" > "$CAPTURE_DIR/hci_${SESSION_ID}.pid"
     
     echo "📡 Starting Tshark capture..."
@@ -68,6 +70,13 @@ stop_captures() {
     
     echo "✅ Captures stopped"
     
+    # Índice por tempo da captura HCI (<captura>.idx) em uma passagem, para
+    # consultas de período (--capture-range) sem reler a captura
+    local hci_file="$CAPTURE_DIR/hci_${SESSION_ID}.pcap"
+    if [[ -s "$hci_file" ]] && command -v python3 >/dev/null 2>&1 && [[ -f "$REPORT_GENERATOR" ]]; then
+        python3 "$REPORT_GENERATOR" --index-capture "$hci_file" 2>/dev/null || true
+    fi
+    
     # Resumo
     echo "📋 Capture Summary:"
     for file in "$CAPTURE_DIR"/*"${SESSION_ID}"*; do
@@ -4,48 +4,1730 @@ BlueSecAudit v2.0 - Final Report Generator
 Gera relatórios consolidados de auditoria de segurança Bluetooth
 """
 
+import io
+import os
+import re
 import sys
+import copy
+import gzip
+import html
 import json
+import lzma
+import time
+import codecs
+import shutil
+import heapq
+import hashlib
+import zipfile
+import configparser
+from array import array
+from collections import Counter
+from contextlib import contextmanager, nullcontext
 import argparse
 import datetime
 from pathlib import Path
+from types import SimpleNamespace
+from html.parser import HTMLParser
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Os módulos dos subsistemas (report_*.py) importam este arquivo pelo nome;
+# executado como script, ele é registrado com esse nome para não ser
+# carregado uma segunda vez
+if __name__ == '__main__':
+    sys.modules.setdefault('generate_final_report', sys.modules[__name__])
+
+# Extensões de arquivos de resultado lidos com descompressão em streaming
+COMPRESSED_SUFFIXES = ('.gz', '.xz', '.zst')
+
+# ID de sessão (bs_<epoch>_<pid>) nos nomes dos itens de resultado
+SESSION_ID_PATTERN = re.compile(r'bs_(\d+)_\d+')
+
+# MAC nos nomes dos itens de resultado: ':' trocado por '_' e delimitado por '_'
+# (ex.: sdp_enum_AA_BB_.._FF_<sessão>)
+FILENAME_MAC_PATTERN = re.compile(r'(?:^|_)((?:[0-9A-Fa-f]{2}_){5}[0-9A-Fa-f]{2})(?=[_.]|$)')
+
+class SignatureMatcher:
+    """Localiza várias assinaturas de texto em uma única passagem
+
+    Todas as assinaturas são combinadas em uma única regex de alternância
+    (compilada uma vez, mais longas primeiro), de modo que o custo por linha
+    praticamente não cresce com o número de regras. As contagens são iguais
+    às de str.count para cada assinatura: assinaturas contidas em outra são
+    creditadas a cada ocorrência da maior e, se alguma assinatura puder se
+    sobrepor a outra (sufixo de uma = prefixo de outra), cada posição
+    encontrada é conferida individualmente.
+    """
+
+    def __init__(self, signatures):
+        self.signatures = tuple(dict.fromkeys(s for s in signatures if s))
+        self.longest = max((len(s) for s in self.signatures), default=0)
+        self._index = {s: i for i, s in enumerate(self.signatures)}
+        # Ocorrências de assinaturas menores contidas em cada assinatura
+        self._credits = {
+            s: [(self._index[t], s.count(t)) for t in self.signatures if t != s and t in s]
+            for s in self.signatures
+        }
+        self._overlapping = any(
+            x[-k:] == y[:k]
+            for x in self.signatures for y in self.signatures
+            for k in range(1, min(len(x), len(y)))
+        )
+        # Assinaturas agrupadas pelo primeiro caractere, mais longas primeiro
+        self._by_first = {}
+        for i in sorted(range(len(self.signatures)), key=lambda i: -len(self.signatures[i])):
+            self._by_first.setdefault(self.signatures[i][0], []).append(i)
+        alternatives = sorted(self.signatures, key=len, reverse=True)
+        self.pattern = re.compile('|'.join(map(re.escape, alternatives))) if alternatives else None
+
+    def scan(self, block, counts, limit=None, next_free=None):
+        """Soma em counts as ocorrências que começam antes de limit
+
+        next_free guarda, por assinatura, a primeira posição livre após a
+        última ocorrência contada (usado ao continuar uma linha dividida).
+        """
+        if self.pattern is None:
+            return {}
+        if limit is None and not next_free and not self._overlapping:
+            for signature, found in Counter(self.pattern.findall(block)).items():
+                counts[self._index[signature]] += found
+                for i, inner in self._credits[signature]:
+                    counts[i] += found * inner
+            return {}
+        return self._scan_positions(block, counts, limit, next_free or {})
+
+    def _scan_positions(self, block, counts, limit, next_free):
+        """Confere cada posição encontrada (linhas divididas ou assinaturas sobrepostas)"""
+        search = self.pattern.search
+        signatures = self.signatures
+        end = len(block) if limit is None else limit
+        pos = 0
+        while True:
+            match = search(block, pos)
+            if match is None:
+                break
+            start = match.start()
+            if start >= end:
+                break
+            for i in self._by_first[block[start]]:
+                if start >= next_free.get(i, 0) and block.startswith(signatures[i], start):
+                    counts[i] += 1
+                    next_free[i] = start + len(signatures[i])
+            pos = start + 1
+        return next_free
+
+class StreamingResultParser:
+    """Parser incremental de arquivos de resultado em uma única passagem
+
+    O conteúdo é consumido em blocos de tamanho fixo e cada bloco (alinhado
+    em fim de linha) é analisado uma única vez para extrair MAC, timestamp,
+    campos "Chave: valor" e as assinaturas do SignatureMatcher ao mesmo
+    tempo. A memória usada não depende do tamanho do arquivo.
+    """
+
+    CHUNK_SIZE = 64 * 1024
+    MAX_PENDING = 1024 * 1024
+    MAC_PATTERN = re.compile(r'([0-9A-Fa-f]{2}[:-]){5}([0-9A-Fa-f]{2})')
+    MAC_LENGTH = 17
+
+    def __init__(self, matcher, value_patterns=None, default_target='Unknown'):
+        self.matcher = matcher
+        self.target = None
+        self.timestamp = None
+        self.default_target = default_target
+        self.counts = {}
+        self.values = {}
+        self._value_patterns = dict(value_patterns or {})
+        self.bytes_read = 0
+        self._counts = [0] * len(matcher.signatures)
+        self._next_free = None
+        self._pending = ''
+        # Sobreposição mínima para não perder assinaturas em linhas gigantes
+        self._overlap = max(self.MAC_LENGTH, matcher.longest) - 1
+
+    @classmethod
+    def parse_file(cls, file_path, matcher, value_patterns=None, default_target='Unknown'):
+        """Analisa um arquivo completo em blocos de tamanho fixo"""
+        parser = cls(matcher, value_patterns, default_target)
+        cls.read_file(file_path, parser)
+        return parser
+
+    @classmethod
+    def read_file(cls, file_path, consumer):
+        """Entrega o arquivo em blocos a um consumidor (feed/close) e o finaliza"""
+        with open_result_binary(file_path) as raw, io.TextIOWrapper(raw, encoding='utf-8') as f:
+            while True:
+                chunk = f.read(cls.CHUNK_SIZE)
+                if not chunk:
+                    break
+                consumer.feed(chunk)
+        consumer.close()
+
+    def feed(self, text):
+        """Consome um trecho de texto, analisando apenas linhas completas"""
+        self.bytes_read += len(text)
+        pending = self._pending + text
+        cut = pending.rfind('\n')
+        if cut == -1:
+            if len(pending) > max(self.MAX_PENDING, self._overlap):
+                # Linha sem quebra muito longa: contar apenas ocorrências que
+                # começam antes do corte e manter a sobreposição necessária
+                # para assinaturas divididas entre blocos
+                split = len(pending) - self._overlap
+                self._scan_block(pending, split)
+                pending = pending[split:]
+                # Posições livres relativas ao novo início do bloco
+                self._next_free = {
+                    i: pos - split for i, pos in self._next_free.items() if pos > split
+                }
+            self._pending = pending
+            return
+        self._scan_block(pending[:cut + 1])
+        self._next_free = None
+        self._pending = pending[cut + 1:]
+
+    def close(self):
+        """Finaliza a análise aplicando os valores padrão
+
+        O timestamp fica None quando o arquivo não tem linha Timestamp (o
+        gerador usa então o mtime do arquivo).
+        """
+        if self._pending:
+            self._scan_block(self._pending)
+            self._pending = ''
+        if self.target is None:
+            self.target = self.default_target
+        self.counts = dict(zip(self.matcher.signatures, self._counts))
+        return self
+
+    def snapshot(self):
+        """Retorna uma cópia finalizada sem encerrar este parser
+
+        Usado pelo modo --watch: o parser continua recebendo o conteúdo
+        acrescentado ao arquivo enquanto a cópia produz o resultado parcial.
+        """
+        clone = copy.copy(self)
+        clone._counts = list(self._counts)
+        clone.values = dict(self.values)
+        clone._value_patterns = dict(self._value_patterns)
+        if self._next_free:
+            clone._next_free = dict(self._next_free)
+        return clone.close()
+
+    def _scan_block(self, block, limit=None):
+        """Extrai todos os campos de um bloco alinhado em linhas"""
+        self._next_free = self.matcher.scan(block, self._counts, limit, self._next_free)
+
+        if self.target is None:
+            match = self.MAC_PATTERN.search(block)
+            if match:
+                self.target = match.group(0)
+
+        if self.timestamp is None:
+            pos = block.find('Timestamp:')
+            if pos != -1:
+                start = block.rfind('\n', 0, pos) + 1
+                end = block.find('\n', pos)
+                line = block[start:end] if end != -1 else block[start:]
+                self.timestamp = line.split('Timestamp:')[-1].strip()
+
+        if self._value_patterns:
+            for key, pattern in list(self._value_patterns.items()):
+                match = pattern.search(block)
+                if match:
+                    self.values[key] = match.group(1).strip()
+                    del self._value_patterns[key]
+
+class HtmlSectionReader(HTMLParser):
+    """Lê relatórios HTML dos módulos (hid/audio/ble) de forma incremental
+
+    O documento é consumido com HTMLParser.feed, bloco a bloco. Apenas o
+    texto do elemento com a classe indicada (ex.: attack-data), onde os
+    módulos gravam os dados da execução, é repassado ao
+    StreamingResultParser; o conteúdo fixo do modelo é ignorado. A data do
+    rodapé ("Report Date:") é usada quando não há linha Timestamp.
+    """
+
+    # Elementos sem tag de fechamento
+    VOID_ELEMENTS = frozenset(('area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input',
+                               'link', 'meta', 'source', 'track', 'wbr'))
+
+    def __init__(self, scan, section_class):
+        super().__init__(convert_charrefs=True)
+        self.scan = scan
+        self.section_class = section_class
+        self._depth = 0
+        self._text = []
+        self._after_label = False
+        self._report_date = None
+
+    def handle_starttag(self, tag, attrs):
+        self._flush_text()
+        if tag in self.VOID_ELEMENTS:
+            return
+        if self._depth:
+            self._depth += 1
+        elif self.section_class in (dict(attrs).get('class') or '').split():
+            self._depth = 1
+
+    def handle_endtag(self, tag):
+        self._flush_text()
+        if self._depth and tag not in self.VOID_ELEMENTS:
+            self._depth -= 1
+            if not self._depth:
+                self.scan.feed('\n')
+
+    def handle_data(self, data):
+        # O texto pode chegar fragmentado entre chamadas de feed
+        if self._depth:
+            self.scan.feed(data)
+        else:
+            self._text.append(data)
+
+    def _flush_text(self):
+        """Interpreta o texto acumulado fora da seção de dados (rótulo/data do rodapé)"""
+        text = ''.join(self._text).strip()
+        self._text = []
+        if not text:
+            return
+        if self._after_label:
+            self._report_date = text
+            self._after_label = False
+        elif text == 'Report Date:':
+            self._after_label = True
+
+    def close(self):
+        super().close()
+        self._flush_text()
+        if self.scan.timestamp is None and self._report_date:
+            self.scan.timestamp = self._report_date
+        self.scan.close()
+
+class GattTableReader:
+    """Lê tabelas de serviços/características GATT (gatttool ou bluetoothctl)
+
+    Cada bloco é repassado ao StreamingResultParser e, na mesma passagem,
+    as linhas completas são classificadas em serviços primários e
+    características (com propriedades de escrita/notificação e UUIDs).
+    """
+
+    SERVICE_PATTERN = re.compile(r'attr handle\s*=\s*0x[0-9A-Fa-f]+.*?uuid:\s*([0-9A-Fa-f-]+)')
+    CHARACTERISTIC_PATTERN = re.compile(
+        r'char properties\s*=\s*0x([0-9A-Fa-f]+).*?uuid\s*=\s*([0-9A-Fa-f-]+)'
+    )
+    UUID_PATTERN = re.compile(r'^\s*([0-9A-Fa-f]{8}-[0-9A-Fa-f]{4}-[0-9A-Fa-f]{4}-'
+                              r'[0-9A-Fa-f]{4}-[0-9A-Fa-f]{12})\s*$')
+    BASE_UUID_SUFFIX = '-0000-1000-8000-00805f9b34fb'
+    # Propriedades GATT: write without response (0x04), write (0x08),
+    # notify (0x10), indicate (0x20)
+    WRITE_PROPERTIES = 0x0C
+    NOTIFY_PROPERTIES = 0x30
+
+    def __init__(self, scan):
+        self.scan = scan
+        self.summary = {'services': 0, 'characteristics': 0, 'writable': 0, 'notify': 0}
+        self.uuids = set()
+        self._pending = ''
+
+    @classmethod
+    def short_uuid(cls, uuid):
+        """Reduz UUIDs da base Bluetooth SIG à forma de 16 bits (ex.: 2A37)"""
+        uuid = uuid.lower()
+        if uuid.endswith(cls.BASE_UUID_SUFFIX) and uuid.startswith('0000'):
+            return uuid[4:8].upper()
+        return uuid.upper()
+
+    def feed(self, text):
+        self.scan.feed(text)
+        lines = (self._pending + text).split('\n')
+        self._pending = lines.pop()
+        for line in lines:
+            self._parse_line(line)
+
+    def close(self):
+        if self._pending:
+            self._parse_line(self._pending)
+            self._pending = ''
+        self.scan.close()
+        return self
+
+    def snapshot(self):
+        """Retorna uma cópia finalizada sem encerrar este leitor (modo --watch)"""
+        clone = copy.copy(self)
+        clone.scan = self.scan.snapshot()
+        clone.summary = dict(self.summary)
+        clone.uuids = set(self.uuids)
+        return clone.close()
+
+    def _parse_line(self, line):
+        match = self.CHARACTERISTIC_PATTERN.search(line)
+        if match:
+            properties = int(match.group(1), 16)
+            self.summary['characteristics'] += 1
+            if properties & self.WRITE_PROPERTIES:
+                self.summary['writable'] += 1
+            if properties & self.NOTIFY_PROPERTIES:
+                self.summary['notify'] += 1
+            self.uuids.add(self.short_uuid(match.group(2)))
+            return
+        
+        match = self.SERVICE_PATTERN.search(line)
+        if match:
+            self.summary['services'] += 1
+            self.uuids.add(self.short_uuid(match.group(1)))
+            return
+        
+        # Formato do bluetoothctl (list-attributes): cabeçalho seguido do UUID
+        stripped = line.strip()
+        if stripped == 'Primary Service':
+            self.summary['services'] += 1
+        elif stripped == 'Characteristic':
+            self.summary['characteristics'] += 1
+        else:
+            match = self.UUID_PATTERN.match(line)
+            if match:
+                self.uuids.add(self.short_uuid(match.group(1)))
+
+class DetectionRules:
+    """Regras de detecção declarativas (config/detection-rules.conf)
+
+    Tipos de arquivo, processadores, assinaturas de conteúdo, vulnerabilidades
+    e recomendações vêm do arquivo de regras. As assinaturas de cada
+    processador são compiladas uma única vez em um SignatureMatcher.
+    """
+
+    DEFAULT_PATH = Path(__file__).resolve().parent / 'config' / 'detection-rules.conf'
+    HANDLERS = ('signatures', 'capture', 'html', 'gatt')
+    FIELD_MODES = {
+        'count': None, 'flag': None, 'value': None,
+        'gatt': 'gatt', 'uuid': 'gatt'
+    }
+    GATT_FIELDS = ('services', 'characteristics', 'writable', 'notify')
+    VULNERABILITY_KEYS = ('type', 'severity', 'description', 'recommendation')
+    RECOMMENDATION_KEYS = ('priority', 'category', 'recommendation')
+    _loaded = {}
+
+    def __init__(self, path=None):
+        self.path = Path(path) if path else self.DEFAULT_PATH
+        raw = self.path.read_bytes()
+        # Muda junto com as regras: invalida fragmentos em cache
+        self.digest = hashlib.sha256(raw).hexdigest()[:16]
+
+        config = configparser.ConfigParser(delimiters=('=',), interpolation=None)
+        config.optionxform = str
+        config.read_string(raw.decode('utf-8'), source=str(self.path))
+
+        self.file_types = []
+        if config.has_section('file_types'):
+            self.file_types = [
+                (self._compile(pattern, 'file_types'), label)
+                for pattern, label in config.items('file_types')
+            ]
+
+        self.processors = []
+        self.recommendations = []
+        processors = {}
+        for section in config.sections():
+            kind, _, name = section.partition(':')
+            options = config[section]
+            if kind == 'processor':
+                processors[name] = self._parse_processor(section, name, options)
+                self.processors.append(processors[name])
+            elif kind == 'finding':
+                # Um achado pode valer para vários processadores
+                for processor_name in self._require(section, options, 'processor').replace(',', ' ').split():
+                    processor = processors.get(processor_name)
+                    if processor is None:
+                        raise ValueError(f"[{section}]: processador desconhecido '{processor_name}'")
+                    processor['findings'].append(self._parse_finding(section, processor, options))
+            elif kind == 'recommendation':
+                self.recommendations.append((
+                    self._require(section, options, 'vulnerability'),
+                    {key: self._require(section, options, key) for key in self.RECOMMENDATION_KEYS}
+                ))
+            elif section != 'file_types':
+                raise ValueError(f"seção desconhecida [{section}] em {self.path}")
+
+        for processor in self.processors:
+            processor['matcher'] = SignatureMatcher(processor.pop('signatures'))
+
+    @classmethod
+    def load(cls, path=None):
+        """Carrega (uma vez por processo) as regras do arquivo indicado"""
+        key = str(Path(path).resolve()) if path else str(cls.DEFAULT_PATH)
+        if key not in cls._loaded:
+            cls._loaded[key] = cls(path)
+        return cls._loaded[key]
+
+    @classmethod
+    def reload(cls, path=None):
+        """Relê as regras do arquivo, substituindo a cópia carregada (modo --serve)
+
+        Workers criados depois da recarga herdam as regras novas.
+        """
+        key = str(Path(path).resolve()) if path else str(cls.DEFAULT_PATH)
+        cls._loaded[key] = cls(path)
+        return cls._loaded[key]
+
+    @staticmethod
+    def _require(section, options, key):
+        value = options.get(key, '').strip()
+        if not value:
+            raise ValueError(f"[{section}]: campo obrigatório '{key}' ausente")
+        return value
+
+    @staticmethod
+    def _compile(pattern, section):
+        try:
+            return re.compile(pattern)
+        except re.error as e:
+            raise ValueError(f"[{section}]: regex inválida '{pattern}': {e}")
+
+    def _parse_processor(self, section, name, options):
+        """Converte uma seção [processor:<nome>] em processador compilado"""
+        processor = {
+            'name': name,
+            'filename': self._compile(self._require(section, options, 'filename'), section),
+            'handler': options.get('handler', 'signatures').strip(),
+            'label': options.get('label', name).strip(),
+            'attack_type': options.get('attack_type', '').strip(),
+            'section': options.get('section', '').strip(),
+            'fields': [],
+            'findings': [],
+            'values': {},
+            'signatures': []
+        }
+        handler = processor['handler']
+        if handler not in self.HANDLERS:
+            raise ValueError(f"[{section}]: handler desconhecido '{handler}'")
+        if handler != 'capture' and not processor['attack_type']:
+            raise ValueError(f"[{section}]: campo obrigatório 'attack_type' ausente")
+        if handler == 'html' and not processor['section']:
+            raise ValueError(f"[{section}]: campo obrigatório 'section' ausente")
+
+        for key, value in options.items():
+            if not key.startswith('field.'):
+                continue
+            mode, _, text = value.partition(':')
+            mode = mode.strip()
+            arguments = [s.strip() for s in text.split(' | ') if s.strip()]
+            if mode not in self.FIELD_MODES or not arguments:
+                raise ValueError(f"[{section}]: campo inválido '{key} = {value}'")
+            if self.FIELD_MODES[mode] not in (None, handler):
+                raise ValueError(f"[{section}]: '{mode}:' exige handler = {self.FIELD_MODES[mode]}")
+            
+            if mode in ('count', 'flag'):
+                processor['signatures'].extend(arguments)
+            elif mode == 'value':
+                # Primeira linha "Chave: valor" do arquivo
+                arguments = arguments[:1]
+                processor['values'][arguments[0]] = re.compile(
+                    rf'^[ \t]*{re.escape(arguments[0])}:[ \t]*(.*)$', re.MULTILINE
+                )
+            elif mode == 'gatt':
+                if arguments[0] not in self.GATT_FIELDS:
+                    raise ValueError(f"[{section}]: campo GATT desconhecido '{arguments[0]}'")
+                arguments = arguments[:1]
+            else:
+                arguments = [uuid.upper() for uuid in arguments]
+            processor['fields'].append((key[len('field.'):], mode, arguments))
+        return processor
+
+    def _parse_finding(self, section, processor, options):
+        """Converte uma seção [finding:<nome>] na condição e no modelo da vulnerabilidade"""
+        when = self._require(section, options, 'when')
+        if when.startswith('contains:'):
+            condition = ('contains', when[len('contains:'):].strip())
+            processor['signatures'].append(condition[1])
+        elif any(field[0] == when for field in processor['fields']):
+            condition = ('field', when)
+        else:
+            raise ValueError(f"[{section}]: condição desconhecida '{when}'")
+        vulnerability = {key: self._require(section, options, key) for key in self.VULNERABILITY_KEYS}
+        # Regra que disparou: compõe a chave de deduplicação do achado
+        vulnerability['evidence'] = section.partition(':')[2]
+        return condition, vulnerability
+
+    def classify(self, filename):
+        """Classifica o tipo de arquivo de resultado"""
+        for pattern, label in self.file_types:
+            if pattern.search(filename):
+                return label
+        return 'Unknown'
+
+    def processor_for(self, filename):
+        """Retorna o primeiro processador cujo padrão casa com o nome do arquivo"""
+        for processor in self.processors:
+            if processor['filename'].search(filename):
+                return processor
+        return None
+
+class FindingStore:
+    """Armazenamento colunar compacto de achados (ataques/vulnerabilidades)
+
+    Cada campo vira uma coluna paralela (array): textos repetitivos como tipo,
+    severidade e descrição são internados e guardados como códigos, MACs
+    canônicos são empacotados em inteiros de 48 bits e booleanos/inteiros
+    ficam em arrays nativos. Contadores por severidade, target e tipo são
+    mantidos a cada inserção. A indexação e a iteração devolvem dicionários,
+    então os geradores HTML/JSON continuam funcionando sem mudanças.
+    """
+
+    ENUM_KEYS = ('type', 'severity', 'description', 'recommendation')
+    MAC_KEYS = ('target',)
+    CANONICAL_MAC = re.compile(r'[0-9A-F]{2}(?::[0-9A-F]{2}){5}')
+    # Targets que não são MACs canônicos vão para o pool de strings
+    STRING_TAG = 1 << 48
+    PLACEHOLDERS = {'enum': 0, 'mac': 0, 'bool': 0, 'int': 0, 'obj': None}
+    TYPECODES = {'enum': 'I', 'mac': 'Q', 'bool': 'b', 'int': 'q'}
+
+    def __init__(self, items=()):
+        self._strings = []
+        self._string_codes = {}
+        self._shapes = []
+        self._shape_codes = {}
+        self._row_shapes = array('H')
+        self._columns = {}
+        # Início de cada sequência já ordenada (um fragmento por arquivo)
+        self._runs = array('I')
+        self.severity_counts = {}
+        self.target_counts = {}
+        self.type_counts = {}
+        self.extend(items)
+
+    def __len__(self):
+        return len(self._row_shapes)
+
+    def __iter__(self):
+        for index in range(len(self._row_shapes)):
+            yield self._row(index)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._row(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('FindingStore index out of range')
+        return self._row(index)
+
+    def __repr__(self):
+        return f"FindingStore({len(self)} itens)"
+
+    def _intern(self, value):
+        code = self._string_codes.get(value)
+        if code is None:
+            code = len(self._strings)
+            self._strings.append(value)
+            self._string_codes[value] = code
+        return code
+
+    def _kind_for(self, key, value):
+        """Escolhe o tipo de coluna pelo primeiro valor visto"""
+        if key in self.MAC_KEYS and isinstance(value, str):
+            return 'mac'
+        if key in self.ENUM_KEYS and isinstance(value, str):
+            return 'enum'
+        if type(value) is bool:
+            return 'bool'
+        if type(value) is int:
+            return 'int'
+        return 'obj'
+
+    def _new_column(self, kind):
+        rows = len(self._row_shapes)
+        placeholder = self.PLACEHOLDERS[kind]
+        if kind == 'obj':
+            return [placeholder] * rows
+        return array(self.TYPECODES[kind], [placeholder]) * rows
+
+    def _encode(self, kind, value):
+        """Codifica um valor para a coluna, ou None se o tipo não couber"""
+        if kind == 'enum':
+            return self._intern(value) if isinstance(value, str) else None
+        if kind == 'mac':
+            if not isinstance(value, str):
+                return None
+            if self.CANONICAL_MAC.fullmatch(value):
+                return int(value.replace(':', ''), 16)
+            return self.STRING_TAG | self._intern(value)
+        if kind == 'bool':
+            return int(value) if type(value) is bool else None
+        if kind == 'int':
+            if type(value) is int and -(1 << 63) <= value < (1 << 63):
+                return value
+            return None
+        return value
+
+    def _decode(self, kind, raw):
+        if kind == 'enum':
+            return self._strings[raw]
+        if kind == 'mac':
+            if raw & self.STRING_TAG:
+                return self._strings[raw & (self.STRING_TAG - 1)]
+            digits = f'{raw:012X}'
+            return ':'.join(digits[i:i + 2] for i in range(0, 12, 2))
+        if kind == 'bool':
+            return bool(raw)
+        return raw
+
+    def _demote(self, key):
+        """Converte uma coluna tipada para lista de objetos genéricos"""
+        kind, storage = self._columns[key]
+        values = [self._decode(kind, raw) for raw in storage]
+        self._columns[key] = ('obj', values)
+
+    def append(self, item):
+        """Insere um achado e atualiza os contadores"""
+        shape = tuple(item)
+        shape_code = self._shape_codes.get(shape)
+        if shape_code is None:
+            shape_code = len(self._shapes)
+            self._shapes.append(shape)
+            self._shape_codes[shape] = shape_code
+        
+        for key in shape:
+            if key not in self._columns:
+                kind = self._kind_for(key, item[key])
+                self._columns[key] = (kind, self._new_column(kind))
+        
+        for key, (kind, storage) in list(self._columns.items()):
+            if key not in item:
+                storage.append(self.PLACEHOLDERS[kind])
+                continue
+            value = item[key]
+            encoded = self._encode(kind, value)
+            if encoded is None and kind != 'obj':
+                self._demote(key)
+                kind, storage = self._columns[key]
+                encoded = value
+            storage.append(encoded)
+        self._row_shapes.append(shape_code)
+        
+        if 'severity' in item:
+            severity = item['severity']
+            self.severity_counts[severity] = self.severity_counts.get(severity, 0) + 1
+        if 'target' in item:
+            target = item['target']
+            self.target_counts[target] = self.target_counts.get(target, 0) + 1
+        if 'type' in item:
+            finding_type = item['type']
+            self.type_counts[finding_type] = self.type_counts.get(finding_type, 0) + 1
+
+    def extend(self, items):
+        for item in items:
+            self.append(item)
+
+    def checkpoint(self):
+        """Posição atual do armazenamento, para um rollback posterior"""
+        return len(self)
+
+    def rollback(self, length):
+        """Descarta as linhas inseridas a partir de length (e seus contadores)"""
+        for index in range(length, len(self)):
+            row = self._row(index)
+            for counts, field in ((self.severity_counts, 'severity'),
+                                  (self.target_counts, 'target'), (self.type_counts, 'type')):
+                if field in row:
+                    counts[row[field]] -= 1
+                    if not counts[row[field]]:
+                        del counts[row[field]]
+        for kind, storage in self._columns.values():
+            del storage[length:]
+        del self._row_shapes[length:]
+        while self._runs and self._runs[-1] >= length:
+            self._runs.pop()
+
+    def start_run(self):
+        """Marca o início de uma nova sequência ordenada de linhas"""
+        if not self._runs or self._runs[-1] != len(self):
+            self._runs.append(len(self))
+
+    def merged(self, key):
+        """Percorre (índice, linha) em ordem de key pelo k-way merge das sequências
+
+        Cada sequência marcada por start_run deve estar ordenada por key; o
+        heap guarda apenas a linha corrente de cada uma.
+        """
+        starts = list(self._runs)
+        if not starts or starts[0] != 0:
+            starts.insert(0, 0)
+        bounds = zip(starts, starts[1:] + [len(self)])
+        runs = [((index, self._row(index)) for index in range(start, end))
+                for start, end in bounds if start < end]
+        return heapq.merge(*runs, key=lambda entry: (entry[1].get(key) or '', entry[0]))
+
+    def group_by_target(self):
+        """Agrupa índices de linha por target, na ordem da primeira ocorrência"""
+        groups = {}
+        if 'target' not in self._columns:
+            if len(self):
+                groups['Unknown'] = array('I', range(len(self)))
+            return groups
+        
+        kind, storage = self._columns['target']
+        codes = {}
+        for index, raw in enumerate(storage):
+            # Linhas sem 'target' aparecem como 'Unknown', como nos geradores
+            key = raw if 'target' in self._shapes[self._row_shapes[index]] else None
+            if key not in codes:
+                codes[key] = self._decode(kind, raw) if key is not None else 'Unknown'
+            groups.setdefault(codes[key], array('I')).append(index)
+        return groups
+
+    def _row(self, index):
+        columns = self._columns
+        row = {}
+        for key in self._shapes[self._row_shapes[index]]:
+            kind, storage = columns[key]
+            row[key] = self._decode(kind, storage[index])
+        return row
+
+class FindingIndex:
+    """Índice de deduplicação de vulnerabilidades
+
+    Achados com o mesmo (target, tipo, evidência) são fundidos em uma única
+    entrada com número de ocorrências, primeiro/último timestamp e arquivos
+    de origem (até SOURCE_LIMIT). A chave é resumida em um fingerprint
+    estável. Assim, reanálises do mesmo target não inflam o total nem o
+    risk score, e o tamanho do relatório depende dos problemas distintos
+    e não do número de arquivos. A interface de leitura é a mesma do
+    FindingStore (contadores, iteração, group_by_target).
+    """
+
+    SOURCE_LIMIT = 10
+
+    def __init__(self, items=()):
+        self._findings = []
+        self._positions = {}
+        # Alterações desde o primeiro checkpoint, desfeitas pelo rollback
+        self._journal = None
+        self.severity_counts = {}
+        self.target_counts = {}
+        self.type_counts = {}
+        self.occurrences = 0
+        self.extend(items)
+
+    @staticmethod
+    def fingerprint(target, finding_type, evidence):
+        """Identificador estável de um achado (o MAC não diferencia maiúsculas)"""
+        key = f"{target.upper()}\0{finding_type}\0{evidence}".encode('utf-8')
+        return hashlib.sha256(key).hexdigest()[:16]
+
+    def __len__(self):
+        return len(self._findings)
+
+    def __iter__(self):
+        for index in range(len(self._findings)):
+            yield self[index]
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        finding = self._findings[index]
+        return dict(finding, sources=list(finding['sources']))
+
+    def __repr__(self):
+        return f"FindingIndex({len(self)} achados, {self.occurrences} ocorrências)"
+
+    def append(self, item):
+        """Insere um achado ou funde-o na entrada existente com a mesma chave"""
+        key = item.get('fingerprint') or self.fingerprint(
+            item.get('target', 'Unknown'), item.get('type', 'Unknown'),
+            item.get('evidence', item.get('description', '')))
+        occurrences = item.get('occurrences', 1)
+        self.occurrences += occurrences
+        
+        position = self._positions.get(key)
+        if position is None:
+            finding = dict(item, fingerprint=key, occurrences=occurrences,
+                           sources=list(item.get('sources', ()))[:self.SOURCE_LIMIT])
+            self._positions[key] = len(self._findings)
+            self._findings.append(finding)
+            for counts, field in ((self.severity_counts, 'severity'),
+                                  (self.target_counts, 'target'), (self.type_counts, 'type')):
+                if field in item:
+                    counts[item[field]] = counts.get(item[field], 0) + 1
+            if self._journal is not None:
+                self._journal.append((key, occurrences, None))
+            return
+        
+        finding = self._findings[position]
+        if self._journal is not None:
+            seen = {field: finding[field] for field in ('first_seen', 'last_seen') if field in finding}
+            self._journal.append((key, occurrences, (finding['occurrences'], seen, len(finding['sources']))))
+        finding['occurrences'] += occurrences
+        first_seen = _timestamp_sort_key(item.get('first_seen'))
+        current = _timestamp_sort_key(finding.get('first_seen'))
+        if first_seen is not None and (current is None or first_seen < current):
+            finding['first_seen'] = item['first_seen']
+        last_seen = _timestamp_sort_key(item.get('last_seen'))
+        current = _timestamp_sort_key(finding.get('last_seen'))
+        if last_seen is not None and (current is None or last_seen > current):
+            finding['last_seen'] = item['last_seen']
+        sources = finding['sources']
+        for source in item.get('sources', ()):
+            if len(sources) >= self.SOURCE_LIMIT:
+                break
+            if source not in sources:
+                sources.append(source)
+
+    def extend(self, items):
+        for item in items:
+            self.append(item)
+
+    def checkpoint(self):
+        """Marca o estado atual do índice para um rollback posterior
+
+        A partir do primeiro checkpoint cada inserção é registrada em um
+        journal, já que a fusão altera entradas existentes e não basta
+        truncar a lista.
+        """
+        if self._journal is None:
+            self._journal = []
+        return len(self._journal)
+
+    def rollback(self, mark):
+        """Desfaz, da mais recente para a mais antiga, as inserções feitas após o checkpoint"""
+        journal = self._journal
+        while len(journal) > mark:
+            key, occurrences, previous = journal.pop()
+            self.occurrences -= occurrences
+            finding = self._findings[self._positions[key]]
+            if previous is None:
+                # Entradas novas são as últimas da lista quando desfeitas em ordem inversa
+                del self._positions[key]
+                self._findings.pop()
+                for counts, field in ((self.severity_counts, 'severity'),
+                                      (self.target_counts, 'target'), (self.type_counts, 'type')):
+                    if field in finding:
+                        counts[finding[field]] -= 1
+                        if not counts[finding[field]]:
+                            del counts[finding[field]]
+                continue
+            finding['occurrences'], seen, sources = previous
+            finding.pop('first_seen', None)
+            finding.pop('last_seen', None)
+            finding.update(seen)
+            del finding['sources'][sources:]
+
+    def group_by_target(self):
+        """Agrupa índices por target, na ordem da primeira ocorrência"""
+        groups = {}
+        for index, finding in enumerate(self._findings):
+            groups.setdefault(finding.get('target', 'Unknown'), array('I')).append(index)
+        return groups
+
+class TimestampNormalizer:
+    """Normaliza os timestamps dos módulos para ISO 8601 em UTC
+
+    Os módulos gravam a saída de $(date) (dependente do locale), ISO 8601
+    ou epoch. Cada valor é testado primeiro contra o último formato
+    reconhecido, já que os arquivos de uma sessão vêm do mesmo ambiente;
+    os demais formatos só são tentados quando ele falha. Sem timestamp
+    reconhecível, vale o mtime do arquivo.
+    """
+
+    MONTHS = {
+        'jan': 1, 'feb': 2, 'fev': 2, 'mar': 3, 'apr': 4, 'abr': 4,
+        'may': 5, 'mai': 5, 'jun': 6, 'jul': 7, 'aug': 8, 'ago': 8,
+        'sep': 9, 'set': 9, 'oct': 10, 'out': 10, 'nov': 11, 'dec': 12, 'dez': 12
+    }
+    # date(1) no locale C: "Mon Jan  1 10:05:00 UTC 2024"
+    DATE_C = re.compile(
+        r'(?:[^\W\d_]+,?\s+)?([^\W\d_]{3})[^\W\d_]*\.?\s+(\d{1,2})\s+'
+        r'(\d{1,2}):(\d{2}):(\d{2})(?:\s+([A-Za-z]+|[+-]\d{2}:?\d{0,2}))?\s+(\d{4})')
+    # date(1) em pt_BR e RFC 2822: "seg 01 jan 2024 10:05:00 -03", "Mon, 01 Jan 2024 10:05:00 +0000"
+    DATE_DAY_FIRST = re.compile(
+        r'(?:[^\W\d_]+\.?,?\s+)?(\d{1,2})(?:\s+de)?\s+([^\W\d_]{3})[^\W\d_]*\.?(?:\s+de)?\s+'
+        r'(\d{4}),?\s+(\d{1,2}):(\d{2}):(\d{2})(?:\s+([A-Za-z]+|[+-]\d{2}:?\d{0,2}))?')
+    # Data numérica dia/mês/ano (locale pt_BR)
+    DATE_NUMERIC = re.compile(r'(\d{1,2})/(\d{1,2})/(\d{4})[\s,T]+(\d{1,2}):(\d{2})(?::(\d{2}))?')
+    EPOCH = re.compile(r'\d{9,10}(?:\.\d+)?')
+    UTC_NAMES = frozenset(('UTC', 'GMT', 'Z'))
+
+    def __init__(self):
+        self._formats = [
+            ('iso', self._parse_iso),
+            ('date', self._parse_date_c),
+            ('date_day_first', self._parse_day_first),
+            ('numeric', self._parse_numeric),
+            ('epoch', self._parse_epoch)
+        ]
+
+    def parse(self, value):
+        """Converte um timestamp textual em datetime (UTC), ou None"""
+        if not value:
+            return None
+        value = value.strip()
+        for position, (name, parser) in enumerate(self._formats):
+            try:
+                parsed = parser(value)
+            except (ValueError, OverflowError, OSError):
+                parsed = None
+            if parsed is not None:
+                if position:
+                    # Formato detectado passa a ser o primeiro testado
+                    self._formats.insert(0, self._formats.pop(position))
+                return parsed.astimezone(datetime.timezone.utc)
+        return None
+
+    def normalize(self, value, file_path=None):
+        """Timestamp em ISO 8601 UTC, recorrendo ao mtime do arquivo"""
+        parsed = self.parse(value)
+        if parsed is None and file_path is not None:
+            try:
+                parsed = datetime.datetime.fromtimestamp(file_path.stat().st_mtime, datetime.timezone.utc)
+            except OSError:
+                return None
+        return self.isoformat(parsed) if parsed is not None else None
+
+    @staticmethod
+    def isoformat(moment):
+        return moment.strftime('%Y-%m-%dT%H:%M:%SZ')
+
+    def _zone(self, name):
+        """Fuso de um abreviação/offset; None = horário local"""
+        if not name:
+            return None
+        if name.upper() in self.UTC_NAMES:
+            return datetime.timezone.utc
+        if name[0] in '+-':
+            digits = name[1:].replace(':', '')
+            if len(digits) not in (2, 4):
+                return None
+            offset = datetime.timedelta(hours=int(digits[:2]), minutes=int(digits[2:] or 0))
+            return datetime.timezone(offset if name[0] == '+' else -offset)
+        # Abreviações ambíguas (BRT, CET...): horário local
+        return None
+
+    def _build(self, year, month, day, hour, minute, second, zone=None):
+        moment = datetime.datetime(year, month, day, hour, minute, second)
+        tz = self._zone(zone)
+        # Sem fuso: horário local da máquina que gravou o arquivo
+        return moment.replace(tzinfo=tz) if tz else moment.astimezone()
+
+    def _month(self, name):
+        month = self.MONTHS.get(name.lower()[:3])
+        if month is None:
+            raise ValueError(f"mês desconhecido: {name}")
+        return month
+
+    def _parse_iso(self, value):
+        # fromisoformat só aceita o sufixo Z a partir do Python 3.11
+        if value[-1:] in ('Z', 'z'):
+            value = value[:-1] + '+00:00'
+        moment = datetime.datetime.fromisoformat(value)
+        return moment if moment.tzinfo else moment.astimezone()
+
+    def _parse_date_c(self, value):
+        match = self.DATE_C.fullmatch(value)
+        if not match:
+            return None
+        month, day, hour, minute, second, zone, year = match.groups()
+        return self._build(int(year), self._month(month), int(day),
+                           int(hour), int(minute), int(second), zone)
+
+    def _parse_day_first(self, value):
+        match = self.DATE_DAY_FIRST.fullmatch(value)
+        if not match:
+            return None
+        day, month, year, hour, minute, second, zone = match.groups()
+        return self._build(int(year), self._month(month), int(day),
+                           int(hour), int(minute), int(second), zone)
+
+    def _parse_numeric(self, value):
+        match = self.DATE_NUMERIC.fullmatch(value)
+        if not match:
+            return None
+        day, month, year, hour, minute, second = match.groups()
+        return self._build(int(year), int(month), int(day), int(hour), int(minute), int(second or 0))
+
+    def _parse_epoch(self, value):
+        if not self.EPOCH.fullmatch(value):
+            return None
+        return datetime.datetime.fromtimestamp(float(value), datetime.timezone.utc)
+
+# Compartilhado pelo processo: o formato detectado vale para os próximos arquivos
+TIMESTAMPS = TimestampNormalizer()
+
+def _timestamp_sort_key(value):
+    """Converte timestamps dos módulos (ver TimestampNormalizer) em epoch
+
+    Retorna None para valores ausentes ou não reconhecidos.
+    """
+    parsed = TIMESTAMPS.parse(value)
+    return parsed.timestamp() if parsed is not None else None
+
+def _format_utc(value):
+    """Exibe um timestamp normalizado (ISO UTC) como 'AAAA-MM-DD HH:MM:SS UTC'"""
+    return f"{value[:10]} {value[11:19]} UTC" if value else None
+
+def _logical_name(name):
+    """Nome do arquivo sem a extensão de compressão (.gz/.xz/.zst)"""
+    for suffix in COMPRESSED_SUFFIXES:
+        if name.endswith(suffix):
+            return name[:-len(suffix)]
+    return name
+
+def _is_compressed(name):
+    return _logical_name(name) != name
+
+@contextmanager
+def open_result_binary(file_path):
+    """Abre um arquivo de resultado (ou membro de arquivo de sessão) para leitura
+
+    Arquivos .gz/.xz/.zst são descomprimidos em streaming, sem carregar o
+    conteúdo inteiro em memória.
+    """
+    raw = file_path.open() if isinstance(file_path, ArchiveMember) else open(file_path, 'rb')
+    stream = None
+    try:
+        name = file_path.name if isinstance(file_path, ArchiveMember) else Path(file_path).name
+        if name.endswith('.gz'):
+            stream = gzip.GzipFile(fileobj=raw, mode='rb')
+        elif name.endswith('.xz'):
+            stream = lzma.LZMAFile(raw)
+        elif name.endswith('.zst'):
+            if zstandard is None:
+                raise ValueError("leitura de .zst requer o pacote zstandard")
+            stream = zstandard.ZstdDecompressor().stream_reader(raw)
+        yield stream if stream is not None else raw
+    finally:
+        if stream is not None:
+            stream.close()
+        raw.close()
+
+def _h(value):
+    """Escapa um valor para inclusão em HTML"""
+    return html.escape(str(value))
+
+def _json_default(obj):
+    """Serializa estruturas próprias do gerador no json.dump"""
+    if isinstance(obj, (FindingStore, FindingIndex)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def _json_item(obj, depth):
+    """Serializa um valor como o json.dump(indent=2) o grava no nível depth do documento"""
+    encoded = json.dumps(obj, indent=2, ensure_ascii=False, default=_json_default)
+    return encoded.replace('\n', '\n' + '  ' * depth)
+
+def _dumps_compact(obj):
+    """Serializa um registro em JSON compacto (orjson quando disponível)"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_json_default)
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':'), default=_json_default).encode('utf-8')
+
+class NdjsonReportWriter:
+    """Exportador NDJSON incremental: um registro por linha
+
+    O cabeçalho de metadados é gravado na abertura e cada ataque, arquivo
+    e captura é gravado assim que o item correspondente é coletado,
+    permitindo que o consumidor (SIEM) comece a ingerir antes do fim da
+    coleta. Vulnerabilidades (já deduplicadas), resumo e recomendações são
+    gravados ao final.
+    """
+
+    RECORD_TYPES = (
+        ('targets', 'target'), ('attacks', 'attack'),
+        ('files_analyzed', 'file'), ('captures', 'capture')
+    )
+
+    def __init__(self, output_file, session_id):
+        self.output_file = output_file
+        self.session_id = session_id
+        self.records = 0
+        self.out = open(output_file, 'wb')
+        self.write('metadata', {
+            'generated_at': datetime.datetime.now().isoformat(),
+            'tool_version': 'BlueSecAudit v2.0',
+            'report_version': '1.0',
+            'serializer': 'orjson' if orjson is not None else 'json'
+        })
+        self.out.flush()
+
+    @staticmethod
+    def encode(session_id, record_type, data):
+        """Serializa um registro (uma linha)"""
+        record = {'record_type': record_type, 'session_id': session_id}
+        if isinstance(data, dict):
+            record.update(data)
+        else:
+            record['value'] = data
+        return _dumps_compact(record) + b'\n'
+
+    @classmethod
+    def encode_fragment(cls, session_id, fragment):
+        """Serializa os registros de um item coletado: (bytes, número de registros)"""
+        lines = [cls.encode(session_id, record_type, item)
+                 for key, record_type in cls.RECORD_TYPES
+                 for item in fragment.get(key, ())]
+        return b''.join(lines), len(lines)
+
+    def write(self, record_type, data):
+        """Grava um registro"""
+        self.out.write(self.encode(self.session_id, record_type, data))
+        self.records += 1
+
+    def write_encoded(self, data, records):
+        """Grava registros já serializados (ver encode_fragment)"""
+        self.out.write(data)
+        self.records += records
+
+    def write_fragment(self, fragment):
+        """Grava os registros de um item coletado e libera o buffer"""
+        self.write_encoded(*self.encode_fragment(self.session_id, fragment))
+        self.out.flush()
+
+    def close(self, summary, recommendations, vulnerabilities=(), activity=(), vendors=()):
+        """Grava vulnerabilidades, atividade por hora, fabricantes, resumo e recomendações e fecha o arquivo"""
+        for vulnerability in vulnerabilities:
+            self.write('vulnerability', vulnerability)
+        for bucket in activity:
+            self.write('activity', bucket)
+        for vendor in vendors:
+            self.write('vendor', vendor)
+        self.write('summary', summary)
+        for recommendation in recommendations:
+            self.write('recommendation', recommendation)
+        self.out.close()
+
+class ReportProfiler:
+    """Instrumentação do gerador de relatórios (--profile)
+
+    Mede tempo de parede, tempo de CPU e bytes por etapa (coleta, HTML,
+    JSON) e por processador de regras, mantém os N arquivos mais lentos
+    (heap) e o pico de RSS. Os arquivos processados por workers são medidos
+    no próprio worker e devolvidos junto com o fragmento. Exporta um
+    textfile do Prometheus (node_exporter) e um trace JSON no formato do
+    Chrome (chrome://tracing, Perfetto).
+    """
+
+    METRIC_PREFIX = 'bluesecaudit_report'
+    # Eventos por arquivo no trace; acima disso só os agregados são mantidos
+    TRACE_EVENT_LIMIT = 20000
+
+    def __init__(self, top=10, keep_records=False):
+        self.top = top
+        self.keep_records = keep_records
+        self.stages = {}
+        self.processors = {}
+        self.bytes_read = 0
+        self.records = []
+        self._slowest = []
+        self._sequence = 0
+        self._events = []
+        self.dropped_events = 0
+
+    @staticmethod
+    def _cpu_time():
+        """CPU do processo e dos filhos já encerrados (workers)"""
+        times = os.times()
+        return times.user + times.system + times.children_user + times.children_system
+
+    @staticmethod
+    def peak_rss():
+        """Pico de RSS em bytes do processo e dos workers (None sem o módulo resource)"""
+        if resource is None:
+            return None, None
+        # ru_maxrss é dado em KB no Linux
+        own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+        children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * 1024
+        return own, children
+
+    @contextmanager
+    def stage(self, name, output=None):
+        """Mede uma etapa; bytes = arquivo gerado (output) ou bytes lidos na etapa"""
+        start_us = time.time_ns() // 1000
+        wall = time.perf_counter()
+        cpu = self._cpu_time()
+        bytes_read = self.bytes_read
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - wall
+            cpu = self._cpu_time() - cpu
+            try:
+                size = os.path.getsize(output) if output else self.bytes_read - bytes_read
+            except OSError:
+                size = 0
+            totals = self.stages.setdefault(name, {'wall': 0.0, 'cpu': 0.0, 'bytes': 0, 'calls': 0})
+            totals['wall'] += wall
+            totals['cpu'] += cpu
+            totals['bytes'] += size
+            totals['calls'] += 1
+            self._add_event({'name': name, 'cat': 'stage', 'ph': 'X', 'ts': start_us,
+                             'dur': round(wall * 1e6), 'pid': os.getpid(), 'tid': 0,
+                             'args': {'cpu_seconds': round(cpu, 6), 'bytes': size}})
+
+    @contextmanager
+    def measure(self, processor, file_path, size):
+        """Mede o processamento de um arquivo por um processador"""
+        start_us = time.time_ns() // 1000
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        try:
+            yield
+        finally:
+            self.add_file({
+                'processor': processor,
+                'file': str(file_path),
+                'wall': time.perf_counter() - wall,
+                'cpu': time.process_time() - cpu,
+                'bytes': size,
+                'start_us': start_us,
+                'pid': os.getpid()
+            })
+
+    def add_file(self, record):
+        """Incorpora a medição de um arquivo (local ou vinda de um worker)"""
+        totals = self.processors.setdefault(record['processor'],
+                                            {'wall': 0.0, 'cpu': 0.0, 'bytes': 0, 'files': 0})
+        totals['wall'] += record['wall']
+        totals['cpu'] += record['cpu']
+        totals['bytes'] += record['bytes']
+        totals['files'] += 1
+        self.bytes_read += record['bytes']
+        if self.keep_records:
+            self.records.append(record)
+        
+        # Heap de mínimo com os N mais lentos
+        self._sequence += 1
+        entry = (record['wall'], self._sequence, record)
+        if len(self._slowest) < self.top:
+            heapq.heappush(self._slowest, entry)
+        elif entry > self._slowest[0]:
+            heapq.heapreplace(self._slowest, entry)
+        
+        self._add_event({'name': record['processor'], 'cat': 'file', 'ph': 'X',
+                         'ts': record['start_us'], 'dur': round(record['wall'] * 1e6),
+                         'pid': record['pid'], 'tid': 1,
+                         'args': {'file': self._short_path(record['file']), 'bytes': record['bytes'],
+                                  'cpu_seconds': round(record['cpu'], 6)}})
+
+    @staticmethod
+    def _short_path(file_path):
+        """Nome do arquivo com o diretório pai (distingue arquivos de auditorias completas)"""
+        path = Path(file_path)
+        return f"{path.parent.name}/{path.name}"
+
+    def drain(self):
+        """Entrega (e descarta) as medições acumuladas; usado pelos workers"""
+        records, self.records = self.records, []
+        return records
+
+    def slowest(self):
+        """Arquivos mais lentos, do mais lento para o mais rápido"""
+        return [record for _, _, record in sorted(self._slowest, reverse=True)]
+
+    def _add_event(self, event):
+        if len(self._events) < self.TRACE_EVENT_LIMIT:
+            self._events.append(event)
+        else:
+            self.dropped_events += 1
+
+    def print_summary(self):
+        """Imprime o resumo do perfil"""
+        print("⏱️ Perfil da geração do relatório:")
+        for name, totals in self.stages.items():
+            print(f"   etapa {name:<16} {totals['wall']:8.3f}s  cpu {totals['cpu']:8.3f}s  "
+                  f"{totals['bytes'] / 1024:10.1f} KB")
+        for name, totals in sorted(self.processors.items(), key=lambda item: -item[1]['wall']):
+            print(f"   processador {name:<10} {totals['wall']:8.3f}s  cpu {totals['cpu']:8.3f}s  "
+                  f"{totals['bytes'] / 1024:10.1f} KB  {totals['files']} arquivos")
+        for rank, record in enumerate(self.slowest(), 1):
+            print(f"   #{rank} {record['wall']:.3f}s  {record['processor']}  {self._short_path(record['file'])}")
+        own, children = self.peak_rss()
+        if own is not None:
+            print(f"   pico RSS {own / 1024 / 1024:.1f} MB (workers {children / 1024 / 1024:.1f} MB)")
+
+    @staticmethod
+    def _label(value):
+        """Escapa o valor de um label do Prometheus"""
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+    def write_prometheus(self, output_file, session_id):
+        """Exporta as métricas no formato textfile do Prometheus (substituição atômica)"""
+        prefix = self.METRIC_PREFIX
+        session = self._label(session_id)
+        lines = []
+
+        def metric(name, help_text, samples):
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} gauge")
+            for labels, value in samples:
+                label_text = ','.join([f'session="{session}"'] +
+                                      [f'{key}="{self._label(val)}"' for key, val in labels])
+                lines.append(f"{prefix}_{name}{{{label_text}}} {value}")
+        
+        stages = list(self.stages.items())
+        processors = list(self.processors.items())
+        metric('stage_seconds', 'Wall time per report stage',
+               [((('stage', name),), round(t['wall'], 6)) for name, t in stages])
+        metric('stage_cpu_seconds', 'CPU time per report stage (including workers)',
+               [((('stage', name),), round(t['cpu'], 6)) for name, t in stages])
+        metric('stage_bytes', 'Bytes read (collect) or written (outputs) per stage',
+               [((('stage', name),), t['bytes']) for name, t in stages])
+        metric('processor_seconds', 'Wall time per detection processor',
+               [((('processor', name),), round(t['wall'], 6)) for name, t in processors])
+        metric('processor_cpu_seconds', 'CPU time per detection processor',
+               [((('processor', name),), round(t['cpu'], 6)) for name, t in processors])
+        metric('processor_bytes', 'Bytes read per detection processor',
+               [((('processor', name),), t['bytes']) for name, t in processors])
+        metric('processor_files', 'Files handled per detection processor',
+               [((('processor', name),), t['files']) for name, t in processors])
+        metric('slowest_file_seconds', 'Slowest result files',
+               [((('rank', rank), ('processor', r['processor']), ('file', self._short_path(r['file']))),
+                 round(r['wall'], 6)) for rank, r in enumerate(self.slowest(), 1)])
+        own, children = self.peak_rss()
+        if own is not None:
+            metric('peak_rss_bytes', 'Peak resident set size',
+                   [((('process', 'main'),), own), ((('process', 'workers'),), children)])
+        metric('last_run_timestamp_seconds', 'Time the report was generated',
+               [((), round(time.time(), 3))])
+        
+        output_file = Path(output_file)
+        tmp_file = output_file.with_name(output_file.name + '.tmp')
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+        os.replace(tmp_file, output_file)
+        print(f"📈 Métricas Prometheus: {output_file}")
+
+    def write_trace(self, output_file, session_id):
+        """Exporta as etapas e os arquivos no formato de trace do Chrome"""
+        own, children = self.peak_rss()
+        trace = {
+            'traceEvents': self._events,
+            'displayTimeUnit': 'ms',
+            'otherData': {
+                'session_id': session_id,
+                'tool_version': 'BlueSecAudit v2.0',
+                'peak_rss_bytes': own,
+                'workers_peak_rss_bytes': children,
+                'dropped_events': self.dropped_events
+            }
+        }
+        output_file = Path(output_file)
+        tmp_file = output_file.with_name(output_file.name + '.tmp')
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(trace, f)
+        os.replace(tmp_file, output_file)
+        print(f"📈 Trace (chrome://tracing): {output_file}")
+
+class ArchiveMember:
+    """Membro de um arquivo de sessão visto como arquivo de resultado
+
+    Oferece o subconjunto da interface de Path usado pelos processadores
+    (name, stat().st_size, str()) e leitura em streaming do membro, com
+    acesso aleatório pelo diretório central do ZIP.
+    """
+
+    def __init__(self, archive, info):
+        self.archive = archive
+        self.info = info
+        self.name = info.filename.rsplit('/', 1)[-1]
+
+    def __str__(self):
+        return f"{self.archive.filename}/{self.info.filename}"
+
+    def stat(self):
+        return SimpleNamespace(st_size=self.info.file_size,
+                               st_mtime=time.mktime(self.info.date_time + (0, 0, -1)))
+
+    def open(self):
+        return self.archive.open(self.info)
+
+def _collect_fragment(task):
+    """Processa um item da sessão em um processo worker"""
+    session_id, results_dir, logs_dir, rules_path, profile, kind, path = task
+    profiler = ReportProfiler(keep_records=True) if profile else None
+    generator = BlueSecAuditReportGenerator(session_id, results_dir, logs_dir,
+                                            rules=DetectionRules.load(rules_path),
+                                            profiler=profiler)
+    fragment, errors = generator._process_task(kind, Path(path))
+    # Medições do worker seguem com o fragmento para o processo principal
+    return fragment, errors, profiler.drain() if profiler else []
 
 class BlueSecAuditReportGenerator:
-    def __init__(self, session_id, results_dir="results", logs_dir="logs"):
+    # Listas produzidas por arquivo e concatenadas na ordem de coleta
+    FRAGMENT_KEYS = ('targets', 'attacks', 'vulnerabilities', 'files_analyzed', 'captures')
+    HTML_TARGET_PATTERN = re.compile(r'<strong>Target:</strong>\s*([0-9A-Fa-f:]+)')
+    HTML_BUFFER_SIZE = 1024 * 1024
+    # Seções por target com mais itens que isso começam recolhidas
+    HTML_GROUP_OPEN_LIMIT = 25
+    # Período em torno de cada ataque consultado nos índices de captura
+    CAPTURE_WINDOW_SECONDS = 30
+    HTML_STYLE = """\
+            body { font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; margin: 0; background: #f8f9fa; }
+            .container { max-width: 1200px; margin: 40px auto; background: white; border-radius: 10px; box-shadow: 0 4px 15px rgba(0,0,0,0.1); overflow: hidden; }
+            .header { background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; padding: 40px; text-align: center; }
+            .content { padding: 40px; }
+            h1 { margin: 0; font-size: 2.5em; font-weight: 300; }
+            h2 { color: #2c3e50; border-bottom: 3px solid #3498db; padding-bottom: 10px; margin-top: 40px; }
+            h3 { color: #34495e; margin-top: 30px; }
+            .metric-grid { display: grid; grid-template-columns: repeat(auto-fit, minmax(200px, 1fr)); gap: 20px; margin: 30px 0; }
+            .metric-card { background: #f8f9fa; padding: 20px; border-radius: 8px; text-align: center; border-left: 4px solid #3498db; }
+            .metric-value { font-size: 2em; font-weight: bold; color: #2c3e50; }
+            .metric-label { color: #7f8c8d; font-size: 0.9em; margin-top: 5px; }
+            .risk-critical { border-left-color: #e74c3c; }
+            .risk-high { border-left-color: #f39c12; }
+            .risk-medium { border-left-color: #f1c40f; }
+            .risk-low { border-left-color: #27ae60; }
+            .vulnerability { background: #fff5f5; border: 1px solid #feb2b2; border-radius: 5px; padding: 15px; margin: 10px 0; }
+            .vuln-critical { border-color: #e53e3e; background: #fed7d7; }
+            .vuln-high { border-color: #dd6b20; background: #feebc8; }
+            .vuln-medium { border-color: #d69e2e; background: #faf089; }
+            .attack-item { background: #f7fafc; border: 1px solid #e2e8f0; border-radius: 5px; padding: 15px; margin: 10px 0; }
+            .recommendation { background: #f0fff4; border: 1px solid #9ae6b4; border-radius: 5px; padding: 15px; margin: 10px 0; }
+            .priority-critical { border-left: 4px solid #e53e3e; }
+            .priority-high { border-left: 4px solid #dd6b20; }
+            .priority-medium { border-left: 4px solid #d69e2e; }
+            .priority-low { border-left: 4px solid #38a169; }
+            .file-list { background: #f8f9fa; border-radius: 5px; padding: 20px; }
+            .file-item { display: flex; justify-content: space-between; padding: 5px 0; border-bottom: 1px solid #e9ecef; }
+            .timeline { position: relative; padding: 20px 0; }
+            .timeline-item { margin: 20px 0; padding-left: 30px; border-left: 2px solid #3498db; }
+            .timeline-marker { position: absolute; left: -6px; width: 12px; height: 12px; background: #3498db; border-radius: 50%; }
+            .footer { background: #2c3e50; color: white; padding: 30px; text-align: center; }
+            .badge { display: inline-block; padding: 4px 8px; border-radius: 12px; font-size: 0.8em; font-weight: bold; }
+            .badge-success { background: #d4edda; color: #155724; }
+            .badge-warning { background: #fff3cd; color: #856404; }
+            .badge-danger { background: #f8d7da; color: #721c24; }
+            .target-group { margin: 15px 0; }
+            .target-group > summary { cursor: pointer; font-weight: bold; color: #2c3e50; padding: 10px; background: #edf2f7; border-radius: 5px; }
+"""
+
+    def __init__(self, session_id, results_dir="results", logs_dir="logs", workers=1,
+                 cache=None, index=None, stream=None, rules=None, profiler=None, vendors=None):
         self.session_id = session_id
         self.results_dir = Path(results_dir)
         self.logs_dir = Path(logs_dir)
-        self.report_data = {
-            'session_id': session_id,
+        self.workers = max(1, workers)
+        self.cache = cache
+        self.index = index
+        self.stream = stream
+        self.rules = rules or DetectionRules.load()
+        self.profiler = profiler
+        self.vendors = vendors
+        self.errors = 0
+        self.report_data = self._empty_report_data()
+
+    def _empty_report_data(self):
+        """Estrutura inicial (vazia) do report_data"""
+        return {
+            'session_id': self.session_id,
             'timestamp': datetime.datetime.now().isoformat(),
             'targets': [],
-            'attacks': [],
-            'vulnerabilities': [],
+            'attacks': FindingStore(),
+            'vulnerabilities': FindingIndex(),
             'recommendations': [],
-            'files_analyzed': []
+            'files_analyzed': [],
+            'captures': []
         }
 
     def collect_session_data(self):
         """Coleta todos os dados da sessão"""
         print(f"🔍 Coletando dados da sessão {self.session_id}...")
         
-        # Buscar arquivos de resultados da sessão
-        session_files = list(self.results_dir.glob(f"*{self.session_id}*"))
+        tasks = self._find_session_items()
         
-        for file_path in session_files:
-            if file_path.is_file():
-                self._process_result_file(file_path)
+        # Itens inalterados vêm direto do cache
+        cached = {}
+        if self.cache:
+            for index, (kind, path) in enumerate(tasks):
+                fragment = self.cache.lookup(kind, path)
+                if fragment is not None:
+                    cached[index] = fragment
+        misses = [index for index in range(len(tasks)) if index not in cached]
+        
+        # Resultados paralelos chegam na ordem de submissão (mesma dos misses)
+        computed = None
+        if self.workers > 1 and len(misses) > 1:
+            computed = self._collect_parallel([tasks[index] for index in misses])
+        
+        # Mesclar sempre na ordem original dos itens
+        for index, (kind, path) in enumerate(tasks):
+            if index in cached:
+                self._merge_fragment(cached[index])
+                self._emit_fragment(cached[index])
+                continue
+            
+            if computed is not None:
+                fragment, errors, records = next(computed)
+                self._merge_fragment(fragment)
+                self.errors += errors
+                for record in records:
+                    self.profiler.add_file(record)
+            else:
+                fragment, errors = self._process_task(kind, path)
+            self._emit_fragment(fragment)
+            
+            # Falhas de leitura podem ser transitórias: não cachear
+            if self.cache and not errors:
+                self.cache.store(kind, path, fragment)
+        
+        if self.cache:
+            self.cache.flush()
+            print(f"💾 Cache: {self.cache.hits} reutilizados, {self.cache.misses} processados")
+        
+        print(f"✅ Coletados dados de {len(self.report_data['files_analyzed'])} arquivos")
+
+    def _find_session_items(self):
+        """Localiza os itens da sessão, pelo índice quando disponível"""
+        from report_archive import SessionArchive
+        from report_capture import CaptureIndex
+        if self.index:
+            tasks = self.index.session_items(self.session_id)
+            if tasks:
+                return self._skip_archived(tasks)
+            print("ℹ️ Sessão não encontrada no índice - varrendo diretório")
+        
+        # Buscar arquivos de resultados da sessão (e o arquivo compactado, se houver)
+        session_files = list(self.results_dir.glob(f"*{self.session_id}*"))
+        tasks = [
+            ('archive' if SessionArchive.is_archive(file_path) else 'file', file_path)
+            for file_path in session_files
+            if file_path.is_file() and not CaptureIndex.is_sidecar(file_path)
+        ]
         
         # Buscar auditorias completas
         audit_dirs = list(self.results_dir.glob(f"full_audit_*{self.session_id}"))
-        for audit_dir in audit_dirs:
-            if audit_dir.is_dir():
-                self._process_audit_directory(audit_dir)
+        tasks += [('dir', audit_dir) for audit_dir in audit_dirs if audit_dir.is_dir()]
         
-        print(f"✅ Coletados dados de {len(self.report_data['files_analyzed'])} arquivos")
+        if self.index:
+            for _, path in tasks:
+                self.index.register(path, self.session_id)
+        return self._skip_archived(tasks)
+
+    def _skip_archived(self, tasks):
+        """Ignora itens avulsos que já estão no arquivo compactado da sessão"""
+        from report_archive import SessionArchive
+        archived = set()
+        for kind, path in tasks:
+            if kind == 'archive':
+                try:
+                    archived |= SessionArchive.top_level_names(path)
+                except (OSError, ValueError, zipfile.BadZipFile) as e:
+                    print(f"⚠️ Arquivo de sessão ilegível {path}: {e}")
+        if not archived:
+            return tasks
+        return [(kind, path) for kind, path in tasks if kind == 'archive' or path.name not in archived]
+
+    def _process_task(self, kind, path):
+        """Processa um item e retorna o fragmento produzido e o número de erros"""
+        # O item é coletado à parte: achados repetidos são fundidos no
+        # report_data, então o fragmento não pode ser um recorte dele
+        collected = self.report_data
+        self.report_data = self._empty_report_data()
+        errors = self.errors
+        try:
+            if kind == 'dir':
+                self._process_audit_directory(path)
+            elif kind == 'archive':
+                self._process_archive(path)
+            else:
+                self._process_result_file(path)
+            fragment = self._take_fragment()
+        finally:
+            self.report_data = collected
+        
+        self._merge_fragment(fragment)
+        return fragment, self.errors - errors
+
+    def open_stream_reader(self, file_path):
+        """Processador e leitor para um arquivo analisado enquanto é produzido
+
+        Usado pelo tool_collector.py: a saída das ferramentas é entregue ao
+        leitor linha a linha. Retorna (None, None) quando nenhuma regra de
+        conteúdo se aplica ao nome do arquivo.
+        """
+        file_path = Path(file_path)
+        processor = self.rules.processor_for(_logical_name(file_path.name))
+        if processor is None or processor['handler'] == 'capture':
+            return None, None
+        return processor, self._open_signature_reader(file_path, processor)
 
-    def _process_result_file(self, file_path):
-        """Processa um arquivo de resultado individual"""
+    def stream_fragment(self, file_path, processor=None, reader=None):
+        """Fragmento de um arquivo já gravado cujo conteúdo passou pelo leitor
+
+        Equivale a _process_task para o arquivo, sem relê-lo: o leitor deve
+        ter recebido exatamente o conteúdo gravado.
+        """
+        file_path = Path(file_path)
+        collected = self.report_data
+        self.report_data = self._empty_report_data()
+        try:
+            self.report_data['files_analyzed'].append({
+                'filename': file_path.name,
+                'size': file_path.stat().st_size,
+                'type': self._classify_file_type(file_path.name)
+            })
+            if processor is not None:
+                reader.close()
+                self._record_signature_results(file_path, processor, reader)
+            return self._take_fragment()
+        finally:
+            self.report_data = collected
+
+    def _collect_parallel(self, tasks):
+        """Distribui o processamento entre processos, preservando a ordem dos itens"""
+        # multiprocessing só é carregado quando há workers
+        from concurrent.futures import ProcessPoolExecutor
+        print(f"⚙️ Processando {len(tasks)} itens com {self.workers} workers...")
+        jobs = [
+            (self.session_id, str(self.results_dir), str(self.logs_dir), str(self.rules.path),
+             self.profiler is not None, kind, str(path))
+            for kind, path in tasks
+        ]
+        chunksize = max(1, len(jobs) // (self.workers * 4))
+        
+        # executor.map preserva a ordem de submissão, igual ao modo serial
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            yield from executor.map(_collect_fragment, jobs, chunksize=chunksize)
+
+    def _emit_fragment(self, fragment):
+        """Envia o fragmento ao exportador incremental, se houver"""
+        if self.stream:
+            self.stream.write_fragment(fragment)
+
+    def _take_fragment(self):
+        """Fragmento do report_data atual, com os ataques em ordem cronológica"""
+        fragment = {key: list(self.report_data[key]) for key in self.FRAGMENT_KEYS}
+        fragment['attacks'].sort(key=lambda attack: attack.get('occurred_at') or '')
+        return fragment
+
+    def _merge_fragment(self, fragment):
+        """Incorpora o fragmento de um arquivo ao report_data"""
+        # Cada fragmento é uma sequência ordenada da linha do tempo
+        self.report_data['attacks'].start_run()
+        for key in self.FRAGMENT_KEYS:
+            self.report_data[key].extend(fragment[key])
+
+    def _warn(self, message):
+        """Registra um erro de processamento sem interromper a coleta"""
+        self.errors += 1
+        print(f"⚠️ {message}")
+
+    def _process_result_file(self, file_path, state=None):
+        """Processa um arquivo de resultado individual
+
+        state (modo --watch) guarda o progresso da leitura do arquivo entre
+        chamadas, de modo que apenas o conteúdo acrescentado é analisado.
+        """
         try:
             filename = file_path.name
             file_size = file_path.stat().st_size
@@ -56,441 +1738,684 @@ class BlueSecAuditReportGenerator:
                 'type': self._classify_file_type(filename)
             })
             
-            # Extrair informações específicas por tipo
-            if 'bluesmack' in filename:
-                self._process_bluesmack_file(file_path)
-            elif 'sdp' in filename:
-                self._process_sdp_file(file_path)
-            elif 'pin_bruteforce' in filename:
-                self._process_pin_file(file_path)
-            elif 'obex' in filename:
-                self._process_obex_file(file_path)
+            # Extrair informações específicas pelo processador da regra
+            processor = self.rules.processor_for(_logical_name(filename))
+            if processor is None:
+                return
+            if self.profiler:
+                with self.profiler.measure(processor['name'], file_path, file_size):
+                    self._dispatch_result_file(file_path, processor, state)
+            else:
+                self._dispatch_result_file(file_path, processor, state)
                 
         except Exception as e:
-            print(f"⚠️ Erro processando {file_path}: {e}")
+            self._warn(f"Erro processando {file_path}: {e}")
+
+    def _dispatch_result_file(self, file_path, processor, state):
+        """Encaminha o arquivo ao handler do processador"""
+        if processor['handler'] == 'capture':
+            self._process_capture_file(file_path, state)
+        else:
+            self._process_signature_file(file_path, processor, state)
 
     def _process_audit_directory(self, audit_dir):
         """Processa diretório de auditoria completa"""
         try:
-            # Ler relatório HTML principal se existir
-            html_report = audit_dir / "audit_report.html"
-            if html_report.exists():
-                with open(html_report, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                    # Extrair informações básicas do HTML
-                    target = self._extract_target_from_html(content)
-                    if target:
-                        self.report_data['targets'].append(target)
-            
-            # Processar outros arquivos da auditoria
-            for file_path in audit_dir.glob("*.txt"):
+            # Relatório HTML principal e demais arquivos (comprimidos ou não)
+            html_report = None
+            result_files = []
+            for file_path in audit_dir.iterdir():
+                logical = _logical_name(file_path.name)
+                if logical == 'audit_report.html':
+                    html_report = html_report or file_path
+                elif logical.endswith('.txt'):
+                    result_files.append(file_path)
+            self._process_audit_items(audit_dir, html_report, result_files)
+        except Exception as e:
+            self._warn(f"Erro processando auditoria {audit_dir}: {e}")
+
+    def _process_audit_items(self, audit_dir, html_report, result_files):
+        """Processa o relatório principal e os arquivos de uma auditoria completa"""
+        try:
+            if html_report is not None:
+                self._process_audit_report(html_report)
+            for file_path in result_files:
                 self._process_result_file(file_path)
-                
         except Exception as e:
-            print(f"⚠️ Erro processando auditoria {audit_dir}: {e}")
+            self._warn(f"Erro processando auditoria {audit_dir}: {e}")
+
+    def _process_archive(self, archive_path):
+        """Processa os itens de um arquivo compactado de sessão sem extraí-lo"""
+        from report_archive import SessionArchive
+        try:
+            with SessionArchive(archive_path) as archive:
+                for item in archive.items():
+                    if item[0] == 'dir':
+                        _, name, html_report, result_files = item
+                        self._process_audit_items(f"{archive_path}/{name}", html_report, result_files)
+                    else:
+                        self._process_result_file(item[1])
+        except (OSError, ValueError, zipfile.BadZipFile) as e:
+            self._warn(f"Erro processando arquivo de sessão {archive_path}: {e}")
+
+    def _process_audit_report(self, html_report):
+        """Extrai o target do relatório HTML principal de uma auditoria"""
+        with open_result_binary(html_report) as raw, io.TextIOWrapper(raw, encoding='utf-8') as f:
+            content = f.read()
+            # Extrair informações básicas do HTML
+            target = self._extract_target_from_html(content)
+            if target:
+                self.report_data['targets'].append(target)
 
     def _classify_file_type(self, filename):
         """Classifica o tipo de arquivo de resultado"""
-        if 'bluesmack' in filename:
-            return 'DoS Attack'
-        elif 'sdp' in filename:
-            return 'Service Enumeration'
-        elif 'pin' in filename:
-            return 'Authentication Attack'
-        elif 'obex' in filename:
-            return 'File System Access'
-        elif 'hid' in filename:
-            return 'HID Injection'
-        elif 'audio' in filename:
-            return 'Audio Interception'
-        elif 'ble' in filename:
-            return 'BLE Attack'
-        else:
-            return 'Unknown'
+        return self.rules.classify(_logical_name(filename))
 
-    def _process_bluesmack_file(self, file_path):
-        """Processa arquivo de resultado BlueSmack"""
+    def _process_capture_file(self, file_path, state=None):
+        """Processa captura de tráfego HCI (pcap/btsnoop)
+
+        Com um índice válido (<captura>.idx, ver CaptureIndex) as estatísticas
+        vêm dele, sem reler a captura; capturas em crescimento (state) são
+        sempre analisadas.
+        """
+        from report_capture import CaptureAnalyzer, CaptureIndex
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-                
-            attack_data = {
-                'type': 'BlueSmack DoS',
-                'target': self._extract_target_from_content(content),
-                'timestamp': self._extract_timestamp_from_content(content),
-                'success': 'SUCCESS' in content,
-                'file': str(file_path)
-            }
-            
-            self.report_data['attacks'].append(attack_data)
-            
-            if attack_data['success']:
-                vulnerability = {
-                    'type': 'DoS Vulnerability',
-                    'severity': 'High',
-                    'target': attack_data['target'],
-                    'description': 'Device susceptible to L2CAP ping flood DoS attack',
-                    'recommendation': 'Implement rate limiting or update firmware'
-                }
-                self.report_data['vulnerabilities'].append(vulnerability)
-                
+            stats = None
+            if state is None and isinstance(file_path, Path):
+                index = CaptureIndex.load(file_path)
+                stats = index.analysis(file_path) if index else None
+            if stats is None:
+                stats = CaptureAnalyzer().analyze(file_path, state)
+            self.report_data['captures'].append(stats)
         except Exception as e:
-            print(f"⚠️ Erro processando BlueSmack {file_path}: {e}")
+            self._warn(f"Erro processando captura {file_path}: {e}")
 
-    def _process_sdp_file(self, file_path):
-        """Processa arquivo de enumeração SDP"""
+    def _process_signature_file(self, file_path, processor, state=None):
+        """Processa arquivo de resultado (texto, HTML ou GATT) conforme as regras do processador"""
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            # Contar serviços encontrados
-            service_count = content.count('Service Name:')
-            protocol_count = content.count('Protocol Descriptor List:')
-            
-            attack_data = {
-                'type': 'SDP Enumeration',
-                'target': self._extract_target_from_content(content),
-                'timestamp': self._extract_timestamp_from_content(content),
-                'services_found': service_count,
-                'protocols_found': protocol_count,
-                'file': str(file_path)
-            }
-            
-            self.report_data['attacks'].append(attack_data)
-            
-            # Analisar serviços para vulnerabilidades
-            if 'Serial Port' in content:
-                vulnerability = {
-                    'type': 'Insecure Service',
-                    'severity': 'Medium',
-                    'target': attack_data['target'],
-                    'description': 'Serial Port Profile (SPP) available',
-                    'recommendation': 'Disable SPP if not required'
-                }
-                self.report_data['vulnerabilities'].append(vulnerability)
-            
-            if 'OBEX' in content:
-                vulnerability = {
-                    'type': 'File Access',
-                    'severity': 'Medium',
-                    'target': attack_data['target'],
-                    'description': 'OBEX file transfer available',
-                    'recommendation': 'Enable authentication for OBEX'
-                }
-                self.report_data['vulnerabilities'].append(vulnerability)
-                
+            # Arquivos comprimidos não permitem retomar do offset: releitura completa
+            if state is None or _is_compressed(file_path.name):
+                reader = self._open_signature_reader(file_path, processor)
+                StreamingResultParser.read_file(file_path, reader)
+            else:
+                reader = self._resume_signature_reader(file_path, processor, state)
+            self._record_signature_results(file_path, processor, reader)
         except Exception as e:
-            print(f"⚠️ Erro processando SDP {file_path}: {e}")
+            if state is not None:
+                # Estado possivelmente inconsistente: reler na próxima vez
+                state.clear()
+            self._warn(f"Erro processando {processor['label']} {file_path}: {e}")
 
-    def _process_pin_file(self, file_path):
-        """Processa arquivo de brute force PIN"""
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            attack_data = {
-                'type': 'PIN Brute Force',
-                'target': self._extract_target_from_content(content),
-                'timestamp': self._extract_timestamp_from_content(content),
-                'success': 'SUCCESS - PIN FOUND' in content,
-                'file': str(file_path)
-            }
-            
-            self.report_data['attacks'].append(attack_data)
-            
-            if attack_data['success']:
+    def _open_signature_reader(self, file_path, processor):
+        """Cria o leitor do arquivo conforme o handler do processador"""
+        # Arquivos sem MAC no conteúdo (ex.: ble_security_*) usam o MAC do nome
+        mac = FILENAME_MAC_PATTERN.search(file_path.name)
+        default_target = mac.group(1).replace('_', ':').upper() if mac else 'Unknown'
+        scan = StreamingResultParser(processor['matcher'], processor['values'], default_target)
+        
+        # Uma única passagem: o leitor repassa o conteúdo ao parser de assinaturas
+        if processor['handler'] == 'html':
+            return HtmlSectionReader(scan, processor['section'])
+        if processor['handler'] == 'gatt':
+            return GattTableReader(scan)
+        return scan
+
+    def _resume_signature_reader(self, file_path, processor, state):
+        """Lê apenas os bytes acrescentados desde a última chamada (modo --watch)
+
+        Relatórios HTML são gravados de uma vez pelos módulos e são relidos
+        por inteiro; arquivos de texto e tabelas GATT continuam do último
+        offset com o mesmo leitor. Um arquivo que encolheu é relido do início.
+        """
+        size = file_path.stat().st_size
+        if (not state or processor['handler'] == 'html' or size < state['offset']
+                or state['processor'] is not processor):
+            state.clear()
+            state.update(
+                processor=processor,
+                reader=self._open_signature_reader(file_path, processor),
+                decoder=io.IncrementalNewlineDecoder(
+                    codecs.getincrementaldecoder('utf-8')(), translate=True),
+                offset=0
+            )
+        
+        reader = state['reader']
+        decoder = state['decoder']
+        with open(file_path, 'rb') as f:
+            f.seek(state['offset'])
+            while True:
+                chunk = f.read(StreamingResultParser.CHUNK_SIZE)
+                if not chunk:
+                    break
+                state['offset'] += len(chunk)
+                text = decoder.decode(chunk)
+                if text:
+                    reader.feed(text)
+        
+        if processor['handler'] == 'html':
+            reader.close()
+            return reader
+        return reader.snapshot()
+
+    def _record_signature_results(self, file_path, processor, reader):
+        """Registra o ataque e as vulnerabilidades de um leitor finalizado"""
+        scan = reader if processor['handler'] == 'signatures' else reader.scan
+        # Sem timestamp reconhecível no conteúdo vale o mtime do arquivo
+        occurred_at = TIMESTAMPS.normalize(scan.timestamp, file_path)
+        attack_data = {
+            'type': processor['attack_type'],
+            'target': scan.target,
+            'timestamp': scan.timestamp or occurred_at,
+            'occurred_at': occurred_at
+        }
+        for name, mode, arguments in processor['fields']:
+            if mode == 'flag':
+                attack_data[name] = any(scan.counts[s] for s in arguments)
+            elif mode == 'count':
+                attack_data[name] = sum(scan.counts[s] for s in arguments)
+            elif mode == 'value':
+                attack_data[name] = scan.values.get(arguments[0])
+            elif mode == 'gatt':
+                attack_data[name] = reader.summary[arguments[0]]
+            else:
+                attack_data[name] = any(uuid in reader.uuids for uuid in arguments)
+        attack_data['file'] = str(file_path)
+        
+        self.report_data['attacks'].append(attack_data)
+        
+        for (condition, value), template in processor['findings']:
+            matched = attack_data[value] if condition == 'field' else scan.counts[value]
+            if matched:
                 vulnerability = {
-                    'type': 'Weak Authentication',
-                    'severity': 'Critical',
+                    'type': template['type'],
+                    'severity': template['severity'],
                     'target': attack_data['target'],
-                    'description': 'Device uses weak PIN authentication',
-                    'recommendation': 'Use strong PINs or upgrade to secure pairing'
+                    'description': template['description'],
+                    'recommendation': template['recommendation'],
+                    'evidence': template['evidence'],
+                    'fingerprint': FindingIndex.fingerprint(
+                        attack_data['target'], template['type'], template['evidence']),
+                    'occurrences': 1,
+                    'first_seen': attack_data['occurred_at'],
+                    'last_seen': attack_data['occurred_at'],
+                    'sources': [str(file_path)]
                 }
                 self.report_data['vulnerabilities'].append(vulnerability)
-                
-        except Exception as e:
-            print(f"⚠️ Erro processando PIN {file_path}: {e}")
-
-    def _process_obex_file(self, file_path):
-        """Processa arquivo de exploração OBEX"""
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            attack_data = {
-                'type': 'OBEX Exploitation',
-                'target': self._extract_target_from_content(content),
-                'timestamp': self._extract_timestamp_from_content(content),
-                'files_accessed': content.count('.vcf') + content.count('.jpg') + content.count('.png'),
-                'file': str(file_path)
-            }
-            
-            self.report_data['attacks'].append(attack_data)
-            
-        except Exception as e:
-            print(f"⚠️ Erro processando OBEX {file_path}: {e}")
-
-    def _extract_target_from_content(self, content):
-        """Extrai endereço MAC do target do conteúdo"""
-        import re
-        mac_pattern = r'([0-9A-Fa-f]{2}[:-]){5}([0-9A-Fa-f]{2})'
-        match = re.search(mac_pattern, content)
-        return match.group(0) if match else 'Unknown'
 
     def _extract_target_from_html(self, content):
         """Extrai target de conteúdo HTML"""
         if '<strong>Target:</strong>' in content:
-            import re
-            pattern = r'<strong>Target:</strong>\s*([0-9A-Fa-f:]+)'
-            match = re.search(pattern, content)
+            match = self.HTML_TARGET_PATTERN.search(content)
             return match.group(1) if match else None
         return None
 
-    def _extract_timestamp_from_content(self, content):
-        """Extrai timestamp do conteúdo"""
-        if 'Timestamp:' in content:
-            lines = content.split('\n')
-            for line in lines:
-                if 'Timestamp:' in line:
-                    return line.split('Timestamp:')[-1].strip()
-        return datetime.datetime.now().isoformat()
-
     def generate_executive_summary(self):
         """Gera resumo executivo"""
-        total_targets = len(set(attack['target'] for attack in self.report_data['attacks'] if 'target' in attack))
-        total_attacks = len(self.report_data['attacks'])
-        total_vulnerabilities = len(self.report_data['vulnerabilities'])
+        attacks = self.report_data['attacks']
+        vulnerabilities = self.report_data['vulnerabilities']
         
-        critical_vulns = sum(1 for v in self.report_data['vulnerabilities'] if v.get('severity') == 'Critical')
-        high_vulns = sum(1 for v in self.report_data['vulnerabilities'] if v.get('severity') == 'High')
+        # Contadores mantidos pelo FindingStore/FindingIndex a cada inserção (O(1));
+        # vulnerabilidades contam achados únicos, não arquivos
+        total_targets = len(attacks.target_counts)
+        total_attacks = len(attacks)
+        total_vulnerabilities = len(vulnerabilities)
         
-        # Calcular risk score
-        risk_score = min(100, critical_vulns * 25 + high_vulns * 15 + total_vulnerabilities * 5)
+        critical_vulns = vulnerabilities.severity_counts.get('Critical', 0)
+        high_vulns = vulnerabilities.severity_counts.get('High', 0)
         
-        if risk_score >= 80:
-            risk_level = "🔴 CRÍTICO"
-        elif risk_score >= 60:
-            risk_level = "🟡 ALTO"
-        elif risk_score >= 30:
-            risk_level = "🟠 MÉDIO"
-        else:
-            risk_level = "🟢 BAIXO"
+        risk_score, risk_level = self.risk_assessment(critical_vulns, high_vulns,
+                                                      total_vulnerabilities)
         
         return {
             'total_targets': total_targets,
             'total_attacks': total_attacks,
             'total_vulnerabilities': total_vulnerabilities,
+            'vulnerability_occurrences': vulnerabilities.occurrences,
             'critical_vulns': critical_vulns,
             'high_vulns': high_vulns,
             'risk_score': risk_score,
             'risk_level': risk_level
         }
 
-    def generate_recommendations(self):
-        """Gera recomendações baseadas nos achados"""
-        recommendations = []
-        
-        # Recomendações baseadas em vulnerabilidades
-        vuln_types = set(v.get('type') for v in self.report_data['vulnerabilities'])
-        
-        if 'DoS Vulnerability' in vuln_types:
-            recommendations.append({
-                'priority': 'High',
-                'category': 'Availability',
-                'recommendation': 'Implement DoS protection mechanisms and rate limiting'
-            })
+    @staticmethod
+    def risk_assessment(critical_vulns, high_vulns, total_vulnerabilities):
+        """Calcula o risk score (0-100) e o nível de risco correspondente"""
+        risk_score = min(100, critical_vulns * 25 + high_vulns * 15 + total_vulnerabilities * 5)
+        return risk_score, BlueSecAuditReportGenerator.risk_level(risk_score)
+
+    @staticmethod
+    def risk_level(risk_score):
+        """Nível de risco correspondente a um risk score"""
+        if risk_score >= 80:
+            return "🔴 CRÍTICO"
+        if risk_score >= 60:
+            return "🟡 ALTO"
+        if risk_score >= 30:
+            return "🟠 MÉDIO"
+        return "🟢 BAIXO"
+
+    def target_vendor(self, target):
+        """Fabricante do target pela tabela OUI (None sem tabela)"""
+        return self.vendors.vendor(target) if self.vendors else None
+
+    def vendor_rollup(self):
+        """Targets, ataques e vulnerabilidades agregados por fabricante
+
+        Usa os contadores por target do FindingStore e uma passagem pelas
+        vulnerabilidades; cada prefixo OUI é consultado uma única vez.
+        Retorna None quando não há tabela OUI.
+        """
+        if not self.vendors:
+            return None
         
-        if 'Weak Authentication' in vuln_types:
-            recommendations.append({
-                'priority': 'Critical',
-                'category': 'Authentication',
-                'recommendation': 'Upgrade to Secure Simple Pairing (SSP) or use strong PINs'
-            })
+        targets = {}
+        for target in self.report_data['targets']:
+            targets.setdefault(target.upper(), [0, 0, 0, 0])
+        for target, count in self.report_data['attacks'].target_counts.items():
+            targets.setdefault(target.upper(), [0, 0, 0, 0])[0] += count
+        for vulnerability in self.report_data['vulnerabilities']:
+            counts = targets.setdefault(vulnerability.get('target', 'Unknown').upper(), [0, 0, 0, 0])
+            severity = vulnerability.get('severity')
+            counts[1] += 1
+            counts[2] += severity == 'Critical'
+            counts[3] += severity == 'High'
         
-        if 'Insecure Service' in vuln_types:
-            recommendations.append({
-                'priority': 'Medium',
-                'category': 'Services',
-                'recommendation': 'Disable unnecessary Bluetooth services and profiles'
-            })
+        vendors = {}
+        for target, counts in targets.items():
+            name = self.target_vendor(target)
+            entry = vendors.get(name)
+            if entry is None:
+                entry = vendors[name] = {
+                    'vendor': name, 'targets': 0, 'attacks': 0, 'vulnerabilities': 0,
+                    'critical_vulns': 0, 'high_vulns': 0
+                }
+            entry['targets'] += 1
+            for field, count in zip(('attacks', 'vulnerabilities', 'critical_vulns', 'high_vulns'),
+                                    counts):
+                entry[field] += count
         
-        if 'File Access' in vuln_types:
-            recommendations.append({
-                'priority': 'Medium',
-                'category': 'Data Protection',
-                'recommendation': 'Enable authentication for file transfer services'
-            })
+        for entry in vendors.values():
+            entry['risk_score'], entry['risk_level'] = self.risk_assessment(
+                entry['critical_vulns'], entry['high_vulns'], entry['vulnerabilities'])
+        return sorted(vendors.values(),
+                      key=lambda entry: (-entry['risk_score'], -entry['targets'], entry['vendor']))
+
+    def generate_recommendations(self):
+        """Gera recomendações baseadas nos achados"""
+        recommendations = []
         
-        # Recomendações gerais
-        recommendations.append({
-            'priority': 'Low',
-            'category': 'General',
-            'recommendation': 'Regular security updates and monitoring of Bluetooth communications'
-        })
+        # Recomendações declaradas nas regras ('*' = sempre incluída)
+        vuln_types = self.report_data['vulnerabilities'].type_counts
+        for vulnerability, recommendation in self.rules.recommendations:
+            if vulnerability == '*' or vulnerability in vuln_types:
+                recommendations.append(dict(recommendation))
         
         self.report_data['recommendations'] = recommendations
         return recommendations
 
-    def generate_html_report(self, output_file):
-        """Gera relatório HTML final consolidado"""
+    def generate_html_report(self, output_file, attack_html=None, file_html=None):
+        """Gera relatório HTML final consolidado
+
+        As seções são escritas diretamente no arquivo (sem montar o documento
+        inteiro em memória) e os achados são agrupados por target em seções
+        recolhíveis. O arquivo final é substituído de forma atômica.
+        attack_html (índice do ataque → HTML) e file_html (HTML de cada
+        arquivo, na ordem do report_data) trazem itens já renderizados pelo
+        modo --watch; sem eles, cada item é renderizado aqui.
+        """
         summary = self.generate_executive_summary()
         recommendations = self.generate_recommendations()
         
-        html_content = f"""
-<!DOCTYPE html>
-<html lang="pt-BR">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>BlueSecAudit v2.0 - Relatório Final Consolidado</title>
-    <style>
-        body {{ font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; margin: 0; background: #f8f9fa; }}
-        .container {{ max-width: 1200px; margin: 40px auto; background: white; border-radius: 10px; box-shadow: 0 4px 15px rgba(0,0,0,0.1); overflow: hidden; }}
-        .header {{ background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; padding: 40px; text-align: center; }}
-        .content {{ padding: 40px; }}
-        h1 {{ margin: 0; font-size: 2.5em; font-weight: 300; }}
-        h2 {{ color: #2c3e50; border-bottom: 3px solid #3498db; padding-bottom: 10px; margin-top: 40px; }}
-        h3 {{ color: #34495e; margin-top: 30px; }}
-        .metric-grid {{ display: grid; grid-template-columns: repeat(auto-fit, minmax(200px, 1fr)); gap: 20px; margin: 30px 0; }}
-        .metric-card {{ background: #f8f9fa; padding: 20px; border-radius: 8px; text-align: center; border-left: 4px solid #3498db; }}
-        .metric-value {{ font-size: 2em; font-weight: bold; color: #2c3e50; }}
-        .metric-label {{ color: #7f8c8d; font-size: 0.9em; margin-top: 5px; }}
-        .risk-critical {{ border-left-color: #e74c3c; }}
-        .risk-high {{ border-left-color: #f39c12; }}
-        .risk-medium {{ border-left-color: #f1c40f; }}
-        .risk-low {{ border-left-color: #27ae60; }}
-        .vulnerability {{ background: #fff5f5; border: 1px solid #feb2b2; border-radius: 5px; padding: 15px; margin: 10px 0; }}
-        .vuln-critical {{ border-color: #e53e3e; background: #fed7d7; }}
-        .vuln-high {{ border-color: #dd6b20; background: #feebc8; }}
-        .vuln-medium {{ border-color: #d69e2e; background: #faf089; }}
-        .attack-item {{ background: #f7fafc; border: 1px solid #e2e8f0; border-radius: 5px; padding: 15px; margin: 10px 0; }}
-        .recommendation {{ background: #f0fff4; border: 1px solid #9ae6b4; border-radius: 5px; padding: 15px; margin: 10px 0; }}
-        .priority-critical {{ border-left: 4px solid #e53e3e; }}
-        .priority-high {{ border-left: 4px solid #dd6b20; }}
-        .priority-medium {{ border-left: 4px solid #d69e2e; }}
-        .priority-low {{ border-left: 4px solid #38a169; }}
-        .file-list {{ background: #f8f9fa; border-radius: 5px; padding: 20px; }}
-        .file-item {{ display: flex; justify-content: space-between; padding: 5px 0; border-bottom: 1px solid #e9ecef; }}
-        .timeline {{ position: relative; padding: 20px 0; }}
-        .timeline-item {{ margin: 20px 0; padding-left: 30px; border-left: 2px solid #3498db; }}
-        .timeline-marker {{ position: absolute; left: -6px; width: 12px; height: 12px; background: #3498db; border-radius: 50%; }}
-        .footer {{ background: #2c3e50; color: white; padding: 30px; text-align: center; }}
-        .badge {{ display: inline-block; padding: 4px 8px; border-radius: 12px; font-size: 0.8em; font-weight: bold; }}
-        .badge-success {{ background: #d4edda; color: #155724; }}
-        .badge-warning {{ background: #fff3cd; color: #856404; }}
-        .badge-danger {{ background: #f8d7da; color: #721c24; }}
-    </style>
-</head>
-<body>
-    <div class="container">
-        <div class="header">
-            <h1>🔐 BlueSecAudit v2.0</h1>
-            <p>Relatório Final Consolidado de Auditoria Bluetooth</p>
-            <p>Sessão: {self.session_id} | Gerado em: {datetime.datetime.now().strftime('%d/%m/%Y %H:%M:%S')}</p>
-        </div>
+        output_file = Path(output_file)
+        tmp_file = output_file.with_name(output_file.name + '.tmp')
+        with open(tmp_file, 'w', encoding='utf-8', buffering=self.HTML_BUFFER_SIZE) as out:
+            out.write(f"""
+    <!DOCTYPE html>
+    <html lang="pt-BR">
+    <head>
+        <meta charset="UTF-8">
+        <meta name="viewport" content="width=device-width, initial-scale=1.0">
+        <title>BlueSecAudit v2.0 - Relatório Final Consolidado</title>
+        <style>
+{self.HTML_STYLE}        </style>
+    </head>
+    <body>
+        <div class="container">
+            <div class="header">
+                <h1>🔐 BlueSecAudit v2.0</h1>
+                <p>Relatório Final Consolidado de Auditoria Bluetooth</p>
+                <p>Sessão: {_h(self.session_id)} | Gerado em: {datetime.datetime.now().strftime('%d/%m/%Y %H:%M:%S')}</p>
+            </div>
         
-        <div class="content">
-            <h2>📊 Resumo Executivo</h2>
-            <div class="metric-grid">
-                <div class="metric-card">
-                    <div class="metric-value">{summary['total_targets']}</div>
-                    <div class="metric-label">Dispositivos Analisados</div>
-                </div>
-                <div class="metric-card">
-                    <div class="metric-value">{summary['total_attacks']}</div>
-                    <div class="metric-label">Ataques Executados</div>
-                </div>
-                <div class="metric-card">
-                    <div class="metric-value">{summary['total_vulnerabilities']}</div>
-                    <div class="metric-label">Vulnerabilidades</div>
-                </div>
-                <div class="metric-card risk-{summary['risk_level'].split()[1].lower()}">
-                    <div class="metric-value">{summary['risk_score']}</div>
-                    <div class="metric-label">Risk Score</div>
+            <div class="content">
+                <h2>📊 Resumo Executivo</h2>
+                <div class="metric-grid">
+                    <div class="metric-card">
+                        <div class="metric-value">{summary['total_targets']}</div>
+                        <div class="metric-label">Dispositivos Analisados</div>
+                    </div>
+                    <div class="metric-card">
+                        <div class="metric-value">{summary['total_attacks']}</div>
+                        <div class="metric-label">Ataques Executados</div>
+                    </div>
+                    <div class="metric-card">
+                        <div class="metric-value">{summary['total_vulnerabilities']}</div>
+                        <div class="metric-label">Vulnerabilidades</div>
+                    </div>
+                    <div class="metric-card risk-{summary['risk_level'].split()[1].lower()}">
+                        <div class="metric-value">{summary['risk_score']}</div>
+                        <div class="metric-label">Risk Score</div>
+                    </div>
                 </div>
-            </div>
             
-            <div style="text-align: center; margin: 30px 0;">
-                <h3>Nível de Risco: {summary['risk_level']}</h3>
-            </div>
+                <div style="text-align: center; margin: 30px 0;">
+                    <h3>Nível de Risco: {summary['risk_level']}</h3>
+                </div>
+            """)
+
+            timeline, hourly = self.build_timeline()
+            self._write_html_attacks(out, timeline, attack_html)
+            self._write_html_activity(out, hourly)
+            self._write_html_vendors(out, self.vendor_rollup())
+            self._write_html_vulnerabilities(out)
+            self._write_html_recommendations(out, recommendations)
+            self._write_html_files(out, file_html)
+            self._write_html_captures(out)
+            self._write_html_footer(out)
+        
+        os.replace(tmp_file, output_file)
+        print(f"✅ Relatório HTML gerado: {output_file}")
 
+    def _open_target_group(self, out, target, count, label):
+        """Abre uma seção recolhível por target"""
+        is_open = ' open' if count <= self.HTML_GROUP_OPEN_LIMIT else ''
+        vendor = self.target_vendor(target)
+        vendor = f" ({_h(vendor)})" if vendor and vendor != self.vendors.UNKNOWN_LABEL else ''
+        out.write(f"""
+            <details class="target-group"{is_open}>
+                <summary>🎯 {_h(target)}{vendor} — {count} {label}</summary>
+        """)
+
+    def build_timeline(self):
+        """Linha do tempo dos ataques em uma única passagem do k-way merge
+
+        Retorna os índices dos ataques por target, em ordem cronológica, e a
+        atividade por hora (UTC) na mesma ordem.
+        """
+        groups = {}
+        hourly = []
+        for index, attack in self.report_data['attacks'].merged('occurred_at'):
+            groups.setdefault(attack.get('target', 'Unknown'), array('I')).append(index)
+            occurred_at = attack.get('occurred_at')
+            hour = f"{occurred_at[:13]}:00:00Z" if occurred_at else None
+            if not hourly or hourly[-1]['hour'] != hour:
+                hourly.append({'hour': hour, 'attacks': 0, 'successful': 0})
+            hourly[-1]['attacks'] += 1
+            if attack.get('success'):
+                hourly[-1]['successful'] += 1
+        return groups, hourly
+
+    def _write_html_attacks(self, out, timeline, attack_html=None):
+        """Escreve a linha do tempo de ataques agrupada por target"""
+        if attack_html is None:
+            attacks = self.report_data['attacks']
+            attack_html = lambda index: self.render_html_attack(attacks[index])
+        out.write("""
             <h2>🎯 Ataques Executados</h2>
             <div class="timeline">
-        """
+        """)
         
-        for i, attack in enumerate(self.report_data['attacks']):
-            success_badge = "badge-success" if attack.get('success', False) else "badge-warning"
-            success_text = "Sucesso" if attack.get('success', False) else "Executado"
-            
-            html_content += f"""
+        for target, indices in timeline.items():
+            self._open_target_group(out, target, len(indices), 'ataques')
+            for index in indices:
+                out.write(attack_html(index))
+            out.write("""
+            </details>
+            """)
+        
+        out.write("""
+            </div>
+        """)
+
+    def render_html_attack(self, attack):
+        """HTML de um ataque da linha do tempo"""
+        success_badge = "badge-success" if attack.get('success', False) else "badge-warning"
+        success_text = "Sucesso" if attack.get('success', False) else "Executado"
+        services = f"<p><strong>Serviços:</strong> {_h(attack.get('services_found', 0))}</p>" if 'services_found' in attack else ""
+        files = f"<p><strong>Arquivos:</strong> {_h(attack.get('files_accessed', 0))}</p>" if 'files_accessed' in attack else ""
+        
+        return f"""
                 <div class="timeline-item">
                     <div class="timeline-marker"></div>
                     <div class="attack-item">
-                        <h4>{attack.get('type', 'Unknown Attack')} <span class="badge {success_badge}">{success_text}</span></h4>
-                        <p><strong>Target:</strong> {attack.get('target', 'Unknown')}</p>
-                        <p><strong>Timestamp:</strong> {attack.get('timestamp', 'Unknown')}</p>
-                        {f"<p><strong>Serviços:</strong> {attack.get('services_found', 0)}</p>" if 'services_found' in attack else ""}
-                        {f"<p><strong>Arquivos:</strong> {attack.get('files_accessed', 0)}</p>" if 'files_accessed' in attack else ""}
+                        <h4>{_h(attack.get('type', 'Unknown Attack'))} <span class="badge {success_badge}">{success_text}</span></h4>
+                        <p><strong>Target:</strong> {_h(attack.get('target', 'Unknown'))}</p>
+                        <p><strong>Timestamp:</strong> {_h(_format_utc(attack.get('occurred_at')) or attack.get('timestamp', 'Unknown'))}</p>
+                        {services}
+                        {files}
                     </div>
                 </div>
-            """
-        
-        html_content += """
+                """
+
+    def _write_html_activity(self, out, hourly):
+        """Escreve a atividade de ataques por hora"""
+        if not hourly:
+            return
+        out.write("""
+            <h2>🕒 Atividade por Hora</h2>
+            <div class="file-list">
+        """)
+        for bucket in hourly:
+            out.write(f"""
+                <div class="file-item">
+                    <span>{_h(_format_utc(bucket['hour']) or 'Sem horário')}</span>
+                    <span>{bucket['attacks']} ataques ({bucket['successful']} com sucesso)</span>
+                </div>
+            """)
+        out.write("""
+            </div>
+        """)
+
+    def _write_html_vendors(self, out, vendors):
+        """Escreve o resumo por fabricante (somente com tabela OUI)"""
+        if not vendors:
+            return
+        out.write("""
+            <h2>🏭 Fabricantes</h2>
+            <div class="file-list">
+        """)
+        for entry in vendors:
+            out.write(f"""
+                <div class="file-item">
+                    <span>{_h(entry['vendor'])} ({entry['targets']} dispositivos)</span>
+                    <span>{entry['attacks']} ataques | {entry['vulnerabilities']} vulnerabilidades ({entry['critical_vulns']} críticas, {entry['high_vulns']} altas) | risco {entry['risk_score']} {_h(entry['risk_level'])}</span>
+                </div>
+            """)
+        out.write("""
             </div>
+        """)
 
+    def _write_html_vulnerabilities(self, out):
+        """Escreve as vulnerabilidades agrupadas por target"""
+        vulnerabilities = self.report_data['vulnerabilities']
+        out.write("""
             <h2>🚨 Vulnerabilidades Identificadas</h2>
-        """
+        """)
+        
+        if not vulnerabilities:
+            out.write("<p>✅ Nenhuma vulnerabilidade crítica identificada.</p>")
+            return
         
-        if self.report_data['vulnerabilities']:
-            for vuln in self.report_data['vulnerabilities']:
-                severity_class = f"vuln-{vuln.get('severity', 'medium').lower()}"
-                html_content += f"""
+        for target, indices in vulnerabilities.group_by_target().items():
+            self._open_target_group(out, target, len(indices), 'vulnerabilidades')
+            for index in indices:
+                vuln = vulnerabilities[index]
+                severity_class = f"vuln-{_h(vuln.get('severity', 'medium').lower())}"
+                sources = ', '.join(Path(source).name for source in vuln.get('sources', ())) or '-'
+                if vuln.get('occurrences', 1) > len(vuln.get('sources', ())) > 0:
+                    sources += ', …'
+                out.write(f"""
                 <div class="vulnerability {severity_class}">
-                    <h4>{vuln.get('type', 'Unknown')} - {vuln.get('severity', 'Unknown')} Severity</h4>
-                    <p><strong>Target:</strong> {vuln.get('target', 'Unknown')}</p>
-                    <p><strong>Descrição:</strong> {vuln.get('description', 'No description')}</p>
-                    <p><strong>Recomendação:</strong> {vuln.get('recommendation', 'No recommendation')}</p>
+                    <h4>{_h(vuln.get('type', 'Unknown'))} - {_h(vuln.get('severity', 'Unknown'))} Severity</h4>
+                    <p><strong>Target:</strong> {_h(vuln.get('target', 'Unknown'))}</p>
+                    <p><strong>Descrição:</strong> {_h(vuln.get('description', 'No description'))}</p>
+                    <p><strong>Ocorrências:</strong> {_h(vuln.get('occurrences', 1))} ({_h(_format_utc(vuln.get('first_seen')) or '-')} → {_h(_format_utc(vuln.get('last_seen')) or '-')})</p>
+                    <p><strong>Evidência:</strong> {_h(sources)}</p>
+                    <p><strong>Recomendação:</strong> {_h(vuln.get('recommendation', 'No recommendation'))}</p>
                 </div>
-                """
-        else:
-            html_content += "<p>✅ Nenhuma vulnerabilidade crítica identificada.</p>"
-        
-        html_content += """
+                """)
+            out.write("""
+            </details>
+            """)
+
+    def _write_html_recommendations(self, out, recommendations):
+        """Escreve as recomendações de segurança"""
+        out.write("""
             <h2>💡 Recomendações de Segurança</h2>
-        """
+        """)
         
         for rec in recommendations:
-            priority_class = f"priority-{rec.get('priority', 'low').lower()}"
-            html_content += f"""
+            priority_class = f"priority-{_h(rec.get('priority', 'low').lower())}"
+            out.write(f"""
             <div class="recommendation {priority_class}">
-                <h4>{rec.get('category', 'General')} - Prioridade {rec.get('priority', 'Low')}</h4>
-                <p>{rec.get('recommendation', 'No recommendation')}</p>
+                <h4>{_h(rec.get('category', 'General'))} - Prioridade {_h(rec.get('priority', 'Low'))}</h4>
+                <p>{_h(rec.get('recommendation', 'No recommendation'))}</p>
             </div>
-            """
-        
-        html_content += f"""
+            """)
+
+    def _write_html_files(self, out, file_html=None):
+        """Escreve a lista de arquivos analisados (recolhível se for grande)"""
+        files = self.report_data['files_analyzed']
+        if file_html is None:
+            file_html = map(self.render_html_file, files)
+        collapsed = len(files) > self.HTML_GROUP_OPEN_LIMIT
+        out.write("""
             <h2>📁 Arquivos Analisados</h2>
+        """)
+        if collapsed:
+            out.write(f"""
+            <details class="target-group">
+                <summary>{len(files)} arquivos</summary>
+            """)
+        out.write("""
             <div class="file-list">
-        """
+        """)
         
-        for file_info in self.report_data['files_analyzed']:
-            file_size_mb = round(file_info['size'] / 1024 / 1024, 2) if file_info['size'] > 1024*1024 else round(file_info['size'] / 1024, 2)
-            size_unit = "MB" if file_info['size'] > 1024*1024 else "KB"
-            
-            html_content += f"""
+        for item in file_html:
+            out.write(item)
+        
+        out.write("""
+            </div>
+        """)
+        if collapsed:
+            out.write("""
+            </details>
+            """)
+
+    def render_html_file(self, file_info):
+        """HTML de um arquivo analisado"""
+        file_size_mb = round(file_info['size'] / 1024 / 1024, 2) if file_info['size'] > 1024*1024 else round(file_info['size'] / 1024, 2)
+        size_unit = "MB" if file_info['size'] > 1024*1024 else "KB"
+        
+        return f"""
                 <div class="file-item">
-                    <span>{file_info['filename']}</span>
-                    <span>{file_info['type']} ({file_size_mb} {size_unit})</span>
+                    <span>{_h(file_info['filename'])}</span>
+                    <span>{_h(file_info['type'])} ({file_size_mb} {size_unit})</span>
                 </div>
             """
+
+    def capture_attack_windows(self):
+        """Tráfego em torno de cada ataque, lido dos índices das capturas
+
+        Para cada captura com índice válido (<captura>.idx), soma os
+        intervalos dos CAPTURE_WINDOW_SECONDS em torno dos ataques ocorridos
+        no período da captura, sem reler o arquivo. Retorna {captura: [janela]}
+        em ordem cronológica; capturas sem índice são omitidas.
+        """
+        from report_capture import CaptureIndex
+        indexes = []
+        for capture in self.report_data['captures']:
+            index = CaptureIndex.load(capture['file'])
+            period = index.period() if index else None
+            if period:
+                indexes.append((capture['file'], index, period))
+        
+        windows = {}
+        if not indexes:
+            return windows
+        half = self.CAPTURE_WINDOW_SECONDS / 2
+        for _, attack in self.report_data['attacks'].merged('occurred_at'):
+            occurred_at = attack.get('occurred_at')
+            moment = _timestamp_sort_key(occurred_at)
+            if moment is None:
+                continue
+            for file, index, (first, last) in indexes:
+                if moment + half <= first or moment - half >= last:
+                    continue
+                windows.setdefault(file, []).append({
+                    'type': attack.get('type'),
+                    'target': attack.get('target'),
+                    'occurred_at': occurred_at,
+                    'window_seconds': self.CAPTURE_WINDOW_SECONDS,
+                    **index.counts(moment - half, moment + half)
+                })
+        return windows
+
+    def _write_html_captures(self, out):
+        """Escreve o resumo das capturas de tráfego"""
+        if not self.report_data['captures']:
+            return
         
-        html_content += f"""
+        out.write("""
+            <h2>📡 Tráfego Capturado</h2>
+        """)
+        windows = self.capture_attack_windows()
+        for capture in self.report_data['captures']:
+            packet_types = ', '.join(f"{name}: {count}" for name, count in capture['packet_types'].items())
+            psms = ', '.join(f"{name}: {count}" for name, count in capture['l2cap_psms'].items())
+            truncated = ' <span class="badge badge-warning">Truncada</span>' if capture['truncated'] else ''
+            out.write(f"""
+            <div class="attack-item">
+                <h4>{_h(Path(capture['file']).name)} <span class="badge badge-success">{_h(capture['format'])}</span>{truncated}</h4>
+                <p><strong>Pacotes:</strong> {capture['packets']} ({capture['bytes']} bytes) em {capture['duration']}s</p>
+                <p><strong>Período:</strong> {_h(capture['first_packet'] or '-')} → {_h(capture['last_packet'] or '-')}</p>
+                <p><strong>Tipos HCI:</strong> {_h(packet_types or '-')}</p>
+                <p><strong>PSMs L2CAP:</strong> {_h(psms or '-')}</p>
+                <p><strong>Conexões ACL:</strong> {len(capture['acl_handles'])} handles</p>
+                <p><strong>Pico:</strong> {capture['peak_packets_per_second']} pacotes/s (janelas de {capture['bucket_seconds']}s)</p>
+            """)
+            le = capture.get('le_events')
+            if le:
+                out.write(f"""
+                <p><strong>Eventos LE:</strong> {le['advertising_reports']} relatórios de advertising, {le['connect_requests']} pedidos de conexão, {le['connections']} conexões</p>
+                """)
+            capture_windows = windows.get(capture['file'])
+            if capture_windows:
+                out.write(f"""
+                <p><strong>Tráfego em torno dos ataques</strong> ({self.CAPTURE_WINDOW_SECONDS}s, índice da captura):</p>
+                <div class="file-list">
+                """)
+                for window in capture_windows:
+                    out.write(f"""
+                    <div class="file-item">
+                        <span>{_h(_format_utc(window['occurred_at']))} — {_h(window['type'] or '-')} ({_h(window['target'] or 'Unknown')})</span>
+                        <span>{window['packets']} pacotes | {window['advertising_reports']} advertising | {window['connect_requests']} pedidos de conexão | {window['connections']} conexões</span>
+                    </div>
+                    """)
+                out.write("""
+                </div>
+                """)
+            out.write("""
             </div>
+            """)
 
+    def _write_html_footer(self, out):
+        """Escreve os detalhes técnicos e o rodapé"""
+        out.write(f"""
             <h2>🔍 Detalhes Técnicos</h2>
             <div class="attack-item">
                 <h4>Informações da Sessão</h4>
-                <p><strong>ID da Sessão:</strong> {self.session_id}</p>
+                <p><strong>ID da Sessão:</strong> {_h(self.session_id)}</p>
                 <p><strong>Data de Geração:</strong> {datetime.datetime.now().strftime('%d/%m/%Y %H:%M:%S')}</p>
                 <p><strong>Total de Arquivos:</strong> {len(self.report_data['files_analyzed'])}</p>
                 <p><strong>Metodologia:</strong> BlueSecAudit v2.0 Automated Testing</p>
@@ -505,15 +2430,24 @@ class BlueSecAuditReportGenerator:
     </div>
 </body>
 </html>
-        """
-        
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(html_content)
-        
-        print(f"✅ Relatório HTML gerado: {output_file}")
+        """)
+
+    def finish_ndjson_report(self):
+        """Conclui o relatório NDJSON gravado durante a coleta"""
+        summary = self.generate_executive_summary()
+        recommendations = self.generate_recommendations()
+        _, hourly = self.build_timeline()
+        self.stream.close(summary, recommendations, self.report_data['vulnerabilities'], hourly,
+                          self.vendor_rollup() or ())
+        print(f"✅ Relatório NDJSON gerado: {self.stream.output_file} ({self.stream.records} registros)")
 
-    def generate_json_report(self, output_file):
-        """Gera relatório JSON para processamento automatizado"""
+    def generate_json_report(self, output_file, encoded=None):
+        """Gera relatório JSON para processamento automatizado
+
+        encoded (modo --watch) traz, para listas do report_data, os itens já
+        serializados por _json_item no nível em que aparecem no documento;
+        o arquivo gravado é o mesmo do json.dump do relatório inteiro.
+        """
         summary = self.generate_executive_summary()
         
         final_report = {
@@ -524,39 +2458,669 @@ class BlueSecAuditReportGenerator:
                 'report_version': '1.0'
             },
             'summary': summary,
+            'activity_by_hour': self.build_timeline()[1],
             'data': self.report_data
         }
+        vendors = self.vendor_rollup()
+        if vendors is not None:
+            final_report['vendors'] = vendors
+        capture_windows = self.capture_attack_windows()
+        if capture_windows:
+            final_report['capture_windows'] = capture_windows
         
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(final_report, f, indent=2, ensure_ascii=False)
+        # Substituição atômica: leitores nunca veem um JSON pela metade
+        output_file = Path(output_file)
+        tmp_file = output_file.with_name(output_file.name + '.tmp')
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            if encoded is None:
+                json.dump(final_report, f, indent=2, ensure_ascii=False, default=_json_default)
+            else:
+                self._write_json_encoded(f, final_report, encoded)
+        os.replace(tmp_file, output_file)
         
         print(f"✅ Relatório JSON gerado: {output_file}")
 
+    @staticmethod
+    def _write_json_encoded(out, final_report, encoded):
+        """Grava o relatório JSON usando os itens já serializados de encoded"""
+        out.write('{')
+        for position, (key, value) in enumerate(final_report.items()):
+            out.write(f'{"," if position else ""}\n  {json.dumps(key, ensure_ascii=False)}: ')
+            if key != 'data':
+                out.write(_json_item(value, 1))
+                continue
+            out.write('{')
+            for data_position, (data_key, data_value) in enumerate(value.items()):
+                out.write(f'{"," if data_position else ""}\n    {json.dumps(data_key, ensure_ascii=False)}: ')
+                items = encoded.get(data_key)
+                if items is None:
+                    out.write(_json_item(data_value, 2))
+                elif not items:
+                    out.write('[]')
+                else:
+                    out.write('[\n      ' + ',\n      '.join(items) + '\n    ]')
+            out.write('\n  }' if value else '}')
+        out.write('\n}')
+
+def _parse_date_bound(value, end=False):
+    """Converte YYYY-MM-DD em timestamp (fim do dia quando end=True)"""
+    day = datetime.datetime.strptime(value, '%Y-%m-%d')
+    if end:
+        day += datetime.timedelta(days=1)
+    return day.timestamp()
+
+def run_index_commands(args, rules):
+    """Executa as operações de manutenção e consulta do índice de sessões"""
+    from report_cache import SessionIndex
+    index = SessionIndex(args.results_dir, rules=rules)
+    try:
+        if args.reindex:
+            count = index.rebuild()
+            print(f"🗂️ Índice reconstruído: {count} itens")
+        
+        if args.index_add:
+            added = sum(1 for path in args.index_add if index.register(path, args.session))
+            print(f"🗂️ {added} itens registrados no índice")
+        
+        if args.query:
+            rows = index.query(
+                session_id=args.session,
+                target=args.target,
+                since=_parse_date_bound(args.since) if args.since else None,
+                until=_parse_date_bound(args.until, end=True) if args.until else None
+            )
+            for session_id, target, attack_type, name, mtime in rows:
+                when = datetime.datetime.fromtimestamp(mtime).strftime('%Y-%m-%d %H:%M:%S')
+                print(f"{when}\t{session_id}\t{target or '-'}\t{attack_type}\t{name}")
+            print(f"📋 {len(rows)} itens encontrados")
+    finally:
+        index.close()
+
+def run_pack(args, rules):
+    """Empacota os itens de uma sessão encerrada em results/<sessão>.session.zip"""
+    from report_archive import SessionArchive
+    results_dir = Path(args.results_dir)
+    archive_path = SessionArchive.path_for(results_dir, args.session)
+    if archive_path.exists():
+        print(f"❌ Arquivo da sessão já existe: {archive_path}")
+        sys.exit(1)
+    
+    generator = BlueSecAuditReportGenerator(args.session, results_dir, args.logs_dir, rules=rules)
+    tasks = [(kind, path) for kind, path in generator._find_session_items() if kind != 'archive']
+    if not tasks:
+        print(f"❌ Nenhum item encontrado para a sessão {args.session}")
+        sys.exit(1)
+    
+    print(f"📦 Empacotando {len(tasks)} itens da sessão {args.session}...")
+    try:
+        archive_path, manifest = SessionArchive.pack(
+            args.session, tasks, results_dir, rules, args.pack_compression)
+    except (OSError, ValueError, zipfile.BadZipFile) as e:
+        print(f"❌ Erro empacotando sessão: {e}")
+        sys.exit(1)
+    
+    original = sum(member['size'] for member in manifest['members'])
+    packed = archive_path.stat().st_size
+    print(f"✅ Sessão empacotada: {archive_path} ({len(manifest['members'])} membros, "
+          f"{original / 1048576:.1f} MB → {packed / 1048576:.1f} MB)")
+    
+    index = open_session_index(args, rules)
+    try:
+        if args.pack_remove:
+            # O arquivo já foi conferido (CRC e índice) antes de remover os originais
+            for kind, path in tasks:
+                if kind == 'dir':
+                    shutil.rmtree(path)
+                else:
+                    path.unlink()
+                if index:
+                    index.unregister(path)
+            print(f"🗑️ {len(tasks)} itens originais removidos")
+        if index:
+            index.register(archive_path, args.session)
+    finally:
+        if index:
+            index.close()
+
+def run_capture_analysis(args):
+    """Imprime a análise nativa de uma captura (usado por lib/bluetooth.sh)
+
+    Um índice válido da captura (--index-capture) evita a releitura.
+    """
+    from report_capture import CaptureAnalyzer, CaptureIndex
+    index = CaptureIndex.load(args.analyze_capture)
+    stats = index.analysis(args.analyze_capture, args.bucket_seconds) if index else None
+    if stats is None:
+        stats = CaptureAnalyzer(bucket_seconds=args.bucket_seconds).analyze(args.analyze_capture)
+    print("=== ANÁLISE DE TRÁFEGO BLUETOOTH ===")
+    print(f"Arquivo: {stats['file']}")
+    print(f"Timestamp: {datetime.datetime.now().isoformat()}")
+    print(f"Formato: {stats['format']} (linktype {stats['linktype']})")
+    print("")
+    print("=== ESTATÍSTICAS GERAIS ===")
+    print(f"Pacotes: {stats['packets']}")
+    print(f"Bytes: {stats['bytes']}")
+    print(f"Primeiro pacote: {stats['first_packet'] or '-'}")
+    print(f"Último pacote: {stats['last_packet'] or '-'}")
+    print(f"Duração: {stats['duration']}s")
+    print(f"Pico: {stats['peak_packets_per_second']} pacotes/s")
+    if stats['truncated']:
+        print("Aviso: captura truncada")
+    print("")
+    print("=== TIPOS DE PACOTE HCI ===")
+    for name, count in stats['packet_types'].items():
+        print(f"{name}: {count}")
+    print("")
+    print("=== PSMs L2CAP ===")
+    for name, count in stats['l2cap_psms'].items():
+        print(f"{name}: {count}")
+    print("")
+    print("=== CONEXÕES ACL ===")
+    for handle, count in stats['acl_handles'].items():
+        print(f"Handle {handle}: {count} pacotes")
+    print("")
+    print("=== EVENTOS LE ===")
+    _print_le_counts(stats['le_events'])
+    print("")
+    print(f"=== TAXA ({stats['bucket_seconds']}s) ===")
+    for start, packets, size in stats['rate_buckets']:
+        print(f"{start}\t{packets} pacotes\t{size} bytes")
+
+def _print_le_counts(counts):
+    """Imprime os contadores LE (formato lido por monitor_ble_traffic)"""
+    print(f"Advertising: {counts['advertising_reports']}")
+    print(f"Pedidos de conexão LE: {counts['connect_requests']}")
+    print(f"Conexões LE: {counts['connections']}")
+
+def _format_epoch(epoch):
+    return datetime.datetime.fromtimestamp(epoch, datetime.timezone.utc).isoformat()
+
+def run_capture_index(args):
+    """Gera o índice lateral de uma captura e imprime o resumo (usado por monitor_ble_traffic)"""
+    from report_capture import CaptureIndex
+    index = CaptureIndex.build(args.index_capture, args.index_interval, args.bucket_seconds)
+    print(f"✅ Índice de captura gerado: {index.path} "
+          f"({len(index.entries)} intervalos de {index.interval_seconds}s)")
+    print(f"Pacotes: {index.stats['packets']}")
+    _print_le_counts(index.stats['le_events'])
+    if index.stats['truncated']:
+        print("Aviso: captura truncada")
+
+def _range_bound(value, option):
+    """Timestamp de --around/--range-start/--range-end em epoch"""
+    parsed = TIMESTAMPS.parse(value)
+    if parsed is None:
+        raise ValueError(f"timestamp não reconhecido em {option}: {value}")
+    return parsed.timestamp()
+
+def run_capture_range(args):
+    """Contadores (e recorte opcional) de um período da captura a partir do índice"""
+    from report_capture import CaptureIndex
+    capture = Path(args.capture_range)
+    if args.around:
+        moment = _range_bound(args.around, '--around')
+        start, end = moment - args.window / 2, moment + args.window / 2
+    else:
+        start = _range_bound(args.range_start, '--range-start')
+        end = _range_bound(args.range_end, '--range-end') if args.range_end else start + args.window
+    if end <= start:
+        raise ValueError("o fim do período deve ser posterior ao início")
+    
+    index = CaptureIndex.load(capture)
+    if index is None:
+        print(f"🔧 Indexando captura ({args.index_interval}s por intervalo)...")
+        index = CaptureIndex.build(capture, args.index_interval, args.bucket_seconds)
+    
+    counts = index.counts(start, end)
+    print("=== PERÍODO DA CAPTURA ===")
+    print(f"Arquivo: {capture}")
+    print(f"Início: {_format_epoch(start)}")
+    print(f"Fim: {_format_epoch(end)}")
+    print(f"Pacotes: {counts['packets']}")
+    print(f"Bytes: {counts['bytes']}")
+    _print_le_counts(counts)
+    print("")
+    print(f"=== INTERVALOS ({index.interval_seconds}s) ===")
+    for start_us, _, packets, _, advertising, requests, connections in index.intervals(start, end):
+        print(f"{_format_epoch(start_us / 1000000)}\t{packets} pacotes\t{advertising} advertising\t"
+              f"{requests} pedidos de conexão\t{connections} conexões")
+    
+    if args.slice_output:
+        copied = index.extract(capture, start, end, args.slice_output)
+        print("")
+        print(f"✂️ Recorte gravado: {args.slice_output} ({copied} bytes de registros)")
+
+def profile_stage(profiler, name, output=None):
+    """Etapa medida pelo profiler (contexto nulo sem --profile)"""
+    return profiler.stage(name, output) if profiler else nullcontext()
+
+def write_profile(profiler, args, label):
+    """Imprime o resumo do --profile e exporta métricas e trace"""
+    profile_dir = Path(args.profile_dir or args.logs_dir)
+    profile_dir.mkdir(parents=True, exist_ok=True)
+    profiler.print_summary()
+    profiler.write_prometheus(profile_dir / f"report_profile_{label}.prom", label)
+    profiler.write_trace(profile_dir / f"report_trace_{label}.json", label)
+
+def open_parse_cache(args, rules):
+    """Abre o cache de parsing quando --cache foi informado"""
+    if not args.cache:
+        return None
+    from report_cache import ParseCache
+    return ParseCache(
+        Path(args.logs_dir) / 'report_cache.db',
+        use_hash=args.cache_hash,
+        max_age_days=args.cache_max_age,
+        max_size_mb=args.cache_max_size,
+        namespace=rules.digest
+    )
+
+def open_vendor_table(args):
+    """Tabela OUI de --oui-table (ou a padrão), ou None se não existir"""
+    from report_oui import OuiTable
+    return OuiTable.load(args.oui_table)
+
+def open_session_index(args, rules):
+    """Abre o índice de sessões quando --index foi informado"""
+    if not args.index:
+        return None
+    from report_cache import SessionIndex
+    return SessionIndex(args.results_dir, rules=rules)
+
+def run_fleet_mode(args, rules):
+    """Consolida várias sessões em um relatório por target"""
+    from report_fleet import FleetAggregator, SessionLoader
+    print("🚀 BlueSecAudit v2.0 - Fleet Report")
+    cache = index = None
+    try:
+        cache = open_parse_cache(args, rules)
+        index = open_session_index(args, rules)
+        profiler = ReportProfiler(top=args.profile_top) if args.profile else None
+        loader = SessionLoader(
+            results_dir=args.results_dir,
+            logs_dir=args.logs_dir,
+            workers=args.workers,
+            cache=cache,
+            index=index,
+            rules=rules,
+            profiler=profiler
+        )
+        fleet = FleetAggregator(loader, vendors=open_vendor_table(args))
+        
+        if args.sessions:
+            sessions = loader.sort_sessions(args.sessions)
+        else:
+            sessions = loader.discover_sessions(
+                since=_parse_date_bound(args.since) if args.since else None,
+                until=_parse_date_bound(args.until, end=True) if args.until else None
+            )
+        if not sessions:
+            print("ℹ️ Nenhuma sessão encontrada para consolidar")
+            return
+        print(f"📋 Consolidando {len(sessions)} sessões")
+        
+        fleet.run(sessions)
+        records = fleet.target_records()
+        summary = fleet.fleet_summary(records)
+        with profile_stage(profiler, 'html', args.output):
+            fleet.generate_html_report(args.output, records, summary)
+        if args.json:
+            with profile_stage(profiler, args.format, args.json):
+                fleet.generate_json_report(args.json, records, summary, args.format)
+        if profiler:
+            write_profile(profiler, args, 'fleet')
+        
+        print(f"🎉 Relatório de frota gerado: {summary['total_targets']} dispositivos, "
+              f"{summary['unique_findings']} achados únicos")
+    except Exception as e:
+        print(f"❌ Erro gerando relatório de frota: {e}")
+        sys.exit(1)
+    finally:
+        if cache:
+            cache.close()
+        if index:
+            index.close()
+
+def run_diff_mode(args, rules):
+    """Compara duas sessões pelos achados (novos, resolvidos e persistentes)"""
+    from report_fleet import SessionDiff, SessionLoader
+    print("🚀 BlueSecAudit v2.0 - Session Diff")
+    cache = index = None
+    try:
+        cache = open_parse_cache(args, rules)
+        index = open_session_index(args, rules)
+        profiler = ReportProfiler(top=args.profile_top) if args.profile else None
+        loader = SessionLoader(
+            results_dir=args.results_dir,
+            logs_dir=args.logs_dir,
+            workers=args.workers,
+            cache=cache,
+            index=index,
+            rules=rules,
+            profiler=profiler
+        )
+        diff = SessionDiff(loader, vendors=open_vendor_table(args))
+        
+        diff.run(args.diff)
+        findings, records, summary = diff.compare()
+        with profile_stage(profiler, 'html', args.output):
+            diff.generate_html_report(args.output, findings, records, summary)
+        if args.json:
+            with profile_stage(profiler, args.format, args.json):
+                diff.generate_json_report(args.json, findings, records, summary, args.format)
+        if profiler:
+            write_profile(profiler, args, 'diff')
+        
+        print(f"🎉 Comparação gerada: {summary['new_findings']} novos, "
+              f"{summary['resolved_findings']} resolvidos, {summary['persisting_findings']} persistentes "
+              f"(risco {summary['old_risk_score']} → {summary['new_risk_score']})")
+    except Exception as e:
+        print(f"❌ Erro gerando comparação de sessões: {e}")
+        sys.exit(1)
+    finally:
+        if cache:
+            cache.close()
+        if index:
+            index.close()
+
+def generate_session_report(args, rules, cache=None, index=None, profiler=None):
+    """Coleta a sessão e grava os relatórios pedidos (CLI e --serve)"""
+    # NDJSON é gravado durante a coleta
+    stream = None
+    if args.json and args.format == 'ndjson':
+        stream = NdjsonReportWriter(args.json, args.session)
+    
+    generator = BlueSecAuditReportGenerator(
+        session_id=args.session,
+        results_dir=args.results_dir,
+        logs_dir=args.logs_dir,
+        workers=args.workers,
+        cache=cache,
+        index=index,
+        stream=stream,
+        rules=rules,
+        profiler=profiler,
+        vendors=open_vendor_table(args)
+    )
+    
+    with profile_stage(profiler, 'collect'):
+        generator.collect_session_data()
+    with profile_stage(profiler, 'html', args.output):
+        generator.generate_html_report(args.output)
+    
+    if stream:
+        with profile_stage(profiler, 'ndjson', args.json):
+            generator.finish_ndjson_report()
+    elif args.json:
+        with profile_stage(profiler, 'json', args.json):
+            generator.generate_json_report(args.json)
+    return generator
+
+def run_serve_mode(args, rules):
+    """Executa o serviço residente de relatórios (--serve)"""
+    import sqlite3
+    from report_service import ReportService
+    try:
+        service = ReportService(args, rules, args.socket)
+        service.run()
+    except (OSError, sqlite3.Error) as e:
+        print(f"❌ Erro no serviço de relatórios: {e}")
+        sys.exit(1)
+
+def run_watch_mode(args, rules):
+    """Executa o modo --watch (cache e workers não se aplicam: o estado fica em memória)"""
+    from report_watch import ReportWatcher
+    index = None
+    try:
+        index = open_session_index(args, rules)
+        generator = BlueSecAuditReportGenerator(
+            session_id=args.session,
+            results_dir=args.results_dir,
+            logs_dir=args.logs_dir,
+            index=index,
+            rules=rules,
+            vendors=open_vendor_table(args)
+        )
+        watcher = ReportWatcher(
+            generator,
+            args.output,
+            json_output=args.json,
+            json_format=args.format,
+            debounce=args.watch_debounce,
+            poll_interval=args.watch_interval,
+            force_polling=args.watch_poll,
+            idle_exit=args.watch_idle
+        )
+        watcher.run()
+    except Exception as e:
+        print(f"❌ Erro no modo watch: {e}")
+        sys.exit(1)
+    finally:
+        if index:
+            index.close()
+
 def main():
     parser = argparse.ArgumentParser(description='BlueSecAudit v2.0 - Final Report Generator')
-    parser.add_argument('--session', required=True, help='Session ID to process')
-    parser.add_argument('--output', required=True, help='Output HTML file path')
+    parser.add_argument('--session', help='Session ID to process')
+    parser.add_argument('--output', help='Output HTML file path')
     parser.add_argument('--json', help='Output JSON file path (optional)')
+    parser.add_argument('--format', choices=('json', 'ndjson'), default='json',
+                        help='Machine-readable output format for --json (default: json)')
     parser.add_argument('--results-dir', default='results', help='Results directory')
     parser.add_argument('--logs-dir', default='logs', help='Logs directory')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Number of worker processes for data collection (default: 1)')
+    parser.add_argument('--cache', action='store_true',
+                        help='Reuse parsed results of unchanged files (cache stored in logs dir)')
+    parser.add_argument('--cache-hash', action='store_true',
+                        help='Also validate cached entries by SHA-256 of file contents')
+    parser.add_argument('--cache-max-age', type=int, default=30,
+                        help='Evict cache entries unused for N days (default: 30)')
+    parser.add_argument('--cache-max-size', type=int, default=256,
+                        help='Maximum cache size in MB (default: 256)')
+    parser.add_argument('--index', action='store_true',
+                        help='Locate session files through the session index instead of globbing')
+    parser.add_argument('--reindex', action='store_true',
+                        help='Rebuild the session index from a full scan of the results dir')
+    parser.add_argument('--index-add', nargs='+', metavar='PATH',
+                        help='Register new result files/directories in the session index')
+    parser.add_argument('--query', action='store_true',
+                        help='List indexed items filtered by --session, --target, --since, --until')
+    parser.add_argument('--target', help='Target MAC filter for --query')
+    parser.add_argument('--since', help='Start date (YYYY-MM-DD) filter for --query and --fleet')
+    parser.add_argument('--until', help='End date (YYYY-MM-DD, inclusive) filter for --query and --fleet')
+    parser.add_argument('--fleet', action='store_true',
+                        help='Aggregate several sessions (--sessions or --since/--until, '
+                             'default: all) into a per-target fleet report')
+    parser.add_argument('--sessions', nargs='+', metavar='SESSION',
+                        help='Session IDs to aggregate with --fleet')
+    parser.add_argument('--diff', nargs=2, metavar=('OLD_SESSION', 'NEW_SESSION'),
+                        help='Compare the findings of two sessions (new, resolved, persisting '
+                             'and risk score delta)')
+    parser.add_argument('--rules', metavar='FILE',
+                        help='Detection rules file (default: config/detection-rules.conf)')
+    parser.add_argument('--watch', action='store_true',
+                        help='Keep running and update the reports as result files are created or grow')
+    parser.add_argument('--watch-debounce', type=float, default=2.0, metavar='SECONDS',
+                        help='Minimum interval between report rewrites in --watch mode (default: 2)')
+    parser.add_argument('--watch-poll', action='store_true',
+                        help='Use polling instead of inotify in --watch mode')
+    parser.add_argument('--watch-interval', type=float, default=1.0, metavar='SECONDS',
+                        help='Polling interval in --watch mode (default: 1)')
+    parser.add_argument('--watch-idle', type=int, default=0, metavar='SECONDS',
+                        help='Stop --watch mode after N seconds without changes (default: never)')
+    parser.add_argument('--profile', action='store_true',
+                        help='Record per-stage/per-processor timings and export Prometheus metrics '
+                             'and a Chrome trace')
+    parser.add_argument('--profile-top', type=int, default=10, metavar='N',
+                        help='Number of slowest files kept by --profile (default: 10)')
+    parser.add_argument('--profile-dir', metavar='DIR',
+                        help='Directory for --profile outputs (default: logs dir)')
+    parser.add_argument('--pack', action='store_true',
+                        help='Pack the items of a finished session (--session) into '
+                             '<results-dir>/<session>.session.zip with an embedded member index')
+    parser.add_argument('--pack-compression', choices=('lzma', 'deflate', 'bzip2'), default='lzma',
+                        help='Compression used for --pack members (default: lzma)')
+    parser.add_argument('--pack-remove', action='store_true',
+                        help='Remove the original items after the archive is written and verified')
+    parser.add_argument('--serve', action='store_true',
+                        help='Run a resident report service on a local Unix socket, keeping rules, '
+                             'parse cache and session index loaded (implies --cache and --index); '
+                             'see report_client.py')
+    parser.add_argument('--socket', metavar='PATH',
+                        help='Unix socket for --serve (default: <logs-dir>/report_service.sock)')
+    parser.add_argument('--oui-table', metavar='FILE',
+                        help='Compiled OUI vendor table used for per-vendor rollups '
+                             '(default: config/oui.bin; rollups are omitted when it does not exist)')
+    parser.add_argument('--compile-oui', metavar='SOURCE',
+                        help='Compile the IEEE OUI registry (oui.txt or oui.csv, e.g. '
+                             '/usr/share/ieee-data/oui.txt) into --oui-table and exit')
+    parser.add_argument('--analyze-capture', metavar='FILE',
+                        help='Print a native analysis of a pcap/btsnoop capture and exit')
+    parser.add_argument('--bucket-seconds', type=int, default=60,
+                        help='Rate bucket width in seconds for capture analysis (default: 60)')
+    parser.add_argument('--index-capture', metavar='FILE',
+                        help='Write a time-indexed sidecar (<FILE>.idx) with per-interval packet '
+                             'offsets and advertising/connection counters in one pass, and exit')
+    parser.add_argument('--index-interval', type=int, default=1, metavar='SECONDS',
+                        help='Interval width in seconds for --index-capture (default: 1)')
+    parser.add_argument('--capture-range', metavar='FILE',
+                        help='Print counters for a time range of a capture from its sidecar index '
+                             '(built if missing or stale) and exit; see --around/--range-start')
+    parser.add_argument('--around', metavar='TIMESTAMP',
+                        help='Center of the --capture-range period (ISO 8601, date(1) output or epoch)')
+    parser.add_argument('--range-start', metavar='TIMESTAMP', help='Start of the --capture-range period')
+    parser.add_argument('--range-end', metavar='TIMESTAMP',
+                        help='End of the --capture-range period (default: start + --window)')
+    parser.add_argument('--window', type=float, default=30, metavar='SECONDS',
+                        help='Period length for --around/--range-start (default: 30)')
+    parser.add_argument('--slice-output', metavar='FILE',
+                        help='With --capture-range, also write the records of the period to a new '
+                             'capture, read directly from the indexed offsets')
     
     args = parser.parse_args()
     
+    if args.workers < 1:
+        parser.error('--workers must be >= 1')
+    if args.bucket_seconds < 1:
+        parser.error('--bucket-seconds must be >= 1')
+    if args.index_interval < 1:
+        parser.error('--index-interval must be >= 1')
+    if args.window <= 0:
+        parser.error('--window must be > 0')
+    if args.capture_range and not (args.around or args.range_start):
+        parser.error('--capture-range requires --around or --range-start')
+    if args.around and args.range_start:
+        parser.error('--around cannot be combined with --range-start')
+    if args.profile and (args.watch or args.serve):
+        parser.error('--profile is not supported with --watch or --serve')
+    if args.serve and (args.watch or args.fleet or args.diff):
+        parser.error('--serve cannot be combined with --watch, --fleet or --diff')
+    if args.diff and (args.watch or args.fleet):
+        parser.error('--diff cannot be combined with --watch or --fleet')
+    if args.profile_top < 1:
+        parser.error('--profile-top must be >= 1')
+    if args.watch_debounce < 0 or args.watch_interval <= 0 or args.watch_idle < 0:
+        parser.error('--watch-debounce/--watch-idle must be >= 0 and --watch-interval > 0')
+    for bound in (args.since, args.until):
+        if bound:
+            try:
+                _parse_date_bound(bound)
+            except ValueError:
+                parser.error(f'invalid date: {bound} (expected YYYY-MM-DD)')
+    
+    if args.compile_oui:
+        from report_oui import OuiTable
+        try:
+            count = OuiTable.compile(args.compile_oui, args.oui_table)
+        except (OSError, ValueError) as e:
+            print(f"❌ Erro compilando tabela OUI: {e}")
+            sys.exit(1)
+        print(f"✅ Tabela OUI gerada: {args.oui_table or OuiTable.DEFAULT_PATH} ({count} prefixos)")
+        return
+    
+    if args.analyze_capture:
+        try:
+            run_capture_analysis(args)
+        except (OSError, ValueError) as e:
+            print(f"❌ Erro analisando captura: {e}")
+            sys.exit(1)
+        return
+    
+    if args.index_capture:
+        try:
+            run_capture_index(args)
+        except (OSError, ValueError) as e:
+            print(f"❌ Erro indexando captura: {e}")
+            sys.exit(1)
+        return
+    
+    if args.capture_range:
+        try:
+            run_capture_range(args)
+        except (OSError, ValueError) as e:
+            print(f"❌ Erro consultando período da captura: {e}")
+            sys.exit(1)
+        return
+    
+    try:
+        rules = DetectionRules.load(args.rules)
+    except (OSError, ValueError, configparser.Error) as e:
+        print(f"❌ Erro carregando regras de detecção: {e}")
+        sys.exit(1)
+    
+    if args.serve:
+        run_serve_mode(args, rules)
+        return
+    
+    index_commands = args.reindex or args.index_add or args.query
+    if index_commands:
+        run_index_commands(args, rules)
+        if not args.output:
+            return
+    
+    if args.pack:
+        if not args.session:
+            parser.error('--session is required with --pack')
+        run_pack(args, rules)
+        if not args.output:
+            return
+    
+    if args.fleet:
+        if not args.output:
+            parser.error('--output is required with --fleet')
+        run_fleet_mode(args, rules)
+        return
+    
+    if args.diff:
+        if not args.output:
+            parser.error('--output is required with --diff')
+        run_diff_mode(args, rules)
+        return
+    
+    if not args.session or not args.output:
+        parser.error('--session and --output are required to generate a report')
+    
     print("🚀 BlueSecAudit v2.0 - Final Report Generator")
     print(f"📋 Processando sessão: {args.session}")
     
+    if args.watch:
+        run_watch_mode(args, rules)
+        return
+    
     try:
-        generator = BlueSecAuditReportGenerator(
-            session_id=args.session,
-            results_dir=args.results_dir,
-            logs_dir=args.logs_dir
-        )
-        
-        generator.collect_session_data()
-        generator.generate_html_report(args.output)
-        
-        if args.json:
-            generator.generate_json_report(args.json)
+        cache = open_parse_cache(args, rules)
+        index = open_session_index(args, rules)
+        profiler = ReportProfiler(top=args.profile_top) if args.profile else None
+        try:
+            generate_session_report(args, rules, cache, index, profiler)
+        finally:
+            if cache:
+                cache.close()
+            if index:
+                index.close()
+        if profiler:
+            write_profile(profiler, args, args.session)
         
         print("🎉 Relatório final gerado com sucesso!")
         
@@ -565,4 +3129,4 @@ def main():
         sys.exit(1)
 
 if __name__ == '__main__':
-    main() 
\ No newline at end of file
+    main()
@@ -170,6 +170,9 @@ install_dependencies() {
             # Tentar instalar OBEX (pode não estar disponível em todas as versões)
             local obex_packages="obexftp"
             
+            # Registro OUI do IEEE (fabricantes por MAC nos relatórios, opcional)
+            local oui_packages="ieee-data"
+            
             log_info "Instalando pacotes básicos..."
             if [[ $EUID -eq 0 ]]; then
                 apt-get install -y $basic_packages || {
@@ -206,6 +209,17 @@ install_dependencies() {
                     log_warning "OBEX não disponível - funcionalidade limitada"
                 }
             fi
+            
+            log_info "Tentando instalar registro OUI (opcional)..."
+            if [[ $EUID -eq 0 ]]; then
+                apt-get install -y $oui_packages || {
+                    log_warning "ieee-data não disponível - relatórios sem fabricantes"
+                }
+            else
+                sudo apt-get install -y $oui_packages || {
+                    log_warning "ieee-data não disponível - relatórios sem fabricantes"
+                }
+            fi
             ;;
         "yum")
             if [[ $EUID -eq 0 ]]; then
@@ -418,6 +432,14 @@ EOF
 1122
 EOF
     
+    # Compilar a tabela de fabricantes (OUI) a partir do registro local do IEEE
+    local oui_source="/usr/share/ieee-data/oui.txt"
+    if [[ -f "$oui_source" ]] && command -v python3 &> /dev/null; then
+        python3 generate_final_report.py --compile-oui "$oui_source" --oui-table config/oui.bin || {
+            log_warning "Falha ao compilar tabela OUI - relatórios sem fabricantes"
+        }
+    fi
+    
     log_success "Arquivos de configuração criados"
 }
 
@@ -70,20 +70,10 @@ bluesmack_attack() {
     return 0
 }
 
-# Enumeração SDP avançada
-sdp_enumeration() {
+# Consultas da enumeração SDP com um comando por vez (sem tool_collector.py)
+sdp_enumeration_serial() {
     local target="$1"
-    local output_file="${2:-/tmp/sdp_enum_$$.txt}"
-    
-    validate_mac_address "$target" || return 1
-    
-    log_message "INFO" "Iniciando enumeração SDP em $target"
-    
-    # Verificar conectividade básica
-    if ! l2ping -c 1 -t 5 "$target" >/dev/null 2>&1; then
-        log_message "ERROR" "Dispositivo $target não está alcançável"
-        return 1
-    fi
+    local output_file="$2"
     
     # Enumeração básica de serviços
     echo "=== SDP Service Discovery para $target ===" > "$output_file"
@@ -125,6 +115,29 @@ sdp_enumeration() {
         echo "--- Informações de classe ---" >> "$output_file"
         timeout 10 hcitool info "$target" >> "$output_file" 2>&1 || echo "Informações não disponíveis" >> "$output_file"
     fi
+}
+
+# Enumeração SDP avançada
+sdp_enumeration() {
+    local target="$1"
+    local output_file="${2:-/tmp/sdp_enum_$$.txt}"
+    
+    validate_mac_address "$target" || return 1
+    
+    log_message "INFO" "Iniciando enumeração SDP em $target"
+    
+    # Verificar conectividade básica
+    if ! l2ping -c 1 -t 5 "$target" >/dev/null 2>&1; then
+        log_message "ERROR" "Dispositivo $target não está alcançável"
+        return 1
+    fi
+    
+    # Consultas SDP e informações do dispositivo (em paralelo com tool_collector.py)
+    if has_tool_collector; then
+        collect_tool_output sdp "$target" "$output_file" || return 1
+    else
+        sdp_enumeration_serial "$target" "$output_file" || return 1
+    fi
     
     # Análise de resultados
     local service_count=$(grep -c "Service Name:" "$output_file" 2>/dev/null || echo "0")
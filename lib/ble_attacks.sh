@@ -950,7 +950,7 @@ monitor_ble_traffic() {
         
         # Capturar tráfego BLE específico
         echo "Starting BLE packet capture..."
-        timeout "$duration" hcidump -w "$output_file" -i hci0 2>/dev/null &
+        timeout "$duration" hcidump -B -w "$output_file" -i hci0 2>/dev/null &
         local capture_pid=$!
         
         echo "📡 Capture started (PID: $capture_pid)"
@@ -974,17 +974,31 @@ monitor_ble_traffic() {
             local file_size=$(stat -c%s "$output_file" 2>/dev/null || echo "0")
             echo "📁 Capture file: $output_file (${file_size} bytes)"
             
-            # Análise básica do tráfego capturado
+            # Análise básica do tráfego capturado: uma única passagem pela
+            # captura, que também grava o índice lateral (<captura>.idx)
             echo "📊 Basic traffic analysis:"
-            local packet_count=$(hcidump -r "$output_file" 2>/dev/null | wc -l)
-            echo "  📦 Packets captured: $packet_count"
+            local packet_count advertising connect_requests
+            local index_summary
+            if index_summary=$(index_capture_file "$output_file"); then
+                packet_count=$(awk -F': ' '/^Pacotes:/ {print $2}' <<< "$index_summary")
+                advertising=$(awk -F': ' '/^Advertising:/ {print $2}' <<< "$index_summary")
+                connect_requests=$(awk -F': ' '/^Pedidos de conexão LE:/ {print $2}' <<< "$index_summary")
+                echo "  🗂️ Time index: ${output_file}.idx"
+            else
+                # Sem o gerador: uma passagem do hcidump com todas as contagens
+                read -r packet_count advertising connect_requests < <(
+                    hcidump -r "$output_file" 2>/dev/null | \
+                        awk '{n++} /ADV_IND/ {a++} /CONNECT_REQ/ {c++} END {print n+0, a+0, c+0}'
+                )
+            fi
+            echo "  📦 Packets captured: ${packet_count:-0}"
             
             # Detectar tipos de tráfego
-            if hcidump -r "$output_file" 2>/dev/null | grep -q "ADV_IND"; then
+            if [[ "${advertising:-0}" -gt 0 ]]; then
                 echo "  📢 Advertising packets detected"
             fi
             
-            if hcidump -r "$output_file" 2>/dev/null | grep -q "CONNECT_REQ"; then
+            if [[ "${connect_requests:-0}" -gt 0 ]]; then
                 echo "  🔗 Connection requests detected"
             fi
             
@@ -12,6 +12,37 @@ DEFAULT_ADAPTER="hci0"
 SCAN_TIMEOUT=30
 INQUIRY_LENGTH=8
 MAX_DEVICES=255
+REPORT_GENERATOR="$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)/generate_final_report.py"
+TOOL_COLLECTOR="$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)/tool_collector.py"
+
+# Coleta concorrente da saída das ferramentas (tool_collector.py): os comandos
+# rodam em paralelo e o resultado já analisado vai para o cache do gerador
+collect_tool_output() {
+    local plan="$1"
+    local target="$2"
+    local output_file="$3"
+    
+    python3 "$TOOL_COLLECTOR" "$plan" \
+        --target "$target" \
+        --output "$output_file" \
+        --logs-dir "$(dirname "$TOOL_COLLECTOR")/logs" \
+        --cache
+}
+
+# Coletor disponível (python3 e tool_collector.py)
+has_tool_collector() {
+    command -v python3 >/dev/null 2>&1 && [[ -f "$TOOL_COLLECTOR" ]]
+}
+
+# Índice lateral (<captura>.idx) de uma captura em passagem única: offsets por
+# intervalo de tempo e contadores de advertising/conexão, consultados depois
+# com --capture-range sem reler a captura. Imprime o resumo do índice.
+index_capture_file() {
+    local capture_file="$1"
+    
+    command -v python3 >/dev/null 2>&1 && [[ -f "$REPORT_GENERATOR" ]] || return 1
+    python3 "$REPORT_GENERATOR" --index-capture "$capture_file" 2>/dev/null
+}
 
 # Verificar dependências Bluetooth reais
 check_bluetooth_dependencies() {
@@ -146,14 +177,10 @@ scan_bluetooth_devices() {
     return 0
 }
 
-# Reconnaissance avançado de dispositivo
-device_reconnaissance() {
+# Etapas 1-3 do reconnaissance com um comando por vez (sem tool_collector.py)
+device_reconnaissance_serial() {
     local target="$1"
-    local output_file="${2:-/tmp/recon_${target//:/_}_$$.txt}"
-    
-    validate_mac_address "$target" || return 1
-    
-    echo "🕵️ Iniciando reconnaissance de $target..."
+    local output_file="$2"
     
     # Criar arquivo de saída
     cat > "$output_file" << EOF
@@ -169,8 +196,8 @@ EOF
     if l2ping -c 3 -t 5 "$target" >/dev/null 2>&1; then
         echo "✅ Dispositivo responde a L2CAP ping" | tee -a "$output_file"
         
-        # Medir latência
-        local latency=$(l2ping -c 5 "$target" 2>/dev/null | grep "ping time" | awk '{print $4}' | tail -1)
+        # Medir latência (linhas "44 bytes from <mac> id 0 time 18.59ms")
+        local latency=$(l2ping -c 5 "$target" 2>/dev/null | grep " time " | awk '{print $NF}' | tail -1)
         echo "📶 Latência: ${latency:-N/A}" | tee -a "$output_file"
     else
         echo "❌ Dispositivo não responde a L2CAP ping" | tee -a "$output_file"
@@ -203,6 +230,25 @@ EOF
         echo "❌ Falha na enumeração SDP" | tee -a "$output_file"
     fi
     echo "" >> "$output_file"
+}
+
+# Reconnaissance avançado de dispositivo
+device_reconnaissance() {
+    local target="$1"
+    local output_file="${2:-/tmp/recon_${target//:/_}_$$.txt}"
+    
+    validate_mac_address "$target" || return 1
+    
+    echo "🕵️ Iniciando reconnaissance de $target..."
+    
+    # Etapas 1-3 (conectividade, informações e serviços)
+    if has_tool_collector; then
+        collect_tool_output recon "$target" "$output_file" || \
+            echo "⚠️ Coleta de reconnaissance incompleta"
+    else
+        device_reconnaissance_serial "$target" "$output_file"
+    fi
+    local device_info=$(grep "Device Class:" "$output_file" 2>/dev/null || true)
     
     # 4. Análise de segurança
     echo "4. Análise de segurança..." | tee -a "$output_file"
@@ -266,7 +312,8 @@ start_packet_capture() {
     if command -v hcidump >/dev/null 2>&1; then
         # Usar hcidump
         echo "Usando hcidump para captura..."
-        sudo hcidump -i "$adapter" -w "$output_file" &
+        # Formato btsnoop (-B): lido pela análise nativa e pelo índice de captura
+        sudo hcidump -B -i "$adapter" -w "$output_file" &
         echo $! > "$HCIDUMP_PID_FILE"
         
     elif command -v tshark >/dev/null 2>&1; then
@@ -318,8 +365,13 @@ analyze_captured_traffic() {
     
     echo "🔍 Analisando tráfego capturado..."
     
+    # Análise nativa em passagem única (pcap/btsnoop HCI) sem depender do tshark
+    if command -v python3 >/dev/null 2>&1 && [[ -f "$REPORT_GENERATOR" ]] && \
+        python3 "$REPORT_GENERATOR" --analyze-capture "$pcap_file" > "$output_file" 2>/dev/null; then
+        echo "✅ Análise salva em: $output_file"
+    
     # Análise básica com tshark se disponível
-    if command -v tshark >/dev/null 2>&1; then
+    elif command -v tshark >/dev/null 2>&1; then
         echo "=== ANÁLISE DE TRÁFEGO BLUETOOTH ===" > "$output_file"
         echo "Arquivo: $pcap_file" >> "$output_file"
         echo "Timestamp: $(date)" >> "$output_file"
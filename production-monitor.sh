@@ -35,6 +35,24 @@ monitor_system() {
     find "$LOG_DIR" -name "*.log" -mtime -1 | wc -l | awk '{print "  Recent logs: " $1}'
     echo ""
     
+    # Métricas do último relatório gerado com --profile (textfile do Prometheus)
+    local metrics
+    metrics=$(ls -t "$LOG_DIR"/report_profile_*.prom 2>/dev/null | head -1 || true)
+    if [[ -n "$metrics" ]]; then
+        echo "📈 REPORT METRICS ($(basename "$metrics" .prom)):"
+        grep -E '^bluesecaudit_report_stage_seconds' "$metrics" | \
+            sed -E 's/.*stage="([^"]+)".*\} (.*)/  \1: \2s/'
+        grep -E '^bluesecaudit_report_slowest_file_seconds.*rank="1"' "$metrics" | \
+            sed -E 's/.*processor="([^"]+)",file="([^"]+)".*\} (.*)/  Slowest: \2 (\1) \3s/'
+        echo ""
+    fi
+    
+    # Serviço de relatórios residente (--serve)
+    if python3 "$SCRIPT_DIR/report_client.py" --logs-dir "$LOG_DIR" --ping >/dev/null 2>&1; then
+        echo "🛰️ REPORT SERVICE: running ($LOG_DIR/report_service.sock)"
+        echo ""
+    fi
+    
     # Capturas ativas
     echo "📹 ACTIVE CAPTURES:"
     if pgrep -f "hcidump\|tshark" >/dev/null; then
@@ -77,6 +95,32 @@ monitor_system() {
     echo "================================================"
 }
 
+# Relatório ao vivo de uma sessão (regravado conforme os resultados chegam)
+if [[ "${1:-}" == "--watch" ]]; then
+    if [[ -z "${2:-}" ]]; then
+        echo "Uso: $0 --watch <session_id>"
+        exit 1
+    fi
+    mkdir -p "$LOG_DIR"
+    echo "Live report: $LOG_DIR/live_report_$2.html (Ctrl+C to stop)"
+    exec python3 "$SCRIPT_DIR/generate_final_report.py" \
+        --session "$2" \
+        --results-dir "$RESULTS_DIR" \
+        --logs-dir "$LOG_DIR" \
+        --output "$LOG_DIR/live_report_$2.html" \
+        --json "$LOG_DIR/live_report_$2.json" \
+        --watch
+fi
+
+# Serviço de relatórios residente (pedidos via report_client.py)
+if [[ "${1:-}" == "--serve" ]]; then
+    mkdir -p "$LOG_DIR"
+    exec python3 "$SCRIPT_DIR/generate_final_report.py" \
+        --results-dir "$RESULTS_DIR" \
+        --logs-dir "$LOG_DIR" \
+        --serve
+fi
+
 # Modo contínuo
 if [[ "${1:-}" == "--continuous" ]]; then
     echo "Starting continuous monitoring (Ctrl+C to stop)..."
@@ -0,0 +1,161 @@
+"""
+BlueSecAudit v2.0 - Session Archive
+Arquivo compactado de sessões encerradas (<sessão>.session.zip)
+
+Gravado pelo modo --pack e lido pelo gerador de relatórios sem extração.
+"""
+
+import os
+import json
+import hashlib
+import zipfile
+import datetime
+from pathlib import Path
+
+import generate_final_report as report
+
+class SessionArchive:
+    """Arquivo compactado de uma sessão encerrada (<sessão>.session.zip)
+
+    Um único ZIP por sessão com os arquivos de resultado e as auditorias
+    completas (full_audit_*/) como membros. O diretório central do ZIP
+    permite ler qualquer membro sem descompactar os demais, e o membro
+    INDEX_NAME (JSON) descreve cada item (tipo, target, tamanho, mtime,
+    SHA-256) na ordem de coleta, de modo que o relatório é regerado a
+    partir do arquivo sem extraí-lo.
+    """
+
+    SUFFIX = '.session.zip'
+    INDEX_NAME = '.bluesecaudit-index.json'
+    FORMAT = 'bluesecaudit-session'
+    FORMAT_VERSION = 1
+    # Mesmas opções de --pack-compression
+    COMPRESSION = {
+        'lzma': zipfile.ZIP_LZMA,
+        'deflate': zipfile.ZIP_DEFLATED,
+        'bzip2': zipfile.ZIP_BZIP2
+    }
+    COPY_CHUNK_SIZE = 1024 * 1024
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.zip = zipfile.ZipFile(self.path)
+        try:
+            self.index = json.loads(self.zip.read(self.INDEX_NAME))
+        except KeyError:
+            self.zip.close()
+            raise ValueError(f"índice de membros ausente em {self.path.name}")
+        if self.index.get('format') != self.FORMAT or self.index.get('version') != self.FORMAT_VERSION:
+            self.zip.close()
+            raise ValueError(f"formato de arquivo de sessão não suportado: {self.path.name}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.zip.close()
+
+    @classmethod
+    def path_for(cls, results_dir, session_id):
+        return Path(results_dir) / f"{session_id}{cls.SUFFIX}"
+
+    @classmethod
+    def is_archive(cls, path):
+        return path.name.endswith(cls.SUFFIX)
+
+    @classmethod
+    def top_level_names(cls, path):
+        """Nomes dos itens do diretório de resultados guardados no arquivo"""
+        with cls(path) as archive:
+            return {member['name'].split('/', 1)[0] for member in archive.index['members']}
+
+    def items(self):
+        """Itens na ordem de coleta: ('file', membro) ou ('dir', nome, relatório, membros)"""
+        audits = {}
+        order = []
+        for entry in self.index['members']:
+            member = report.ArchiveMember(self.zip, self.zip.getinfo(entry['name']))
+            if entry['kind'] == 'file':
+                order.append(('file', member))
+                continue
+            directory = entry['name'].split('/', 1)[0]
+            if directory not in audits:
+                audits[directory] = [None, []]
+                order.append(('dir', directory))
+            logical = report._logical_name(member.name)
+            if logical == 'audit_report.html':
+                audits[directory][0] = member
+            elif logical.endswith('.txt'):
+                audits[directory][1].append(member)
+        
+        for item in order:
+            if item[0] == 'file':
+                yield item
+            else:
+                yield ('dir', item[1], *audits[item[1]])
+
+    @classmethod
+    def pack(cls, session_id, tasks, results_dir, rules, compression='lzma'):
+        """Grava o arquivo da sessão com os itens informados e retorna (caminho, índice)"""
+        archive_path = cls.path_for(results_dir, session_id)
+        tmp_file = archive_path.with_name(archive_path.name + '.tmp')
+        members = []
+        try:
+            with zipfile.ZipFile(tmp_file, 'w', allowZip64=True) as zf:
+                for kind, path in tasks:
+                    if kind == 'dir':
+                        for member in sorted(p for p in path.iterdir() if p.is_file()):
+                            members.append(cls._add_member(zf, member, f"{path.name}/{member.name}",
+                                                           'audit', rules, compression))
+                    else:
+                        members.append(cls._add_member(zf, path, path.name, 'file', rules, compression))
+                
+                index = {
+                    'format': cls.FORMAT,
+                    'version': cls.FORMAT_VERSION,
+                    'session_id': session_id,
+                    'created_at': datetime.datetime.now().isoformat(),
+                    'members': members
+                }
+                zf.writestr(cls.INDEX_NAME, json.dumps(index, indent=2, ensure_ascii=False),
+                            compress_type=zipfile.ZIP_DEFLATED)
+            
+            # Conferir CRCs e índice antes de substituir
+            with cls(tmp_file) as archive:
+                bad = archive.zip.testzip()
+                if bad is not None:
+                    raise ValueError(f"membro corrompido no arquivo: {bad}")
+                if len(archive.index['members']) != len(members):
+                    raise ValueError("índice de membros inconsistente")
+            os.replace(tmp_file, archive_path)
+        except BaseException:
+            tmp_file.unlink(missing_ok=True)
+            raise
+        return archive_path, index
+
+    @classmethod
+    def _add_member(cls, zf, path, name, kind, rules, compression):
+        """Copia um arquivo para o ZIP em blocos, calculando o SHA-256"""
+        info = zipfile.ZipInfo.from_file(path, name)
+        # Arquivos já comprimidos são guardados como estão
+        info.compress_type = zipfile.ZIP_STORED if report._is_compressed(path.name) else cls.COMPRESSION[compression]
+        digest = hashlib.sha256()
+        with open(path, 'rb') as source, zf.open(info, 'w', force_zip64=True) as target:
+            for chunk in iter(lambda: source.read(cls.COPY_CHUNK_SIZE), b''):
+                digest.update(chunk)
+                target.write(chunk)
+        
+        stat = path.stat()
+        mac = report.FILENAME_MAC_PATTERN.search(path.name if kind == 'file' else path.parent.name)
+        return {
+            'name': name,
+            'kind': kind,
+            'type': rules.classify(report._logical_name(path.name)),
+            'target': mac.group(1).replace('_', ':').upper() if mac else None,
+            'size': stat.st_size,
+            'mtime': stat.st_mtime,
+            'sha256': digest.hexdigest()
+        }
@@ -0,0 +1,280 @@
+"""
+BlueSecAudit v2.0 - Report Cache and Session Index
+Cache de parsing dos arquivos de resultado e índice de sessões (SQLite)
+
+Abertos pelo gerador de relatórios com --cache e --index e pelos modos
+--reindex, --query e --index-add.
+"""
+
+import os
+import re
+import json
+import time
+import hashlib
+import sqlite3
+from pathlib import Path
+
+import generate_final_report as report
+from report_archive import SessionArchive
+from report_capture import CaptureIndex
+
+class ParseCache:
+    """Cache persistente (SQLite) dos fragmentos já extraídos de cada arquivo
+
+    A chave é (caminho, tamanho, mtime_ns) e, opcionalmente, o SHA-256 do
+    conteúdo (mesma ideia de calculate_file_hash em lib/utils.sh). Entradas
+    antigas são removidas por idade ou quando o cache excede o limite de tamanho.
+    """
+
+    # Incrementar sempre que o formato dos fragmentos mudar
+    SCHEMA_VERSION = 8
+    HASH_CHUNK_SIZE = 1024 * 1024
+
+    def __init__(self, db_path, use_hash=False, max_age_days=30, max_size_mb=256, namespace=''):
+        self.db_path = Path(db_path)
+        self.use_hash = use_hash
+        self.max_age = max_age_days * 86400
+        self.max_size = max_size_mb * 1024 * 1024
+        self.hits = 0
+        self.misses = 0
+        self._keys = {}
+        
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.db_path))
+        version = self.conn.execute('PRAGMA user_version').fetchone()[0]
+        if version != self.SCHEMA_VERSION:
+            self.conn.execute('DROP TABLE IF EXISTS fragments')
+            self.conn.execute('DROP TABLE IF EXISTS meta')
+            self.conn.execute(f'PRAGMA user_version = {self.SCHEMA_VERSION}')
+        
+        # Fragmentos dependem das regras de detecção: regras novas invalidam o cache
+        self.conn.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)')
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'namespace'").fetchone()
+        if row is None or row[0] != namespace:
+            self.conn.execute('DROP TABLE IF EXISTS fragments')
+            self.conn.execute("INSERT OR REPLACE INTO meta VALUES ('namespace', ?)", (namespace,))
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS fragments ('
+            'path TEXT PRIMARY KEY, signature TEXT NOT NULL, digest TEXT, '
+            'fragment TEXT NOT NULL, accessed REAL NOT NULL)'
+        )
+
+    def _file_digest(self, file_path, digest=None):
+        """Calcula SHA-256 do arquivo em blocos"""
+        digest = digest or hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(self.HASH_CHUNK_SIZE), b''):
+                digest.update(chunk)
+        return digest
+
+    def _compute_key(self, kind, path):
+        """Calcula assinatura (tamanho/mtime) e hash opcional de um item"""
+        if kind == 'dir':
+            members = sorted(p for p in path.iterdir() if p.is_file())
+        else:
+            members = [path]
+        
+        parts = []
+        for member in members:
+            stat = member.stat()
+            parts.append(f"{member.name}:{stat.st_size}:{stat.st_mtime_ns}")
+        signature = '|'.join(parts)
+        
+        digest = None
+        if self.use_hash:
+            hasher = hashlib.sha256()
+            for member in members:
+                hasher.update(member.name.encode('utf-8'))
+                self._file_digest(member, hasher)
+            digest = hasher.hexdigest()
+        return signature, digest
+
+    def lookup(self, kind, path):
+        """Retorna o fragmento em cache se o item não mudou, senão None"""
+        key_path = str(Path(path).resolve())
+        try:
+            key = self._compute_key(kind, Path(path))
+        except OSError:
+            self.misses += 1
+            return None
+        self._keys[key_path] = key
+        
+        row = self.conn.execute(
+            'SELECT signature, digest, fragment FROM fragments WHERE path = ?',
+            (key_path,)
+        ).fetchone()
+        if row is None or row[0] != key[0] or (self.use_hash and row[1] != key[1]):
+            self.misses += 1
+            return None
+        
+        self.hits += 1
+        self.conn.execute('UPDATE fragments SET accessed = ? WHERE path = ?', (time.time(), key_path))
+        return json.loads(row[2])
+
+    def store(self, kind, path, fragment):
+        """Grava o fragmento de um item recém-processado"""
+        key_path = str(Path(path).resolve())
+        key = self._keys.pop(key_path, None)
+        if key is None:
+            try:
+                key = self._compute_key(kind, Path(path))
+            except OSError:
+                return
+        self.conn.execute(
+            'INSERT OR REPLACE INTO fragments (path, signature, digest, fragment, accessed) '
+            'VALUES (?, ?, ?, ?, ?)',
+            (key_path, key[0], key[1], json.dumps(fragment, ensure_ascii=False), time.time())
+        )
+
+    def flush(self):
+        """Remove entradas expiradas, aplica o limite de tamanho e persiste"""
+        self.conn.execute('DELETE FROM fragments WHERE accessed < ?', (time.time() - self.max_age,))
+        
+        total = self.conn.execute('SELECT COALESCE(SUM(LENGTH(fragment)), 0) FROM fragments').fetchone()[0]
+        if total > self.max_size:
+            kept = 0
+            stale = []
+            for path, size in self.conn.execute(
+                'SELECT path, LENGTH(fragment) FROM fragments ORDER BY accessed DESC'
+            ):
+                kept += size
+                if kept > self.max_size:
+                    stale.append((path,))
+            self.conn.executemany('DELETE FROM fragments WHERE path = ?', stale)
+        
+        self.conn.commit()
+
+    def close(self):
+        """Persiste e fecha o cache"""
+        self.flush()
+        self.conn.close()
+
+class SessionIndex:
+    """Índice persistente (SQLite) dos itens de resultado por sessão, target e tipo
+
+    Evita varrer todo o diretório de resultados a cada relatório: os itens são
+    registrados incrementalmente (--index-add) e consultados por chave.
+    """
+
+    SCHEMA_VERSION = 1
+    SESSION_PATTERN = re.compile(r'bs_\d+_\d+')
+    MAC_PATTERN = report.FILENAME_MAC_PATTERN
+
+    def __init__(self, results_dir, db_path=None, rules=None):
+        self.results_dir = Path(results_dir)
+        self.rules = rules or report.DetectionRules.load()
+        self.db_path = Path(db_path) if db_path else self.results_dir / '.session_index.db'
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.db_path))
+        version = self.conn.execute('PRAGMA user_version').fetchone()[0]
+        if version != self.SCHEMA_VERSION:
+            self.conn.execute('DROP TABLE IF EXISTS entries')
+            self.conn.execute(f'PRAGMA user_version = {self.SCHEMA_VERSION}')
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS entries ('
+            'name TEXT PRIMARY KEY, kind TEXT NOT NULL, session_id TEXT, '
+            'target TEXT, attack_type TEXT, mtime REAL)'
+        )
+        self.conn.execute('CREATE INDEX IF NOT EXISTS idx_entries_session ON entries(session_id)')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS idx_entries_target ON entries(target)')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS idx_entries_mtime ON entries(mtime)')
+
+    def _describe(self, path, session_id=None):
+        """Extrai sessão, target e tipo a partir do nome do item"""
+        name = path.name
+        if path.is_dir():
+            if not name.startswith('full_audit_'):
+                return None
+            kind, attack_type = 'dir', 'Full Audit'
+        elif path.is_file():
+            if CaptureIndex.is_sidecar(path):
+                return None
+            if SessionArchive.is_archive(path):
+                kind, attack_type = 'archive', 'Session Archive'
+            else:
+                kind, attack_type = 'file', self.rules.classify(report._logical_name(name))
+        else:
+            return None
+        
+        if session_id is None:
+            match = self.SESSION_PATTERN.search(name)
+            if not match:
+                return None
+            session_id = match.group(0)
+        
+        mac = self.MAC_PATTERN.search(name)
+        target = mac.group(1).replace('_', ':').upper() if mac else None
+        return (name, kind, session_id, target, attack_type, path.stat().st_mtime)
+
+    def register(self, path, session_id=None):
+        """Registra (ou atualiza) um item do diretório de resultados"""
+        path = Path(path)
+        if path.parent.resolve() != self.results_dir.resolve():
+            path = self.results_dir / path.name
+        try:
+            entry = self._describe(path, session_id)
+        except OSError:
+            return False
+        if entry is None:
+            return False
+        self.conn.execute('INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)', entry)
+        return True
+
+    def unregister(self, path):
+        """Remove um item do índice (ex.: arquivos movidos para o arquivo da sessão)"""
+        self.conn.execute('DELETE FROM entries WHERE name = ?', (Path(path).name,))
+
+    def rebuild(self):
+        """Reconstrói o índice a partir de uma varredura completa do diretório"""
+        self.conn.execute('DELETE FROM entries')
+        count = 0
+        with os.scandir(self.results_dir) as entries:
+            for entry in entries:
+                if self.register(Path(entry.path)):
+                    count += 1
+        self.conn.commit()
+        return count
+
+    def session_items(self, session_id):
+        """Lista os itens (tipo, caminho) de uma sessão"""
+        rows = self.conn.execute(
+            'SELECT kind, name FROM entries WHERE session_id = ? ORDER BY kind DESC, name',
+            (session_id,)
+        )
+        return [(kind, self.results_dir / name) for kind, name in rows]
+
+    def query(self, session_id=None, target=None, since=None, until=None):
+        """Consulta itens por sessão, target e intervalo de datas (mtime)"""
+        clauses, params = [], []
+        if session_id:
+            clauses.append('session_id = ?')
+            params.append(session_id)
+        if target:
+            clauses.append('target = ?')
+            params.append(target.upper())
+        if since is not None:
+            clauses.append('mtime >= ?')
+            params.append(since)
+        if until is not None:
+            clauses.append('mtime < ?')
+            params.append(until)
+        
+        sql = 'SELECT session_id, target, attack_type, name, mtime FROM entries'
+        if clauses:
+            sql += ' WHERE ' + ' AND '.join(clauses)
+        sql += ' ORDER BY mtime, name'
+        return self.conn.execute(sql, params).fetchall()
+
+    def commit(self):
+        """Persiste os itens registrados desde a última gravação"""
+        self.conn.commit()
+
+    def sessions(self):
+        """Lista as sessões registradas no índice"""
+        rows = self.conn.execute('SELECT DISTINCT session_id FROM entries WHERE session_id IS NOT NULL')
+        return [session_id for session_id, in rows]
+
+    def close(self):
+        """Persiste e fecha o índice"""
+        self.conn.commit()
+        self.conn.close()
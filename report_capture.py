@@ -0,0 +1,543 @@
+"""
+BlueSecAudit v2.0 - Capture Analysis
+Leitura de capturas HCI (pcap/btsnoop) e índice lateral por intervalos de tempo
+
+Usado pelo gerador de relatórios para as capturas da sessão e pelos modos
+--analyze-capture, --index-capture e --capture-range.
+"""
+
+import os
+import json
+import mmap
+import struct
+import bisect
+import datetime
+from pathlib import Path
+
+import generate_final_report as report
+
+class CaptureAnalyzer:
+    """Leitor nativo de capturas HCI (pcap e btsnoop) em uma única passagem
+
+    O arquivo é mapeado em memória (mmap) e os registros são percorridos por
+    offset com struct.unpack_from, sem criar objetos por pacote. Apenas
+    contadores agregados são mantidos, então capturas de vários GB são
+    analisadas com memória limitada e sem depender do tshark.
+    """
+
+    HCI_PACKET_TYPES = {1: 'Command', 2: 'ACL Data', 3: 'SCO Data', 4: 'Event', 5: 'ISO Data'}
+    L2CAP_PSMS = {
+        0x0001: 'SDP', 0x0003: 'RFCOMM', 0x0005: 'TCS-BIN', 0x000F: 'BNEP',
+        0x0011: 'HID Control', 0x0013: 'HID Interrupt', 0x0017: 'AVCTP',
+        0x0019: 'AVDTP', 0x001B: 'AVCTP Browsing', 0x001F: 'ATT', 0x0027: 'EATT'
+    }
+    # Opcodes do Linux monitor -> tipo de pacote HCI
+    MONITOR_OPCODES = {2: 1, 3: 4, 4: 2, 5: 2, 6: 3, 7: 3, 18: 5, 19: 5}
+    # Datalinks btsnoop e linktypes pcap suportados
+    BTSNOOP_H1, BTSNOOP_H4, BTSNOOP_MONITOR = 1001, 1002, 2001
+    PCAP_H4, PCAP_H4_PHDR, PCAP_MONITOR = 187, 201, 254
+    # Microssegundos entre 0000-01-01 (epoch btsnoop) e 1970-01-01
+    BTSNOOP_EPOCH_DELTA = 0x00dcddb30f2f8000
+
+    BTSNOOP_RECORD = struct.Struct('>IIIIq')
+    HEADER_SIZES = {'btsnoop': 16, 'pcap': 24}
+    STREAM_CHUNK_SIZE = 1024 * 1024
+    # Maior registro aceito na leitura em streaming (pacotes HCI têm até 64 KB);
+    # um tamanho acima disso é um registro corrompido e encerra a varredura,
+    # como o fim do arquivo mapeado
+    STREAM_RECORD_LIMIT = 1024 * 1024
+    U16LE = struct.Struct('<H')
+    U16LE_PAIR = struct.Struct('<HH')
+    U16BE_PAIR = struct.Struct('>HH')
+
+    # Opcodes HCI de LE Create Connection e LE Extended Create Connection
+    LE_CREATE_CONNECTION = (0x200D, 0x2043)
+    # Subeventos LE Meta: relatórios de advertising (legado e estendido) e conexão completa
+    LE_ADVERTISING_REPORTS = (0x02, 0x0D)
+    LE_CONNECTION_COMPLETE = (0x01, 0x0A, 0x29)
+
+    def __init__(self, bucket_seconds=60, index_seconds=None):
+        self.bucket_seconds = bucket_seconds
+        # Com index_seconds, os contadores guardam também o offset do primeiro
+        # registro e os totais de cada intervalo (ver CaptureIndex)
+        self.index_seconds = index_seconds
+
+    def analyze(self, file_path, state=None):
+        """Analisa uma captura e retorna estatísticas agregadas
+
+        Se state (dicionário mantido pelo chamador) for informado, a
+        varredura continua a partir do último registro completo da chamada
+        anterior: capturas em crescimento são lidas apenas na parte nova.
+        Capturas comprimidas (.gz/.xz/.zst) ou dentro de um arquivo de
+        sessão são sempre lidas por inteiro.
+        """
+        if isinstance(file_path, report.ArchiveMember) or report._is_compressed(Path(file_path).name):
+            return self._analyze_stream(file_path)
+        
+        file_path = Path(file_path)
+        size = file_path.stat().st_size
+        if size == 0:
+            raise ValueError("captura vazia")
+        if state is not None and state.get('pos', 0) > size:
+            # Arquivo truncado ou substituído: recomeçar
+            state.clear()
+        
+        with open(file_path, 'rb') as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                stats = self._scan_mapped(mm, size, state)
+        
+        stats['file'] = str(file_path)
+        stats['size'] = size
+        return stats
+
+    def _analyze_stream(self, file_path):
+        """Analisa a captura direto do descompressor, em blocos
+
+        Os registros de pcap e btsnoop são sequenciais: cada bloco é varrido
+        com o cabeçalho do arquivo na frente (de onde os scanners leem o
+        formato) e o registro incompleto do fim passa para o bloco seguinte.
+        A memória fica limitada a um bloco, sem cópia em disco. Os offsets
+        de registro são relativos ao bloco, por isso capturas comprimidas
+        não têm índice lateral.
+        """
+        with report.open_result_binary(file_path) as source:
+            head = self._read_exactly(source, self.HEADER_SIZES['pcap'])
+            if not head:
+                raise ValueError("captura vazia")
+            scanner = self._detect_format(head[:8])
+            header_size = self.HEADER_SIZES[scanner]
+            if len(head) < header_size:
+                raise ValueError("cabeçalho de captura incompleto")
+            header, pending = head[:header_size], head[header_size:]
+            scan = self._scan_btsnoop if scanner == 'btsnoop' else self._scan_pcap
+            c = self._new_counters()
+            # Valida o cabeçalho mesmo sem nenhum registro
+            _, linktype = scan(header, header_size, c)
+            
+            size = len(head)
+            for chunk in iter(lambda: source.read(self.STREAM_CHUNK_SIZE), b''):
+                size += len(chunk)
+                if len(pending) > self.STREAM_RECORD_LIMIT:
+                    # Registro corrompido: só contar o restante
+                    continue
+                block = header + pending + chunk
+                pos, _ = scan(block, len(block), c, header_size)
+                pending = block[pos:]
+        
+        # Registro incompleto ou bytes sobrando no fim do arquivo
+        c['truncated'] = bool(pending)
+        stats = self._finish(c, scanner, linktype)
+        stats['file'] = str(file_path)
+        stats['size'] = size
+        return stats
+
+    @staticmethod
+    def _read_exactly(source, count):
+        """Lê count bytes (menos só no fim); descompressores podem devolver leituras curtas"""
+        data = b''
+        while len(data) < count:
+            chunk = source.read(count - len(data))
+            if not chunk:
+                break
+            data += chunk
+        return data
+
+    def _detect_format(self, magic):
+        """Formato da captura pelos primeiros bytes"""
+        if magic == b'btsnoop\0':
+            return 'btsnoop'
+        if magic[:4] in (b'\xd4\xc3\xb2\xa1', b'\xa1\xb2\xc3\xd4',
+                         b'\x4d\x3c\xb2\xa1', b'\xa1\xb2\x3c\x4d'):
+            return 'pcap'
+        if magic[:4] == b'\x0a\x0d\x0d\x0a':
+            raise ValueError("formato pcapng não suportado")
+        raise ValueError("formato de captura desconhecido")
+
+    def _scan_mapped(self, mm, size, state):
+        """Identifica o formato e percorre os registros de uma captura mapeada"""
+        scanner = state['scanner'] if state else self._detect_format(mm[:8])
+        
+        c = state['counters'] if state else self._new_counters()
+        pos = state['pos'] if state else None
+        scan = self._scan_btsnoop if scanner == 'btsnoop' else self._scan_pcap
+        pos, linktype = scan(mm, size, c, pos)
+        
+        # Registro incompleto ou bytes sobrando no fim do arquivo
+        c['truncated'] = pos < size
+        if state is not None:
+            state.update(scanner=scanner, counters=c, pos=pos)
+        
+        return self._finish(c, scanner, linktype)
+
+    def _new_counters(self):
+        """Cria o estado agregado da varredura"""
+        return {
+            'packets': 0, 'bytes': 0, 'original_bytes': 0,
+            'first_ts': None, 'last_ts': None, 'truncated': False,
+            'types': {}, 'psms': {}, 'handles': {},
+            'bucket_packets': {}, 'bucket_bytes': {},
+            'le': [0, 0, 0], 'intervals': {}
+        }
+
+    def _count_packet(self, c, mm, ptype, offset, length, ts_us, incl_len, orig_len, record):
+        """Atualiza contadores para um pacote HCI (payload sem o byte de tipo)
+
+        record é o offset do registro no arquivo (início do cabeçalho), usado
+        pelo índice de intervalos.
+        """
+        c['packets'] += 1
+        c['bytes'] += incl_len
+        c['original_bytes'] += orig_len
+        if c['first_ts'] is None:
+            c['first_ts'] = ts_us
+        c['last_ts'] = ts_us
+        
+        bucket = ts_us // (self.bucket_seconds * 1000000)
+        c['bucket_packets'][bucket] = c['bucket_packets'].get(bucket, 0) + 1
+        c['bucket_bytes'][bucket] = c['bucket_bytes'].get(bucket, 0) + incl_len
+        
+        types = c['types']
+        types[ptype] = types.get(ptype, 0) + 1
+        
+        # Eventos LE: [relatórios de advertising, pedidos de conexão, conexões]
+        le = None
+        if ptype == 4:
+            if length >= 4 and mm[offset] == 0x3E:
+                subevent = mm[offset + 2]
+                if subevent in self.LE_ADVERTISING_REPORTS:
+                    le = (mm[offset + 3], 0, 0)
+                elif subevent in self.LE_CONNECTION_COMPLETE and mm[offset + 3] == 0:
+                    le = (0, 0, 1)
+        elif ptype == 1 and length >= 2:
+            if self.U16LE.unpack_from(mm, offset)[0] in self.LE_CREATE_CONNECTION:
+                le = (0, 1, 0)
+        if le:
+            totals = c['le']
+            totals[0] += le[0]
+            totals[1] += le[1]
+            totals[2] += le[2]
+        
+        if self.index_seconds:
+            interval = ts_us // (self.index_seconds * 1000000)
+            entry = c['intervals'].get(interval)
+            if entry is None:
+                # [offset do primeiro registro, pacotes, bytes, advertising, pedidos, conexões]
+                entry = c['intervals'][interval] = [record, 0, 0, 0, 0, 0]
+            entry[1] += 1
+            entry[2] += incl_len
+            if le:
+                entry[3] += le[0]
+                entry[4] += le[1]
+                entry[5] += le[2]
+        
+        if ptype != 2 or length < 4:
+            return
+        
+        header, = self.U16LE.unpack_from(mm, offset)
+        handle = header & 0x0fff
+        handles = c['handles']
+        handles[handle] = handles.get(handle, 0) + 1
+        
+        # Primeiro fragmento com cabeçalho L2CAP: procurar pedidos de conexão
+        if (header >> 12) & 0x3 not in (0, 2) or length < 14:
+            return
+        _, cid = self.U16LE_PAIR.unpack_from(mm, offset + 4)
+        code = mm[offset + 8]
+        if (cid == 0x0001 and code == 0x02) or (cid == 0x0005 and code == 0x14):
+            psm, = self.U16LE.unpack_from(mm, offset + 12)
+            psms = c['psms']
+            psms[psm] = psms.get(psm, 0) + 1
+
+    def _scan_btsnoop(self, mm, size, c, pos=None):
+        """Percorre os registros de um arquivo btsnoop a partir de pos"""
+        datalink = struct.unpack_from('>I', mm, 12)[0]
+        if datalink not in (self.BTSNOOP_H1, self.BTSNOOP_H4, self.BTSNOOP_MONITOR):
+            raise ValueError(f"datalink btsnoop não suportado: {datalink}")
+        
+        record = self.BTSNOOP_RECORD
+        count_packet = self._count_packet
+        delta = self.BTSNOOP_EPOCH_DELTA
+        pos = 16 if pos is None else pos
+        
+        while pos + 24 <= size:
+            orig_len, incl_len, flags, _, ts = record.unpack_from(mm, pos)
+            start, data = pos, pos + 24
+            if data + incl_len > size:
+                break
+            pos = data + incl_len
+            
+            if datalink == self.BTSNOOP_H4:
+                if incl_len < 1:
+                    continue
+                ptype, data, length = mm[data], data + 1, incl_len - 1
+            elif datalink == self.BTSNOOP_H1:
+                # Bit 1: comando/evento; bit 0: direção (0 = enviado)
+                if flags & 0x02:
+                    ptype = 4 if flags & 0x01 else 1
+                else:
+                    ptype = 2
+                length = incl_len
+            else:
+                ptype = self.MONITOR_OPCODES.get(flags & 0xffff)
+                if ptype is None:
+                    continue
+                length = incl_len
+            count_packet(c, mm, ptype, data, length, ts - delta, incl_len, orig_len, start)
+        
+        return pos, datalink
+
+    def _scan_pcap(self, mm, size, c, pos=None):
+        """Percorre os registros de um arquivo pcap clássico a partir de pos"""
+        magic = mm[:4]
+        endian = '<' if magic in (b'\xd4\xc3\xb2\xa1', b'\x4d\x3c\xb2\xa1') else '>'
+        nanoseconds = magic in (b'\x4d\x3c\xb2\xa1', b'\xa1\xb2\x3c\x4d')
+        linktype = struct.unpack_from(endian + 'I', mm, 20)[0] & 0x0fffffff
+        if linktype not in (self.PCAP_H4, self.PCAP_H4_PHDR, self.PCAP_MONITOR):
+            raise ValueError(f"linktype pcap não suportado: {linktype}")
+        
+        record = struct.Struct(endian + 'IIII')
+        count_packet = self._count_packet
+        divisor = 1000 if nanoseconds else 1
+        pos = 24 if pos is None else pos
+        
+        while pos + 16 <= size:
+            ts_sec, ts_frac, incl_len, orig_len = record.unpack_from(mm, pos)
+            start, data = pos, pos + 16
+            if data + incl_len > size:
+                break
+            pos = data + incl_len
+            ts_us = ts_sec * 1000000 + ts_frac // divisor
+            
+            if linktype == self.PCAP_MONITOR:
+                if incl_len < 4:
+                    continue
+                _, opcode = self.U16BE_PAIR.unpack_from(mm, data)
+                ptype = self.MONITOR_OPCODES.get(opcode)
+                if ptype is None:
+                    continue
+                data, length = data + 4, incl_len - 4
+            else:
+                skip = 4 if linktype == self.PCAP_H4_PHDR else 0
+                if incl_len < skip + 1:
+                    continue
+                ptype = mm[data + skip]
+                data, length = data + skip + 1, incl_len - skip - 1
+            count_packet(c, mm, ptype, data, length, ts_us, incl_len, orig_len, start)
+        
+        return pos, linktype
+
+    def _finish(self, c, capture_format, linktype):
+        """Converte os contadores em um dicionário serializável (horários em UTC)"""
+        def iso(ts_us):
+            if ts_us is None:
+                return None
+            return datetime.datetime.fromtimestamp(ts_us / 1000000, datetime.timezone.utc).isoformat()
+        
+        width = self.bucket_seconds * 1000000
+        buckets = [
+            [iso(bucket * width), c['bucket_packets'][bucket], c['bucket_bytes'][bucket]]
+            for bucket in sorted(c['bucket_packets'])
+        ]
+        peak = max(c['bucket_packets'].values(), default=0)
+        duration = (c['last_ts'] - c['first_ts']) / 1000000 if c['packets'] else 0
+        
+        return {
+            'format': capture_format,
+            'linktype': linktype,
+            'packets': c['packets'],
+            'bytes': c['bytes'],
+            'original_bytes': c['original_bytes'],
+            'first_packet': iso(c['first_ts']),
+            'last_packet': iso(c['last_ts']),
+            'duration': round(duration, 3),
+            'truncated': c['truncated'],
+            'packet_types': {
+                self.HCI_PACKET_TYPES.get(ptype, f'0x{ptype:02x}'): count
+                for ptype, count in sorted(c['types'].items())
+            },
+            'l2cap_psms': {
+                f"0x{psm:04x} ({self.L2CAP_PSMS.get(psm, 'Dynamic')})": count
+                for psm, count in sorted(c['psms'].items())
+            },
+            'acl_handles': {
+                f'0x{handle:04x}': count for handle, count in sorted(c['handles'].items())
+            },
+            'le_events': dict(zip(CaptureIndex.LE_COUNTERS, c['le'])),
+            'bucket_seconds': self.bucket_seconds,
+            'rate_buckets': buckets,
+            'peak_packets_per_second': round(peak / self.bucket_seconds, 2)
+        }
+
+class CaptureIndex:
+    """Índice lateral (<captura>.idx) de uma captura HCI por intervalos de tempo
+
+    Gerado na mesma passagem do CaptureAnalyzer: para cada intervalo de
+    interval_seconds com pacotes guarda o offset do primeiro registro e os
+    contadores do intervalo (pacotes, bytes, relatórios de advertising,
+    pedidos de conexão LE e conexões LE), além das estatísticas completas
+    da captura. A consulta de um período ("os 30 s em torno deste ataque")
+    soma os intervalos localizados por bisect, e o recorte do período é
+    copiado a partir do offset indexado, sem reler a captura. Os limites do
+    período são arredondados para os intervalos; o recorte supõe registros
+    em ordem cronológica, como gravados pelo hcidump e pelo btmon.
+
+    Layout: cabeçalho (magic, segundos por intervalo, entradas, tamanho e
+    mtime da captura, bytes indexados, tamanho das estatísticas), entradas
+    de tamanho fixo ordenadas por tempo e as estatísticas em JSON. O índice
+    vale enquanto o tamanho e o mtime da captura não mudarem.
+    """
+
+    SUFFIX = '.idx'
+    MAGIC = b'BSACIX2\0'
+    HEADER = struct.Struct('<8sIIQqQI')
+    # Início do intervalo (µs), offset, pacotes, bytes e os contadores LE
+    ENTRY = struct.Struct('<qQIIIII')
+    LE_COUNTERS = ('advertising_reports', 'connect_requests', 'connections')
+    COUNTERS = ('packets', 'bytes') + LE_COUNTERS
+    # Cabeçalho de arquivo de cada formato, repetido nos recortes
+    FILE_HEADER_SIZE = {'pcap': 24, 'btsnoop': 16}
+    COPY_CHUNK_SIZE = 1024 * 1024
+    _loaded = {}
+
+    def __init__(self, path):
+        self.path = Path(path)
+        data = self.path.read_bytes()
+        if len(data) < self.HEADER.size:
+            raise ValueError(f"índice de captura inválido: {self.path}")
+        (magic, self.interval_seconds, count, self.capture_size, self.capture_mtime_ns,
+         self.indexed_bytes, stats_size) = self.HEADER.unpack_from(data, 0)
+        stats_offset = self.HEADER.size + count * self.ENTRY.size
+        if magic != self.MAGIC or stats_offset + stats_size != len(data):
+            raise ValueError(f"índice de captura inválido: {self.path}")
+        self.entries = list(self.ENTRY.iter_unpack(data[self.HEADER.size:stats_offset]))
+        self._starts = [entry[0] for entry in self.entries]
+        self.stats = json.loads(data[stats_offset:])
+
+    @classmethod
+    def path_for(cls, capture):
+        capture = Path(str(capture))
+        return capture.with_name(capture.name + cls.SUFFIX)
+
+    @classmethod
+    def is_sidecar(cls, path):
+        """Índices laterais não são itens de resultado da sessão"""
+        return path.name.endswith(cls.SUFFIX)
+
+    @classmethod
+    def load(cls, capture):
+        """Índice da captura, ou None se não existir, for inválido ou estiver desatualizado"""
+        path = cls.path_for(capture)
+        try:
+            st = path.stat()
+            capture_st = Path(str(capture)).stat()
+        except OSError:
+            return None
+        key = str(path.resolve())
+        stamp = (st.st_mtime_ns, st.st_size)
+        loaded = cls._loaded.get(key)
+        if loaded is None or loaded[0] != stamp:
+            try:
+                loaded = cls._loaded[key] = (stamp, cls(path))
+            except (OSError, ValueError):
+                return None
+        index = loaded[1]
+        if (index.capture_size, index.capture_mtime_ns) != (capture_st.st_size, capture_st.st_mtime_ns):
+            return None
+        return index
+
+    @classmethod
+    def build(cls, capture, interval_seconds=1, bucket_seconds=60):
+        """Indexa a captura em uma única passagem e grava o índice ao lado dela"""
+        capture = Path(capture)
+        if report._is_compressed(capture.name):
+            raise ValueError("o índice requer uma captura sem compressão")
+        mtime_ns = capture.stat().st_mtime_ns
+        state = {}
+        stats = CaptureAnalyzer(bucket_seconds, interval_seconds).analyze(capture, state)
+        intervals = state['counters']['intervals']
+        
+        entries = bytearray()
+        width = interval_seconds * 1000000
+        for interval in sorted(intervals):
+            entries += cls.ENTRY.pack(interval * width, *intervals[interval])
+        del stats['file']
+        blob = json.dumps(stats, ensure_ascii=False).encode('utf-8')
+        
+        path = cls.path_for(capture)
+        tmp_file = path.with_name(path.name + '.tmp')
+        with open(tmp_file, 'wb') as f:
+            f.write(cls.HEADER.pack(cls.MAGIC, interval_seconds, len(intervals), stats['size'],
+                                    mtime_ns, state['pos'], len(blob)))
+            f.write(entries)
+            f.write(blob)
+        os.replace(tmp_file, path)
+        cls._loaded.pop(str(path.resolve()), None)
+        return cls(path)
+
+    def analysis(self, capture, bucket_seconds=60):
+        """Estatísticas da captura gravadas no índice, ou None se as janelas de taxa diferirem"""
+        if self.stats['bucket_seconds'] != bucket_seconds:
+            return None
+        return {**self.stats, 'file': str(capture)}
+
+    def period(self):
+        """(início, fim) em epoch dos intervalos indexados, ou None para captura sem pacotes"""
+        if not self.entries:
+            return None
+        return self._starts[0] / 1000000, self._starts[-1] / 1000000 + self.interval_seconds
+
+    def _span(self, start, end):
+        """Entradas [first, last) dos intervalos que se sobrepõem a [start, end) (epoch)"""
+        width = self.interval_seconds * 1000000
+        first = bisect.bisect_right(self._starts, round(start * 1000000) - width)
+        last = bisect.bisect_left(self._starts, round(end * 1000000))
+        return first, max(first, last)
+
+    def intervals(self, start, end):
+        """Entradas dos intervalos do período [start, end) (epoch)"""
+        first, last = self._span(start, end)
+        return self.entries[first:last]
+
+    def counts(self, start, end):
+        """Totais dos intervalos do período [start, end) (epoch), sem ler a captura"""
+        totals = [0] * len(self.COUNTERS)
+        for entry in self.intervals(start, end):
+            for position, value in enumerate(entry[2:]):
+                totals[position] += value
+        return dict(zip(self.COUNTERS, totals))
+
+    def byte_range(self, start, end):
+        """(offset inicial, offset final) dos registros do período, ou None"""
+        first, last = self._span(start, end)
+        if first == last:
+            return None
+        begin = self.entries[first][1]
+        finish = self.entries[last][1] if last < len(self.entries) else self.indexed_bytes
+        if finish < begin:
+            # Registros fora de ordem cronológica: copiar até o fim do trecho indexado
+            finish = self.indexed_bytes
+        return begin, finish
+
+    def extract(self, capture, start, end, output):
+        """Grava em output uma captura com os registros do período e retorna os bytes copiados
+
+        Apenas o cabeçalho do arquivo e o trecho indicado pelo índice são lidos.
+        """
+        span = self.byte_range(start, end)
+        output = Path(output)
+        tmp_file = output.with_name(output.name + '.tmp')
+        copied = 0
+        with open(capture, 'rb') as source, open(tmp_file, 'wb') as out:
+            out.write(source.read(self.FILE_HEADER_SIZE[self.stats['format']]))
+            if span:
+                source.seek(span[0])
+                remaining = span[1] - span[0]
+                while remaining:
+                    chunk = source.read(min(remaining, self.COPY_CHUNK_SIZE))
+                    if not chunk:
+                        break
+                    out.write(chunk)
+                    copied += len(chunk)
+                    remaining -= len(chunk)
+        os.replace(tmp_file, output)
+        return copied
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+BlueSecAudit v2.0 - Report Service Client
+Cliente leve do serviço residente de relatórios (generate_final_report.py --serve)
+
+Importa apenas a biblioteca padrão necessária para o socket, de modo que cada
+chamada dos scripts evita a inicialização completa do gerador. Se o serviço
+não estiver em execução, a mesma operação é executada pelo CLI do gerador.
+"""
+
+import os
+import sys
+import json
+import socket
+import argparse
+from pathlib import Path
+
+GENERATOR = Path(__file__).resolve().parent / 'generate_final_report.py'
+
+# Mesmo nome usado por ReportService.SOCKET_NAME
+SOCKET_NAME = 'report_service.sock'
+
+# Código de saída quando o serviço não está disponível e não há fallback
+EXIT_UNAVAILABLE = 3
+
+# Espera pela resposta de pedidos rápidos (index-add, ping, shutdown); o
+# serviço atende um pedido por vez e um relatório em andamento não deve
+# bloquear a auditoria que registra seus resultados
+QUICK_TIMEOUT = 5.0
+
+class ServiceBusy(Exception):
+    """Pedido entregue, mas o serviço não respondeu dentro do prazo"""
+
+def build_request(args):
+    """Monta o pedido JSON; caminhos são absolutos (o serviço tem outro cwd)"""
+    results_dir = os.path.abspath(args.results_dir)
+    if args.ping:
+        return {'op': 'ping'}
+    if args.shutdown:
+        return {'op': 'shutdown'}
+    if args.index_add:
+        return {
+            'op': 'index-add',
+            'session': args.session,
+            'results_dir': results_dir,
+            'paths': [os.path.abspath(path) for path in args.index_add]
+        }
+    return {
+        'op': 'report',
+        'session': args.session,
+        'output': os.path.abspath(args.output),
+        'json': os.path.abspath(args.json) if args.json else None,
+        'format': args.format,
+        'results_dir': results_dir
+    }
+
+def send_request(socket_path, request, connect_timeout=2.0, response_timeout=None):
+    """Envia o pedido e aguarda a resposta
+
+    Sem response_timeout a espera não tem limite (relatórios podem demorar);
+    com ele, ServiceBusy indica que o pedido foi entregue e fica na fila do
+    serviço, que o atende ao terminar o pedido em andamento.
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+        conn.settimeout(connect_timeout)
+        conn.connect(str(socket_path))
+        conn.settimeout(response_timeout)
+        conn.sendall(json.dumps(request).encode('utf-8') + b'\n')
+        conn.shutdown(socket.SHUT_WR)
+
+        chunks = []
+        while True:
+            try:
+                chunk = conn.recv(65536)
+            except socket.timeout:
+                raise ServiceBusy(f"sem resposta em {response_timeout:g}s") from None
+            if not chunk:
+                break
+            chunks.append(chunk)
+
+    if not chunks:
+        raise ConnectionError("serviço encerrou a conexão sem responder")
+    return json.loads(b''.join(chunks).decode('utf-8'))
+
+def fallback_command(args):
+    """Linha de comando equivalente do gerador (execução a frio)"""
+    command = [sys.executable, str(GENERATOR), '--results-dir', args.results_dir,
+               '--logs-dir', args.logs_dir]
+    if args.session:
+        command += ['--session', args.session]
+    if args.index_add:
+        return command + ['--index-add', *args.index_add]
+    command += ['--output', args.output, '--format', args.format]
+    if args.json:
+        command += ['--json', args.json]
+    return command
+
+def main():
+    parser = argparse.ArgumentParser(description='BlueSecAudit v2.0 - Report Service Client')
+    parser.add_argument('--session', help='Session ID to process')
+    parser.add_argument('--output', help='Output HTML file path')
+    parser.add_argument('--json', help='Output JSON file path (optional)')
+    parser.add_argument('--format', choices=('json', 'ndjson'), default='json',
+                        help='Machine-readable output format for --json (default: json)')
+    parser.add_argument('--results-dir', default='results', help='Results directory')
+    parser.add_argument('--logs-dir', default='logs', help='Logs directory')
+    parser.add_argument('--index-add', nargs='+', metavar='PATH',
+                        help='Register new result files/directories in the session index')
+    parser.add_argument('--socket', metavar='PATH',
+                        help=f'Service socket (default: <logs-dir>/{SOCKET_NAME})')
+    parser.add_argument('--ping', action='store_true', help='Check whether the service is running')
+    parser.add_argument('--shutdown', action='store_true', help='Stop the service')
+    parser.add_argument('--no-fallback', action='store_true',
+                        help=f'Exit with status {EXIT_UNAVAILABLE} instead of running the '
+                             'generator directly when the service is not running')
+
+    args = parser.parse_args()
+
+    control = args.ping or args.shutdown
+    if not control and not args.index_add and (not args.session or not args.output):
+        parser.error('--session and --output are required to generate a report')
+
+    socket_path = Path(args.socket) if args.socket else Path(args.logs_dir) / SOCKET_NAME
+    request = build_request(args)
+    response_timeout = None if request['op'] == 'report' else QUICK_TIMEOUT
+    try:
+        response = send_request(socket_path, request, response_timeout=response_timeout)
+    except ServiceBusy as e:
+        # O pedido já está na fila do serviço: não vale esperar nem repetir a frio
+        print(f"⏳ Serviço de relatórios ocupado ({e}); pedido {request['op']} enfileirado")
+        return
+    except (OSError, ValueError) as e:
+        if control or args.no_fallback:
+            print(f"❌ Serviço de relatórios indisponível ({socket_path}): {e}")
+            sys.exit(EXIT_UNAVAILABLE)
+        # Sem serviço: mesma operação pelo CLI (execução a frio)
+        command = fallback_command(args)
+        os.execv(command[0], command)
+
+    sys.stdout.write(response.get('log', ''))
+    if not response.get('ok'):
+        action = 'gerando relatório' if request['op'] == 'report' else 'no serviço de relatórios'
+        print(f"❌ Erro {action}: {response.get('error')}")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,645 @@
+"""
+BlueSecAudit v2.0 - Fleet and Session Diff Reports
+Relatórios de várias sessões: consolidação por target (--fleet) e comparação
+de duas sessões (--diff)
+
+As sessões são coletadas pelo gerador de relatórios e reduzidas a resumos
+compactos pelo SessionLoader, usado pelos dois relatórios.
+"""
+
+import os
+import json
+import datetime
+from collections import Counter
+from pathlib import Path
+
+import generate_final_report as report
+
+class SessionLoader:
+    """Coleta sessões e as reduz a resumos compactos por target
+
+    Usado pelo relatório de frota e pela comparação de sessões: cada sessão
+    é coletada pelo BlueSecAuditReportGenerator e reduzida na hora
+    (summarize); os dados completos da sessão são descartados antes da
+    próxima, de modo que só os resumos chegam a quem os consome.
+    """
+
+    SESSION_PATTERN = report.SESSION_ID_PATTERN
+
+    def __init__(self, results_dir="results", logs_dir="logs", workers=1, cache=None,
+                 index=None, rules=None, profiler=None):
+        self.results_dir = Path(results_dir)
+        self.logs_dir = Path(logs_dir)
+        self.workers = workers
+        self.cache = cache
+        self.index = index
+        self.rules = rules or report.DetectionRules.load()
+        self.profiler = profiler
+        self.errors = 0
+
+    @classmethod
+    def session_started(cls, session_id):
+        """Epoch de início da sessão, extraído do ID (bs_<epoch>_<pid>)"""
+        match = cls.SESSION_PATTERN.fullmatch(session_id)
+        return int(match.group(1)) if match else None
+
+    def discover_sessions(self, since=None, until=None):
+        """Lista as sessões do diretório (ou do índice) iniciadas no intervalo"""
+        if self.index:
+            found = set(self.index.sessions())
+        else:
+            found = set()
+            with os.scandir(self.results_dir) as entries:
+                for entry in entries:
+                    match = self.SESSION_PATTERN.search(entry.name)
+                    if match:
+                        found.add(match.group(0))
+        
+        sessions = []
+        for session_id in found:
+            started = self.session_started(session_id)
+            if since is not None and (started is None or started < since):
+                continue
+            if until is not None and (started is None or started >= until):
+                continue
+            sessions.append(session_id)
+        return self.sort_sessions(sessions)
+
+    @classmethod
+    def sort_sessions(cls, sessions):
+        """Ordena as sessões cronologicamente (IDs fora do padrão por último)"""
+        return sorted(set(sessions), key=lambda s: (cls.session_started(s) is None,
+                                                    cls.session_started(s) or 0, s))
+
+    def summaries(self, sessions):
+        """Coleta e reduz as sessões, uma de cada vez (gerador de resumos)"""
+        for number, session_id in enumerate(sessions, 1):
+            print(f"🛰️ Sessão {number}/{len(sessions)}: {session_id}")
+            generator = report.BlueSecAuditReportGenerator(
+                session_id=session_id,
+                results_dir=self.results_dir,
+                logs_dir=self.logs_dir,
+                workers=self.workers,
+                cache=self.cache,
+                index=self.index,
+                rules=self.rules,
+                profiler=self.profiler
+            )
+            with report.profile_stage(self.profiler, 'collect'):
+                generator.collect_session_data()
+            self.errors += generator.errors
+            yield self.summarize(generator)
+
+    def summarize(self, generator):
+        """Reduz os dados de uma sessão a um resumo por target"""
+        targets = {}
+
+        def target_summary(target):
+            summary = targets.get(target)
+            if summary is None:
+                summary = targets[target] = {
+                    'attacks': 0, 'attack_types': Counter(), 'findings': {},
+                    'vulnerabilities': 0, 'critical': 0, 'high': 0
+                }
+            return summary
+        
+        for target in generator.report_data['targets']:
+            target_summary(target.upper())
+        for attack in generator.report_data['attacks']:
+            summary = target_summary(attack.get('target', 'Unknown').upper())
+            summary['attacks'] += 1
+            summary['attack_types'][attack.get('type', 'Unknown Attack')] += 1
+        for vulnerability in generator.report_data['vulnerabilities']:
+            summary = target_summary(vulnerability.get('target', 'Unknown').upper())
+            severity = vulnerability.get('severity', 'Unknown')
+            summary['vulnerabilities'] += 1
+            summary['critical'] += severity == 'Critical'
+            summary['high'] += severity == 'High'
+            # O FindingIndex já deduplicou por (target, tipo, evidência)
+            summary['findings'][vulnerability['fingerprint']] = {
+                'fingerprint': vulnerability['fingerprint'],
+                'type': vulnerability.get('type', 'Unknown'), 'severity': severity,
+                'description': vulnerability.get('description', ''),
+                'evidence': vulnerability.get('evidence', ''),
+                'recommendation': vulnerability.get('recommendation', ''),
+                'count': vulnerability.get('occurrences', 1)
+            }
+        
+        for summary in targets.values():
+            summary['risk_score'] = generator.risk_assessment(
+                summary['critical'], summary['high'], summary['vulnerabilities'])[0]
+        
+        return {
+            'session_id': generator.session_id,
+            'started': self.session_started(generator.session_id),
+            'files': len(generator.report_data['files_analyzed']),
+            'targets': targets
+        }
+
+class FleetAggregator:
+    """Agrega várias sessões em um relatório de frota por target
+
+    Map-reduce em streaming: o SessionLoader entrega um resumo compacto
+    por sessão, que é mesclado (merge) em um estado por target com
+    primeira/última aparição, tendência do risk score e achados
+    deduplicados (pelo fingerprint do FindingIndex), de modo que a memória
+    depende do número de targets distintos e não do número de arquivos.
+    """
+
+    # Pontos da tendência exibidos no HTML (o JSON traz a série completa)
+    HTML_TREND_POINTS = 12
+
+    def __init__(self, loader, vendors=None):
+        self.loader = loader
+        self.vendors = vendors
+        self.sessions = []
+        self.targets = {}
+
+    def run(self, sessions):
+        """Coleta, reduz e mescla as sessões, uma de cada vez"""
+        for session in self.loader.summaries(sessions):
+            self.merge(session)
+
+    def merge(self, session):
+        """Incorpora o resumo de uma sessão ao estado por target"""
+        started = session['started']
+        self.sessions.append({
+            'session_id': session['session_id'],
+            'started': self._iso(started),
+            'files': session['files'],
+            'targets': len(session['targets'])
+        })
+        
+        for target, summary in session['targets'].items():
+            entry = self.targets.get(target)
+            if entry is None:
+                entry = self.targets[target] = {
+                    'first_seen': started, 'last_seen': started, 'sessions': 0,
+                    'attacks': 0, 'attack_types': Counter(), 'findings': {}, 'trend': []
+                }
+            entry['first_seen'] = self._earliest(entry['first_seen'], started)
+            entry['last_seen'] = self._latest(entry['last_seen'], started)
+            entry['sessions'] += 1
+            entry['attacks'] += summary['attacks']
+            entry['attack_types'].update(summary['attack_types'])
+            entry['trend'].append((started, session['session_id'], summary['risk_score']))
+            
+            for key, finding in summary['findings'].items():
+                merged = entry['findings'].get(key)
+                if merged is None:
+                    merged = entry['findings'][key] = {
+                        'fingerprint': finding['fingerprint'],
+                        'type': finding['type'], 'severity': finding['severity'],
+                        'description': finding['description'],
+                        'evidence': finding['evidence'],
+                        'recommendation': finding['recommendation'],
+                        'occurrences': 0, 'sessions': 0,
+                        'first_seen': started, 'last_seen': started
+                    }
+                merged['occurrences'] += finding['count']
+                merged['sessions'] += 1
+                merged['first_seen'] = self._earliest(merged['first_seen'], started)
+                merged['last_seen'] = self._latest(merged['last_seen'], started)
+
+    @staticmethod
+    def _earliest(current, value):
+        return value if current is None else current if value is None else min(current, value)
+
+    @staticmethod
+    def _latest(current, value):
+        return value if current is None else current if value is None else max(current, value)
+
+    @staticmethod
+    def _iso(epoch):
+        """Epoch em ISO 8601 UTC, no formato dos timestamps normalizados das sessões"""
+        if epoch is None:
+            return None
+        return report.TimestampNormalizer.isoformat(datetime.datetime.fromtimestamp(epoch, datetime.timezone.utc))
+
+    def target_records(self):
+        """Resumo final por target, do maior para o menor risco atual"""
+        records = []
+        for target, entry in self.targets.items():
+            trend = sorted(entry['trend'], key=lambda point: (point[0] is None, point[0] or 0))
+            current = trend[-1][2]
+            findings = sorted(entry['findings'].values(),
+                              key=lambda f: (-f['occurrences'], f['type'], f['description']))
+            records.append({
+                'target': target,
+                **({'vendor': self.vendors.vendor(target)} if self.vendors else {}),
+                'first_seen': self._iso(entry['first_seen']),
+                'last_seen': self._iso(entry['last_seen']),
+                'sessions': entry['sessions'],
+                'attacks': entry['attacks'],
+                'attack_types': dict(entry['attack_types'].most_common()),
+                'risk_score': current,
+                'risk_level': report.BlueSecAuditReportGenerator.risk_level(current),
+                'risk_trend': [
+                    {'session_id': session_id, 'started': self._iso(started), 'risk_score': score}
+                    for started, session_id, score in trend
+                ],
+                'findings': [
+                    dict(finding, first_seen=self._iso(finding['first_seen']),
+                         last_seen=self._iso(finding['last_seen']))
+                    for finding in findings
+                ]
+            })
+        records.sort(key=lambda record: (-record['risk_score'], record['target']))
+        return records
+
+    def fleet_summary(self, records):
+        """Resumo executivo da frota"""
+        started = [session['started'] for session in self.sessions if session['started']]
+        return {
+            'total_sessions': len(self.sessions),
+            'total_targets': len(records),
+            'unique_findings': sum(len(record['findings']) for record in records),
+            'finding_occurrences': sum(finding['occurrences'] for record in records
+                                       for finding in record['findings']),
+            'critical_targets': sum(1 for record in records if record['risk_score'] >= 80),
+            'high_targets': sum(1 for record in records if 60 <= record['risk_score'] < 80),
+            'max_risk_score': max((record['risk_score'] for record in records), default=0),
+            'first_session': min(started, default=None),
+            'last_session': max(started, default=None)
+        }
+
+    def generate_html_report(self, output_file, records, summary):
+        """Gera o relatório HTML da frota (gravado em blocos e substituído de forma atômica)"""
+        output_file = Path(output_file)
+        tmp_file = output_file.with_name(output_file.name + '.tmp')
+        period = f"{summary['first_session'] or '-'} → {summary['last_session'] or '-'}"
+        with open(tmp_file, 'w', encoding='utf-8',
+                  buffering=report.BlueSecAuditReportGenerator.HTML_BUFFER_SIZE) as out:
+            out.write(f"""
+    <!DOCTYPE html>
+    <html lang="pt-BR">
+    <head>
+        <meta charset="UTF-8">
+        <meta name="viewport" content="width=device-width, initial-scale=1.0">
+        <title>BlueSecAudit v2.0 - Relatório de Frota</title>
+        <style>
+{report.BlueSecAuditReportGenerator.HTML_STYLE}        </style>
+    </head>
+    <body>
+        <div class="container">
+            <div class="header">
+                <h1>🔐 BlueSecAudit v2.0</h1>
+                <p>Relatório de Frota - Consolidação de Sessões</p>
+                <p>Período: {report._h(period)} | Gerado em: {datetime.datetime.now().strftime('%d/%m/%Y %H:%M:%S')}</p>
+            </div>
+        
+            <div class="content">
+                <h2>📊 Resumo da Frota</h2>
+                <div class="metric-grid">
+                    <div class="metric-card">
+                        <div class="metric-value">{summary['total_sessions']}</div>
+                        <div class="metric-label">Sessões</div>
+                    </div>
+                    <div class="metric-card">
+                        <div class="metric-value">{summary['total_targets']}</div>
+                        <div class="metric-label">Dispositivos</div>
+                    </div>
+                    <div class="metric-card">
+                        <div class="metric-value">{summary['unique_findings']}</div>
+                        <div class="metric-label">Achados Únicos</div>
+                    </div>
+                    <div class="metric-card risk-critical">
+                        <div class="metric-value">{summary['critical_targets']}</div>
+                        <div class="metric-label">Dispositivos em Risco Crítico</div>
+                    </div>
+                </div>
+            
+                <h2>🎯 Dispositivos</h2>
+            """)
+            
+            for record in records:
+                self._write_html_target(out, record)
+            
+            out.write("""
+                <h2>📋 Sessões Consolidadas</h2>
+                <div class="file-list">
+            """)
+            for session in self.sessions:
+                out.write(f"""
+                    <div class="file-item">
+                        <span>{report._h(session['session_id'])}</span>
+                        <span>{report._h(report._format_utc(session['started']) or '-')} | {session['targets']} targets | {session['files']} arquivos</span>
+                    </div>
+                """)
+            out.write("""
+                </div>
+            </div>
+        
+            <div class="footer">
+                <p>🔐 BlueSecAudit v2.0 - Advanced Bluetooth Security Auditing Tool</p>
+                <p>⚠️ Este relatório contém informações confidenciais de segurança</p>
+            </div>
+        </div>
+    </body>
+    </html>
+            """)
+        
+        os.replace(tmp_file, output_file)
+        print(f"✅ Relatório de frota HTML gerado: {output_file}")
+
+    def _write_html_target(self, out, record):
+        """Escreve a seção recolhível de um target"""
+        trend = [str(point['risk_score']) for point in record['risk_trend']]
+        if len(trend) > self.HTML_TREND_POINTS:
+            trend = ['…'] + trend[-self.HTML_TREND_POINTS:]
+        attack_types = ', '.join(f"{name}: {count}" for name, count in record['attack_types'].items())
+        is_open = ' open' if record['risk_score'] >= 60 else ''
+        vendor = f" ({report._h(record['vendor'])})" if 'vendor' in record else ''
+        out.write(f"""
+                <details class="target-group"{is_open}>
+                    <summary>🎯 {report._h(record['target'])}{vendor} — risco {record['risk_score']} ({report._h(record['risk_level'])}) — {len(record['findings'])} achados</summary>
+                    <div class="attack-item">
+                        <p><strong>Primeira aparição:</strong> {report._h(report._format_utc(record['first_seen']) or '-')}</p>
+                        <p><strong>Última aparição:</strong> {report._h(report._format_utc(record['last_seen']) or '-')}</p>
+                        <p><strong>Sessões:</strong> {record['sessions']} | <strong>Ataques:</strong> {record['attacks']}</p>
+                        <p><strong>Tendência do risco:</strong> {report._h(' → '.join(trend))}</p>
+                        <p><strong>Ataques por tipo:</strong> {report._h(attack_types or '-')}</p>
+                    </div>
+        """)
+        for finding in record['findings']:
+            severity_class = f"vuln-{report._h(finding['severity'].lower())}"
+            out.write(f"""
+                    <div class="vulnerability {severity_class}">
+                        <h4>{report._h(finding['type'])} - {report._h(finding['severity'])} Severity</h4>
+                        <p><strong>Descrição:</strong> {report._h(finding['description'])}</p>
+                        <p><strong>Ocorrências:</strong> {finding['occurrences']} em {finding['sessions']} sessões ({report._h(report._format_utc(finding['first_seen']) or '-')} → {report._h(report._format_utc(finding['last_seen']) or '-')})</p>
+                        <p><strong>Recomendação:</strong> {report._h(finding['recommendation'])}</p>
+                    </div>
+            """)
+        out.write("""
+                </details>
+        """)
+
+    def generate_json_report(self, output_file, records, summary, output_format='json'):
+        """Gera o relatório da frota em JSON ou NDJSON (um registro por target)"""
+        metadata = {
+            'generated_at': datetime.datetime.now().isoformat(),
+            'tool_version': 'BlueSecAudit v2.0',
+            'report_version': '1.0',
+            'report_type': 'fleet'
+        }
+        output_file = Path(output_file)
+        tmp_file = output_file.with_name(output_file.name + '.tmp')
+        if output_format == 'ndjson':
+            with open(tmp_file, 'wb') as out:
+                out.write(report._dumps_compact({'record_type': 'metadata', **metadata}) + b'\n')
+                for session in self.sessions:
+                    out.write(report._dumps_compact({'record_type': 'session', **session}) + b'\n')
+                for record in records:
+                    out.write(report._dumps_compact({'record_type': 'target', **record}) + b'\n')
+                out.write(report._dumps_compact({'record_type': 'summary', **summary}) + b'\n')
+        else:
+            final_report = {
+                'metadata': metadata,
+                'summary': summary,
+                'sessions': self.sessions,
+                'targets': records
+            }
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(final_report, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_file, output_file)
+        print(f"✅ Relatório de frota {output_format.upper()} gerado: {output_file}")
+
+class SessionDiff:
+    """Compara duas sessões pelos fingerprints dos achados (--diff)
+
+    Cada sessão é coletada e reduzida pelo SessionLoader, como no
+    relatório de frota: só o mapa fingerprint → achado e o risk score por
+    target são mantidos, sem gerar os relatórios completos. Novos,
+    resolvidos e persistentes saem de consultas a esses mapas, em tempo
+    linear no número de achados.
+    """
+
+    STATUS_ORDER = ('new', 'persisting', 'resolved')
+    STATUS_LABELS = {
+        'new': ('Novo', 'badge-danger'),
+        'persisting': ('Persistente', 'badge-warning'),
+        'resolved': ('Resolvido', 'badge-success')
+    }
+
+    def __init__(self, loader, vendors=None):
+        self.loader = loader
+        self.vendors = vendors
+        self.summaries = []
+
+    def run(self, sessions):
+        """Coleta e guarda o resumo das duas sessões (elas não são mescladas)"""
+        for session in self.loader.summaries(sessions):
+            self.summaries.append(session)
+            if not session['files']:
+                print(f"⚠️ Sessão {session['session_id']} sem arquivos de resultado")
+
+    @staticmethod
+    def _findings(session):
+        """Achados da sessão por fingerprint (o fingerprint já inclui o target)"""
+        return {
+            key: dict(finding, target=target)
+            for target, summary in session['targets'].items()
+            for key, finding in summary['findings'].items()
+        }
+
+    @staticmethod
+    def _risk_score(findings):
+        """Risk score da sessão, calculado como no resumo executivo"""
+        severities = Counter(finding['severity'] for finding in findings.values())
+        return report.BlueSecAuditReportGenerator.risk_assessment(
+            severities['Critical'], severities['High'], len(findings))[0]
+
+    def compare(self):
+        """Achados classificados, resumo por target e resumo geral da comparação"""
+        old, new = self.summaries
+        old_findings = self._findings(old)
+        new_findings = self._findings(new)
+        
+        findings = []
+        for key, finding in new_findings.items():
+            previous = old_findings.get(key)
+            findings.append(self._finding_record(
+                'persisting' if previous else 'new', finding,
+                previous['count'] if previous else 0, finding['count']))
+        for key, finding in old_findings.items():
+            if key not in new_findings:
+                findings.append(self._finding_record('resolved', finding, finding['count'], 0))
+        findings.sort(key=lambda f: (f['target'], self.STATUS_ORDER.index(f['status']),
+                                     f['type'], f['description']))
+        
+        targets = {}
+        for target in sorted(old['targets'].keys() | new['targets'].keys()):
+            old_score = old['targets'][target]['risk_score'] if target in old['targets'] else 0
+            new_score = new['targets'][target]['risk_score'] if target in new['targets'] else 0
+            targets[target] = {
+                'target': target,
+                **({'vendor': self.vendors.vendor(target)} if self.vendors else {}),
+                'old_risk_score': old_score,
+                'new_risk_score': new_score,
+                'risk_delta': new_score - old_score,
+                'new': 0, 'persisting': 0, 'resolved': 0
+            }
+        for finding in findings:
+            targets[finding['target']][finding['status']] += 1
+        
+        old_score = self._risk_score(old_findings)
+        new_score = self._risk_score(new_findings)
+        counts = Counter(finding['status'] for finding in findings)
+        summary = {
+            'old_session': old['session_id'],
+            'new_session': new['session_id'],
+            'new_findings': counts['new'],
+            'persisting_findings': counts['persisting'],
+            'resolved_findings': counts['resolved'],
+            'old_risk_score': old_score,
+            'new_risk_score': new_score,
+            'risk_delta': new_score - old_score,
+            'old_risk_level': report.BlueSecAuditReportGenerator.risk_level(old_score),
+            'new_risk_level': report.BlueSecAuditReportGenerator.risk_level(new_score)
+        }
+        records = sorted(targets.values(),
+                         key=lambda record: (-record['risk_delta'], -record['new'], record['target']))
+        return findings, records, summary
+
+    @staticmethod
+    def _finding_record(status, finding, old_count, new_count):
+        return {
+            'status': status,
+            'fingerprint': finding['fingerprint'],
+            'target': finding['target'],
+            'type': finding['type'],
+            'severity': finding['severity'],
+            'description': finding['description'],
+            'evidence': finding['evidence'],
+            'recommendation': finding['recommendation'],
+            'old_occurrences': old_count,
+            'new_occurrences': new_count
+        }
+
+    def generate_html_report(self, output_file, findings, records, summary):
+        """Gera o relatório HTML da comparação (gravado em blocos e substituído de forma atômica)"""
+        output_file = Path(output_file)
+        tmp_file = output_file.with_name(output_file.name + '.tmp')
+        delta = f"{summary['risk_delta']:+d}"
+        with open(tmp_file, 'w', encoding='utf-8',
+                  buffering=report.BlueSecAuditReportGenerator.HTML_BUFFER_SIZE) as out:
+            out.write(f"""
+    <!DOCTYPE html>
+    <html lang="pt-BR">
+    <head>
+        <meta charset="UTF-8">
+        <meta name="viewport" content="width=device-width, initial-scale=1.0">
+        <title>BlueSecAudit v2.0 - Comparação de Sessões</title>
+        <style>
+{report.BlueSecAuditReportGenerator.HTML_STYLE}        </style>
+    </head>
+    <body>
+        <div class="container">
+            <div class="header">
+                <h1>🔐 BlueSecAudit v2.0</h1>
+                <p>Comparação de Sessões</p>
+                <p>{report._h(summary['old_session'])} → {report._h(summary['new_session'])} | Gerado em: {datetime.datetime.now().strftime('%d/%m/%Y %H:%M:%S')}</p>
+            </div>
+        
+            <div class="content">
+                <h2>📊 Resumo da Comparação</h2>
+                <div class="metric-grid">
+                    <div class="metric-card risk-critical">
+                        <div class="metric-value">{summary['new_findings']}</div>
+                        <div class="metric-label">Achados Novos</div>
+                    </div>
+                    <div class="metric-card risk-low">
+                        <div class="metric-value">{summary['resolved_findings']}</div>
+                        <div class="metric-label">Achados Resolvidos</div>
+                    </div>
+                    <div class="metric-card risk-medium">
+                        <div class="metric-value">{summary['persisting_findings']}</div>
+                        <div class="metric-label">Achados Persistentes</div>
+                    </div>
+                    <div class="metric-card">
+                        <div class="metric-value">{delta}</div>
+                        <div class="metric-label">Variação do Risk Score</div>
+                    </div>
+                </div>
+            
+                <div style="text-align: center; margin: 30px 0;">
+                    <h3>Risco: {summary['old_risk_score']} ({report._h(summary['old_risk_level'])}) → {summary['new_risk_score']} ({report._h(summary['new_risk_level'])})</h3>
+                </div>
+            
+                <h2>🎯 Dispositivos</h2>
+            """)
+            
+            by_target = {}
+            for finding in findings:
+                by_target.setdefault(finding['target'], []).append(finding)
+            for record in records:
+                self._write_html_diff_target(out, record, by_target.get(record['target'], ()))
+            
+            out.write("""
+            </div>
+        
+            <div class="footer">
+                <p>🔐 BlueSecAudit v2.0 - Advanced Bluetooth Security Auditing Tool</p>
+                <p>⚠️ Este relatório contém informações confidenciais de segurança</p>
+            </div>
+        </div>
+    </body>
+    </html>
+            """)
+        
+        os.replace(tmp_file, output_file)
+        print(f"✅ Relatório de comparação HTML gerado: {output_file}")
+
+    def _write_html_diff_target(self, out, record, findings):
+        """Escreve a seção recolhível de um target com os achados classificados"""
+        vendor = f" ({report._h(record['vendor'])})" if 'vendor' in record else ''
+        is_open = ' open' if record['new'] or record['risk_delta'] > 0 else ''
+        out.write(f"""
+                <details class="target-group"{is_open}>
+                    <summary>🎯 {report._h(record['target'])}{vendor} — risco {record['old_risk_score']} → {record['new_risk_score']} ({record['risk_delta']:+d}) — {record['new']} novos, {record['resolved']} resolvidos, {record['persisting']} persistentes</summary>
+        """)
+        for finding in findings:
+            label, badge = self.STATUS_LABELS[finding['status']]
+            severity_class = f"vuln-{report._h(finding['severity'].lower())}"
+            out.write(f"""
+                    <div class="vulnerability {severity_class}">
+                        <h4>{report._h(finding['type'])} - {report._h(finding['severity'])} Severity <span class="badge {badge}">{label}</span></h4>
+                        <p><strong>Descrição:</strong> {report._h(finding['description'])}</p>
+                        <p><strong>Ocorrências:</strong> {finding['old_occurrences']} → {finding['new_occurrences']}</p>
+                        <p><strong>Recomendação:</strong> {report._h(finding['recommendation'])}</p>
+                    </div>
+            """)
+        out.write("""
+                </details>
+        """)
+
+    def generate_json_report(self, output_file, findings, records, summary, output_format='json'):
+        """Gera a comparação em JSON ou NDJSON (um registro por target e por achado)"""
+        metadata = {
+            'generated_at': datetime.datetime.now().isoformat(),
+            'tool_version': 'BlueSecAudit v2.0',
+            'report_version': '1.0',
+            'report_type': 'diff'
+        }
+        output_file = Path(output_file)
+        tmp_file = output_file.with_name(output_file.name + '.tmp')
+        if output_format == 'ndjson':
+            with open(tmp_file, 'wb') as out:
+                out.write(report._dumps_compact({'record_type': 'metadata', **metadata}) + b'\n')
+                for record in records:
+                    out.write(report._dumps_compact({'record_type': 'target', **record}) + b'\n')
+                for finding in findings:
+                    out.write(report._dumps_compact({'record_type': 'finding', **finding}) + b'\n')
+                out.write(report._dumps_compact({'record_type': 'summary', **summary}) + b'\n')
+        else:
+            final_report = {
+                'metadata': metadata,
+                'summary': summary,
+                'targets': records,
+                'findings': findings
+            }
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(final_report, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_file, output_file)
+        print(f"✅ Relatório de comparação {output_format.upper()} gerado: {output_file}")
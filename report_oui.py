@@ -0,0 +1,170 @@
+"""
+BlueSecAudit v2.0 - OUI Vendor Table
+Tabela compilada do registro OUI do IEEE para identificar fabricantes por MAC
+
+Compilada offline com --compile-oui e consultada pelos relatórios.
+"""
+
+import os
+import re
+import csv
+import mmap
+import struct
+import bisect
+from pathlib import Path
+
+class _PackedPrefixes:
+    """Sequência de prefixos de 24 bits (big-endian) sobre o mmap, para o bisect"""
+
+    def __init__(self, mm, offset, count):
+        self.mm = mm
+        self.offset = offset
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        start = self.offset + index * 3
+        return int.from_bytes(self.mm[start:start + 3], 'big')
+
+class OuiTable:
+    """Registro OUI (MA-L) do IEEE compilado em tabela binária (config/oui.bin)
+
+    Layout: cabeçalho (magic, entradas, tamanho do pool), prefixos de 24
+    bits ordenados e empacotados em 3 bytes, offsets (uint32) no pool e o
+    pool de nomes UTF-8 terminados em NUL, sem repetição. A tabela é mapeada
+    em memória (só as páginas consultadas são lidas) e cada MAC custa um
+    bisect (O(log n)) sobre os prefixos, guardado por prefixo. O registro
+    é atualizado offline com --compile-oui (ex.: /usr/share/ieee-data/oui.txt
+    do pacote ieee-data); nada é baixado durante a geração dos relatórios.
+    """
+
+    MAGIC = b'BSAOUI1\0'
+    HEADER = struct.Struct('<8sII')
+    OFFSET = struct.Struct('<I')
+    DEFAULT_PATH = Path(__file__).resolve().parent / 'config' / 'oui.bin'
+    # Bit "localmente administrado" do primeiro octeto (inclui endereços BLE aleatórios)
+    LOCAL_BIT = 0x020000
+    LOCAL_LABEL = 'Locally Administered'
+    UNKNOWN_LABEL = 'Unknown'
+    TEXT_ENTRY = re.compile(r'^\s*([0-9A-Fa-f]{2})-([0-9A-Fa-f]{2})-([0-9A-Fa-f]{2})\s+\(hex\)\s+(.+?)\s*$')
+    HEX_DIGITS = re.compile(r'[^0-9A-Fa-f]')
+    _loaded = {}
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._cache = {}
+        with open(self.path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < self.HEADER.size:
+                raise ValueError(f"tabela OUI inválida: {self.path}")
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count, pool_size = self.HEADER.unpack_from(self._mm, 0)
+        self._offsets = self.HEADER.size + count * 3
+        self._pool = self._offsets + count * self.OFFSET.size
+        if magic != self.MAGIC or self._pool + pool_size != size:
+            self._mm.close()
+            raise ValueError(f"tabela OUI inválida: {self.path}")
+        self._prefixes = _PackedPrefixes(self._mm, self.HEADER.size, count)
+
+    @classmethod
+    def load(cls, path=None):
+        """Tabela do arquivo indicado, ou None se não existir
+
+        Reaproveitada enquanto o arquivo não mudar (o serviço residente vê
+        uma tabela recompilada sem reiniciar).
+        """
+        path = Path(path) if path else cls.DEFAULT_PATH
+        try:
+            st = path.stat()
+        except OSError:
+            return None
+        key = str(path.resolve())
+        stamp = (st.st_mtime_ns, st.st_size)
+        loaded = cls._loaded.get(key)
+        if loaded is None or loaded[0] != stamp:
+            loaded = cls._loaded[key] = (stamp, cls(path))
+        return loaded[1]
+
+    def __len__(self):
+        return len(self._prefixes)
+
+    def lookup(self, mac):
+        """Fabricante registrado para o MAC, ou None"""
+        digits = self.HEX_DIGITS.sub('', mac or '')
+        if len(digits) != 12:
+            return None
+        prefix = int(digits[:6], 16)
+        if prefix & self.LOCAL_BIT:
+            return None
+        if prefix in self._cache:
+            return self._cache[prefix]
+        vendor = None
+        index = bisect.bisect_left(self._prefixes, prefix)
+        if index < len(self._prefixes) and self._prefixes[index] == prefix:
+            start = self._pool + self.OFFSET.unpack_from(self._mm, self._offsets + index * 4)[0]
+            vendor = self._mm[start:self._mm.find(b'\0', start)].decode('utf-8')
+        self._cache[prefix] = vendor
+        return vendor
+
+    def vendor(self, mac):
+        """Rótulo do fabricante para relatórios (inclui endereços locais e desconhecidos)"""
+        digits = self.HEX_DIGITS.sub('', mac or '')
+        if len(digits) == 12 and int(digits[:6], 16) & self.LOCAL_BIT:
+            return self.LOCAL_LABEL
+        return self.lookup(mac) or self.UNKNOWN_LABEL
+
+    @classmethod
+    def read_registry(cls, source):
+        """Lê o registro do IEEE (oui.txt ou oui.csv) em {prefixo: organização}"""
+        entries = {}
+        with open(source, 'r', encoding='utf-8', errors='replace', newline='') as f:
+            first = f.readline()
+            f.seek(0)
+            if first.lstrip('﻿').startswith('Registry,'):
+                for row in csv.DictReader(f):
+                    assignment = (row.get('Assignment') or '').strip()
+                    name = ' '.join((row.get('Organization Name') or '').split())
+                    if len(assignment) == 6 and name:
+                        try:
+                            entries.setdefault(int(assignment, 16), name)
+                        except ValueError:
+                            continue
+            else:
+                for line in f:
+                    match = cls.TEXT_ENTRY.match(line)
+                    if match:
+                        prefix = int(''.join(match.group(1, 2, 3)), 16)
+                        entries.setdefault(prefix, ' '.join(match.group(4).split()))
+        return entries
+
+    @classmethod
+    def compile(cls, source, output=None):
+        """Compila o registro do IEEE na tabela binária e retorna o número de entradas"""
+        entries = cls.read_registry(source)
+        if not entries:
+            raise ValueError(f"nenhuma entrada OUI reconhecida em {source}")
+        
+        prefixes = bytearray()
+        offsets = bytearray()
+        pool = bytearray()
+        names = {}
+        for prefix in sorted(entries):
+            name = entries[prefix]
+            if name not in names:
+                names[name] = len(pool)
+                pool += name.encode('utf-8') + b'\0'
+            prefixes += prefix.to_bytes(3, 'big')
+            offsets += cls.OFFSET.pack(names[name])
+        
+        output = Path(output) if output else cls.DEFAULT_PATH
+        tmp_file = output.with_name(output.name + '.tmp')
+        with open(tmp_file, 'wb') as f:
+            f.write(cls.HEADER.pack(cls.MAGIC, len(entries), len(pool)))
+            f.write(prefixes)
+            f.write(offsets)
+            f.write(pool)
+        os.replace(tmp_file, output)
+        cls._loaded.pop(str(output.resolve()), None)
+        return len(entries)
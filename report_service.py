@@ -0,0 +1,235 @@
+"""
+BlueSecAudit v2.0 - Report Service
+Modo --serve: serviço residente de relatórios em um socket Unix local
+
+Atende os pedidos de report_client.py com as regras, o cache de parsing e
+o índice de sessões já carregados.
+"""
+
+import io
+import os
+import json
+import time
+import select
+import signal
+import socket
+from contextlib import redirect_stdout
+from pathlib import Path
+from types import SimpleNamespace
+
+import generate_final_report as report
+from report_cache import SessionIndex
+
+class ReportService:
+    """Modo --serve: serviço residente que gera relatórios sob demanda
+
+    Mantém carregados as regras de detecção, o cache de parsing e o índice
+    de sessões, e atende pedidos recebidos por um socket Unix local (um
+    objeto JSON por conexão, respondido com outro). Os pedidos são atendidos
+    em sequência, na ordem de chegada; a saída que o CLI imprimiria volta ao
+    cliente (report_client.py) no campo "log" da resposta.
+    """
+
+    SOCKET_NAME = 'report_service.sock'
+    REQUEST_LIMIT = 1024 * 1024
+    REQUEST_TIMEOUT = 30
+
+    def __init__(self, args, rules, socket_path=None):
+        # O serviço existe para manter cache e índice carregados entre pedidos,
+        # com ou sem --cache/--index na linha de comando
+        args.cache = args.index = True
+        self.args = args
+        self.rules = rules
+        self.rules_mtime = self._rules_mtime()
+        self.socket_path = Path(socket_path or Path(args.logs_dir) / self.SOCKET_NAME)
+        self.results_dir = Path(args.results_dir).resolve()
+        self.cache = report.open_parse_cache(args, rules)
+        self.index = SessionIndex(args.results_dir, rules=rules)
+        self.handlers = {
+            'report': self._report,
+            'index-add': self._index_add,
+            'ping': self._ping,
+            'shutdown': self._shutdown
+        }
+        self.requests = 0
+        self.started = time.time()
+        self.running = True
+
+    def _rules_mtime(self):
+        try:
+            return os.stat(self.rules.path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _listen(self):
+        """Cria o socket de escuta (somente o dono tem acesso)"""
+        if self.socket_path.exists():
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(str(self.socket_path))
+                raise OSError(f"serviço já em execução em {self.socket_path}")
+            except (ConnectionRefusedError, FileNotFoundError):
+                # Socket órfão de um serviço encerrado sem limpeza
+                self.socket_path.unlink(missing_ok=True)
+            finally:
+                probe.close()
+        
+        # O socket só aparece no caminho final quando já aceita conexões
+        self.socket_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.socket_path.with_name(self.socket_path.name + '.tmp')
+        tmp_path.unlink(missing_ok=True)
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        previous_umask = os.umask(0o177)
+        try:
+            listener.bind(str(tmp_path))
+        finally:
+            os.umask(previous_umask)
+        listener.listen(16)
+        os.replace(tmp_path, self.socket_path)
+        return listener
+
+    def run(self):
+        """Atende pedidos até SIGTERM, Ctrl+C ou um pedido de shutdown"""
+        listener = self._listen()
+        print(f"🛰️ Serviço de relatórios em {self.socket_path} (Ctrl+C para encerrar)")
+        
+        previous_handler = signal.signal(signal.SIGTERM, self._stop)
+        try:
+            while self.running:
+                ready, _, _ = select.select([listener], [], [], 1.0)
+                if not ready:
+                    continue
+                conn, _ = listener.accept()
+                with conn:
+                    self._serve_connection(conn)
+        except KeyboardInterrupt:
+            print("")
+        finally:
+            signal.signal(signal.SIGTERM, previous_handler)
+            listener.close()
+            self.socket_path.unlink(missing_ok=True)
+            if self.cache:
+                self.cache.close()
+            self.index.close()
+        print(f"⏹️ Serviço encerrado ({self.requests} pedidos atendidos)")
+
+    def _stop(self, signum, frame):
+        self.running = False
+
+    def _serve_connection(self, conn):
+        conn.settimeout(self.REQUEST_TIMEOUT)
+        started = time.perf_counter()
+        try:
+            data = self._read_request(conn)
+            if not data.strip():
+                # Conexão sem pedido (ex.: verificação de serviço em execução)
+                return
+            request = json.loads(data)
+            if not isinstance(request, dict):
+                raise ValueError("pedido deve ser um objeto JSON")
+            response = self._dispatch(request)
+        except (OSError, ValueError) as e:
+            request, response = {}, {'ok': False, 'error': f"pedido inválido: {e}", 'log': ''}
+        
+        status = '✅' if response['ok'] else '❌'
+        label = ' '.join(str(part) for part in (request.get('op', '-'), request.get('session')) if part)
+        print(f"{status} {label} ({time.perf_counter() - started:.2f}s)")
+        try:
+            conn.sendall(json.dumps(response, ensure_ascii=False).encode('utf-8') + b'\n')
+        except OSError:
+            # Cliente desistiu: o relatório já foi gravado
+            pass
+
+    def _read_request(self, conn):
+        """Lê o pedido (uma linha JSON) do cliente"""
+        data = b''
+        while not data.endswith(b'\n'):
+            chunk = conn.recv(65536)
+            if not chunk:
+                break
+            data += chunk
+            if len(data) > self.REQUEST_LIMIT:
+                raise ValueError("pedido excede o limite de tamanho")
+        return data.decode('utf-8')
+
+    def _dispatch(self, request):
+        """Executa o pedido capturando a saída que o CLI imprimiria"""
+        handler = self.handlers.get(request.get('op'))
+        if handler is None:
+            return {'ok': False, 'error': f"operação desconhecida: {request.get('op')}", 'log': ''}
+        
+        self.requests += 1
+        log = io.StringIO()
+        try:
+            with redirect_stdout(log):
+                result = handler(request)
+        except Exception as e:
+            return {'ok': False, 'error': str(e), 'log': log.getvalue()}
+        return {'ok': True, 'log': log.getvalue(), **result}
+
+    def _check_results_dir(self, request):
+        results_dir = request.get('results_dir')
+        if results_dir and Path(results_dir).resolve() != self.results_dir:
+            raise ValueError(f"serviço atende {self.results_dir}, não {results_dir}")
+
+    def _refresh_rules(self):
+        """Recarrega as regras (e o namespace do cache) se o arquivo mudou"""
+        mtime = self._rules_mtime()
+        if mtime == self.rules_mtime:
+            return
+        rules = report.DetectionRules.reload(self.args.rules)
+        if self.cache:
+            self.cache.close()
+        self.cache = report.open_parse_cache(self.args, rules)
+        self.rules, self.rules_mtime = rules, mtime
+        self.index.rules = rules
+        print("🔁 Regras de detecção recarregadas")
+
+    def _report(self, request):
+        if not request.get('session') or not request.get('output'):
+            raise ValueError("session e output são obrigatórios")
+        if request.get('format', 'json') not in ('json', 'ndjson'):
+            raise ValueError(f"formato inválido: {request['format']}")
+        self._check_results_dir(request)
+        self._refresh_rules()
+        
+        options = SimpleNamespace(
+            session=request['session'],
+            output=request['output'],
+            json=request.get('json'),
+            format=request.get('format', 'json'),
+            results_dir=self.args.results_dir,
+            logs_dir=self.args.logs_dir,
+            workers=self.args.workers,
+            oui_table=self.args.oui_table
+        )
+        print("🚀 BlueSecAudit v2.0 - Final Report Generator")
+        print(f"📋 Processando sessão: {options.session}")
+        if self.cache:
+            self.cache.hits = self.cache.misses = 0
+        try:
+            generator = report.generate_session_report(options, self.rules, self.cache, self.index)
+        finally:
+            self.index.commit()
+        print("🎉 Relatório final gerado com sucesso!")
+        return {'files': len(generator.report_data['files_analyzed']), 'errors': generator.errors}
+
+    def _index_add(self, request):
+        self._check_results_dir(request)
+        paths = request.get('paths') or []
+        added = sum(1 for path in paths if self.index.register(path, request.get('session')))
+        self.index.commit()
+        print(f"🗂️ {added} itens registrados no índice")
+        return {'added': added}
+
+    def _ping(self, request):
+        uptime = int(time.time() - self.started)
+        print(f"🛰️ Serviço ativo (pid {os.getpid()}, {uptime}s, {self.requests} pedidos) - "
+              f"{self.results_dir}")
+        return {'pid': os.getpid(), 'uptime': uptime, 'requests': self.requests,
+                'results_dir': str(self.results_dir)}
+
+    def _shutdown(self, request):
+        self.running = False
+        print("⏹️ Encerrando serviço de relatórios")
+        return {}
@@ -0,0 +1,546 @@
+"""
+BlueSecAudit v2.0 - Report Watcher
+Modo --watch: relatórios da sessão atualizados enquanto a auditoria grava resultados
+
+Observa o diretório de resultados com inotify (Linux) ou por polling e
+reprocessa apenas os arquivos alterados.
+"""
+
+import os
+import sys
+import time
+import ctypes
+import select
+import signal
+import struct
+import datetime
+from collections import Counter
+from pathlib import Path
+
+import generate_final_report as report
+from report_archive import SessionArchive
+from report_capture import CaptureIndex
+
+class InotifyWatcher:
+    """Observa diretórios com inotify (Linux), via ctypes e sem dependências
+
+    read() bloqueia até chegarem eventos e devolve apenas os caminhos
+    alterados; o custo não depende do número de arquivos no diretório.
+    """
+
+    IN_MODIFY = 0x00000002
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+    EVENT_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+    EVENT_HEADER = struct.Struct('iIII')
+    READ_SIZE = 64 * 1024
+    name = 'inotify'
+
+    def __init__(self):
+        libc = ctypes.CDLL(None, use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = (ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32)
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        self._dirs = {}
+
+    def add(self, directory, pattern=None):
+        """Passa a observar um diretório (pattern é filtrado pelo chamador)"""
+        wd = self._add_watch(self.fd, os.fsencode(directory), self.EVENT_MASK)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno), str(directory))
+        self._dirs[wd] = Path(directory)
+
+    def read(self, timeout):
+        """Caminhos alterados em até timeout segundos (None = fila estourou, reler tudo)"""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        
+        changed = set()
+        overflow = False
+        header = self.EVENT_HEADER
+        while True:
+            try:
+                data = os.read(self.fd, self.READ_SIZE)
+            except BlockingIOError:
+                break
+            pos = 0
+            while pos + header.size <= len(data):
+                wd, mask, _, length = header.unpack_from(data, pos)
+                name = data[pos + header.size:pos + header.size + length].rstrip(b'\0')
+                pos += header.size + length
+                if mask & self.IN_Q_OVERFLOW:
+                    overflow = True
+                elif mask & self.IN_IGNORED:
+                    self._dirs.pop(wd, None)
+                elif name and wd in self._dirs:
+                    changed.add(self._dirs[wd] / os.fsdecode(name))
+        return None if overflow else changed
+
+    def close(self):
+        os.close(self.fd)
+
+class PollingWatcher:
+    """Alternativa portátil ao inotify: compara tamanho/mtime a cada intervalo
+
+    Apenas nomes que contêm o padrão do diretório são verificados, então o
+    custo por ciclo é proporcional aos arquivos da sessão.
+    """
+
+    name = 'polling'
+
+    def __init__(self, interval=1.0):
+        self.interval = interval
+        self._dirs = {}
+
+    def add(self, directory, pattern=None):
+        """Passa a observar um diretório (apenas nomes contendo pattern)"""
+        directory = Path(directory)
+        if directory not in self._dirs:
+            self._dirs[directory] = (pattern, self._snapshot(directory, pattern))
+
+    def read(self, timeout):
+        """Caminhos criados, alterados ou removidos desde a última leitura"""
+        time.sleep(min(timeout, self.interval))
+        changed = set()
+        for directory, (pattern, previous) in list(self._dirs.items()):
+            current = self._snapshot(directory, pattern)
+            changed.update(path for path, signature in current.items()
+                           if previous.get(path) != signature)
+            changed.update(path for path in previous if path not in current)
+            self._dirs[directory] = (pattern, current)
+        return changed
+
+    def close(self):
+        self._dirs.clear()
+
+    @staticmethod
+    def _snapshot(directory, pattern):
+        entries = {}
+        try:
+            with os.scandir(directory) as it:
+                for entry in it:
+                    if pattern and pattern not in entry.name:
+                        continue
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    entries[directory / entry.name] = (stat.st_size, stat.st_mtime_ns)
+        except FileNotFoundError:
+            pass
+        return entries
+
+class ReportWatcher:
+    """Modo --watch: mantém os relatórios da sessão atualizados durante a auditoria
+
+    Cada item da sessão (arquivo de resultado ou relatório de auditoria)
+    produz um fragmento, guardado em memória na ordem de descoberta. Quando
+    um arquivo é criado ou cresce, apenas ele é reprocessado pelo
+    _process_result_file, que continua do último offset lido; os
+    contadores do resumo são ajustados pela diferença entre o fragmento
+    antigo e o novo. HTML e JSON são regravados (de forma atômica) no
+    máximo uma vez por intervalo de debounce, sem reler a sessão: o
+    report_data é mantido entre os flushes e só recebe os fragmentos
+    alterados (ver flush).
+    """
+
+    AUDIT_REPORT = 'audit_report.html'
+    # Listas do report_data gravadas no JSON a partir dos itens de cada fragmento
+    JSON_ITEM_KEYS = ('targets', 'attacks', 'files_analyzed', 'captures')
+
+    def __init__(self, generator, html_output, json_output=None, json_format='json',
+                 debounce=2.0, poll_interval=1.0, force_polling=False, idle_exit=0):
+        self.generator = generator
+        self.session_id = generator.session_id
+        self.results_dir = generator.results_dir
+        self.html_output = Path(html_output)
+        self.json_output = Path(json_output) if json_output else None
+        self.json_format = json_format
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.idle_exit = idle_exit
+        self.backend = self._open_backend(force_polling)
+        
+        # Saídas do próprio watcher não são itens da sessão
+        self.outputs = set()
+        for output in (self.html_output, self.json_output):
+            if output:
+                self.outputs.add(os.path.abspath(output))
+                self.outputs.add(os.path.abspath(output.with_name(output.name + '.tmp')))
+        
+        self.fragments = {}
+        self.states = {}
+        self.seen = {}
+        # Fragmentos já mesclados ao report_data, na ordem da mescla, com o
+        # checkpoint tomado antes de cada um; alterados desde o último flush
+        self.merged = []
+        self.positions = {}
+        self.marks = {}
+        self.changed = {}
+        # Itens já renderizados/serializados por fragmento (HTML, JSON e NDJSON)
+        self.rendered = {}
+        self.encoded_json = {}
+        self.encoded = {}
+        self.audit_dirs = set()
+        self.totals = Counter()
+        self.finding_counts = Counter()
+        self.severity_counts = Counter()
+        self.target_counts = Counter()
+        self.dirty = False
+        self.running = True
+        self.last_change = time.monotonic()
+        self.last_flush = 0.0
+
+    def _open_backend(self, force_polling):
+        if not force_polling and sys.platform.startswith('linux'):
+            try:
+                return InotifyWatcher()
+            except (OSError, AttributeError) as e:
+                print(f"ℹ️ inotify indisponível ({e}) - usando polling")
+        return PollingWatcher(self.poll_interval)
+
+    def run(self):
+        """Processa a sessão atual e acompanha as alterações até ser interrompido"""
+        print(f"👀 Observando {self.results_dir} ({self.backend.name}, "
+              f"debounce {self.debounce:g}s) - Ctrl+C para encerrar")
+        
+        # Observar antes da varredura inicial para não perder alterações
+        self.backend.add(self.results_dir, self.session_id)
+        self._rescan()
+        self.flush()
+        
+        previous_handler = signal.signal(signal.SIGTERM, self._stop)
+        try:
+            while self.running:
+                timeout = self.poll_interval
+                if self.dirty:
+                    wait = self.last_flush + self.debounce - time.monotonic()
+                    timeout = max(0.0, min(timeout, wait))
+                
+                changed = self.backend.read(timeout)
+                if changed is None:
+                    print("⚠️ Fila de eventos estourou - relendo a sessão")
+                    self._rescan()
+                else:
+                    # Ordem estável: diretórios novos antes dos arquivos que contêm
+                    for path in sorted(changed, key=lambda p: (len(p.parts), str(p))):
+                        self._handle(path)
+                
+                now = time.monotonic()
+                if self.dirty and now - self.last_flush >= self.debounce:
+                    self.flush()
+                if self.idle_exit and now - self.last_change >= self.idle_exit:
+                    print(f"⏹️ Nenhuma alteração em {self.idle_exit}s - encerrando")
+                    break
+        except KeyboardInterrupt:
+            print("")
+        finally:
+            signal.signal(signal.SIGTERM, previous_handler)
+            self.backend.close()
+        
+        if self.dirty:
+            self.flush()
+        print("⏹️ Observação encerrada")
+
+    def _stop(self, signum, frame):
+        self.running = False
+
+    def flush(self):
+        """Mescla os fragmentos alterados e regrava os relatórios
+
+        HTML e JSON são sempre regravados por inteiro: resumo, contadores,
+        linha do tempo e agrupamentos por target ficam antes dos itens e
+        mudam a cada alteração, então o arquivo anterior não pode ser só
+        estendido. Ataques, arquivos e os itens do JSON ficam guardados já
+        renderizados por fragmento (como os registros NDJSON), e só os
+        fragmentos alterados são renderizados de novo; resumo, linha do
+        tempo, vulnerabilidades (fundidas entre fragmentos) e capturas
+        (janelas dependem de todos os ataques) são refeitos a cada flush.
+        """
+        generator = self.generator
+        self._merge_changes()
+        generator.report_data['timestamp'] = datetime.datetime.now().isoformat()
+        
+        # Os ataques do FindingStore seguem a ordem de self.merged
+        rendered = [self._cached(self.rendered, key, self._render_html) for key in self.merged]
+        generator.generate_html_report(
+            self.html_output,
+            attack_html=[item for html in rendered for item in html['attacks']].__getitem__,
+            file_html=[item for html in rendered for item in html['files_analyzed']])
+        if self.json_output and self.json_format == 'ndjson':
+            self._write_ndjson()
+        elif self.json_output:
+            encoded = [self._cached(self.encoded_json, key, self._encode_json) for key in self.merged]
+            generator.generate_json_report(self.json_output, {
+                data_key: [item for items in encoded for item in items[data_key]]
+                for data_key in self.JSON_ITEM_KEYS})
+        
+        self.dirty = False
+        self.last_flush = time.monotonic()
+        self._print_status()
+
+    def _merge_changes(self):
+        """Incorpora ao report_data apenas os fragmentos alterados desde o último flush
+
+        O report_data volta (rollback) ao checkpoint anterior ao primeiro
+        fragmento alterado, e os fragmentos dali em diante são mesclados de
+        novo; novos itens são apenas acrescentados. Como os arquivos
+        crescem na ordem em que foram criados, normalmente só o último
+        fragmento é refeito.
+        """
+        generator = self.generator
+        start = min((self.positions[key] for key in self.changed if key in self.positions),
+                    default=len(self.merged))
+        tail = self.merged[start:]
+        if tail:
+            self._rollback(self.marks[tail[0]])
+            del self.merged[start:]
+            for key in tail:
+                del self.positions[key]
+                del self.marks[key]
+        
+        for key in tail + [key for key in self.changed if key not in self.positions and key not in tail]:
+            fragment = self.fragments.get(key)
+            if fragment is None:
+                continue
+            self.marks[key] = self._checkpoint()
+            self.positions[key] = len(self.merged)
+            self.merged.append(key)
+            generator._merge_fragment(fragment)
+        self.changed.clear()
+
+    def _checkpoint(self):
+        data = self.generator.report_data
+        return {key: len(data[key]) if isinstance(data[key], list) else data[key].checkpoint()
+                for key in self.generator.FRAGMENT_KEYS}
+
+    def _rollback(self, mark):
+        data = self.generator.report_data
+        for key, position in mark.items():
+            if isinstance(data[key], list):
+                del data[key][position:]
+            else:
+                data[key].rollback(position)
+
+    def _cached(self, cache, key, render):
+        """Renderização de um fragmento, refeita só quando ele muda (ver _replace)"""
+        value = cache.get(key)
+        if value is None:
+            value = cache[key] = render(self.fragments[key])
+        return value
+
+    def _render_html(self, fragment):
+        generator = self.generator
+        return {'attacks': [generator.render_html_attack(attack) for attack in fragment['attacks']],
+                'files_analyzed': [generator.render_html_file(file_info)
+                                   for file_info in fragment['files_analyzed']]}
+
+    def _encode_json(self, fragment):
+        # Itens das listas de data ficam no terceiro nível do documento
+        return {key: [report._json_item(item, 3) for item in fragment[key]]
+                for key in self.JSON_ITEM_KEYS}
+
+    def _encode_ndjson(self, fragment):
+        return report.NdjsonReportWriter.encode_fragment(self.session_id, fragment)
+
+    def _write_ndjson(self):
+        """Grava o NDJSON completo em arquivo temporário e o substitui
+
+        Só os fragmentos alterados são serializados; os demais registros são
+        copiados da serialização anterior.
+        """
+        tmp_file = self.json_output.with_name(self.json_output.name + '.tmp')
+        stream = report.NdjsonReportWriter(tmp_file, self.session_id)
+        for key in self.merged:
+            stream.write_encoded(*self._cached(self.encoded, key, self._encode_ndjson))
+        stream.close(self.generator.generate_executive_summary(),
+                     self.generator.generate_recommendations(),
+                     self.generator.report_data['vulnerabilities'],
+                     self.generator.build_timeline()[1],
+                     self.generator.vendor_rollup() or ())
+        os.replace(tmp_file, self.json_output)
+        print(f"✅ Relatório NDJSON gerado: {self.json_output} ({stream.records} registros)")
+
+    def _print_status(self):
+        critical = self.severity_counts['Critical']
+        high = self.severity_counts['High']
+        risk_score, risk_level = self.generator.risk_assessment(
+            critical, high, self.totals['vulnerabilities'])
+        print(f"🔄 {datetime.datetime.now().strftime('%H:%M:%S')} | "
+              f"arquivos: {self.totals['files']} | targets: {len(self.target_counts)} | "
+              f"ataques: {self.totals['attacks']} | "
+              f"vulnerabilidades: {self.totals['vulnerabilities']} "
+              f"({critical} críticas, {high} altas) | risco: {risk_score}/100 {risk_level}")
+
+    def _rescan(self):
+        """Confere todos os itens da sessão (início e estouro da fila de eventos)"""
+        items = list(self.results_dir.glob(f"*{self.session_id}*"))
+        for path in [p for p in items if p.is_file()] + [p for p in items if p.is_dir()]:
+            self._handle(path)
+        for audit_dir in list(self.audit_dirs):
+            self._handle(audit_dir / self.AUDIT_REPORT)
+            for path in audit_dir.glob("*.txt"):
+                self._handle(path)
+        
+        # Itens removidos enquanto os eventos se perdiam
+        for key in list(self.fragments):
+            if not key.exists():
+                self._handle(key)
+
+    def _handle(self, path):
+        """Atualiza o item da sessão correspondente a um caminho alterado"""
+        if path.name.endswith('.tmp') or CaptureIndex.is_sidecar(path) or os.path.abspath(path) in self.outputs:
+            return
+        
+        parent = path.parent
+        if parent in self.audit_dirs:
+            if path.name == self.AUDIT_REPORT:
+                self._update_audit_report(parent)
+            elif path.suffix == '.txt':
+                self._update_file(path)
+        elif parent == self.results_dir and self.session_id in path.name:
+            if path.name.startswith('full_audit_') and path.name.endswith(self.session_id):
+                self._update_audit_dir(path)
+            elif path.is_file() or path in self.fragments:
+                self._update_file(path)
+
+    def _update_file(self, path):
+        if not self._changed(path):
+            return
+        if not path.is_file():
+            self._remove(path)
+            return
+        if path not in self.fragments:
+            if not self.seen[path][0]:
+                # Recém-criado e ainda vazio: processar quando tiver conteúdo
+                return
+            self._register(path)
+        
+        if SessionArchive.is_archive(path):
+            # Arquivo da sessão gravado de uma vez (pack): releitura completa
+            fragment = self._collect(self.generator._process_archive, path)
+        else:
+            state = self.states.setdefault(path, {})
+            fragment = self._collect(self.generator._process_result_file, path, state)
+        self._replace(path, fragment)
+
+    def _update_audit_dir(self, audit_dir):
+        if not audit_dir.is_dir():
+            # Auditoria removida: descartar o relatório e os arquivos dela
+            self.audit_dirs.discard(audit_dir)
+            for key in [k for k in self.fragments if k == audit_dir or k.parent == audit_dir]:
+                self._remove(key)
+            return
+        if audit_dir in self.audit_dirs:
+            return
+        
+        self.audit_dirs.add(audit_dir)
+        self.backend.add(audit_dir)
+        self._register(audit_dir)
+        self._update_audit_report(audit_dir)
+        for path in audit_dir.glob("*.txt"):
+            self._update_file(path)
+
+    def _update_audit_report(self, audit_dir):
+        html_report = audit_dir / self.AUDIT_REPORT
+        if not self._changed(html_report):
+            return
+        if not html_report.is_file():
+            self._remove(audit_dir)
+            return
+        fragment = self._collect(self._read_audit_report, html_report)
+        self._replace(audit_dir, fragment)
+
+    def _read_audit_report(self, html_report):
+        try:
+            self.generator._process_audit_report(html_report)
+        except Exception as e:
+            self.generator._warn(f"Erro processando auditoria {html_report.parent}: {e}")
+
+    def _collect(self, process, *args):
+        """Executa o processamento de um item e devolve apenas o fragmento dele"""
+        generator = self.generator
+        collected = generator.report_data
+        generator.report_data = generator._empty_report_data()
+        try:
+            process(*args)
+            return generator._take_fragment()
+        finally:
+            generator.report_data = collected
+
+    def _changed(self, path):
+        """Indica se tamanho/mtime do arquivo mudaram desde a última leitura"""
+        try:
+            stat = path.stat()
+            signature = (stat.st_size, stat.st_mtime_ns)
+        except FileNotFoundError:
+            signature = None
+        if self.seen.get(path) == signature:
+            return False
+        if signature is None:
+            del self.seen[path]
+        else:
+            self.seen[path] = signature
+        return True
+
+    def _register(self, path):
+        if self.generator.index:
+            self.generator.index.register(path, self.session_id)
+
+    def _replace(self, key, fragment):
+        """Substitui o fragmento de um item (mantendo sua posição) e ajusta os contadores"""
+        previous = self.fragments.get(key)
+        if previous is not None:
+            self._account(previous, -1)
+        self.fragments[key] = fragment
+        self.changed[key] = None
+        self._discard_rendered(key)
+        self._account(fragment, 1)
+        self.dirty = True
+        self.last_change = time.monotonic()
+
+    def _remove(self, key):
+        fragment = self.fragments.pop(key, None)
+        self.states.pop(key, None)
+        self.seen.pop(key, None)
+        self._discard_rendered(key)
+        if fragment is not None:
+            self.changed[key] = None
+            self._account(fragment, -1)
+            self.dirty = True
+            self.last_change = time.monotonic()
+
+    def _discard_rendered(self, key):
+        for cache in (self.rendered, self.encoded_json, self.encoded):
+            cache.pop(key, None)
+
+    def _account(self, fragment, sign):
+        """Soma (sign=1) ou subtrai (sign=-1) um fragmento dos contadores do resumo"""
+        self.totals['files'] += sign * len(fragment['files_analyzed'])
+        self.totals['attacks'] += sign * len(fragment['attacks'])
+        # Vulnerabilidades contam achados únicos (fingerprint), como no relatório
+        for vulnerability in fragment['vulnerabilities']:
+            fingerprint = vulnerability['fingerprint']
+            self.finding_counts[fingerprint] += sign * vulnerability.get('occurrences', 1)
+            if sign > 0 and self.finding_counts[fingerprint] == vulnerability.get('occurrences', 1):
+                self.totals['vulnerabilities'] += 1
+                self.severity_counts[vulnerability.get('severity')] += 1
+            elif sign < 0 and not self.finding_counts[fingerprint]:
+                del self.finding_counts[fingerprint]
+                self.totals['vulnerabilities'] -= 1
+                self.severity_counts[vulnerability.get('severity')] -= 1
+        for attack in fragment['attacks']:
+            target = attack.get('target', 'Unknown')
+            self.target_counts[target] += sign
+            if not self.target_counts[target]:
+                del self.target_counts[target]
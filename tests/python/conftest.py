@@ -0,0 +1,83 @@
+"""Configuração dos testes Python do gerador de relatórios (pytest)"""
+
+import datetime
+import struct
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+# Os módulos do gerador ficam na raiz do projeto
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import generate_final_report as report  # noqa: E402
+from benchmark_report import SessionGenerator  # noqa: E402
+
+SESSION_ID = 'bs_1700000000_4242'
+
+
+@pytest.fixture
+def make_session(tmp_path):
+    """Grava uma sessão sintética (formatos do bs-at-v2.sh) e retorna o diretório de resultados"""
+    def make(session_id=SESSION_ID, targets=3, files=5, captures=0, seed=7):
+        results = tmp_path / 'results'
+        SessionGenerator(results, session_id, targets=targets, files=files, size_kb=2,
+                         captures=captures, packets=120, seed=seed).generate()
+        return results
+    return make
+
+
+class FixedDatetime(datetime.datetime):
+    @classmethod
+    def now(cls, tz=None):
+        return cls(2024, 1, 2, 3, 4, 5, tzinfo=tz)
+
+
+@pytest.fixture
+def fixed_now(monkeypatch):
+    """Data de geração fixa nos relatórios (datetime.now() do gerador)"""
+    monkeypatch.setattr(report, 'datetime', SimpleNamespace(**dict(vars(datetime), datetime=FixedDatetime)))
+    return FixedDatetime.now()
+
+
+# Pacotes H4 (tipo + payload) de uma captura HCI de exemplo
+CAPTURE_EPOCH = 1700000000
+HCI_LE_CREATE_CONNECTION = bytes([1]) + struct.pack('<HB', 0x200D, 25) + bytes(25)
+HCI_LE_ADVERTISING_REPORT = bytes([4, 0x3E, 12, 0x02, 3]) + bytes(10)
+HCI_LE_CONNECTION_COMPLETE = bytes([4, 0x3E, 19, 0x01, 0x00]) + bytes(17)
+# Pedido de conexão L2CAP (PSM SDP) no handle 0x0040, primeiro fragmento
+HCI_L2CAP_CONNECT_SDP = bytes([2]) + struct.pack('<HHHHBBHHH', 0x2040, 12, 8, 0x0001,
+                                                 0x02, 1, 4, 0x0001, 0x0040)
+HCI_ACL_DATA = bytes([2]) + struct.pack('<HHHH', 0x2041, 104, 100, 0x0040) + bytes(100)
+
+# (segundos após CAPTURE_EPOCH, pacote)
+CAPTURE_PACKETS = [
+    (0.0, HCI_LE_ADVERTISING_REPORT),
+    (0.5, HCI_LE_CREATE_CONNECTION),
+    (1.2, HCI_LE_CONNECTION_COMPLETE),
+    (2.0, HCI_L2CAP_CONNECT_SDP),
+    (2.1, HCI_ACL_DATA),
+    (2.7, HCI_ACL_DATA),
+    (5.0, HCI_LE_ADVERTISING_REPORT),
+]
+
+BTSNOOP_EPOCH_DELTA = 0x00dcddb30f2f8000
+
+
+def write_capture(path, packets=CAPTURE_PACKETS, capture_format='btsnoop'):
+    """Grava uma captura btsnoop H4 (1002) ou pcap H4 (linktype 187) com os pacotes dados"""
+    if capture_format == 'btsnoop':
+        data = bytearray(b'btsnoop\0' + struct.pack('>II', 1, 1002))
+        for offset, packet in packets:
+            ts = round((CAPTURE_EPOCH + offset) * 1000000) + BTSNOOP_EPOCH_DELTA
+            data += struct.pack('>IIIIq', len(packet), len(packet), 0, 0, ts) + packet
+    else:
+        data = bytearray(struct.pack('<IHHiIII', 0xa1b2c3d4, 2, 4, 0, 0, 65535, 187))
+        for offset, packet in packets:
+            ts = round((CAPTURE_EPOCH + offset) * 1000000)
+            data += struct.pack('<IIII', ts // 1000000, ts % 1000000, len(packet), len(packet)) + packet
+    Path(path).write_bytes(bytes(data))
+    return Path(path)
@@ -0,0 +1,104 @@
+"""Benchmark do gerador de relatórios (benchmark_report.py)"""
+
+import json
+import re
+
+import pytest
+
+import benchmark_report as bench
+from conftest import SESSION_ID
+from report_capture import CaptureAnalyzer
+
+# Linhas com o horário da geração
+TIMESTAMP_LINE = re.compile(rb'^.*(?:Timestamp|Data/Hora):.*$', re.MULTILINE)
+
+
+def generate(results, seed=3, **params):
+    options = dict(targets=2, files=5, size_kb=4, captures=1, packets=120)
+    options.update(params)
+    return bench.SessionGenerator(results, SESSION_ID, seed=seed, **options)
+
+
+def contents(results):
+    """Conteúdo dos arquivos sem os horários e o diretório de geração (capturas: só o tamanho)"""
+    files = {}
+    for path in sorted(results.rglob('*')):
+        if path.suffix == '.pcap':
+            files[path.relative_to(results)] = path.stat().st_size
+        elif path.is_file():
+            data = path.read_bytes().replace(str(results).encode('utf-8'), b'')
+            files[path.relative_to(results)] = TIMESTAMP_LINE.sub(b'', data)
+    return files
+
+
+def test_session_is_reproducible(tmp_path):
+    first = generate(tmp_path / 'a')
+    files, size = first.generate()
+    generate(tmp_path / 'b').generate()
+
+    written = [path for path in (tmp_path / 'a').rglob('*') if path.is_file()]
+    assert files == len(written) == first.files
+    assert size == sum(path.stat().st_size for path in written)
+    # Mesma semente, mesmo conteúdo (a menos dos horários de geração)
+    assert contents(tmp_path / 'a') == contents(tmp_path / 'b')
+    generate(tmp_path / 'c', seed=4).generate()
+    assert contents(tmp_path / 'a') != contents(tmp_path / 'c')
+
+
+@pytest.mark.parametrize('files', [1, 3, 5])
+def test_report_kinds(tmp_path, files):
+    generate(tmp_path, files=files, captures=0).generate()
+    prefixes = {path.name.split('_00_1A_7D_')[0] for path in tmp_path.iterdir()}
+    assert prefixes == set(bench.REPORT_KINDS[:files])
+
+
+def test_sdp_size_and_capture(tmp_path):
+    generate(tmp_path, size_kb=8).generate()
+    sdp = next(tmp_path.glob('sdp_enum_*'))
+    assert 8 * 1024 <= sdp.stat().st_size < 9 * 1024
+
+    stats = CaptureAnalyzer().analyze(next(tmp_path.glob('*.pcap')))
+    assert stats['format'] == 'btsnoop' and not stats['truncated']
+    assert stats['packets'] == 120
+    # Um pedido de conexão L2CAP (PSM SDP) a cada 50 pacotes
+    assert stats['l2cap_psms'] == {'0x0001 (SDP)': 3}
+
+
+def test_run_stages(make_session, tmp_path):
+    results = make_session(targets=2, files=5, captures=1)
+    output = tmp_path / 'output'
+    output.mkdir()
+    measured = bench.run_stages(str(results), SESSION_ID, str(output), 1)
+
+    assert set(measured['stages']) == set(bench.STAGES)
+    assert all(stage['wall_s'] >= 0 and stage['peak_rss_kb'] > 0 for stage in measured['stages'].values())
+    assert measured['errors'] == 0 and measured['attacks'] > 0
+    assert json.loads((output / 'report.json').read_text())['metadata']['session_id'] == SESSION_ID
+
+
+def result(scale='small', collect=1.0, rss=1000, params=None):
+    return {'scale': scale, 'params': params or bench.SCALES[scale], 'peak_rss_kb': rss,
+            'stages': {stage: {'wall_s': collect if stage == 'collect' else 0.5} for stage in bench.STAGES}}
+
+
+def write_baseline(tmp_path, results, workers=1):
+    path = tmp_path / 'baseline.json'
+    path.write_text(json.dumps({'workers': workers, 'results': results}))
+    return path
+
+
+def test_compare_baseline(tmp_path):
+    baseline = write_baseline(tmp_path, [result(), result('medium')])
+
+    assert bench.compare_baseline([result(collect=1.05), result('medium', rss=1050)], baseline, 10, 1) == 0
+    assert bench.compare_baseline([result(collect=1.2), result('medium', rss=1200)], baseline, 10, 1) == 2
+    # Variações abaixo de min_delta são ruído
+    assert bench.compare_baseline([result(collect=1.2)], baseline, 10, 1, min_delta=0.5) == 0
+
+
+def test_compare_baseline_skips_incomparable_runs(tmp_path):
+    baseline = write_baseline(tmp_path, [result()], workers=4)
+    assert bench.compare_baseline([result(collect=9)], baseline, 10, 1) == 0
+
+    baseline = write_baseline(tmp_path, [result(params={'targets': 1})])
+    assert bench.compare_baseline([result(collect=9), result('large', collect=9)], baseline, 10, 1) == 0
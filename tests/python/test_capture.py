@@ -0,0 +1,154 @@
+"""Leitor nativo de capturas HCI (CaptureAnalyzer)"""
+
+import gzip
+import lzma
+import struct
+
+import pytest
+
+from conftest import (CAPTURE_PACKETS, HCI_ACL_DATA, HCI_LE_ADVERTISING_REPORT, SESSION_ID,
+                      write_capture)
+import generate_final_report as report
+from report_capture import CaptureAnalyzer
+
+EXPECTED = {
+    'packets': 7,
+    'first_packet': '2023-11-14T22:13:20+00:00',
+    'last_packet': '2023-11-14T22:13:25+00:00',
+    'duration': 5.0,
+    'truncated': False,
+    'packet_types': {'Command': 1, 'ACL Data': 3, 'Event': 3},
+    'l2cap_psms': {'0x0001 (SDP)': 1},
+    'acl_handles': {'0x0040': 1, '0x0041': 2},
+    'le_events': {'advertising_reports': 6, 'connect_requests': 1, 'connections': 1},
+}
+
+
+def subset(stats):
+    return {key: stats[key] for key in EXPECTED}
+
+
+@pytest.mark.parametrize('capture_format', ['btsnoop', 'pcap'])
+def test_counters(tmp_path, capture_format):
+    capture = write_capture(tmp_path / f'hci.{capture_format}', capture_format=capture_format)
+    stats = CaptureAnalyzer().analyze(capture)
+
+    assert subset(stats) == EXPECTED
+    assert stats['format'] == capture_format
+    assert stats['linktype'] == (1002 if capture_format == 'btsnoop' else 187)
+    assert stats['bytes'] == stats['original_bytes'] == sum(len(p) for _, p in CAPTURE_PACKETS)
+    assert stats['size'] == capture.stat().st_size
+    assert stats['file'] == str(capture)
+
+
+def test_rate_buckets(tmp_path):
+    capture = write_capture(tmp_path / 'hci.btsnoop')
+    stats = CaptureAnalyzer(bucket_seconds=2).analyze(capture)
+
+    # Janelas alinhadas ao epoch: [0, 2) s, [2, 4) s e [4, 6) s da captura
+    assert [bucket[1] for bucket in stats['rate_buckets']] == [3, 3, 1]
+    assert stats['rate_buckets'][0][0] == '2023-11-14T22:13:20+00:00'
+    assert stats['rate_buckets'][1][2] == len(HCI_ACL_DATA) * 2 + 17
+    assert stats['peak_packets_per_second'] == 1.5
+
+
+def test_truncated_record_is_ignored(tmp_path):
+    capture = write_capture(tmp_path / 'hci.btsnoop')
+    with open(capture, 'ab') as f:
+        f.write(b'\0' * 10)
+    stats = CaptureAnalyzer().analyze(capture)
+
+    assert stats['truncated'] is True
+    assert stats['packets'] == EXPECTED['packets']
+
+
+def test_growing_capture_is_read_incrementally(tmp_path):
+    capture = tmp_path / 'hci.btsnoop'
+    analyzer = CaptureAnalyzer()
+    state = {}
+    write_capture(capture, CAPTURE_PACKETS[:3])
+    partial = analyzer.analyze(capture, state)
+    assert partial['packets'] == 3
+    position = state['pos']
+
+    write_capture(capture, CAPTURE_PACKETS + [(6.0, HCI_LE_ADVERTISING_REPORT)])
+    grown = analyzer.analyze(capture, state)
+    assert state['pos'] > position
+    assert grown == analyzer.analyze(capture)
+    assert grown['packets'] == 8
+
+
+def test_truncated_file_restarts_scan(tmp_path):
+    capture = write_capture(tmp_path / 'hci.btsnoop')
+    analyzer = CaptureAnalyzer()
+    state = {}
+    analyzer.analyze(capture, state)
+
+    write_capture(capture, CAPTURE_PACKETS[:2])
+    assert analyzer.analyze(capture, state)['packets'] == 2
+
+
+def compress(capture, suffix):
+    compressor = gzip.compress if suffix == '.gz' else lzma.compress
+    compressed = capture.with_name(capture.name + suffix)
+    compressed.write_bytes(compressor(capture.read_bytes()))
+    return compressed
+
+
+@pytest.mark.parametrize('suffix', ['.gz', '.xz'])
+@pytest.mark.parametrize('capture_format', ['btsnoop', 'pcap'])
+@pytest.mark.parametrize('chunk_size', [1, 7, 1024 * 1024])
+def test_compressed_capture_is_streamed(tmp_path, monkeypatch, capture_format, suffix, chunk_size):
+    # Blocos pequenos: cabeçalhos e registros divididos entre leituras
+    monkeypatch.setattr(CaptureAnalyzer, 'STREAM_CHUNK_SIZE', chunk_size)
+    capture = write_capture(tmp_path / f'hci.{capture_format}', capture_format=capture_format)
+    with open(capture, 'ab') as f:
+        f.write(b'\0' * 10)
+    plain = CaptureAnalyzer(bucket_seconds=2).analyze(capture)
+
+    stats = CaptureAnalyzer(bucket_seconds=2).analyze(compress(capture, suffix))
+    assert stats['truncated'] is True
+    assert stats['file'].endswith(suffix)
+    assert dict(stats, file=plain['file']) == plain
+
+
+def test_corrupted_record_stops_stream(tmp_path, monkeypatch):
+    monkeypatch.setattr(CaptureAnalyzer, 'STREAM_CHUNK_SIZE', 64)
+    monkeypatch.setattr(CaptureAnalyzer, 'STREAM_RECORD_LIMIT', 256)
+    capture = write_capture(tmp_path / 'hci.btsnoop', CAPTURE_PACKETS[:3])
+    with open(capture, 'ab') as f:
+        # Registro com tamanho absurdo seguido de dados que não cabem nele
+        f.write(struct.pack('>IIIIq', 1 << 30, 1 << 30, 0, 0, 0) + bytes(4096))
+    plain = CaptureAnalyzer().analyze(capture)
+
+    stats = CaptureAnalyzer().analyze(compress(capture, '.gz'))
+    assert (stats['packets'], stats['truncated']) == (3, True)
+    assert dict(stats, file=plain['file']) == plain
+
+
+@pytest.mark.parametrize('content, message', [
+    (b'', 'vazia'),
+    (b'\x0a\x0d\x0d\x0a' + bytes(28), 'pcapng'),
+    (b'not a capture at all', 'desconhecido'),
+    (b'btsnoop\0' + struct.pack('>II', 1, 500), 'datalink'),
+])
+def test_invalid_captures(tmp_path, content, message):
+    capture = tmp_path / 'hci.cap'
+    capture.write_bytes(content)
+    with pytest.raises(ValueError, match=message):
+        CaptureAnalyzer().analyze(capture)
+    with pytest.raises(ValueError, match=message):
+        CaptureAnalyzer().analyze(compress(capture, '.gz'))
+
+
+def test_session_captures_are_reported(tmp_path):
+    results = tmp_path / 'results'
+    results.mkdir()
+    write_capture(results / f'bluesmack_capture_AA_BB_CC_DD_EE_FF_{SESSION_ID}.btsnoop')
+
+    generator = report.BlueSecAuditReportGenerator(SESSION_ID, str(results), str(tmp_path / 'logs'))
+    generator.collect_session_data()
+    captures = generator.report_data['captures']
+
+    assert len(captures) == 1
+    assert subset(captures[0]) == EXPECTED
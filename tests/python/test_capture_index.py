@@ -0,0 +1,114 @@
+"""Índice lateral de capturas por intervalos de tempo (CaptureIndex)"""
+
+import gzip
+
+import pytest
+
+from conftest import (CAPTURE_EPOCH, CAPTURE_PACKETS, HCI_ACL_DATA, HCI_L2CAP_CONNECT_SDP,
+                      HCI_LE_ADVERTISING_REPORT, SESSION_ID, write_capture)
+import generate_final_report as report
+from report_capture import CaptureAnalyzer, CaptureIndex
+
+
+@pytest.fixture(params=['btsnoop', 'pcap'])
+def capture(request, tmp_path):
+    return write_capture(tmp_path / f'hci.{request.param}', capture_format=request.param)
+
+
+def test_build_and_load_round_trip(capture):
+    built = CaptureIndex.build(capture)
+    loaded = CaptureIndex.load(capture)
+
+    assert CaptureIndex.path_for(capture).name == capture.name + '.idx'
+    assert loaded.entries == built.entries
+    # Intervalos de 1 s com pacotes: 0, 1, 2 e 5 s após o início
+    assert [entry[0] // 1000000 - CAPTURE_EPOCH for entry in loaded.entries] == [0, 1, 2, 5]
+    assert loaded.period() == (CAPTURE_EPOCH, CAPTURE_EPOCH + 6)
+    assert loaded.indexed_bytes == capture.stat().st_size
+
+
+def test_analysis_matches_analyzer(capture):
+    index = CaptureIndex.build(capture, bucket_seconds=2)
+
+    assert index.analysis(capture, bucket_seconds=2) == CaptureAnalyzer(bucket_seconds=2).analyze(capture)
+    assert index.analysis(capture, bucket_seconds=60) is None
+
+
+def test_counts(capture):
+    index = CaptureIndex.build(capture)
+
+    assert index.counts(CAPTURE_EPOCH, CAPTURE_EPOCH + 2) == {
+        'packets': 3, 'bytes': sum(len(p) for _, p in CAPTURE_PACKETS[:3]),
+        'advertising_reports': 3, 'connect_requests': 1, 'connections': 1}
+    assert index.counts(CAPTURE_EPOCH + 2, CAPTURE_EPOCH + 3) == {
+        'packets': 3, 'bytes': len(HCI_L2CAP_CONNECT_SDP) + 2 * len(HCI_ACL_DATA),
+        'advertising_reports': 0, 'connect_requests': 0, 'connections': 0}
+    # Limites são arredondados para os intervalos indexados
+    assert index.counts(CAPTURE_EPOCH + 2.5, CAPTURE_EPOCH + 2.6)['packets'] == 3
+    assert index.counts(CAPTURE_EPOCH + 3, CAPTURE_EPOCH + 5)['packets'] == 0
+    assert index.counts(CAPTURE_EPOCH - 60, CAPTURE_EPOCH + 60)['packets'] == len(CAPTURE_PACKETS)
+
+
+def test_extract(capture, tmp_path):
+    index = CaptureIndex.build(capture)
+    output = tmp_path / f'slice{capture.suffix}'
+    copied = index.extract(capture, CAPTURE_EPOCH + 1, CAPTURE_EPOCH + 3, output)
+
+    stats = CaptureAnalyzer().analyze(output)
+    assert stats['packets'] == 4
+    assert stats['first_packet'] == '2023-11-14T22:13:21.200000+00:00'
+    assert stats['truncated'] is False
+    assert copied == output.stat().st_size - CaptureIndex.FILE_HEADER_SIZE[stats['format']]
+
+    # Período sem pacotes: apenas o cabeçalho da captura
+    assert index.extract(capture, CAPTURE_EPOCH + 3, CAPTURE_EPOCH + 5, output) == 0
+    assert CaptureAnalyzer().analyze(output)['packets'] == 0
+
+
+def test_stale_or_invalid_index_is_ignored(tmp_path):
+    capture = write_capture(tmp_path / 'hci.btsnoop')
+    assert CaptureIndex.load(capture) is None
+    CaptureIndex.build(capture)
+
+    # Captura alterada depois da indexação
+    write_capture(capture, CAPTURE_PACKETS + [(7.0, HCI_LE_ADVERTISING_REPORT)])
+    assert CaptureIndex.load(capture) is None
+    assert CaptureIndex.build(capture).period() == (CAPTURE_EPOCH, CAPTURE_EPOCH + 8)
+
+    CaptureIndex.path_for(capture).write_bytes(b'BSACIX2\0 truncado')
+    assert CaptureIndex.load(capture) is None
+
+
+def test_compressed_capture_is_not_indexed(tmp_path):
+    plain = write_capture(tmp_path / 'hci.btsnoop')
+    compressed = tmp_path / 'hci.btsnoop.gz'
+    compressed.write_bytes(gzip.compress(plain.read_bytes()))
+
+    with pytest.raises(ValueError, match='sem compressão'):
+        CaptureIndex.build(compressed)
+
+
+def test_session_uses_index_and_skips_sidecar(tmp_path, monkeypatch):
+    results = tmp_path / 'results'
+    results.mkdir()
+    capture = write_capture(results / f'bluesmack_capture_AA_BB_CC_DD_EE_FF_{SESSION_ID}.btsnoop')
+    (results / f'bluesmack_report_AA_BB_CC_DD_EE_FF_{SESSION_ID}.txt').write_text(
+        "Target: AA:BB:CC:DD:EE:FF\nTimestamp: 2023-11-14T22:13:22Z\nResult: SUCCESS\n")
+    CaptureIndex.build(capture)
+
+    def fail(self, file_path, state=None):
+        raise AssertionError('a captura indexada não deveria ser relida')
+
+    monkeypatch.setattr(CaptureAnalyzer, 'analyze', fail)
+    generator = report.BlueSecAuditReportGenerator(SESSION_ID, str(results), str(tmp_path / 'logs'))
+    generator.collect_session_data()
+
+    assert generator.errors == 0
+    assert sorted(f['filename'] for f in generator.report_data['files_analyzed']) == sorted(
+        [capture.name, f'bluesmack_report_AA_BB_CC_DD_EE_FF_{SESSION_ID}.txt'])
+    assert generator.report_data['captures'][0]['packets'] == len(CAPTURE_PACKETS)
+
+    windows = generator.capture_attack_windows()
+    assert list(windows) == [str(capture)]
+    assert windows[str(capture)][0]['occurred_at'] == '2023-11-14T22:13:22Z'
+    assert windows[str(capture)][0]['packets'] == len(CAPTURE_PACKETS)
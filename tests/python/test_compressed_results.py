@@ -0,0 +1,103 @@
+"""Resultados comprimidos (.gz/.xz) e arquivo compactado da sessão (SessionArchive)"""
+
+import gzip
+import json
+import lzma
+import shutil
+import zipfile
+
+import pytest
+
+from conftest import SESSION_ID
+import generate_final_report as report
+from report_archive import SessionArchive
+
+REPORT_KEYS = ('targets', 'attacks', 'vulnerabilities', 'files_analyzed', 'captures')
+COMPRESSORS = {'.gz': gzip.compress, '.xz': lzma.compress}
+
+
+def collect(results, logs):
+    generator = report.BlueSecAuditReportGenerator(SESSION_ID, str(results), str(logs))
+    generator.collect_session_data()
+    assert generator.errors == 0
+    return generator
+
+
+def snapshot(generator, replace=()):
+    """report_data serializado (sem depender da ordem de varredura), com os caminhos substituídos"""
+    data = json.dumps({key: list(generator.report_data[key]) for key in REPORT_KEYS},
+                      default=str, sort_keys=True)
+    for old, new in replace:
+        data = data.replace(old, new)
+    return {key: sorted(items, key=lambda item: json.dumps(item, sort_keys=True))
+            for key, items in json.loads(data).items()}
+
+
+def compress_results(results, suffix):
+    """Substitui cada arquivo de resultado e captura pela versão comprimida"""
+    for path in list(results.rglob('*')):
+        if path.is_file():
+            path.with_name(path.name + suffix).write_bytes(COMPRESSORS[suffix](path.read_bytes()))
+            path.unlink()
+
+
+@pytest.mark.parametrize('suffix', sorted(COMPRESSORS))
+def test_compressed_results_match_plain(make_session, tmp_path, suffix):
+    results = make_session(targets=3, files=5, captures=1)
+    plain = snapshot(collect(results, tmp_path / 'logs'))
+
+    compress_results(results, suffix)
+    compressed = collect(results, tmp_path / 'logs')
+    assert all(f['filename'].endswith(suffix) for f in compressed.report_data['files_analyzed'])
+
+    # Mesmo conteúdo; mudam apenas os nomes e tamanhos dos arquivos
+    data = snapshot(compressed, [(suffix + '"', '"')])
+    for key in ('files_analyzed', 'captures'):
+        for item in data[key] + plain[key]:
+            item.pop('size', None)
+    for key in REPORT_KEYS:
+        assert sorted(data[key], key=str) == sorted(plain[key], key=str), key
+
+
+def test_logical_name():
+    assert report._logical_name('sdp_enum_x.txt.gz') == 'sdp_enum_x.txt'
+    assert report._logical_name('hci.btsnoop.xz') == 'hci.btsnoop'
+    assert report._logical_name('sdp_enum_x.txt') == 'sdp_enum_x.txt'
+    assert report._is_compressed('a.txt.zst') and not report._is_compressed('a.txt')
+
+
+@pytest.mark.parametrize('compression', sorted(SessionArchive.COMPRESSION))
+def test_archive_round_trip(make_session, tmp_path, compression):
+    results = make_session(targets=3, files=5, captures=1)
+    expected = collect(results, tmp_path / 'logs')
+    tasks = expected._find_session_items()
+
+    archive_path, index = SessionArchive.pack(SESSION_ID, tasks, results, expected.rules, compression)
+    assert archive_path == SessionArchive.path_for(results, SESSION_ID)
+    assert index['session_id'] == SESSION_ID
+    assert SessionArchive.top_level_names(archive_path) == {path.name for _, path in tasks}
+    assert all(len(member['sha256']) == 64 for member in index['members'])
+    assert {member['target'] for member in index['members']} == {
+        '00:1A:7D:00:00:00', '00:1A:7D:00:00:01', '00:1A:7D:00:00:02'}
+
+    # Enquanto os originais existirem, os itens arquivados não são contados duas vezes
+    assert snapshot(collect(results, tmp_path / 'logs'), [(f'{archive_path}/', f'{results}/')]) == \
+        snapshot(expected)
+
+    for kind, path in tasks:
+        if kind == 'dir':
+            shutil.rmtree(path)
+        else:
+            path.unlink()
+    assert [p.name for p in results.iterdir()] == [archive_path.name]
+
+    packed = collect(results, tmp_path / 'logs')
+    assert snapshot(packed, [(f'{archive_path}/', f'{results}/')]) == snapshot(expected)
+
+
+def test_invalid_archive_is_rejected(tmp_path):
+    path = tmp_path / f'{SESSION_ID}{SessionArchive.SUFFIX}'
+    with zipfile.ZipFile(path, 'w') as zf:
+        zf.writestr('sdp_enum.txt', 'Service Name: Serial Port\n')
+    with pytest.raises(ValueError, match='índice de membros ausente'):
+        SessionArchive(path)
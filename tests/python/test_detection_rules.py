@@ -0,0 +1,156 @@
+"""Regras de detecção declarativas (DetectionRules)"""
+
+import itertools
+
+import pytest
+
+import generate_final_report as report
+
+RULES = """
+[file_types]
+scan = Scan
+
+[processor:scan]
+filename = ^scan_
+label = Scan
+attack_type = Custom Scan
+field.open_ports = count:OPEN
+field.vulnerable = flag:VULNERABLE | EXPLOITABLE
+field.firmware = value:Firmware
+
+[finding:vulnerable]
+processor = scan
+when = vulnerable
+type = Weak Firmware
+severity = High
+description = Vulnerable firmware
+recommendation = Update the firmware
+
+[finding:debug]
+processor = scan
+when = contains:debug mode
+type = Debug Interface
+severity = Medium
+description = Debug mode enabled
+recommendation = Disable debug mode
+
+[recommendation:firmware]
+vulnerability = Weak Firmware
+priority = High
+category = Firmware
+recommendation = Keep firmware up to date
+
+[recommendation:general]
+vulnerability = *
+priority = Low
+category = General
+recommendation = Monitor
+"""
+
+
+def write_rules(tmp_path, text=RULES):
+    path = tmp_path / 'rules.conf'
+    path.write_text(text, encoding='utf-8')
+    return path
+
+
+def baseline_classify(filename):
+    """_classify_file_type do gerador original"""
+    for needle, label in (('bluesmack', 'DoS Attack'), ('sdp', 'Service Enumeration'),
+                          ('pin', 'Authentication Attack'), ('obex', 'File System Access'),
+                          ('hid', 'HID Injection'), ('audio', 'Audio Interception'),
+                          ('ble', 'BLE Attack')):
+        if needle in filename:
+            return label
+    return 'Unknown'
+
+
+# generate_recommendations do gerador original, na mesma ordem
+BASELINE_RECOMMENDATIONS = [
+    ('DoS Vulnerability', {'priority': 'High', 'category': 'Availability',
+                           'recommendation': 'Implement DoS protection mechanisms and rate limiting'}),
+    ('Weak Authentication', {'priority': 'Critical', 'category': 'Authentication',
+                             'recommendation': 'Upgrade to Secure Simple Pairing (SSP) or use strong PINs'}),
+    ('Insecure Service', {'priority': 'Medium', 'category': 'Services',
+                          'recommendation': 'Disable unnecessary Bluetooth services and profiles'}),
+    ('File Access', {'priority': 'Medium', 'category': 'Data Protection',
+                     'recommendation': 'Enable authentication for file transfer services'}),
+]
+BASELINE_GENERAL = {'priority': 'Low', 'category': 'General',
+                    'recommendation': 'Regular security updates and monitoring of Bluetooth communications'}
+
+
+@pytest.mark.parametrize('filename', [
+    'bluesmack_report_AA_BB_CC_DD_EE_FF_bs_1_2.txt', 'sdp_enum_x.txt', 'pin_bruteforce_x.txt',
+    'obex_summary_x.txt', 'hid_injection_x.txt', 'audio_capture_x.txt', 'ble_scan_x.txt',
+    'audit_report.html', 'notes.txt', 'bluesmack_sdp_pin.txt',
+])
+def test_default_file_types_match_baseline(filename):
+    assert report.DetectionRules.load().classify(filename) == baseline_classify(filename)
+
+
+def test_first_matching_processor_wins():
+    rules = report.DetectionRules.load()
+    assert rules.processor_for('sdp_audio_x.txt')['name'] == 'sdp_audio'
+    assert rules.processor_for('sdp_enum_x.txt')['name'] == 'sdp'
+    assert rules.processor_for('hci.btsnoop')['handler'] == 'capture'
+    assert rules.processor_for('notes.txt') is None
+
+
+def test_default_recommendations_match_baseline(tmp_path):
+    generator = report.BlueSecAuditReportGenerator('bs_1_1', str(tmp_path), str(tmp_path))
+    for size in range(len(BASELINE_RECOMMENDATIONS) + 1):
+        for combination in itertools.combinations(BASELINE_RECOMMENDATIONS, size):
+            generator.report_data['vulnerabilities'] = report.FindingIndex(
+                {'type': vulnerability, 'target': 'AA:BB:CC:DD:EE:FF'} for vulnerability, _ in combination)
+            expected = [recommendation for _, recommendation in combination] + [BASELINE_GENERAL]
+            assert generator.generate_recommendations() == expected
+
+
+def test_custom_rules_drive_the_report(tmp_path):
+    rules = report.DetectionRules(write_rules(tmp_path))
+    results = tmp_path / 'results'
+    results.mkdir()
+    (results / 'scan_AA_BB_CC_DD_EE_FF_bs_1_1.txt').write_text(
+        "Target: AA:BB:CC:DD:EE:FF\nFirmware: 1.2.3\nport 1 OPEN\nport 2 OPEN\n"
+        "status: EXPLOITABLE\ndebug mode on\n")
+    (results / 'scan_11_22_33_44_55_66_bs_1_1.txt').write_text("Target: 11:22:33:44:55:66\nport 1 CLOSED\n")
+
+    generator = report.BlueSecAuditReportGenerator('bs_1_1', str(results), str(tmp_path / 'logs'), rules=rules)
+    generator.collect_session_data()
+    attacks = {attack['target']: attack for attack in generator.report_data['attacks']}
+
+    assert {key: attacks['AA:BB:CC:DD:EE:FF'][key] for key in ('type', 'open_ports', 'vulnerable', 'firmware')} == {
+        'type': 'Custom Scan', 'open_ports': 2, 'vulnerable': True, 'firmware': '1.2.3'}
+    assert (attacks['11:22:33:44:55:66']['open_ports'], attacks['11:22:33:44:55:66']['vulnerable'],
+            attacks['11:22:33:44:55:66']['firmware']) == (0, False, None)
+    assert [(v['type'], v['evidence']) for v in generator.report_data['vulnerabilities']] == [
+        ('Weak Firmware', 'vulnerable'), ('Debug Interface', 'debug')]
+    assert [r['category'] for r in generator.generate_recommendations()] == ['Firmware', 'General']
+    assert generator.report_data['files_analyzed'][0]['type'] == 'Scan'
+
+
+def test_digest_follows_rule_changes(tmp_path):
+    path = write_rules(tmp_path)
+    first = report.DetectionRules(path)
+    assert report.DetectionRules(path).digest == first.digest
+    path.write_text(RULES.replace('count:OPEN', 'count:OPEN | open'), encoding='utf-8')
+    assert report.DetectionRules(path).digest != first.digest
+
+    assert report.DetectionRules.load(path) is report.DetectionRules.load(path)
+    assert report.DetectionRules.reload(path) is report.DetectionRules.load(path)
+
+
+@pytest.mark.parametrize('change, message', [
+    (('label = Scan', 'handler = magic\nlabel = Scan'), "handler desconhecido 'magic'"),
+    (('attack_type = Custom Scan\n', ''), "'attack_type' ausente"),
+    (('filename = ^scan_', 'filename = scan_('), 'regex inválida'),
+    (('processor = scan\nwhen = vulnerable', 'processor = nmap\nwhen = vulnerable'), "processador desconhecido 'nmap'"),
+    (('when = vulnerable', 'when = missing'), "condição desconhecida 'missing'"),
+    (('field.firmware = value:Firmware', 'field.firmware = gatt:services'), "exige handler = gatt"),
+    (('[file_types]', '[unknown]'), 'seção desconhecida'),
+])
+def test_invalid_rules(tmp_path, change, message):
+    assert change[0] in RULES
+    with pytest.raises(ValueError, match=message):
+        report.DetectionRules(write_rules(tmp_path, RULES.replace(*change)))
@@ -0,0 +1,94 @@
+"""Deduplicação de vulnerabilidades (FindingIndex)"""
+
+import generate_final_report as report
+from conftest import SESSION_ID
+
+
+def finding(target='AA:BB:CC:DD:EE:FF', finding_type='Insecure Service', evidence='sdp_serial_port',
+            severity='Medium', seen='2024-01-01T10:00:00Z', source='sdp_1.txt'):
+    return {'type': finding_type, 'severity': severity, 'target': target, 'evidence': evidence,
+            'first_seen': seen, 'last_seen': seen, 'sources': [source]}
+
+
+def test_same_key_is_merged():
+    index = report.FindingIndex([
+        finding(seen='2024-01-02T10:00:00Z', source='sdp_2.txt'),
+        finding(seen='2024-01-01T10:00:00Z', source='sdp_1.txt'),
+        finding(seen='2024-01-03T10:00:00Z', source='sdp_2.txt'),
+    ])
+
+    assert len(index) == 1
+    assert index.occurrences == 3
+    merged = index[0]
+    assert merged['occurrences'] == 3
+    assert merged['first_seen'] == '2024-01-01T10:00:00Z'
+    assert merged['last_seen'] == '2024-01-03T10:00:00Z'
+    assert merged['sources'] == ['sdp_2.txt', 'sdp_1.txt']
+    assert merged['fingerprint'] == report.FindingIndex.fingerprint(
+        'AA:BB:CC:DD:EE:FF', 'Insecure Service', 'sdp_serial_port')
+    # Contadores contam achados distintos, não ocorrências
+    assert index.severity_counts == {'Medium': 1}
+    assert index.target_counts == {'AA:BB:CC:DD:EE:FF': 1}
+
+
+def test_distinct_keys_are_kept_in_first_seen_order():
+    index = report.FindingIndex([
+        finding(target='11:22:33:44:55:66'),
+        finding(finding_type='File Access', evidence='sdp_obex'),
+        finding(target='11:22:33:44:55:66'),
+        finding(finding_type='Weak Authentication', evidence='pin_found', severity='Critical'),
+    ])
+
+    assert [(f['target'], f['type']) for f in index] == [
+        ('11:22:33:44:55:66', 'Insecure Service'),
+        ('AA:BB:CC:DD:EE:FF', 'File Access'),
+        ('AA:BB:CC:DD:EE:FF', 'Weak Authentication'),
+    ]
+    assert index.severity_counts == {'Medium': 2, 'Critical': 1}
+    assert index.type_counts == {'Insecure Service': 1, 'File Access': 1, 'Weak Authentication': 1}
+    groups = index.group_by_target()
+    assert {target: list(positions) for target, positions in groups.items()} == {
+        '11:22:33:44:55:66': [0], 'AA:BB:CC:DD:EE:FF': [1, 2]}
+
+
+def test_sources_are_limited():
+    limit = report.FindingIndex.SOURCE_LIMIT
+    index = report.FindingIndex(finding(source=f'sdp_{n}.txt') for n in range(limit + 5))
+
+    assert index[0]['occurrences'] == limit + 5
+    assert index[0]['sources'] == [f'sdp_{n}.txt' for n in range(limit)]
+
+
+def test_merged_entries_keep_occurrences():
+    # Um índice já deduplicado (p.ex. de outra sessão) soma as ocorrências
+    first = report.FindingIndex([finding(), finding()])
+    second = report.FindingIndex([finding(seen='2024-02-01T00:00:00Z', source='sdp_9.txt')])
+    second.extend(first)
+
+    assert second.occurrences == 3
+    assert second[0]['occurrences'] == 3
+    assert second[0]['first_seen'] == '2024-01-01T10:00:00Z'
+    assert second[0]['last_seen'] == '2024-02-01T00:00:00Z'
+
+
+def test_items_are_copies():
+    index = report.FindingIndex([finding()])
+    index[0]['sources'].append('outro.txt')
+    assert index[0]['sources'] == ['sdp_1.txt']
+
+
+def test_reanalysed_target_does_not_inflate_report(make_session, tmp_path):
+    # Dois arquivos SDP do mesmo target geram uma única vulnerabilidade por evidência
+    results = make_session(targets=1, files=1)
+    original = next(results.glob('sdp_enum_*'))
+    copy = original.with_name(original.name.replace('sdp_enum_', 'sdp_enum_rerun_'))
+    copy.write_bytes(original.read_bytes())
+
+    generator = report.BlueSecAuditReportGenerator(SESSION_ID, str(results), str(tmp_path / 'logs'))
+    generator.collect_session_data()
+    vulnerabilities = generator.report_data['vulnerabilities']
+
+    assert len(generator.report_data['attacks']) == 2
+    assert len(vulnerabilities) == 2
+    assert all(v['occurrences'] == 2 for v in vulnerabilities)
+    assert all(sorted(v['sources']) == sorted([str(original), str(copy)]) for v in vulnerabilities)
@@ -0,0 +1,74 @@
+"""Armazenamento colunar de achados (FindingStore)"""
+
+import pytest
+
+import generate_final_report as report
+from conftest import SESSION_ID
+
+ITEMS = [
+    {'type': 'SDP Enumeration', 'target': 'AA:BB:CC:DD:EE:FF', 'services_found': 9,
+     'protocols_found': 7, 'file': 'sdp.txt'},
+    {'type': 'BlueSmack DoS', 'target': 'AA:BB:CC:DD:EE:FF', 'success': True, 'file': 'dos.txt'},
+    {'type': 'PIN Brute Force', 'target': 'Unknown', 'success': False, 'file': 'pin.txt'},
+    {'type': 'OBEX Exploitation', 'target': 'aa:bb:cc:dd:ee:ff', 'files_accessed': 0, 'file': None},
+    {'file': 'audit.html', 'type': 'Full Security Audit', 'severity': 'High', 'details': {'k': [1, 2]}},
+]
+
+
+def test_rows_round_trip():
+    store = report.FindingStore(ITEMS)
+
+    assert len(store) == len(ITEMS)
+    assert list(store) == ITEMS
+    # A ordem das chaves de cada linha é preservada
+    assert [list(row) for row in store] == [list(item) for item in ITEMS]
+    assert store[1]['success'] is True and store[2]['success'] is False
+    assert store[-1] == ITEMS[-1]
+    assert store[1:3] == ITEMS[1:3]
+    with pytest.raises(IndexError):
+        store[len(ITEMS)]
+
+
+def test_mixed_column_types_are_demoted():
+    items = [
+        {'target': 'AA:BB:CC:DD:EE:FF', 'count': 1, 'success': True, 'type': 'a'},
+        {'target': 'AA:BB:CC:DD:EE:01', 'count': 1 << 70, 'success': 1, 'type': 'b'},
+        {'target': None, 'count': 'many', 'success': None, 'type': 3},
+        {'target': 'AA:BB:CC:DD:EE:FF', 'count': 2.5, 'success': False, 'type': 'a'},
+    ]
+    store = report.FindingStore(items)
+
+    assert list(store) == items
+    assert type(store[1]['success']) is int and type(store[0]['success']) is bool
+
+
+def test_counters():
+    store = report.FindingStore(ITEMS)
+
+    assert store.target_counts == {'AA:BB:CC:DD:EE:FF': 2, 'Unknown': 1, 'aa:bb:cc:dd:ee:ff': 1}
+    assert store.type_counts['BlueSmack DoS'] == 1
+    assert store.severity_counts == {'High': 1}
+
+
+def test_group_by_target():
+    store = report.FindingStore(ITEMS)
+    groups = {target: list(rows) for target, rows in store.group_by_target().items()}
+
+    # Linhas sem target são agrupadas como 'Unknown', junto com o target literal
+    assert groups == {'AA:BB:CC:DD:EE:FF': [0, 1], 'Unknown': [2, 4], 'aa:bb:cc:dd:ee:ff': [3]}
+    assert report.FindingStore([{'type': 'x'}]).group_by_target() == {'Unknown': report.array('I', [0])}
+    assert report.FindingStore().group_by_target() == {}
+
+
+def test_store_matches_list_in_report(make_session, tmp_path):
+    results = make_session(targets=3, files=5)
+    generator = report.BlueSecAuditReportGenerator(SESSION_ID, str(results), str(tmp_path / 'logs'))
+    generator.collect_session_data()
+    attacks = generator.report_data['attacks']
+
+    rows = list(attacks)
+    assert report.FindingStore(rows)[:] == rows
+    counts = {}
+    for row in rows:
+        counts[row['target']] = counts.get(row['target'], 0) + 1
+    assert attacks.target_counts == counts
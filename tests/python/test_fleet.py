@@ -0,0 +1,152 @@
+"""Relatório de frota: descoberta de sessões e consolidação por target (--fleet)"""
+
+import json
+
+import pytest
+
+from report_fleet import FleetAggregator, SessionLoader
+
+FIRST, SECOND, THIRD = 'bs_1700000000_1', 'bs_1700086400_2', 'bs_1700172800_3'
+AA, BB, CC = 'AA:BB:CC:00:00:01', 'AA:BB:CC:00:00:02', 'AA:BB:CC:00:00:03'
+
+SDP_SERIAL_OBEX = "Service Name: Serial Port\nService Name: OBEX Object Push\n"
+PIN_FOUND = "Status: SUCCESS - PIN FOUND\n"
+PIN_FAILED = "Status: FAILED\n"
+DOS = "Result: SUCCESS\n"
+
+
+def write_result(results, prefix, mac, session_id, content):
+    name = f"{prefix}_{mac.replace(':', '_')}_{session_id}.txt"
+    (results / name).write_text(f"Target: {mac}\nTimestamp: 2023-11-14T22:13:20Z\n{content}")
+
+
+@pytest.fixture
+def results(tmp_path):
+    results = tmp_path / 'results'
+    results.mkdir()
+    # AA aparece nas três sessões e corrige o PIN na última; BB some depois
+    # da segunda; CC só aparece na última
+    write_result(results, 'sdp_enum', AA, FIRST, SDP_SERIAL_OBEX)
+    write_result(results, 'pin_bruteforce', AA, FIRST, PIN_FOUND)
+    write_result(results, 'bluesmack_report', BB, FIRST, DOS)
+    write_result(results, 'pin_bruteforce', AA, SECOND, PIN_FOUND)
+    write_result(results, 'bluesmack_report', BB, SECOND, DOS)
+    write_result(results, 'bluesmack_report', BB, SECOND + '_rerun', DOS)
+    write_result(results, 'pin_bruteforce', AA, THIRD, PIN_FAILED)
+    write_result(results, 'bluesmack_report', CC, THIRD, DOS)
+    (results / 'notes.txt').write_text('fora de qualquer sessão')
+    return results
+
+
+def aggregate(results, tmp_path, sessions=(FIRST, SECOND, THIRD)):
+    fleet = FleetAggregator(SessionLoader(results, tmp_path / 'logs'))
+    fleet.run(list(sessions))
+    return fleet
+
+
+def test_discover_sessions(results, tmp_path):
+    loader = SessionLoader(results, tmp_path / 'logs')
+    assert loader.discover_sessions() == [FIRST, SECOND, THIRD]
+    assert loader.discover_sessions(since=1700086400) == [SECOND, THIRD]
+    assert loader.discover_sessions(until=1700172800) == [FIRST, SECOND]
+    assert loader.discover_sessions(since=1700000001, until=1700172800) == [SECOND]
+
+
+def test_sort_sessions():
+    assert SessionLoader.session_started(SECOND) == 1700086400
+    assert SessionLoader.session_started('manual') is None
+    assert SessionLoader.sort_sessions(['manual', THIRD, 'bs_999_9', FIRST, THIRD]) == [
+        'bs_999_9', FIRST, THIRD, 'manual']
+
+
+def test_summarize_reduces_session(results, tmp_path):
+    loader = SessionLoader(results, tmp_path / 'logs')
+    first, second = loader.summaries([FIRST, SECOND])
+
+    assert (first['session_id'], first['started'], first['files']) == (FIRST, 1700000000, 3)
+    assert set(first['targets']) == {AA, BB}
+    assert first['targets'][AA]['attacks'] == 2
+    assert first['targets'][AA]['risk_score'] == 40
+    # As duas execuções de DoS em BB são um único achado com duas ocorrências
+    findings = list(second['targets'][BB]['findings'].values())
+    assert [(f['type'], f['count']) for f in findings] == [('DoS Vulnerability', 2)]
+
+
+def test_target_records(results, tmp_path):
+    records = {record['target']: record for record in aggregate(results, tmp_path).target_records()}
+
+    aa, bb, cc = records[AA], records[BB], records[CC]
+    assert (aa['first_seen'], aa['last_seen'], aa['sessions'], aa['attacks']) == (
+        '2023-11-14T22:13:20Z', '2023-11-16T22:13:20Z', 3, 4)
+    assert [point['session_id'] for point in aa['risk_trend']] == [FIRST, SECOND, THIRD]
+    # O risco atual é o da última sessão em que o target apareceu
+    assert aa['risk_score'] == aa['risk_trend'][-1]['risk_score'] == 0
+    pin = next(f for f in aa['findings'] if f['type'] == 'Weak Authentication')
+    assert (pin['occurrences'], pin['sessions'], pin['last_seen']) == (2, 2, '2023-11-15T22:13:20Z')
+
+    assert (bb['sessions'], bb['last_seen']) == (2, '2023-11-15T22:13:20Z')
+    assert [(f['type'], f['occurrences'], f['sessions']) for f in bb['findings']] == [
+        ('DoS Vulnerability', 3, 2)]
+    assert (cc['first_seen'], cc['sessions']) == ('2023-11-16T22:13:20Z', 1)
+
+
+def test_target_case_is_normalized(results, tmp_path):
+    # MAC em minúsculas no conteúdo do arquivo (o nome do arquivo segue o padrão)
+    name = f"bluesmack_report_{CC.replace(':', '_')}_{SECOND}.txt"
+    (results / name).write_text(f"Target: {CC.lower()}\nTimestamp: 2023-11-15T22:13:20Z\n{DOS}")
+    records = {record['target']: record for record in aggregate(results, tmp_path).target_records()}
+
+    assert set(records) == {AA, BB, CC}
+    cc = records[CC]
+    assert (cc['sessions'], cc['attacks'], cc['first_seen']) == (2, 2, '2023-11-15T22:13:20Z')
+    assert [(f['type'], f['occurrences'], f['sessions']) for f in cc['findings']] == [
+        ('DoS Vulnerability', 2, 2)]
+
+
+def test_merge_order_does_not_matter(results, tmp_path):
+    loader = SessionLoader(results, tmp_path / 'logs')
+    summaries = list(loader.summaries([FIRST, SECOND, THIRD]))
+    forward, backward = FleetAggregator(loader), FleetAggregator(loader)
+    for summary in summaries:
+        forward.merge(summary)
+    for summary in reversed(summaries):
+        backward.merge(summary)
+
+    assert forward.target_records() == backward.target_records()
+
+
+def test_fleet_summary(results, tmp_path):
+    fleet = aggregate(results, tmp_path)
+    records = fleet.target_records()
+    summary = fleet.fleet_summary(records)
+
+    assert records == sorted(records, key=lambda record: (-record['risk_score'], record['target']))
+    assert (summary['total_sessions'], summary['total_targets']) == (3, 3)
+    assert summary['unique_findings'] == sum(len(record['findings']) for record in records)
+    assert summary['max_risk_score'] == records[0]['risk_score']
+    assert (summary['first_session'], summary['last_session']) == (
+        '2023-11-14T22:13:20Z', '2023-11-16T22:13:20Z')
+
+
+def test_reports(results, tmp_path):
+    fleet = aggregate(results, tmp_path)
+    records = fleet.target_records()
+    summary = fleet.fleet_summary(records)
+
+    fleet.generate_json_report(tmp_path / 'fleet.json', records, summary)
+    document = json.loads((tmp_path / 'fleet.json').read_text())
+    assert document['metadata']['report_type'] == 'fleet'
+    assert (document['summary'], document['targets']) == (summary, records)
+    assert [session['session_id'] for session in document['sessions']] == [FIRST, SECOND, THIRD]
+
+    fleet.generate_json_report(tmp_path / 'fleet.ndjson', records, summary, 'ndjson')
+    lines = [json.loads(line) for line in (tmp_path / 'fleet.ndjson').read_text().splitlines()]
+    assert [line['record_type'] for line in lines] == (
+        ['metadata'] + ['session'] * 3 + ['target'] * 3 + ['summary'])
+    assert [line['target'] for line in lines if line['record_type'] == 'target'] == [
+        record['target'] for record in records]
+
+    fleet.generate_html_report(tmp_path / 'fleet.html', records, summary)
+    html = (tmp_path / 'fleet.html').read_text()
+    assert html.count('<details class="target-group"') == 3
+    assert not list(tmp_path.glob('*.tmp'))
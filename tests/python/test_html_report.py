@@ -0,0 +1,97 @@
+"""Relatório HTML gravado em streaming (generate_html_report)"""
+
+import re
+from html.parser import HTMLParser
+
+import pytest
+
+import generate_final_report as report
+from conftest import SESSION_ID
+
+HOSTILE = '<script>alert("x")</script>'
+
+
+class SectionCounter(HTMLParser):
+    """Conta as seções por target e verifica o aninhamento das tags"""
+
+    VOID = {'meta', 'br', 'hr', 'img', 'input', 'link'}
+
+    def __init__(self):
+        super().__init__()
+        self.stack = []
+        self.groups = []
+        self.scripts = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'script':
+            self.scripts += 1
+        if tag == 'details':
+            self.groups.append('open' in dict(attrs))
+        if tag not in self.VOID:
+            self.stack.append(tag)
+
+    def handle_endtag(self, tag):
+        assert self.stack and self.stack[-1] == tag, (self.stack[-3:], tag)
+        self.stack.pop()
+
+
+def generator_with_findings(tmp_path, attacks_per_target):
+    generator = report.BlueSecAuditReportGenerator(SESSION_ID, str(tmp_path), str(tmp_path / 'logs'))
+    for target, count in attacks_per_target.items():
+        for n in range(count):
+            generator.report_data['attacks'].append({
+                'type': f'BlueSmack DoS {HOSTILE}', 'target': target, 'success': n % 2 == 0,
+                'timestamp': HOSTILE, 'occurred_at': f'2024-01-01T10:{n:02d}:00Z'})
+    generator.report_data['vulnerabilities'].append({
+        'type': 'DoS Vulnerability', 'severity': 'High', 'target': HOSTILE,
+        'description': HOSTILE, 'recommendation': '"&"', 'evidence': 'dos',
+        'sources': [f'/results/{HOSTILE}.txt']})
+    generator.report_data['files_analyzed'].append({'filename': HOSTILE, 'size': 1, 'type': HOSTILE})
+    return generator
+
+
+def render(generator, tmp_path):
+    output = tmp_path / 'report.html'
+    generator.generate_html_report(output)
+    assert not output.with_name(output.name + '.tmp').exists()
+    html = output.read_text(encoding='utf-8')
+    parser = SectionCounter()
+    parser.feed(html)
+    parser.close()
+    return html, parser
+
+
+def test_values_are_escaped(tmp_path):
+    html, parser = render(generator_with_findings(tmp_path, {'AA:BB:CC:DD:EE:FF': 2}), tmp_path)
+
+    assert HOSTILE not in html
+    assert parser.scripts == 0
+    assert parser.stack == []
+    assert '&lt;script&gt;alert(&quot;x&quot;)&lt;/script&gt;' in html
+    assert '&quot;&amp;&quot;' in html
+
+
+def test_findings_are_grouped_by_target(tmp_path, monkeypatch):
+    monkeypatch.setattr(report.BlueSecAuditReportGenerator, 'HTML_GROUP_OPEN_LIMIT', 3)
+    targets = {'AA:BB:CC:DD:EE:01': 2, 'AA:BB:CC:DD:EE:02': 5, HOSTILE: 1}
+    html, parser = render(generator_with_findings(tmp_path, targets), tmp_path)
+
+    # Ataques: uma seção por target; vulnerabilidades: uma seção para o único target
+    assert parser.groups == [True, False, True, True]
+    summaries = re.findall(r'<summary>🎯 ([^<]*?) — (\d+) ataques</summary>', html)
+    assert [(target, int(count)) for target, count in summaries] == [
+        ('AA:BB:CC:DD:EE:01', 2), ('AA:BB:CC:DD:EE:02', 5), (report._h(HOSTILE), 1)]
+
+
+def test_existing_report_is_replaced_atomically(tmp_path, monkeypatch):
+    output = tmp_path / 'report.html'
+    output.write_text('relatório anterior')
+    generator = generator_with_findings(tmp_path, {'AA:BB:CC:DD:EE:FF': 1})
+
+    def fail(self, out):
+        raise OSError('disco cheio')
+
+    monkeypatch.setattr(report.BlueSecAuditReportGenerator, '_write_html_footer', fail)
+    with pytest.raises(OSError):
+        generator.generate_html_report(output)
+    assert output.read_text() == 'relatório anterior'
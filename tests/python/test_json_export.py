@@ -0,0 +1,93 @@
+"""Exportação JSON e NDJSON em streaming"""
+
+import json
+
+import pytest
+
+import generate_final_report as report
+from conftest import SESSION_ID
+
+RECORD_KEYS = {'target': 'targets', 'attack': 'attacks', 'file': 'files_analyzed',
+               'capture': 'captures', 'vulnerability': 'vulnerabilities'}
+
+
+def read_ndjson(path):
+    records = [json.loads(line) for line in path.read_bytes().splitlines()]
+    for record in records:
+        assert record.pop('session_id') == SESSION_ID
+    return records
+
+
+@pytest.fixture
+def session(make_session):
+    return make_session(targets=3, files=5, captures=1)
+
+
+def test_ndjson_matches_json(session, tmp_path):
+    generator = report.BlueSecAuditReportGenerator(SESSION_ID, str(session), str(tmp_path / 'logs'))
+    generator.collect_session_data()
+    # Como na CLI: o HTML (gerado antes) preenche as recomendações do report_data
+    generator.generate_recommendations()
+    generator.generate_json_report(tmp_path / 'report.json')
+    document = json.loads((tmp_path / 'report.json').read_text(encoding='utf-8'))
+
+    stream = report.NdjsonReportWriter(tmp_path / 'report.ndjson', SESSION_ID)
+    streamed = report.BlueSecAuditReportGenerator(SESSION_ID, str(session), str(tmp_path / 'logs'),
+                                                  stream=stream)
+    streamed.collect_session_data()
+    streamed.finish_ndjson_report()
+    records = read_ndjson(tmp_path / 'report.ndjson')
+
+    assert records[0]['record_type'] == 'metadata'
+    assert records[-1]['record_type'] == 'recommendation'
+    assert stream.records == len(records)
+    by_type = {}
+    for record in records:
+        record_type = record.pop('record_type')
+        by_type.setdefault(record_type, []).append(record.get('value', record))
+    for record_type, key in RECORD_KEYS.items():
+        expected = document['data'][key]
+        # Ataques são gravados por arquivo, na ordem de coleta
+        assert sorted(by_type.get(record_type, []), key=str) == sorted(expected, key=str), key
+    assert by_type['activity'] == document['activity_by_hour']
+    assert by_type['summary'] == [document['summary']]
+    assert by_type['recommendation'] == document['data']['recommendations']
+
+
+def test_ndjson_is_written_during_collection(session, tmp_path):
+    stream = report.NdjsonReportWriter(tmp_path / 'report.ndjson', SESSION_ID)
+    generator = report.BlueSecAuditReportGenerator(SESSION_ID, str(session), str(tmp_path / 'logs'),
+                                                   stream=stream)
+    generator.collect_session_data()
+
+    # Antes do fechamento, os registros dos itens coletados já estão no arquivo
+    types = [record['record_type'] for record in read_ndjson(tmp_path / 'report.ndjson')]
+    assert types.count('attack') == len(generator.report_data['attacks'])
+    assert types.count('file') == len(generator.report_data['files_analyzed'])
+    assert 'summary' not in types
+    generator.finish_ndjson_report()
+
+
+def test_encode_fragment():
+    fragment = {'attacks': [{'type': 'BlueSmack DoS', 'success': True}], 'targets': ['AA:BB:CC:DD:EE:FF'],
+                'files_analyzed': [], 'vulnerabilities': [{'type': 'ignorado'}]}
+    data, count = report.NdjsonReportWriter.encode_fragment(SESSION_ID, fragment)
+
+    assert count == 2
+    assert [json.loads(line) for line in data.splitlines()] == [
+        {'record_type': 'target', 'session_id': SESSION_ID, 'value': 'AA:BB:CC:DD:EE:FF'},
+        {'record_type': 'attack', 'session_id': SESSION_ID, 'type': 'BlueSmack DoS', 'success': True},
+    ]
+
+
+def test_json_fallback_matches_orjson(monkeypatch):
+    record = {'attacks': report.FindingStore([{'type': 'Ação', 'target': 'AA:BB:CC:DD:EE:FF'}]),
+              'vulnerabilities': report.FindingIndex([{'type': 'x', 'target': 'y'}])}
+    encoded = json.loads(report._dumps_compact(record))
+    monkeypatch.setattr(report, 'orjson', None)
+    fallback = report._dumps_compact(record)
+
+    assert json.loads(fallback) == encoded
+    assert 'Ação'.encode('utf-8') in fallback
+    with pytest.raises(TypeError):
+        report._dumps_compact({'value': object()})
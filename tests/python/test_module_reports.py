@@ -0,0 +1,148 @@
+"""Processadores dos relatórios HID, áudio, BLE, GATT e SDP de áudio"""
+
+import pytest
+
+import generate_final_report as report
+
+SESSION = 'bs_1700000000_7'
+MAC = 'AA:BB:CC:DD:EE:FF'
+MAC_NAME = MAC.replace(':', '_')
+
+MODULE_HTML = """<!DOCTYPE html>
+<html>
+<head><title>Report</title><style>.{section} {{ font-family: monospace; }}</style></head>
+<body>
+    <div class="container">
+        <h1>Attack Report</h1>
+        <p>Exemplo do modelo: Status: SUCCESS, Encryption: None, Pairing: Just Works</p>
+        <div class="{section}">{data}</div>
+        <div class="footer">
+            <p><strong>Report Date:</strong> Tue Nov 14 22:13:20 UTC 2023</p>
+        </div>
+    </div>
+</body>
+</html>
+"""
+
+GATTTOOL = f"""Target: {MAC}
+attr handle = 0x0001, end grp handle = 0x0007 uuid: 00001800-0000-1000-8000-00805f9b34fb
+attr handle = 0x0010, end grp handle = 0x0020 uuid: 0000180d-0000-1000-8000-00805f9b34fb
+handle = 0x0002, char properties = 0x02, char value handle = 0x0003, uuid = 00002a00-0000-1000-8000-00805f9b34fb
+handle = 0x0011, char properties = 0x10, char value handle = 0x0012, uuid = 00002a37-0000-1000-8000-00805f9b34fb
+handle = 0x0013, char properties = 0x0a, char value handle = 0x0014, uuid = 00002a39-0000-1000-8000-00805f9b34fb
+"""
+
+BLUETOOTHCTL = f"""Target: {MAC}
+Primary Service
+\t/org/bluez/hci0/dev_{MAC_NAME}/service0001
+\t0000180f-0000-1000-8000-00805f9b34fb
+\tBattery Service
+Characteristic
+\t/org/bluez/hci0/dev_{MAC_NAME}/service0001/char0002
+\t00002a19-0000-1000-8000-00805f9b34fb
+\tBattery Level
+"""
+
+
+def collect(tmp_path, files):
+    results = tmp_path / 'results'
+    results.mkdir()
+    for name, content in files.items():
+        (results / name.format(mac=MAC_NAME, session=SESSION)).write_text(content, encoding='utf-8')
+    generator = report.BlueSecAuditReportGenerator(SESSION, str(results), str(tmp_path / 'logs'))
+    generator.collect_session_data()
+    assert generator.errors == 0
+    return generator
+
+
+def only_attack(generator):
+    attacks = list(generator.report_data['attacks'])
+    assert len(attacks) == 1
+    return attacks[0]
+
+
+def vulnerability_types(generator):
+    return [vulnerability['type'] for vulnerability in generator.report_data['vulnerabilities']]
+
+
+@pytest.mark.parametrize('status, expected', [('SUCCESS (simulated)', ['HID Injection']), ('FAILED', [])])
+def test_hid_report(tmp_path, status, expected):
+    # Mesmo formato do hid_data gravado pelo bs-at-v2.sh
+    data = f"Target: {MAC}\nPayload Type: keyboard\nDuration: 30s\nStatus: {status}"
+    generator = collect(tmp_path, {'hid_report_{mac}_{session}.html':
+                                   MODULE_HTML.format(section='attack-data', data=data)})
+    attack = only_attack(generator)
+
+    assert attack['type'] == 'HID Injection'
+    assert attack['target'] == MAC
+    assert (attack['payload_type'], attack['duration'], attack['success']) == ('keyboard', '30s', bool(expected))
+    # Sem Timestamp na seção de dados vale a data do rodapé
+    assert attack['occurred_at'] == '2023-11-14T22:13:20Z'
+    assert vulnerability_types(generator) == expected
+    assert generator.report_data['files_analyzed'][0]['type'] == 'HID Injection'
+
+
+def test_audio_report(tmp_path):
+    data = f"Target: {MAC}\nTimestamp: 2024-01-01T10:00:00Z\nDuration: 60s\nSample Rate: 44100 Hz\nStatus: SUCCESS"
+    generator = collect(tmp_path, {'audio_report_{mac}_{session}.html':
+                                   MODULE_HTML.format(section='audio-data', data=data)})
+    attack = only_attack(generator)
+
+    assert (attack['type'], attack['sample_rate'], attack['success']) == (
+        'Audio Interception', '44100 Hz', True)
+    assert attack['occurred_at'] == '2024-01-01T10:00:00Z'
+    assert vulnerability_types(generator) == ['Audio Interception']
+
+
+def test_ble_report(tmp_path):
+    data = "Pairing: Just Works\nEncryption: AES-128\nAuthentication: None\nServices: 5"
+    generator = collect(tmp_path, {'ble_security_{mac}_{session}.html':
+                                   MODULE_HTML.format(section='ble-data', data=data)})
+    attack = only_attack(generator)
+
+    # Os dados BLE não têm linha Target: vale o MAC do nome do arquivo
+    assert attack['target'] == MAC
+    assert {key: attack[key] for key in ('pairing', 'encryption', 'authentication', 'services')} == {
+        'pairing': 'Just Works', 'encryption': 'AES-128', 'authentication': 'None', 'services': '5'}
+    # "Encryption: None" aparece apenas no texto do modelo, fora da seção de dados
+    assert vulnerability_types(generator) == ['Weak Authentication', 'Weak Authentication']
+    assert [v['evidence'] for v in generator.report_data['vulnerabilities']] == [
+        'ble_just_works', 'ble_no_authentication']
+
+
+def test_gatttool_table(tmp_path):
+    generator = collect(tmp_path, {'gatt_services_{mac}_{session}.txt': GATTTOOL})
+    attack = only_attack(generator)
+
+    assert {key: attack[key] for key in ('services_found', 'characteristics_found',
+                                         'writable_characteristics', 'health_data')} == {
+        'services_found': 2, 'characteristics_found': 3, 'writable_characteristics': 1, 'health_data': True}
+    assert vulnerability_types(generator) == ['Insecure Service', 'Data Exposure']
+
+
+def test_bluetoothctl_table(tmp_path):
+    attack = only_attack(collect(tmp_path, {'gatt_attributes_{mac}_{session}.txt': BLUETOOTHCTL}))
+
+    assert (attack['services_found'], attack['characteristics_found'], attack['health_data']) == (1, 1, False)
+
+
+def test_short_uuid():
+    assert report.GattTableReader.short_uuid('00002a37-0000-1000-8000-00805f9b34fb') == '2A37'
+    assert report.GattTableReader.short_uuid('6e400001-b5a3-f393-e0a9-e50e24dcca9e') == \
+        '6E400001-B5A3-F393-E0A9-E50E24DCCA9E'
+
+
+def test_sdp_audio_report(tmp_path):
+    content = (f"=== SDP Audio para {MAC} ===\nTimestamp: 2024-01-01T10:00:00Z\n"
+               "Service Name: Audio Sink\nProtocol Descriptor List:\n"
+               "Service Name: AV Remote Control Target\nService Name: Headset Gateway\n")
+    generator = collect(tmp_path, {'sdp_audio_{mac}_{session}.txt': content})
+    attack = only_attack(generator)
+
+    assert attack['type'] == 'Audio Service Enumeration'
+    assert {key: attack[key] for key in ('services_found', 'protocols_found', 'a2dp_source', 'a2dp_sink',
+                                         'remote_control', 'headset', 'handsfree')} == {
+        'services_found': 3, 'protocols_found': 1, 'a2dp_source': False, 'a2dp_sink': True,
+        'remote_control': True, 'headset': True, 'handsfree': False}
+    assert vulnerability_types(generator) == ['Audio Exposure']
+    assert generator.report_data['files_analyzed'][0]['type'] == 'Audio Interception'
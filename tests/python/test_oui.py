@@ -0,0 +1,136 @@
+"""Tabela OUI compilada e agregação dos relatórios por fabricante"""
+
+import json
+
+import pytest
+
+import generate_final_report as report
+from conftest import SESSION_ID
+from report_oui import OuiTable
+
+OUI_TEXT = """OUI/MA-L                                                    Organization
+company_id                                                  Organization
+                                                            Address
+
+00-1A-7D   (hex)\t\tcyber-blue(HK)Ltd
+001A7D     (base 16)\t\tcyber-blue(HK)Ltd
+\t\t\t\tShenzhen  Guangdong  518000
+\t\t\t\tCN
+
+F0-99-B6   (hex)\t\tApple,   Inc.
+F099B6     (base 16)\t\tApple, Inc.
+
+00-03-93   (hex)\t\tApple, Inc.
+AC-DE-48   (hex)\t\tPrivate
+"""
+
+OUI_CSV = """Registry,Assignment,Organization Name,Organization Address
+MA-L,001A7D,cyber-blue(HK)Ltd,Shenzhen CN
+MA-L,F099B6,"Apple, Inc.",Cupertino US
+MA-L,000393,"Apple, Inc.",Cupertino US
+MA-L,ZZZZZZ,Invalid,
+MA-L,ACDE48,Private,
+"""
+
+
+@pytest.fixture
+def oui_table(tmp_path):
+    source = tmp_path / 'oui.txt'
+    source.write_text(OUI_TEXT)
+    output = tmp_path / 'oui.bin'
+    assert OuiTable.compile(source, output) == 4
+    return OuiTable.load(output)
+
+
+def test_registry_formats(tmp_path):
+    (tmp_path / 'oui.txt').write_text(OUI_TEXT)
+    (tmp_path / 'oui.csv').write_text(OUI_CSV)
+    entries = OuiTable.read_registry(tmp_path / 'oui.txt')
+
+    assert entries == OuiTable.read_registry(tmp_path / 'oui.csv')
+    assert entries == {0x001A7D: 'cyber-blue(HK)Ltd', 0xF099B6: 'Apple, Inc.',
+                       0x000393: 'Apple, Inc.', 0xACDE48: 'Private'}
+
+
+def test_lookup(oui_table):
+    assert len(oui_table) == 4
+    assert oui_table.lookup('00:1A:7D:12:34:56') == 'cyber-blue(HK)Ltd'
+    assert oui_table.lookup('f0-99-b6-00-00-01') == 'Apple, Inc.'
+    assert oui_table.lookup('000393AABBCC') == 'Apple, Inc.'
+    # Prefixos vizinhos, fora da tabela e MACs malformados
+    for mac in ('00:1A:7C:00:00:00', '00:1A:7E:00:00:00', 'FF:FF:FF:00:00:00', '00:00:00:00:00:00',
+                '00:1A:7D', 'Unknown', None):
+        assert oui_table.lookup(mac) is None
+
+
+def test_vendor_labels(oui_table):
+    assert oui_table.vendor('00:1A:7D:00:00:01') == 'cyber-blue(HK)Ltd'
+    assert oui_table.vendor('AC:DE:48:00:00:01') == 'Private'
+    # Bit localmente administrado (ex.: endereços BLE aleatórios)
+    assert oui_table.vendor('D2:11:22:33:44:55') == OuiTable.LOCAL_LABEL
+    assert oui_table.vendor('00:1A:7E:00:00:00') == OuiTable.UNKNOWN_LABEL
+
+
+def test_names_are_pooled(tmp_path, oui_table):
+    data = (tmp_path / 'oui.bin').read_bytes()
+    assert data.count(b'Apple, Inc.\0') == 1
+
+
+def test_load_follows_recompilation(tmp_path, oui_table):
+    assert OuiTable.load(tmp_path / 'oui.bin') is oui_table
+    assert OuiTable.load(tmp_path / 'missing.bin') is None
+
+    (tmp_path / 'oui.csv').write_text(OUI_CSV.replace('cyber-blue(HK)Ltd', 'Cyber Blue'))
+    OuiTable.compile(tmp_path / 'oui.csv', tmp_path / 'oui.bin')
+    reloaded = OuiTable.load(tmp_path / 'oui.bin')
+    assert reloaded is not oui_table
+    assert reloaded.lookup('00:1A:7D:00:00:01') == 'Cyber Blue'
+
+
+def test_invalid_tables(tmp_path):
+    (tmp_path / 'empty.txt').write_text('nada aqui\n')
+    with pytest.raises(ValueError, match='nenhuma entrada'):
+        OuiTable.compile(tmp_path / 'empty.txt', tmp_path / 'empty.bin')
+    assert not (tmp_path / 'empty.bin').exists()
+
+    (tmp_path / 'short.bin').write_bytes(b'BSA')
+    (tmp_path / 'magic.bin').write_bytes(OuiTable.HEADER.pack(b'OTHER\0\0\0', 0, 0))
+    for name in ('short.bin', 'magic.bin'):
+        with pytest.raises(ValueError, match='tabela OUI inválida'):
+            OuiTable(tmp_path / name)
+
+
+def test_vendor_rollup(make_session, tmp_path, oui_table):
+    results = make_session(targets=3, files=6)
+    (results / f'pin_bruteforce_D2_11_22_33_44_55_{SESSION_ID}.txt').write_text(
+        "Target: D2:11:22:33:44:55\nStatus: SUCCESS - PIN FOUND\n")
+    generator = report.BlueSecAuditReportGenerator(SESSION_ID, str(results), str(tmp_path / 'logs'),
+                                                   vendors=oui_table)
+    generator.collect_session_data()
+    rollup = {entry['vendor']: entry for entry in generator.vendor_rollup()}
+
+    data = generator.report_data
+    assert set(rollup) == {'cyber-blue(HK)Ltd', OuiTable.LOCAL_LABEL}
+    assert sum(entry['targets'] for entry in rollup.values()) == len(
+        {target.upper() for target in data['targets']} |
+        {attack['target'].upper() for attack in data['attacks']})
+    assert sum(entry['attacks'] for entry in rollup.values()) == len(data['attacks'])
+    assert sum(entry['vulnerabilities'] for entry in rollup.values()) == len(data['vulnerabilities'])
+    local = rollup[OuiTable.LOCAL_LABEL]
+    assert (local['targets'], local['attacks'], local['vulnerabilities']) == (1, 1, 1)
+    assert local['risk_score'] == generator.risk_assessment(
+        local['critical_vulns'], local['high_vulns'], local['vulnerabilities'])[0]
+
+    generator.generate_json_report(tmp_path / 'report.json')
+    document = json.loads((tmp_path / 'report.json').read_text())
+    assert document['vendors'] == generator.vendor_rollup()
+
+
+def test_no_table_no_rollup(make_session, tmp_path):
+    results = make_session(targets=1, files=3)
+    generator = report.BlueSecAuditReportGenerator(SESSION_ID, str(results), str(tmp_path / 'logs'))
+    generator.collect_session_data()
+    generator.generate_json_report(tmp_path / 'report.json')
+
+    assert generator.vendor_rollup() is None
+    assert 'vendors' not in json.loads((tmp_path / 'report.json').read_text())
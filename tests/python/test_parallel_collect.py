@@ -0,0 +1,52 @@
+"""Coleta paralela (--workers) x coleta serial"""
+
+import pytest
+
+import generate_final_report as report
+from conftest import SESSION_ID
+
+REPORT_KEYS = ('targets', 'attacks', 'vulnerabilities', 'files_analyzed', 'captures')
+
+
+def collect(results, logs, workers):
+    generator = report.BlueSecAuditReportGenerator(SESSION_ID, str(results), str(logs),
+                                                   workers=workers)
+    generator.collect_session_data()
+    return generator
+
+
+@pytest.mark.parametrize('workers', [2, 3])
+def test_parallel_collect_matches_serial(make_session, tmp_path, workers):
+    results = make_session(targets=5, files=5, captures=2)
+    serial = collect(results, tmp_path / 'logs', 1)
+    parallel = collect(results, tmp_path / 'logs', workers)
+
+    for key in REPORT_KEYS:
+        assert list(parallel.report_data[key]) == list(serial.report_data[key]), key
+    assert len(serial.report_data['attacks']) > 0 and serial.report_data['captures']
+    assert parallel.errors == serial.errors == 0
+    assert parallel.report_data['attacks'].target_counts == serial.report_data['attacks'].target_counts
+
+
+@pytest.mark.parametrize('workers', [2, 3])
+def test_parallel_reports_match_serial(make_session, tmp_path, fixed_now, workers):
+    results = make_session(targets=5, files=5, captures=2)
+    outputs = {}
+    for mode, count in (('serial', 1), ('parallel', workers)):
+        generator = collect(results, tmp_path / 'logs', count)
+        generator.generate_html_report(tmp_path / f'{mode}.html')
+        generator.generate_json_report(tmp_path / f'{mode}.json')
+        outputs[mode] = [(tmp_path / f'{mode}.{ext}').read_bytes() for ext in ('html', 'json')]
+
+    assert outputs['parallel'] == outputs['serial']
+
+
+def test_single_item_is_collected_serially(make_session, tmp_path, monkeypatch):
+    results = make_session(targets=1, files=1)
+
+    def fail(self, tasks):
+        raise AssertionError('ProcessPoolExecutor não deveria ser usado')
+
+    monkeypatch.setattr(report.BlueSecAuditReportGenerator, '_collect_parallel', fail)
+    generator = collect(results, tmp_path / 'logs', 4)
+    assert len(generator.report_data['files_analyzed']) == 1
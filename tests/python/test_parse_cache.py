@@ -0,0 +1,99 @@
+"""Cache persistente de parsing (ParseCache)"""
+
+import os
+
+import generate_final_report as report
+from conftest import SESSION_ID
+from report_cache import ParseCache
+
+REPORT_KEYS = ('targets', 'attacks', 'vulnerabilities', 'files_analyzed', 'captures')
+
+
+def collect(results, cache):
+    generator = report.BlueSecAuditReportGenerator(SESSION_ID, str(results), str(results.parent / 'logs'),
+                                                   cache=cache)
+    generator.collect_session_data()
+    return {key: list(generator.report_data[key]) for key in REPORT_KEYS}
+
+
+def open_cache(tmp_path, **options):
+    return ParseCache(tmp_path / 'logs' / 'report_cache.db', **options)
+
+
+def test_cached_run_matches_fresh_run(make_session, tmp_path):
+    results = make_session(targets=3, files=5, captures=1)
+    fresh = collect(results, None)
+
+    cache = open_cache(tmp_path)
+    assert collect(results, cache) == fresh
+    items = cache.misses
+    assert (cache.hits, items) == (0, 3 * 4 + 3 + 1)
+    cache.close()
+
+    # O cache persiste entre execuções
+    cache = open_cache(tmp_path)
+    assert collect(results, cache) == fresh
+    assert (cache.hits, cache.misses) == (items, 0)
+    cache.close()
+
+
+def test_changed_file_is_reprocessed(make_session, tmp_path):
+    results = make_session(targets=2, files=1)
+    cache = open_cache(tmp_path)
+    collect(results, cache)
+
+    changed = sorted(results.glob('sdp_enum_*'))[0]
+    changed.write_text(changed.read_text() + "Service Name: Serial Port\n")
+    cache.hits = cache.misses = 0
+    data = collect(results, cache)
+
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert data == collect(results, None)
+    cache.close()
+
+
+def test_hash_detects_content_change_with_same_stat(make_session, tmp_path):
+    results = make_session(targets=1, files=1)
+    path = next(results.glob('sdp_enum_*'))
+    stat = path.stat()
+
+    for use_hash, expected_hits in ((False, 1), (True, 0)):
+        cache = open_cache(tmp_path / str(use_hash), use_hash=use_hash)
+        collect(results, cache)
+        content = path.read_bytes()
+        path.write_bytes(content.replace(b'Service Name:', b'Service Nome:', 1))
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        cache.hits = cache.misses = 0
+        collect(results, cache)
+        assert cache.hits == expected_hits
+        cache.close()
+        path.write_bytes(content)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+
+def test_namespace_change_invalidates(make_session, tmp_path):
+    results = make_session(targets=1, files=2)
+    cache = open_cache(tmp_path, namespace='rules-a')
+    collect(results, cache)
+    cache.close()
+
+    cache = open_cache(tmp_path, namespace='rules-b')
+    collect(results, cache)
+    assert (cache.hits, cache.misses) == (0, 2)
+    cache.close()
+
+
+def test_size_limit_evicts_least_recently_used(tmp_path):
+    cache = open_cache(tmp_path, max_size_mb=0)
+    cache.max_size = 3000
+    for accessed, name in enumerate('abc'):
+        path = tmp_path / f'{name}.txt'
+        path.write_text(name)
+        cache.store('file', path, {'attacks': ['x' * 1000]})
+        cache.conn.execute('UPDATE fragments SET accessed = accessed + ? WHERE path = ?',
+                           (accessed, str(path.resolve())))
+    cache.flush()
+
+    cached = [name for name in 'abc' if cache.lookup('file', tmp_path / f'{name}.txt') is not None]
+    assert cached == ['b', 'c']
+    cache.close()
@@ -0,0 +1,125 @@
+"""Instrumentação do gerador de relatórios (--profile)"""
+
+import json
+import sys
+
+import pytest
+
+import generate_final_report as report
+from conftest import SESSION_ID
+
+
+def record(processor, wall, file_path='results/a.txt', size=100):
+    return {'processor': processor, 'file': file_path, 'wall': wall, 'cpu': wall / 2,
+            'bytes': size, 'start_us': 1, 'pid': 1}
+
+
+def collect(results, tmp_path, profiler, workers=1):
+    generator = report.BlueSecAuditReportGenerator(SESSION_ID, str(results), str(tmp_path / 'logs'),
+                                                   workers=workers, profiler=profiler)
+    with report.profile_stage(profiler, 'collect'):
+        generator.collect_session_data()
+    return generator
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_collect_is_measured(make_session, tmp_path, workers):
+    results = make_session(targets=2, files=4)
+    profiler = report.ReportProfiler()
+    generator = collect(results, tmp_path, profiler, workers)
+
+    # Um registro por arquivo com processador, vindo do próprio processo ou dos workers
+    files = generator.report_data['files_analyzed']
+    measured = sum(totals['files'] for totals in profiler.processors.values())
+    assert 0 < measured <= len(files)
+    assert profiler.bytes_read == sum(totals['bytes'] for totals in profiler.processors.values())
+    assert profiler.stages['collect']['calls'] == 1
+    assert profiler.stages['collect']['bytes'] == profiler.bytes_read
+    assert profiler.records == []
+
+
+def test_stage_counts_output_size(tmp_path):
+    profiler = report.ReportProfiler()
+    output = tmp_path / 'report.html'
+    for _ in range(2):
+        with profiler.stage('html', output):
+            output.write_text('x' * 10)
+    with profiler.stage('json', tmp_path / 'missing.json'):
+        pass
+
+    assert (profiler.stages['html']['calls'], profiler.stages['html']['bytes']) == (2, 20)
+    assert profiler.stages['json']['bytes'] == 0
+
+
+def test_slowest_files():
+    profiler = report.ReportProfiler(top=3)
+    for number, wall in enumerate([0.5, 0.1, 0.9, 0.3, 0.7, 0.9]):
+        profiler.add_file(record('sdp', wall, f'results/{number}.txt'))
+
+    assert [(r['wall'], r['file']) for r in profiler.slowest()] == [
+        (0.9, 'results/5.txt'), (0.9, 'results/2.txt'), (0.7, 'results/4.txt')]
+    assert profiler.processors['sdp']['files'] == 6
+    assert profiler.bytes_read == 600
+
+
+def test_worker_records_are_drained():
+    profiler = report.ReportProfiler(keep_records=True)
+    profiler.add_file(record('pin', 0.1))
+    assert len(profiler.drain()) == 1
+    assert profiler.drain() == []
+
+
+def test_prometheus_textfile(tmp_path):
+    profiler = report.ReportProfiler()
+    with profiler.stage('collect'):
+        profiler.add_file(record('sdp', 0.25, 'results/full_audit_x/sdp "1".txt'))
+    output = tmp_path / 'profile.prom'
+    profiler.write_prometheus(output, SESSION_ID)
+
+    lines = output.read_text().splitlines()
+    samples = {line.rsplit(' ', 1)[0]: line.rsplit(' ', 1)[1] for line in lines if not line.startswith('#')}
+    prefix = report.ReportProfiler.METRIC_PREFIX
+    assert samples[f'{prefix}_processor_files{{session="{SESSION_ID}",processor="sdp"}}'] == '1'
+    assert samples[f'{prefix}_stage_bytes{{session="{SESSION_ID}",stage="collect"}}'] == '100'
+    assert (f'{prefix}_slowest_file_seconds{{session="{SESSION_ID}",rank="1",processor="sdp",'
+            f'file="full_audit_x/sdp \\"1\\".txt"}}') in samples
+    assert f'# TYPE {prefix}_stage_seconds gauge' in lines
+    assert not (tmp_path / 'profile.prom.tmp').exists()
+
+
+def test_chrome_trace(tmp_path, monkeypatch):
+    monkeypatch.setattr(report.ReportProfiler, 'TRACE_EVENT_LIMIT', 3)
+    profiler = report.ReportProfiler()
+    with profiler.stage('collect'):
+        for number in range(4):
+            profiler.add_file(record('sdp', 0.001, f'results/{number}.txt'))
+    output = tmp_path / 'trace.json'
+    profiler.write_trace(output, SESSION_ID)
+
+    trace = json.loads(output.read_text())
+    events = trace['traceEvents']
+    assert [(e['cat'], e['args']['file']) for e in events] == [
+        ('file', 'results/0.txt'), ('file', 'results/1.txt'), ('file', 'results/2.txt')]
+    assert events[0]['dur'] == 1000
+    # A etapa termina depois dos arquivos e fica entre os eventos descartados
+    assert trace['otherData']['dropped_events'] == 2
+    assert trace['otherData']['session_id'] == SESSION_ID
+    # Os agregados não dependem do limite do trace
+    assert profiler.processors['sdp']['files'] == 4
+
+
+def test_cli_writes_profile(make_session, tmp_path, monkeypatch):
+    results = make_session(targets=1, files=3)
+    profile_dir = tmp_path / 'profile'
+    monkeypatch.setattr(sys, 'argv', [
+        'generate_final_report.py', '--session', SESSION_ID, '--results-dir', str(results),
+        '--logs-dir', str(tmp_path / 'logs'), '--output', str(tmp_path / 'report.html'),
+        '--json', str(tmp_path / 'report.json'), '--profile', '--profile-dir', str(profile_dir)])
+    report.main()
+
+    metrics = (profile_dir / f'report_profile_{SESSION_ID}.prom').read_text()
+    for stage in ('collect', 'html', 'json'):
+        assert f'stage="{stage}"' in metrics
+    trace = json.loads((profile_dir / f'report_trace_{SESSION_ID}.json').read_text())
+    assert {event['name'] for event in trace['traceEvents'] if event['cat'] == 'stage'} == {
+        'collect', 'html', 'json'}
@@ -0,0 +1,244 @@
+"""Serviço residente de relatórios (--serve) e cliente leve (report_client.py)"""
+
+import json
+import os
+import shutil
+import socket
+import sys
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import generate_final_report as report
+import report_client
+from conftest import SESSION_ID
+from report_service import ReportService
+
+
+def service_args(results, tmp_path, rules_path=None):
+    return SimpleNamespace(results_dir=str(results), logs_dir=str(tmp_path / 'logs'), workers=1,
+                           cache=False, cache_hash=False, cache_max_age=30, cache_max_size=256,
+                           index=False, rules=rules_path, oui_table=None)
+
+
+@pytest.fixture
+def service(make_session, tmp_path):
+    results = make_session(targets=2, files=4)
+    rules_path = tmp_path / 'detection-rules.conf'
+    shutil.copy(report.DetectionRules.DEFAULT_PATH, rules_path)
+    args = service_args(results, tmp_path, rules_path)
+    service = ReportService(args, report.DetectionRules.load(rules_path), tmp_path / 's.sock')
+    yield service
+    if not service.running:
+        # run() já fechou o cache e o índice
+        return
+    if service.cache:
+        service.cache.close()
+    service.index.close()
+
+
+def send_raw(socket_path, data):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+        conn.connect(str(socket_path))
+        conn.sendall(data)
+        return json.loads(conn.makefile().readline())
+
+
+def serve(service, requests):
+    """Roda o serviço na thread principal e envia os pedidos por outra thread"""
+    responses = []
+
+    def client():
+        deadline = time.monotonic() + 10
+        while not service.socket_path.exists() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        try:
+            for request in requests:
+                if isinstance(request, bytes):
+                    responses.append(send_raw(service.socket_path, request))
+                else:
+                    responses.append(report_client.send_request(service.socket_path, request))
+        finally:
+            # Uma falha do cliente não deixa o serviço esperando para sempre
+            service.running = False
+
+    thread = threading.Thread(target=client)
+    thread.start()
+    service.run()
+    thread.join()
+    return responses
+
+
+def report_request(tmp_path, name, results=None):
+    return {'op': 'report', 'session': SESSION_ID, 'output': str(tmp_path / f'{name}.html'),
+            'json': str(tmp_path / f'{name}.json'), 'format': 'json',
+            **({'results_dir': str(results)} if results else {})}
+
+
+def test_requests_over_socket(service, tmp_path):
+    ping, first, second, stop = serve(service, [
+        {'op': 'ping'},
+        report_request(tmp_path, 'first', service.args.results_dir),
+        report_request(tmp_path, 'second'),
+        {'op': 'shutdown'},
+    ])
+
+    assert ping['ok'] and ping['pid'] == os.getpid() and ping['results_dir'] == str(service.results_dir)
+    assert first['ok'] and first['errors'] == 0
+    assert 'Relatório final gerado com sucesso' in first['log']
+    # O segundo relatório sai do cache de parsing mantido pelo serviço
+    assert second['files'] == first['files']
+    assert service.cache.hits > 0 and service.cache.misses == 0
+    first_data = json.loads((tmp_path / 'first.json').read_text())['data']
+    second_data = json.loads((tmp_path / 'second.json').read_text())['data']
+    for key in ('attacks', 'vulnerabilities'):
+        assert sorted(map(json.dumps, first_data[key])) == sorted(map(json.dumps, second_data[key]))
+    assert stop['ok'] and service.requests == 4
+    # O socket é removido ao encerrar
+    assert not service.socket_path.exists()
+
+
+def test_cache_and_index_stay_loaded(service, tmp_path):
+    # Iniciado como em production-monitor.sh --serve, sem --cache nem --index
+    assert service.cache is not None
+    first = service._dispatch(report_request(tmp_path, 'first'))
+    assert first['ok'] and 'varrendo diretório' in first['log']
+    assert service.cache.misses > 0 and service.cache.hits == 0
+    items = service.cache.misses
+
+    # O segundo pedido localiza os itens pelo índice e sai inteiro do cache
+    second = service._dispatch(report_request(tmp_path, 'second'))
+    assert second['ok'] and second['files'] == first['files']
+    assert 'varrendo diretório' not in second['log']
+    assert (service.cache.hits, service.cache.misses) == (items, 0)
+    assert (service.cache.hits, service.cache.misses) == (first['files'], 0)
+
+
+def test_invalid_requests(service, tmp_path):
+    assert service._dispatch({'op': 'rebuild'}) == {
+        'ok': False, 'error': 'operação desconhecida: rebuild', 'log': ''}
+    missing = service._dispatch({'op': 'report', 'session': SESSION_ID})
+    assert not missing['ok'] and 'obrigatórios' in missing['error']
+    other_dir = service._dispatch(report_request(tmp_path, 'x', tmp_path / 'other'))
+    assert not other_dir['ok'] and 'serviço atende' in other_dir['error']
+    assert not (tmp_path / 'x.html').exists()
+
+
+def test_malformed_request_keeps_serving(service):
+    malformed, stop = serve(service, [b'[1, 2]\n', {'op': 'shutdown'}])
+
+    assert not malformed['ok'] and 'pedido inválido' in malformed['error']
+    assert stop['ok'] and service.requests == 1
+
+
+def test_rules_are_reloaded_when_changed(service, tmp_path):
+    original = service.rules
+    assert service._dispatch(report_request(tmp_path, 'a'))['ok']
+
+    rules_path = service.rules.path
+    rules_path.write_text(rules_path.read_text() + '\n# ajuste local\n')
+    os.utime(rules_path, ns=(time.time_ns(), time.time_ns() + 10**9))
+    response = service._dispatch(report_request(tmp_path, 'b'))
+
+    assert 'Regras de detecção recarregadas' in response['log']
+    assert service.rules is not original and service.index.rules is service.rules
+
+
+def test_index_add(service, tmp_path):
+    path = service.results_dir / f'sdp_enum_AA_BB_CC_DD_EE_FF_{SESSION_ID}.txt'
+    path.write_text("Target: AA:BB:CC:DD:EE:FF\nService Name: Serial Port\n")
+    response = service._dispatch({'op': 'index-add', 'session': SESSION_ID, 'paths': [str(path)]})
+
+    assert response['ok'] and response['added'] == 1
+    assert str(path) in {str(path) for _, path in service.index.session_items(SESSION_ID)}
+
+
+def test_second_service_is_refused(service, tmp_path):
+    listener = service._listen()
+    try:
+        with pytest.raises(OSError, match='já em execução'):
+            service._listen()
+        assert oct(service.socket_path.stat().st_mode & 0o777) == oct(0o600)
+        # O caminho final só existe com o socket já escutando
+        assert not service.socket_path.with_name('s.sock.tmp').exists()
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+            conn.connect(str(service.socket_path))
+    finally:
+        listener.close()
+    # Socket órfão (serviço encerrado sem limpeza) é substituído
+    service._listen().close()
+
+
+def test_client_request_and_fallback(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    args = SimpleNamespace(results_dir='results', logs_dir='logs', session=SESSION_ID,
+                           output='out/report.html', json=None, format='ndjson',
+                           index_add=None, ping=False, shutdown=False)
+
+    assert report_client.build_request(args) == {
+        'op': 'report', 'session': SESSION_ID, 'output': str(tmp_path / 'out/report.html'),
+        'json': None, 'format': 'ndjson', 'results_dir': str(tmp_path / 'results')}
+    assert report_client.fallback_command(args)[1:] == [
+        str(report_client.GENERATOR), '--results-dir', 'results', '--logs-dir', 'logs',
+        '--session', SESSION_ID, '--output', 'out/report.html', '--format', 'ndjson']
+
+    args.index_add = ['results/new.txt']
+    assert report_client.build_request(args)['paths'] == [str(tmp_path / 'results/new.txt')]
+    assert report_client.fallback_command(args)[-2:] == ['--index-add', 'results/new.txt']
+
+
+def test_client_without_service(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(sys, 'argv', ['report_client.py', '--ping', '--logs-dir', str(tmp_path)])
+    with pytest.raises(SystemExit) as exit_info:
+        report_client.main()
+    assert exit_info.value.code == report_client.EXIT_UNAVAILABLE
+    assert 'indisponível' in capsys.readouterr().out
+
+    # Pedido de relatório sem serviço: o processo é substituído pelo CLI do gerador
+    def execv(path, command):
+        raise SystemExit(command)
+
+    monkeypatch.setattr(report_client.os, 'execv', execv)
+    monkeypatch.setattr(sys, 'argv', ['report_client.py', '--logs-dir', str(tmp_path),
+                                      '--session', SESSION_ID, '--output', 'r.html'])
+    with pytest.raises(SystemExit) as exit_info:
+        report_client.main()
+    assert exit_info.value.code[:2] == [sys.executable, str(report_client.GENERATOR)]
+
+
+def test_quick_requests_do_not_wait_for_busy_service(tmp_path, monkeypatch, capsys):
+    # Serviço ocupado com um relatório: a conexão fica na fila sem ser atendida
+    socket_path = tmp_path / report_client.SOCKET_NAME
+    busy = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    busy.bind(str(socket_path))
+    busy.listen(16)
+    monkeypatch.setattr(report_client, 'QUICK_TIMEOUT', 0.2)
+    monkeypatch.setattr(report_client.os, 'execv', lambda path, command: pytest.fail('fallback a frio'))
+    try:
+        for argv in (['--index-add', 'results/new.txt', '--session', SESSION_ID], ['--ping']):
+            monkeypatch.setattr(sys, 'argv', ['report_client.py', '--logs-dir', str(tmp_path), *argv])
+            report_client.main()
+            assert 'ocupado' in capsys.readouterr().out
+
+        # Os pedidos foram entregues e o serviço os atende quando ficar livre
+        requests = []
+        for _ in range(2):
+            conn, _ = busy.accept()
+            with conn:
+                requests.append(json.loads(conn.makefile().readline()))
+        assert [request['op'] for request in requests] == ['index-add', 'ping']
+        assert requests[0]['paths'] == [os.path.abspath('results/new.txt')]
+
+    finally:
+        busy.close()
+
+    # Relatórios continuam esperando a resposta sem limite
+    timeouts = []
+    monkeypatch.setattr(report_client, 'send_request', lambda path, request, response_timeout: (
+        timeouts.append(response_timeout), {'ok': True, 'log': ''})[1])
+    monkeypatch.setattr(sys, 'argv', ['report_client.py', '--logs-dir', str(tmp_path),
+                                      '--session', SESSION_ID, '--output', 'r.html'])
+    report_client.main()
+    assert timeouts == [None]
@@ -0,0 +1,102 @@
+"""Comparação de sessões pelos fingerprints dos achados (SessionDiff)"""
+
+import json
+
+import pytest
+
+from report_fleet import SessionDiff, SessionLoader
+
+OLD_SESSION = 'bs_1700000000_1'
+NEW_SESSION = 'bs_1700086400_2'
+AA, BB, CC = 'AA:BB:CC:00:00:01', 'AA:BB:CC:00:00:02', 'AA:BB:CC:00:00:03'
+
+SDP_SERIAL_OBEX = "Service Name: Serial Port\nService Name: OBEX Object Push\n"
+SDP_SERIAL = "Service Name: Serial Port\n"
+PIN_FOUND = "Status: SUCCESS - PIN FOUND\n"
+PIN_FAILED = "Status: FAILED\n"
+DOS = "Result: SUCCESS\n"
+
+
+def write_result(results, prefix, mac, session_id, content):
+    name = f"{prefix}_{mac.replace(':', '_')}_{session_id}.txt"
+    (results / name).write_text(f"Target: {mac}\nTimestamp: 2023-11-14T22:13:20Z\n{content}")
+
+
+@pytest.fixture
+def results(tmp_path):
+    results = tmp_path / 'results'
+    results.mkdir()
+    # Sessão antiga: AA com SPP, OBEX e PIN fraco; BB vulnerável a DoS
+    write_result(results, 'sdp_enum', AA, OLD_SESSION, SDP_SERIAL_OBEX)
+    write_result(results, 'pin_bruteforce', AA, OLD_SESSION, PIN_FOUND)
+    write_result(results, 'bluesmack_report', BB, OLD_SESSION, DOS)
+    # Sessão nova: OBEX e PIN corrigidos em AA, BB sem mudança, CC novo com PIN fraco
+    write_result(results, 'sdp_enum', AA, NEW_SESSION, SDP_SERIAL)
+    write_result(results, 'pin_bruteforce', AA, NEW_SESSION, PIN_FAILED)
+    write_result(results, 'bluesmack_report', BB, NEW_SESSION, DOS)
+    write_result(results, 'bluesmack_report', BB, NEW_SESSION + '_rerun', DOS)
+    write_result(results, 'pin_bruteforce', CC, NEW_SESSION, PIN_FOUND)
+    return results
+
+
+def compare(results, tmp_path, sessions=(OLD_SESSION, NEW_SESSION)):
+    diff = SessionDiff(SessionLoader(results, tmp_path / 'logs'))
+    diff.run(list(sessions))
+    return diff.compare()
+
+
+def test_findings_are_classified(results, tmp_path):
+    findings, _, _ = compare(results, tmp_path)
+
+    assert [(f['target'], f['status'], f['type']) for f in findings] == [
+        (AA, 'persisting', 'Insecure Service'),
+        (AA, 'resolved', 'File Access'),
+        (AA, 'resolved', 'Weak Authentication'),
+        (BB, 'persisting', 'DoS Vulnerability'),
+        (CC, 'new', 'Weak Authentication'),
+    ]
+    occurrences = {(f['target'], f['type']): (f['old_occurrences'], f['new_occurrences']) for f in findings}
+    assert occurrences[(AA, 'File Access')] == (1, 0)
+    assert occurrences[(CC, 'Weak Authentication')] == (0, 1)
+    # O arquivo repetido da sessão nova é contado como ocorrência do mesmo achado
+    assert occurrences[(BB, 'DoS Vulnerability')] == (1, 2)
+
+
+def test_summary_and_targets(results, tmp_path):
+    _, records, summary = compare(results, tmp_path)
+
+    assert (summary['new_findings'], summary['persisting_findings'], summary['resolved_findings']) == (1, 2, 2)
+    # Critical 25, High 15, Medium 0, mais 5 por achado
+    assert (summary['old_risk_score'], summary['new_risk_score'], summary['risk_delta']) == (60, 55, -5)
+    assert [(r['target'], r['old_risk_score'], r['new_risk_score'], r['new'], r['persisting'], r['resolved'])
+            for r in records] == [
+        (CC, 0, 30, 1, 0, 0),
+        (BB, 20, 20, 0, 1, 0),
+        (AA, 40, 5, 0, 1, 2),
+    ]
+
+
+def test_identical_sessions_only_persist(results, tmp_path):
+    findings, _, summary = compare(results, tmp_path, (OLD_SESSION, OLD_SESSION))
+
+    assert {f['status'] for f in findings} == {'persisting'}
+    assert summary['risk_delta'] == 0
+
+
+def test_reports(results, tmp_path):
+    findings, records, summary = compare(results, tmp_path)
+    diff = SessionDiff(SessionLoader(results, tmp_path / 'logs'))
+
+    diff.generate_json_report(tmp_path / 'diff.json', findings, records, summary)
+    data = json.loads((tmp_path / 'diff.json').read_text())
+    assert data['summary'] == summary and data['findings'] == findings
+
+    diff.generate_json_report(tmp_path / 'diff.ndjson', findings, records, summary, 'ndjson')
+    lines = [json.loads(line) for line in (tmp_path / 'diff.ndjson').read_text().splitlines()]
+    assert [line['record_type'] for line in lines] == (
+        ['metadata'] + ['target'] * len(records) + ['finding'] * len(findings) + ['summary'])
+
+    diff.generate_html_report(tmp_path / 'diff.html', findings, records, summary)
+    html = (tmp_path / 'diff.html').read_text()
+    assert html.count('badge-success">Resolvido') == 2
+    assert 'badge-danger">Novo' in html
@@ -0,0 +1,96 @@
+"""Índice persistente de sessões (SessionIndex)"""
+
+import os
+
+import generate_final_report as report
+from conftest import SESSION_ID
+from report_cache import SessionIndex
+from report_capture import CaptureIndex
+
+OTHER_SESSION = 'bs_1700086400_99'
+REPORT_KEYS = ('targets', 'attacks', 'vulnerabilities', 'files_analyzed', 'captures')
+
+
+def collect(results, index=None, session_id=SESSION_ID):
+    generator = report.BlueSecAuditReportGenerator(session_id, str(results), str(results.parent / 'logs'),
+                                                   index=index)
+    generator.collect_session_data()
+    return {key: sorted(map(str, generator.report_data[key])) for key in REPORT_KEYS}
+
+
+def test_rebuild_and_session_items(make_session, tmp_path):
+    results = make_session(targets=2, files=5, captures=1)
+    capture = next(results.glob('*.pcap'))
+    CaptureIndex.build(capture)
+    (results / f'sdp_enum_AA_BB_CC_DD_EE_FF_{OTHER_SESSION}.txt').write_text('Service Name: OBEX\n')
+    (results / 'notes.txt').write_text('sem sessão')
+
+    index = SessionIndex(results)
+    # 2 targets x 4 arquivos + 2 auditorias + 1 captura, mais o item da outra sessão
+    assert index.rebuild() == 12
+    assert sorted(index.sessions()) == [SESSION_ID, OTHER_SESSION]
+
+    items = index.session_items(SESSION_ID)
+    assert sorted(path.name for _, path in items) == sorted(
+        path.name for path in results.glob(f'*{SESSION_ID}*') if not CaptureIndex.is_sidecar(path))
+    assert [kind for kind, _ in items] == ['file'] * 9 + ['dir'] * 2
+    index.close()
+
+
+def test_indexed_collection_matches_scan(make_session, tmp_path):
+    results = make_session(targets=3, files=5, captures=1)
+    scanned = collect(results)
+
+    index = SessionIndex(results)
+    index.rebuild()
+    assert collect(results, index) == scanned
+    index.close()
+
+
+def test_unknown_session_falls_back_to_scan_and_registers(make_session, tmp_path):
+    results = make_session(targets=1, files=2)
+    index = SessionIndex(results)
+    assert index.session_items(SESSION_ID) == []
+
+    assert collect(results, index) == collect(results)
+    assert len(index.session_items(SESSION_ID)) == 2
+    index.close()
+
+
+def test_query(tmp_path):
+    results = tmp_path / 'results'
+    results.mkdir()
+    names = {
+        f'sdp_enum_aa_bb_cc_dd_ee_ff_{SESSION_ID}.txt': 1700000000,
+        f'pin_bruteforce_AA_BB_CC_DD_EE_FF_{SESSION_ID}.txt.gz': 1700000100,
+        f'bluesmack_report_11_22_33_44_55_66_{OTHER_SESSION}.txt': 1700086500,
+    }
+    for name, mtime in names.items():
+        (results / name).write_bytes(b'')
+        os.utime(results / name, (mtime, mtime))
+
+    index = SessionIndex(results, db_path=tmp_path / 'index.db')
+    for name in names:
+        # Caminhos fora do diretório de resultados são registrados pelo nome
+        assert index.register(tmp_path / 'elsewhere' / name)
+    assert not index.register(results / 'ausente.txt')
+
+    rows = index.query(target='aa:bb:cc:dd:ee:ff')
+    assert [(session, target, name) for session, target, _, name, _ in rows] == [
+        (SESSION_ID, 'AA:BB:CC:DD:EE:FF', f'sdp_enum_aa_bb_cc_dd_ee_ff_{SESSION_ID}.txt'),
+        (SESSION_ID, 'AA:BB:CC:DD:EE:FF', f'pin_bruteforce_AA_BB_CC_DD_EE_FF_{SESSION_ID}.txt.gz'),
+    ]
+    # O tipo vem das regras, pelo nome sem a extensão de compressão
+    assert rows[1][2] == index.rules.classify(f'pin_bruteforce_AA_BB_CC_DD_EE_FF_{SESSION_ID}.txt')
+    assert [row[3] for row in index.query(since=1700000050, until=1700086400)] == [
+        f'pin_bruteforce_AA_BB_CC_DD_EE_FF_{SESSION_ID}.txt.gz']
+    assert len(index.query(session_id=OTHER_SESSION)) == 1
+
+    index.unregister(results / f'sdp_enum_aa_bb_cc_dd_ee_ff_{SESSION_ID}.txt')
+    assert len(index.query(session_id=SESSION_ID)) == 1
+    index.close()
+
+    # O índice persiste entre aberturas
+    index = SessionIndex(results, db_path=tmp_path / 'index.db')
+    assert len(index.query()) == 2
+    index.close()
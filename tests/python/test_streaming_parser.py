@@ -0,0 +1,124 @@
+"""Parser em streaming (StreamingResultParser/SignatureMatcher) x leitura integral"""
+
+import re
+
+import pytest
+
+import generate_final_report as report
+from conftest import SESSION_ID
+
+SIGNATURES = ('Service Name:', 'Protocol Descriptor List:', 'Serial Port', 'OBEX',
+              'SUCCESS', 'SUCCESS - PIN FOUND')
+
+SDP_CONTENT = """=== SDP Service Discovery para AA:BB:CC:DD:EE:FF ===
+Timestamp: Mon Jan 01 10:00:00 UTC 2024
+
+Service Name: Serial Port
+Protocol Descriptor List:
+  "RFCOMM" (0x0003)
+Service Name: OBEX Object Push
+Protocol Descriptor List:
+  "OBEX" (0x0008)
+Status: SUCCESS - PIN FOUND
+Status: SUCCESS
+"""
+
+
+def baseline(content):
+    """Resultado da leitura integral do arquivo, como no gerador original"""
+    match = re.search(r'([0-9A-Fa-f]{2}[:-]){5}([0-9A-Fa-f]{2})', content)
+    timestamp = None
+    for line in content.split('\n'):
+        if 'Timestamp:' in line:
+            timestamp = line.split('Timestamp:')[-1].strip()
+            break
+    return {
+        'counts': {signature: content.count(signature) for signature in SIGNATURES},
+        'target': match.group(0) if match else 'Unknown',
+        'timestamp': timestamp
+    }
+
+
+def streamed(content, chunk_size, parser_class=report.StreamingResultParser):
+    parser = parser_class(report.SignatureMatcher(SIGNATURES))
+    for start in range(0, len(content), chunk_size):
+        parser.feed(content[start:start + chunk_size])
+    parser.close()
+    return {'counts': parser.counts, 'target': parser.target, 'timestamp': parser.timestamp}
+
+
+@pytest.mark.parametrize('chunk_size', [1, 3, 7, 64, 1 << 16])
+@pytest.mark.parametrize('content', [
+    SDP_CONTENT,
+    SDP_CONTENT * 50,
+    'sem target nem timestamp\nOBEXOBEX SUCCESS\n',
+    'Target: 00-11-22-33-44-55 SUCCESS - PIN FOUND',
+    '',
+], ids=['sdp', 'sdp-x50', 'no-target', 'no-newline', 'empty'])
+def test_streaming_matches_whole_file_read(content, chunk_size):
+    assert streamed(content, chunk_size) == baseline(content)
+
+
+def test_long_line_without_newline_keeps_split_signatures():
+    """Linhas maiores que MAX_PENDING são cortadas sem perder assinaturas na divisa"""
+    class SmallPending(report.StreamingResultParser):
+        MAX_PENDING = 64
+
+    content = ('x' * 50 + 'Serial Port' + 'y' * 37 + 'SUCCESS - PIN FOUND') * 20
+    assert streamed(content, 5, SmallPending) == baseline(content)
+
+
+def test_overlapping_signatures_count_like_str_count():
+    matcher = report.SignatureMatcher(('aba', 'bab', 'ab'))
+    counts = [0] * len(matcher.signatures)
+    block = 'ababababa bab abab'
+    matcher.scan(block, counts)
+    assert dict(zip(matcher.signatures, counts)) == {
+        signature: block.count(signature) for signature in matcher.signatures
+    }
+
+
+
+def baseline_attack(path):
+    """Campos de ataque/vulnerabilidades dos _process_*_file originais (leitura integral)"""
+    content = path.read_text(encoding='utf-8')
+    name = path.name
+    if 'bluesmack' in name:
+        success = 'SUCCESS' in content
+        return {'type': 'BlueSmack DoS', 'success': success}, {'DoS Vulnerability'} if success else set()
+    if 'sdp' in name:
+        vulnerabilities = set()
+        if 'Serial Port' in content:
+            vulnerabilities.add('Insecure Service')
+        if 'OBEX' in content:
+            vulnerabilities.add('File Access')
+        return {'type': 'SDP Enumeration',
+                'services_found': content.count('Service Name:'),
+                'protocols_found': content.count('Protocol Descriptor List:')}, vulnerabilities
+    if 'pin' in name:
+        success = 'SUCCESS - PIN FOUND' in content
+        return {'type': 'PIN Brute Force', 'success': success}, {'Weak Authentication'} if success else set()
+    files = content.count('.vcf') + content.count('.jpg') + content.count('.png')
+    return {'type': 'OBEX Exploitation', 'files_accessed': files}, set()
+
+
+def test_generator_matches_baseline_processors(make_session, tmp_path):
+    results = make_session(targets=4, files=4)
+    generator = report.BlueSecAuditReportGenerator(SESSION_ID, str(results),
+                                                   str(tmp_path / 'logs'))
+    generator.collect_session_data()
+
+    attacks = {attack['file']: attack for attack in generator.report_data['attacks']}
+    vulnerabilities = {}
+    for vulnerability in generator.report_data['vulnerabilities']:
+        for source in vulnerability['sources']:
+            vulnerabilities.setdefault(source, set()).add(vulnerability['type'])
+
+    files = sorted(results.glob('*.txt'))
+    assert len(attacks) == len(files) == 16
+    for path in files:
+        expected, expected_vulnerabilities = baseline_attack(path)
+        attack = attacks[str(path)]
+        assert {key: attack[key] for key in expected} == expected
+        assert attack['target'] == baseline(path.read_text(encoding='utf-8'))['target']
+        assert vulnerabilities.get(str(path), set()) == expected_vulnerabilities
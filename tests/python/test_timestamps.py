@@ -0,0 +1,106 @@
+"""Normalização de timestamps dos módulos (TimestampNormalizer)"""
+
+import os
+import time
+
+import pytest
+
+import generate_final_report as report
+
+
+@pytest.fixture
+def local_time(monkeypatch):
+    """Fixa o fuso local (valores sem fuso são interpretados nele)"""
+    monkeypatch.setenv('TZ', 'America/Sao_Paulo')
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+@pytest.mark.parametrize('value, expected', [
+    # $(date) no locale C
+    ('Mon Jan  1 10:05:00 UTC 2024', '2024-01-01T10:05:00Z'),
+    ('Mon Jan 01 10:05:00 GMT 2024', '2024-01-01T10:05:00Z'),
+    ('Mon Jan  1 10:05:00 -0300 2024', '2024-01-01T13:05:00Z'),
+    # $(date) em pt_BR e RFC 2822
+    ('seg 01 jan 2024 10:05:00 -03', '2024-01-01T13:05:00Z'),
+    ('qui, 15 de fev de 2024 08:00:00 UTC', '2024-02-15T08:00:00Z'),
+    ('Mon, 01 Jan 2024 10:05:00 +0000', '2024-01-01T10:05:00Z'),
+    # ISO 8601
+    ('2024-01-01T10:05:00Z', '2024-01-01T10:05:00Z'),
+    ('2024-01-01T10:05:00z', '2024-01-01T10:05:00Z'),
+    ('2024-01-01T10:05:00+02:00', '2024-01-01T08:05:00Z'),
+    ('2024-01-01 10:05:00.123456+00:00', '2024-01-01T10:05:00Z'),
+    # epoch
+    ('1704103500', '2024-01-01T10:05:00Z'),
+    ('1704103500.75', '2024-01-01T10:05:00Z'),
+])
+def test_known_formats(value, expected):
+    assert report.TimestampNormalizer().normalize(value) == expected
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('Mon Jan  1 10:05:00 2024', '2024-01-01T13:05:00Z'),
+    ('Mon Jan  1 10:05:00 BRT 2024', '2024-01-01T13:05:00Z'),
+    ('01/02/2024 10:05', '2024-02-01T13:05:00Z'),
+    ('2024-01-01T10:05:00', '2024-01-01T13:05:00Z'),
+])
+def test_values_without_zone_use_local_time(local_time, value, expected):
+    assert report.TimestampNormalizer().normalize(value) == expected
+
+
+@pytest.mark.parametrize('value', [None, '', 'N/A', 'Foo Bar 99 10:05:00 UTC 2024', '12345'])
+def test_unknown_values(value):
+    assert report.TimestampNormalizer().parse(value) is None
+    assert report._timestamp_sort_key(value) is None
+
+
+def test_unknown_value_falls_back_to_mtime(tmp_path):
+    path = tmp_path / 'sdp_enum.txt'
+    path.write_text('')
+    os.utime(path, (1704103500, 1704103500))
+
+    normalizer = report.TimestampNormalizer()
+    assert normalizer.normalize('sem data', path) == '2024-01-01T10:05:00Z'
+    assert normalizer.normalize('sem data', tmp_path / 'ausente.txt') is None
+
+
+def test_detected_format_is_tried_first():
+    normalizer = report.TimestampNormalizer()
+    normalizer.parse('1704103500')
+    assert normalizer._formats[0][0] == 'epoch'
+    normalizer.parse('Mon Jan  1 10:05:00 UTC 2024')
+    assert normalizer._formats[0][0] == 'date'
+    # A ordem dos formatos não altera o resultado
+    assert normalizer.normalize('2024-01-01T10:05:00Z') == '2024-01-01T10:05:00Z'
+
+
+def test_sort_key_orders_mixed_formats():
+    values = ['2024-01-01T10:06:00Z', 'Mon Jan  1 10:05:00 UTC 2024', '1704103400']
+    assert sorted(values, key=report._timestamp_sort_key) == [
+        '1704103400', 'Mon Jan  1 10:05:00 UTC 2024', '2024-01-01T10:06:00Z']
+
+
+def test_format_utc():
+    assert report._format_utc('2024-01-01T10:05:00Z') == '2024-01-01 10:05:00 UTC'
+    assert report._format_utc(None) is None
+
+
+def test_attacks_carry_normalized_timestamp(tmp_path):
+    results = tmp_path / 'results'
+    results.mkdir()
+    session_id = 'bs_1704103500_1'
+    (results / f'bluesmack_report_AA_BB_CC_DD_EE_FF_{session_id}.txt').write_text(
+        "=== BlueSmack DoS Attack ===\n"
+        "Target: AA:BB:CC:DD:EE:FF\n"
+        "Timestamp: seg 01 jan 2024 10:05:00 -03\n"
+        "Result: SUCCESS\n")
+
+    generator = report.BlueSecAuditReportGenerator(session_id, str(results), str(tmp_path / 'logs'))
+    generator.collect_session_data()
+    attack = generator.report_data['attacks'][0]
+
+    assert attack['timestamp'] == 'seg 01 jan 2024 10:05:00 -03'
+    assert attack['occurred_at'] == '2024-01-01T13:05:00Z'
+    assert generator.report_data['vulnerabilities'][0]['first_seen'] == '2024-01-01T13:05:00Z'
@@ -0,0 +1,184 @@
+"""Coleta concorrente da saída das ferramentas (tool_collector.py)"""
+
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import generate_final_report as report
+import tool_collector
+from conftest import SESSION_ID
+from report_cache import ParseCache
+from tool_collector import ResultFile, ToolCollector
+
+MAC = '00:1A:7D:00:00:01'
+
+FAKE_SDPTOOL = """#!/bin/sh
+if [ "$1" = browse ]; then
+    [ -n "$FAIL_BROWSE" ] && exit 1
+    echo "Browsing $2 ..."
+    echo "Service Name: Serial Port"
+    echo "Service Name: OBEX Object Push"
+    exit 0
+fi
+# sdptool search --bdaddr <mac> <serviço>
+case "$4" in
+    HID) sleep 0.2; echo "Service Name: Human Interface Device"; exit 0 ;;
+    OPP) echo "Service Name: OBEX Object Push"; exit 0 ;;
+    *) echo "Service $4 not found" >&2; exit 1 ;;
+esac
+"""
+
+FAKE_HCITOOL = """#!/bin/sh
+case "$1" in
+    name) echo "Fake Headset" ;;
+    info) echo "Requesting information ..."; echo "	Class: 0x240404" ;;
+esac
+"""
+
+FAKE_L2PING = """#!/bin/sh
+echo "Ping: $5 from 00:00:00:00:00:00 (data size 44) ..."
+echo "44 bytes from $5 id 0 time 9.10ms"
+echo "44 bytes from $5 id 1 time 7.25ms"
+"""
+
+
+def python_command(code, timeout=5, stderr=True):
+    return [sys.executable, '-c', code], timeout, stderr
+
+
+@pytest.fixture
+def fake_tools(tmp_path, monkeypatch):
+    bin_dir = tmp_path / 'bin'
+    bin_dir.mkdir()
+    for name, script in (('sdptool', FAKE_SDPTOOL), ('hcitool', FAKE_HCITOOL), ('l2ping', FAKE_L2PING)):
+        path = bin_dir / name
+        path.write_text(script)
+        path.chmod(0o755)
+    monkeypatch.setenv('PATH', f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    return bin_dir
+
+
+def result_path(tmp_path, prefix):
+    results = tmp_path / 'results'
+    results.mkdir(exist_ok=True)
+    return results / f"{prefix}_{MAC.replace(':', '_')}_{SESSION_ID}.txt"
+
+
+def fresh_fragment(path):
+    generator = report.BlueSecAuditReportGenerator(SESSION_ID, str(path.parent), rules=report.DetectionRules.load())
+    fragment, errors = generator._process_task('file', path)
+    assert errors == 0
+    return fragment
+
+
+def test_results_keep_command_order():
+    sink = []
+    collector = ToolCollector(concurrency=3, sink=sink.append)
+    results = collector.run([
+        python_command("import time; time.sleep(0.2); print('lento')"),
+        python_command("print('a'); print('b', end='')"),
+        python_command("import sys; print('erro', file=sys.stderr); sys.exit(2)"),
+        python_command("import sys; print('oculto', file=sys.stderr)", stderr=False),
+    ])
+
+    assert results == [(True, ['lento\n']), (True, ['a\n', 'b\n']), (False, ['erro\n']), (True, [])]
+    # O sink recebe as linhas assim que chegam (o comando lento termina por último)
+    assert sorted(sink) == ['a\n', 'b\n', 'erro\n', 'lento\n'] and sink[-1] == 'lento\n'
+
+
+def running_command(running):
+    """Comando que se registra em running/ e anota quantas cópias rodam juntas"""
+    code = ("import os, time, sys; d = sys.argv[1]; me = os.path.join(d, str(os.getpid())); "
+            "os.mkdir(me); print(len(os.listdir(d))); time.sleep(0.2); os.rmdir(me)")
+    return [sys.executable, '-c', code, str(running)], 10, True
+
+
+@pytest.mark.parametrize('concurrency', [1, 3])
+def test_concurrency_limit(tmp_path, concurrency):
+    running = tmp_path / 'running'
+    running.mkdir()
+    results = ToolCollector(concurrency).run([running_command(running) for _ in range(8)])
+
+    # Mais comandos que vagas: nunca passam do limite e o limite é atingido
+    assert max(int(lines[0]) for _, lines in results) == concurrency
+
+
+def test_timeout_and_missing_tool():
+    code = "import time; print('parcial', flush=True); time.sleep(30)"
+    started = time.perf_counter()
+    (timed_out, missing) = ToolCollector().run([
+        python_command(code, timeout=0.5),
+        (['ferramenta-inexistente'], 5),
+    ])
+
+    assert time.perf_counter() - started < 10
+    assert timed_out == (False, ['parcial\n'])
+    assert missing == (False, [])
+
+
+def test_collect_sdp_matches_file_parsing(tmp_path, fake_tools):
+    path = result_path(tmp_path, 'sdp_enum')
+    result = ResultFile(path, report.DetectionRules.load())
+    args = SimpleNamespace(target=MAC, timeout=5, query_timeout=5)
+    assert tool_collector.collect_sdp(args, result, ToolCollector(4, result.feed))
+    result.save()
+
+    content = path.read_text()
+    sections = ['=== SDP Service Discovery', 'Browsing', '=== Busca de Serviços Específicos ===',
+                'Service Name: Human Interface Device',
+                '=== Informações do Dispositivo ===', 'Fake Headset', 'Class: 0x240404']
+    positions = [content.index(section) for section in sections]
+    assert positions == sorted(positions)
+    assert content.count('Service Name:') == 4
+    # A saída de erro das buscas segue junto com a padrão (2>&1)
+    assert content.count('not found') == len(tool_collector.SDP_SERVICES) - 2
+
+    # O fragmento montado durante a coleta é o mesmo da leitura do arquivo gravado
+    assert result.generator.stream_fragment(path, result.processor, result.reader) == fresh_fragment(path)
+
+
+def test_collect_sdp_browse_failure(tmp_path, fake_tools, monkeypatch):
+    monkeypatch.setenv('FAIL_BROWSE', '1')
+    path = result_path(tmp_path, 'sdp_enum')
+    result = ResultFile(path, report.DetectionRules.load())
+    args = SimpleNamespace(target=MAC, timeout=5, query_timeout=5)
+
+    assert not tool_collector.collect_sdp(args, result, ToolCollector(4, result.feed))
+    assert result.lines[0].startswith('=== SDP Service Discovery') and len(result.lines) == 3
+
+
+def test_collect_recon(tmp_path, fake_tools, capsys):
+    path = result_path(tmp_path, 'recon')
+    result = ResultFile(path, report.DetectionRules.load())
+    args = SimpleNamespace(target=MAC, timeout=5, query_timeout=5)
+    assert tool_collector.collect_recon(args, result, ToolCollector(4, result.feed))
+    result.save()
+
+    content = path.read_text()
+    assert f"Target: {MAC}\n" in content
+    assert '📶 Latência: 7.25ms' in content
+    assert '📱 Nome: Fake Headset' in content
+    assert '✅ Enumeração SDP concluída: 2 serviços' in content
+    assert '1. Testando conectividade...' in capsys.readouterr().out
+
+
+def test_save_stores_parsed_fragment(tmp_path, fake_tools):
+    path = result_path(tmp_path, 'sdp_enum')
+    rules = report.DetectionRules.load()
+    result = ResultFile(path, rules)
+    tool_collector.collect_sdp(SimpleNamespace(target=MAC, timeout=5, query_timeout=5),
+                               result, ToolCollector(4, result.feed))
+    cache = ParseCache(tmp_path / 'logs' / 'report_cache.db', namespace=rules.digest)
+    result.save(cache)
+    assert not path.with_name(path.name + '.tmp').exists()
+
+    # O gerador encontra o fragmento no cache em vez de reler o arquivo
+    generator = report.BlueSecAuditReportGenerator(SESSION_ID, str(path.parent), str(tmp_path / 'logs'),
+                                                   cache=cache, rules=rules)
+    generator.collect_session_data()
+    assert (cache.hits, cache.misses) == (1, 0)
+    assert generator.report_data['attacks'][0]['services_found'] == 4
+    cache.close()
@@ -0,0 +1,240 @@
+"""Modo --watch: atualização incremental dos relatórios (ReportWatcher)"""
+
+import json
+
+import pytest
+
+import generate_final_report as report
+from conftest import SESSION_ID
+from report_watch import PollingWatcher, ReportWatcher
+
+REPORT_KEYS = ('targets', 'attacks', 'vulnerabilities', 'files_analyzed', 'captures')
+MAC_NAME = '00_1A_7D_00_00_09'
+
+
+def new_generator(results, tmp_path):
+    return report.BlueSecAuditReportGenerator(SESSION_ID, str(results), str(tmp_path / 'logs'))
+
+
+def rows(data):
+    return {key: list(data[key]) for key in REPORT_KEYS}
+
+
+def unordered(data):
+    """report_data sem depender da ordem dos itens (nem das origens de cada achado)"""
+    result = {}
+    for key, items in rows(data).items():
+        items = [dict(item, sources=sorted(item['sources'])) if isinstance(item, dict) and 'sources' in item
+                 else item for item in items]
+        result[key] = sorted(json.dumps(item, sort_keys=True) for item in items)
+    return result
+
+
+def full_merge(watcher, results, tmp_path):
+    """report_data refeito do zero a partir de todos os fragmentos, na ordem do watcher"""
+    generator = new_generator(results, tmp_path)
+    for key in watcher.merged:
+        generator._merge_fragment(watcher.fragments[key])
+    return generator.report_data
+
+
+def assert_consistent(watcher, results, tmp_path):
+    data = watcher.generator.report_data
+    expected = full_merge(watcher, results, tmp_path)
+    assert rows(data) == rows(expected)
+    for key in ('attacks', 'vulnerabilities'):
+        for counter in ('severity_counts', 'target_counts', 'type_counts'):
+            assert getattr(data[key], counter) == getattr(expected[key], counter)
+    assert data['vulnerabilities'].occurrences == expected['vulnerabilities'].occurrences
+    # Mesmo conteúdo de uma coleta completa da sessão em disco
+    fresh = new_generator(results, tmp_path)
+    fresh.collect_session_data()
+    assert unordered(data) == unordered(fresh.report_data)
+    assert watcher.totals['attacks'] == len(fresh.report_data['attacks'])
+    assert watcher.totals['vulnerabilities'] == len(fresh.report_data['vulnerabilities'])
+
+
+def sync(watcher):
+    """Processa as alterações em disco como o laço do run() e regrava os relatórios"""
+    watcher._rescan()
+    watcher.flush()
+
+
+@pytest.fixture
+def watcher(make_session, tmp_path):
+    results = make_session(targets=3, files=5, captures=1)
+    watcher = ReportWatcher(new_generator(results, tmp_path), tmp_path / 'report.html',
+                            tmp_path / 'report.json', force_polling=True)
+    sync(watcher)
+    yield watcher
+    watcher.backend.close()
+
+
+def test_initial_scan_matches_collection(watcher, tmp_path):
+    assert_consistent(watcher, watcher.results_dir, tmp_path)
+    document = json.loads((tmp_path / 'report.json').read_text())
+    assert len(document['data']['attacks']) == watcher.totals['attacks']
+    assert (tmp_path / 'report.html').exists()
+
+
+def test_growing_new_and_removed_files(watcher, tmp_path):
+    results = watcher.results_dir
+    sdp = sorted(results.glob('sdp_enum_*'))[0]
+    pin = sorted(results.glob('pin_bruteforce_*'))[1]
+
+    # Arquivo crescendo: só a parte nova é lida
+    with open(sdp, 'a') as f:
+        f.write("Service Name: Serial Port\nService Name: OBEX Object Push\n")
+    sync(watcher)
+    assert_consistent(watcher, results, tmp_path)
+
+    # Novo target e resultado de PIN alterado (o fragmento é refeito na mesma posição)
+    (results / f'pin_bruteforce_{MAC_NAME}_{SESSION_ID}.txt').write_text(
+        f"Target: 00:1A:7D:00:00:09\nTimestamp: 2024-01-01T10:00:00Z\nStatus: SUCCESS - PIN FOUND\n")
+    pin.write_text(pin.read_text() + "Status: SUCCESS - PIN FOUND\n")
+    sync(watcher)
+    assert_consistent(watcher, results, tmp_path)
+
+    sdp.unlink()
+    sync(watcher)
+    assert_consistent(watcher, results, tmp_path)
+    assert str(sdp) not in {attack['file'] for attack in watcher.generator.report_data['attacks']}
+
+
+def test_audit_directory_changes(watcher, tmp_path):
+    results = watcher.results_dir
+    audit = sorted(results.glob('full_audit_*'))[0]
+    (audit / 'sdp_enumeration.txt').write_text("Service Name: Serial Port\n")
+    sync(watcher)
+    assert_consistent(watcher, results, tmp_path)
+
+    for path in audit.iterdir():
+        path.unlink()
+    audit.rmdir()
+    sync(watcher)
+    assert_consistent(watcher, results, tmp_path)
+
+
+def test_only_changed_fragments_are_merged(watcher, tmp_path, monkeypatch):
+    merged = []
+    original = watcher.generator._merge_fragment
+    monkeypatch.setattr(watcher.generator, '_merge_fragment',
+                        lambda fragment: (merged.append(fragment), original(fragment)))
+
+    last = watcher.merged[-1]
+    with open(last, 'a') as f:
+        f.write("Timestamp: 2024-01-01T10:00:00Z\n")
+    sync(watcher)
+    assert merged == [watcher.fragments[last]]
+
+    merged.clear()
+    sync(watcher)
+    assert merged == []
+
+
+def test_reports_match_full_render(watcher, tmp_path, fixed_now):
+    results = watcher.results_dir
+    sdp = sorted(results.glob('sdp_enum_*'))[0]
+    with open(sdp, 'a') as f:
+        f.write("Service Name: Serial Port\n")
+    (results / f'pin_bruteforce_{MAC_NAME}_{SESSION_ID}.txt').write_text(
+        f"Target: 00:1A:7D:00:00:09\nTimestamp: 2024-01-01T10:00:00Z\nStatus: SUCCESS - PIN FOUND\n")
+    sync(watcher)
+
+    # Mesmo relatório do gerador renderizando o report_data inteiro
+    generator = new_generator(results, tmp_path)
+    generator.report_data = full_merge(watcher, results, tmp_path)
+    generator.report_data['timestamp'] = watcher.generator.report_data['timestamp']
+    generator.generate_html_report(tmp_path / 'full.html')
+    generator.generate_json_report(tmp_path / 'full.json')
+    assert (tmp_path / 'report.html').read_bytes() == (tmp_path / 'full.html').read_bytes()
+    assert (tmp_path / 'report.json').read_bytes() == (tmp_path / 'full.json').read_bytes()
+
+
+def test_only_changed_fragments_are_rendered(watcher, monkeypatch):
+    rendered = []
+    original = watcher.generator.render_html_attack
+    monkeypatch.setattr(watcher.generator, 'render_html_attack',
+                        lambda attack: (rendered.append(attack), original(attack))[1])
+    encoded = []
+    original_encode = watcher._encode_json
+    monkeypatch.setattr(watcher, '_encode_json',
+                        lambda fragment: (encoded.append(fragment), original_encode(fragment))[1])
+
+    last = watcher.merged[-1]
+    with open(last, 'a') as f:
+        f.write("Timestamp: 2024-01-01T10:00:00Z\n")
+    sync(watcher)
+    fragment = watcher.fragments[last]
+    assert rendered == fragment['attacks']
+    assert encoded == [fragment]
+
+    rendered.clear()
+    encoded.clear()
+    sync(watcher)
+    assert rendered == [] and encoded == []
+
+
+def test_ndjson_output(make_session, tmp_path):
+    results = make_session(targets=2, files=4)
+    watcher = ReportWatcher(new_generator(results, tmp_path), tmp_path / 'report.html',
+                            tmp_path / 'report.ndjson', 'ndjson', force_polling=True)
+    sync(watcher)
+    sdp = sorted(results.glob('sdp_enum_*'))[0]
+    with open(sdp, 'a') as f:
+        f.write("Service Name: Serial Port\n")
+    sync(watcher)
+    watcher.backend.close()
+
+    records = [json.loads(line) for line in (tmp_path / 'report.ndjson').read_text().splitlines()]
+    attacks = [r for r in records if r['record_type'] == 'attack']
+    assert len(attacks) == len(watcher.generator.report_data['attacks'])
+    assert sum(r['services_found'] for r in attacks if r['file'] == str(sdp)) == \
+        sdp.read_text().count('Service Name:')
+
+
+def test_finding_index_rollback():
+    index = report.FindingIndex([{'type': 'A', 'target': 'x', 'severity': 'High',
+                                  'first_seen': '2024-01-02T00:00:00Z', 'last_seen': '2024-01-02T00:00:00Z',
+                                  'sources': ['a.txt']}])
+    before = (list(index), index.occurrences, dict(index.severity_counts), dict(index.target_counts))
+    mark = index.checkpoint()
+    index.extend([
+        {'type': 'A', 'target': 'x', 'severity': 'High', 'first_seen': '2024-01-01T00:00:00Z',
+         'last_seen': '2024-01-03T00:00:00Z', 'sources': ['b.txt']},
+        {'type': 'B', 'target': 'y', 'severity': 'Low', 'sources': ['c.txt']},
+    ])
+    assert index[0]['occurrences'] == 2 and len(index) == 2
+
+    index.rollback(mark)
+    assert (list(index), index.occurrences, dict(index.severity_counts), dict(index.target_counts)) == before
+
+
+def test_finding_store_rollback():
+    store = report.FindingStore([{'type': 'A', 'target': 'AA:BB:CC:DD:EE:FF', 'success': True}])
+    store.start_run()
+    mark = store.checkpoint()
+    store.start_run()
+    store.extend([{'type': 'B', 'target': 'x', 'count': 3}, {'type': 'A', 'severity': 'High'}])
+
+    store.rollback(mark)
+    assert list(store) == [{'type': 'A', 'target': 'AA:BB:CC:DD:EE:FF', 'success': True}]
+    assert (store.type_counts, store.target_counts, store.severity_counts) == (
+        {'A': 1}, {'AA:BB:CC:DD:EE:FF': 1}, {})
+    store.append({'type': 'C', 'target': 'y'})
+    assert store[1] == {'type': 'C', 'target': 'y'}
+
+
+def test_polling_watcher(tmp_path):
+    backend = PollingWatcher(interval=0)
+    backend.add(tmp_path, SESSION_ID)
+    created = tmp_path / f'sdp_enum_{SESSION_ID}.txt'
+    created.write_text('x')
+    (tmp_path / 'other.txt').write_text('x')
+    assert backend.read(0) == {created}
+    assert backend.read(0) == set()
+
+    created.write_text('xy')
+    assert backend.read(0) == {created}
+    created.unlink()
+    assert backend.read(0) == {created}
@@ -69,6 +69,39 @@ EOF
     assert_output --partial "0x111f"
 }
 
+@test "sdp_enumeration: deve executar as buscas em paralelo com tool_collector.py" {
+    # Cada cópia do mock se registra em running/ e anota quantas rodam juntas
+    mkdir -p "$TEST_TEMP_DIR/running"
+    cat > tests/mocks/sdptool << EOF
+#!/bin/bash
+mkdir "$TEST_TEMP_DIR/running/\$\$"
+ls "$TEST_TEMP_DIR/running" | wc -l >> "$TEST_TEMP_DIR/concurrent"
+sleep 0.5
+rmdir "$TEST_TEMP_DIR/running/\$\$"
+if [[ "\$1" == "browse" ]]; then
+    echo "Service Name: Audio Gateway"
+    echo "Protocol Descriptor List:"
+else
+    echo "Service Name: \$4"
+fi
+EOF
+    chmod +x tests/mocks/sdptool
+    local output_file="$TEST_TEMP_DIR/sdp_enum_00_11_22_33_44_55.txt"
+
+    run sdp_enumeration "00:11:22:33:44:55" "$output_file"
+
+    assert_success
+    assert_output --partial "Verificando PANU... OK"
+    assert_file_exist "$output_file"
+    run grep -c "Service Name:" "$output_file"
+    assert_output "17"
+    run grep -q "=== Informações do Dispositivo ===" "$output_file"
+    assert_success
+    # 17 consultas, no máximo 4 ao mesmo tempo (--concurrency padrão de tool_collector.py)
+    run sort -n "$TEST_TEMP_DIR/concurrent"
+    assert_line --index 16 "4"
+}
+
 @test "vulnerability_scanner: deve identificar vulnerabilidades conhecidas" {
     # Mock para resultado com vulnerabilidade
     local vuln_result=$(cat << 'EOF'
@@ -129,6 +129,44 @@ Security: Low"
     [[ "$output" == *"monitoring"* ]]
 }
 
+# Teste 11b: Análise da captura em uma passagem com índice lateral por tempo
+@test "monitor_ble_traffic should index the capture in a single pass" {
+    mkdir -p "$TEST_BLE_DIR/bin"
+    # hcidump -w grava 20 registros btsnoop H4: LE Advertising Report e LE Create Connection
+    cat > "$TEST_BLE_DIR/bin/hcidump" << 'EOF'
+#!/bin/bash
+while [[ $# -gt 0 ]]; do
+    [[ "$1" == "-w" ]] && output="$2"
+    shift
+done
+[[ -n "$output" ]] || { echo "hcidump -r should not be needed" >&2; exit 1; }
+python3 - "$output" << 'PY'
+import sys, struct
+with open(sys.argv[1], 'wb') as f:
+    f.write(b'btsnoop\0' + struct.pack('>II', 1, 1002))
+    for i in range(20):
+        packet = bytes([4, 0x3E, 3, 0x02, 1]) if i % 4 else bytes([1, 0x0D, 0x20, 0])
+        f.write(struct.pack('>IIIIq', len(packet), len(packet), 0, 0,
+                            0x00dcddb30f2f8000 + 1700000000000000 + i * 500000) + packet)
+PY
+EOF
+    chmod +x "$TEST_BLE_DIR/bin/hcidump"
+    
+    PATH="$TEST_BLE_DIR/bin:$PATH" run monitor_ble_traffic "$TEST_BLE_TARGET" "1" "$TEST_BLE_DIR/capture.log"
+    [ "$status" -eq 0 ]
+    [[ "$output" == *"Packets captured: 20"* ]]
+    [[ "$output" == *"Advertising packets detected"* ]]
+    [[ "$output" == *"Connection requests detected"* ]]
+    [ -f "$TEST_BLE_DIR/capture.log.idx" ]
+    
+    # Período consultado pelo índice, sem reler a captura
+    run python3 "$REPORT_GENERATOR" --capture-range "$TEST_BLE_DIR/capture.log" \
+        --range-start 1700000000 --window 4
+    [ "$status" -eq 0 ]
+    [[ "$output" == *"Pacotes: 8"* ]]
+    [[ "$output" == *"Pedidos de conexão LE: 2"* ]]
+}
+
 # Teste 12: Detectar beacons BLE
 @test "detect_ble_beacons should find iBeacon/Eddystone" {
     local beacon_data="iBeacon: UUID=550e8400-e29b-41d4-a716-446655440000
@@ -153,6 +153,24 @@ EOF
     assert_output --partial "3 sent, 3 received, 0% loss"
 }
 
+@test "device_reconnaissance_serial: deve extrair a latência do campo time do l2ping" {
+    # Mock no formato do l2ping do BlueZ (mesma linha de tests/mocks/l2ping)
+    cat > tests/mocks/l2ping << 'EOF'
+#!/bin/bash
+echo "Ping: ${@: -1} from 00:1A:7D:DA:71:13 (data size 44) ..."
+echo "44 bytes from ${@: -1} id 0 time 18.59ms"
+echo "1 sent, 1 received, 0% loss"
+EOF
+    chmod +x tests/mocks/l2ping
+    local output_file="$TEST_TEMP_DIR/recon.txt"
+    
+    run device_reconnaissance_serial "00:11:22:33:44:55" "$output_file"
+    assert_success
+    assert_output --partial "📶 Latência: 18.59ms"
+    run grep -c "Latência: 18.59ms" "$output_file"
+    assert_output "1"
+}
+
 @test "is_device_reachable: deve verificar se dispositivo está alcançável" {
     # Mock para l2ping com sucesso
     cat > tests/mocks/l2ping << 'EOF'
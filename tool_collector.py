@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+BlueSecAudit v2.0 - Tool Output Collector
+Coleta concorrente (asyncio) da saída das ferramentas de reconhecimento
+
+Substitui os laços seriais de sdp_enumeration (lib/attacks.sh) e da coleta
+de device_reconnaissance (lib/bluetooth.sh). Os comandos (sdptool, hcitool,
+l2ping) rodam em paralelo, limitados por --concurrency e com timeout por
+comando, e cada linha de saída é entregue, assim que produzida, ao mesmo
+leitor de assinaturas usado pelo gerador de relatórios. O arquivo de
+resultado mantém as seções na ordem de sempre e, com --cache, o fragmento
+já analisado é gravado no cache de parsing: o gerador não relê o arquivo.
+"""
+
+import os
+import sys
+import time
+import signal
+import socket
+import shutil
+import asyncio
+import getpass
+import argparse
+from pathlib import Path
+
+import generate_final_report as report
+
+# Serviços consultados individualmente (sdptool search), como em sdp_enumeration
+SDP_SERVICES = ("AudioSource", "AudioSink", "A2DP", "AVRCP", "HID", "HFP", "HSP", "OPP",
+                "FTP", "BIP", "BPP", "DUN", "FAX", "LAP", "NAP", "PANU")
+
+# Maior linha aceita da saída de uma ferramenta (mesmo limite do parser)
+LINE_LIMIT = report.StreamingResultParser.MAX_PENDING
+
+class ToolCollector:
+    """Executa comandos em paralelo, no máximo `concurrency` ao mesmo tempo
+
+    Cada comando é (argv, timeout, stderr): com stderr verdadeiro a saída de
+    erro segue junto com a padrão (como 2>&1), senão é descartada. As linhas
+    são repassadas ao sink assim que chegam e também guardadas por comando,
+    para que o arquivo seja montado na ordem do plano. Um comando que estoura
+    o timeout é encerrado (com seus processos filhos) e a saída parcial é
+    mantida.
+    """
+
+    def __init__(self, concurrency=4, sink=None):
+        self.concurrency = max(1, concurrency)
+        self.sink = sink
+
+    def run(self, commands):
+        """Executa os comandos e retorna [(sucesso, linhas)] na ordem recebida"""
+        return asyncio.run(self._run_all(commands))
+
+    async def _run_all(self, commands):
+        semaphore = asyncio.Semaphore(self.concurrency)
+        return await asyncio.gather(*(self._run(semaphore, *command) for command in commands))
+
+    async def _run(self, semaphore, argv, timeout, stderr=True):
+        lines = []
+        async with semaphore:
+            try:
+                proc = await asyncio.create_subprocess_exec(
+                    *argv,
+                    stdin=asyncio.subprocess.DEVNULL,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.STDOUT if stderr else asyncio.subprocess.DEVNULL,
+                    limit=LINE_LIMIT,
+                    start_new_session=True
+                )
+            except OSError:
+                return False, lines
+
+            try:
+                await asyncio.wait_for(self._pump(proc, lines), timeout)
+            except (asyncio.TimeoutError, ValueError):
+                # Timeout ou linha acima do limite: encerrar o grupo de processos
+                # (processos filhos manteriam a saída aberta)
+                try:
+                    os.killpg(proc.pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+                await proc.wait()
+                return False, lines
+        return proc.returncode == 0, lines
+
+    async def _pump(self, proc, lines):
+        """Repassa a saída do processo linha a linha até ele terminar"""
+        async for raw in proc.stdout:
+            self._emit(lines, raw.decode('utf-8', errors='replace'))
+        await proc.wait()
+
+    def _emit(self, lines, line):
+        if not line.endswith('\n'):
+            line += '\n'
+        lines.append(line)
+        if self.sink:
+            self.sink(line)
+
+class ResultFile:
+    """Conteúdo de um arquivo de resultado montado a partir das saídas das ferramentas
+
+    Linhas próprias do arquivo (cabeçalho, títulos de seção, mensagens de
+    falha) também passam pelo leitor do gerador, de modo que ele recebe
+    exatamente o que é gravado, apenas em outra ordem. As assinaturas são
+    contagens, e o MAC e o Timestamp vêm do cabeçalho, entregue primeiro.
+    """
+
+    def __init__(self, path, rules):
+        self.path = Path(path)
+        match = report.SESSION_ID_PATTERN.search(self.path.name)
+        self.generator = report.BlueSecAuditReportGenerator(
+            session_id=match.group(0) if match else '', rules=rules)
+        self.processor, self.reader = self.generator.open_stream_reader(self.path)
+        self.lines = []
+
+    def feed(self, line):
+        """Entrega ao leitor uma linha de saída de ferramenta"""
+        if self.reader is not None:
+            self.reader.feed(line)
+
+    def write(self, *lines):
+        """Acrescenta linhas próprias do arquivo"""
+        for line in lines:
+            self.lines.append(line)
+            self.feed(line)
+
+    def extend(self, lines):
+        """Acrescenta a saída (já entregue ao leitor) de um comando"""
+        self.lines.extend(lines)
+
+    def save(self, cache=None):
+        """Grava o arquivo (substituição atômica) e o fragmento já analisado no cache"""
+        tmp_file = self.path.with_name(self.path.name + '.tmp')
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            f.writelines(self.lines)
+        tmp_file.replace(self.path)
+        if cache is not None:
+            cache.store('file', self.path, self.generator.stream_fragment(
+                self.path, self.processor, self.reader))
+
+def shell_timestamp():
+    """Timestamp no formato de $(date) no locale C"""
+    return time.strftime('%a %b %d %H:%M:%S %Z %Y')
+
+def collect_sdp(args, result, collector):
+    """Enumeração SDP: browse, buscas por serviço e informações do dispositivo"""
+    target = args.target
+    result.write(f"=== SDP Service Discovery para {target} ===\n",
+                 f"Timestamp: {shell_timestamp()}\n", "\n")
+
+    commands = [(['sdptool', 'browse', target], args.timeout)]
+    commands += [(['sdptool', 'search', '--bdaddr', target, service], args.query_timeout)
+                 for service in SDP_SERVICES]
+    has_hcitool = shutil.which('hcitool') is not None
+    if has_hcitool:
+        commands += [(['hcitool', 'name', target], args.query_timeout),
+                     (['hcitool', 'info', target], args.query_timeout)]
+
+    print(f"Executando sdptool browse {target} e {len(commands) - 1} consultas "
+          f"({collector.concurrency} em paralelo)...")
+    results = collector.run(commands)
+
+    browse_ok, browse_lines = results[0]
+    result.extend(browse_lines)
+    if not browse_ok:
+        # Sem a enumeração básica o arquivo fica só com ela, como no laço serial
+        print("Falha na enumeração SDP básica")
+        return False
+    print("Enumeração SDP básica concluída")
+
+    result.write("\n", "=== Busca de Serviços Específicos ===\n")
+    for service, (ok, lines) in zip(SDP_SERVICES, results[1:]):
+        result.extend(lines)
+        print(f"Verificando {service}... {'OK' if ok else 'N/A'}")
+
+    result.write("\n", "=== Informações do Dispositivo ===\n")
+    if has_hcitool:
+        (name_ok, name_lines), (info_ok, info_lines) = results[-2:]
+        result.write("--- Nome do dispositivo ---\n")
+        result.extend(name_lines)
+        if not name_ok:
+            result.write("Nome não disponível\n")
+        result.write("--- Informações de classe ---\n")
+        result.extend(info_lines)
+        if not info_ok:
+            result.write("Informações não disponíveis\n")
+    return True
+
+def collect_recon(args, result, collector):
+    """Etapas 1-3 de device_reconnaissance: conectividade, informações e serviços"""
+    target = args.target
+    result.write("=== RECONNAISSANCE REPORT ===\n", f"Target: {target}\n",
+                 f"Timestamp: {shell_timestamp()}\n",
+                 f"Analyst: {getpass.getuser()}@{socket.gethostname()}\n", "\n")
+
+    has_hcitool = shutil.which('hcitool') is not None
+    commands = [(['l2ping', '-c', '5', '-t', '5', target], args.timeout, False),
+                (['hcitool', 'name', target], args.query_timeout, False),
+                (['sdptool', 'browse', target], args.timeout)]
+    if has_hcitool:
+        commands.append((['hcitool', 'info', target], args.query_timeout, False))
+    results = collector.run(commands)
+
+    def tee(*lines):
+        for line in lines:
+            print(line, end='')
+        result.write(*lines)
+
+    (ping_ok, ping_lines), (name_ok, name_lines), (browse_ok, browse_lines) = results[:3]
+    tee("1. Testando conectividade...\n")
+    if ping_ok:
+        tee("✅ Dispositivo responde a L2CAP ping\n")
+        latency = [line.split(' time ', 1)[1].split()[0] for line in ping_lines if ' time ' in line]
+        tee(f"📶 Latência: {latency[-1] if latency else 'N/A'}\n")
+    else:
+        tee("❌ Dispositivo não responde a L2CAP ping\n")
+    result.write("\n")
+
+    tee("2. Coletando informações básicas...\n")
+    name = ''.join(name_lines).strip() if name_ok else 'Unknown'
+    tee(f"📱 Nome: {name}\n")
+    if has_hcitool and ''.join(results[3][1]).strip():
+        tee("📋 Informações de classe:\n", *results[3][1])
+    result.write("\n")
+
+    tee("3. Enumerando serviços...\n")
+    result.extend(browse_lines)
+    if browse_ok:
+        services = sum(line.count("Service Name:") for line in result.lines)
+        tee(f"✅ Enumeração SDP concluída: {services} serviços\n")
+    else:
+        tee("❌ Falha na enumeração SDP\n")
+    result.write("\n")
+    return True
+
+PLANS = {'sdp': collect_sdp, 'recon': collect_recon}
+
+def main():
+    parser = argparse.ArgumentParser(description='BlueSecAudit v2.0 - Tool Output Collector')
+    parser.add_argument('plan', choices=tuple(PLANS),
+                        help='sdp: SDP enumeration (sdp_enumeration); '
+                             'recon: connectivity, device info and services (device_reconnaissance)')
+    parser.add_argument('--target', required=True, help='Target MAC address')
+    parser.add_argument('--output', required=True, help='Result file to write')
+    parser.add_argument('--concurrency', type=int, default=4,
+                        help='Maximum number of tool processes running at once (default: 4)')
+    parser.add_argument('--timeout', type=float, default=30,
+                        help='Timeout in seconds for sdptool browse and l2ping (default: 30)')
+    parser.add_argument('--query-timeout', type=float, default=10,
+                        help='Timeout in seconds for each sdptool search/hcitool query (default: 10)')
+    parser.add_argument('--cache', action='store_true',
+                        help='Store the parsed result in the report parse cache (logs dir)')
+    parser.add_argument('--logs-dir', default='logs', help='Logs directory (parse cache location)')
+    parser.add_argument('--rules', metavar='FILE',
+                        help='Detection rules file (default: config/detection-rules.conf)')
+
+    args = parser.parse_args()
+
+    if args.concurrency < 1:
+        parser.error('--concurrency must be >= 1')
+    if args.timeout <= 0 or args.query_timeout <= 0:
+        parser.error('--timeout and --query-timeout must be > 0')
+
+    try:
+        rules = report.DetectionRules.load(args.rules)
+        result = ResultFile(args.output, rules)
+        ok = PLANS[args.plan](args, result, ToolCollector(args.concurrency, result.feed))
+
+        # Falhas podem ser transitórias: o resultado parcial não vai para o cache
+        cache = None
+        if args.cache and ok:
+            from report_cache import ParseCache
+            cache = ParseCache(Path(args.logs_dir) / 'report_cache.db', namespace=rules.digest)
+        try:
+            result.save(cache)
+        finally:
+            if cache:
+                cache.close()
+    except Exception as e:
+        print(f"❌ Erro na coleta ({args.plan}): {e}")
+        sys.exit(1)
+
+    if not ok:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()